@@ -28,7 +28,6 @@ Default schedule: Daily 9:00 AM AEST  (see agents/scheduler.py)
 """
 
 import os
-import smtplib
 import sys
 from datetime import datetime, timedelta, timezone
 from email.mime.multipart import MIMEMultipart
@@ -38,6 +37,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base import BaseAgent, GMAIL_USER, GMAIL_PASS, JAMES_EMAIL
+from agents import outbox as _outbox
 from dashboard import db
 
 # ── Default KPI targets — AU professional services benchmarks ─────────────────
@@ -230,10 +230,8 @@ class AdsAgent(BaseAgent):
             msg["From"]    = GMAIL_USER
             msg["To"]      = to
             msg.attach(MIMEText(body, "plain"))
-            with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-                server.login(GMAIL_USER, GMAIL_PASS)
-                server.sendmail(GMAIL_USER, to, msg.as_string())
-            self.log_info(f"Report sent to {to}: {subject}")
+            _outbox.enqueue(msg, to, from_addr=GMAIL_USER, agent_id=self.agent_id)
+            self.log_info(f"Report queued for {to}: {subject}")
         except Exception as exc:
             self.log_warn(f"Report email failed: {exc}")
 
@@ -15,6 +15,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base import BaseAgent
+from agents import ratelimit as _ratelimit
 from dashboard import db
 
 QUALITY_THRESHOLD = 6  # score below this triggers a warning email
@@ -66,6 +67,7 @@ class AnalystAgent(BaseAgent):
             )
 
             try:
+                _ratelimit.acquire("api.anthropic.com")
                 response = client.messages.create(
                     model="claude-opus-4-6",
                     max_tokens=100,
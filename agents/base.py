@@ -7,8 +7,9 @@ Every agent gets:
   - update_progress(id, pct)    → 0-100
   - complete_task(id, preview)
   - fail_task(id, reason)
-  - send_email(subject, body)   → Gmail SMTP from .env creds
+  - send_email(subject, body)   → queued on the SMTP outbox (Gmail creds from .env)
   - run()                       → override in subclass
+  - self.ctx / run_mode()       → per-run RunContext (mode, trigger, run_id, deadline)
 
 Usage:
     class MyAgent(BaseAgent):
@@ -21,13 +22,13 @@ Usage:
 from __future__ import annotations
 
 import os
-import smtplib
 import sys
 import traceback
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from pathlib import Path
+from typing import Optional
 
 # Ensure project root is on path so we can import dashboard.db
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -36,6 +37,9 @@ from dotenv import load_dotenv
 load_dotenv(Path(__file__).parent.parent / "builder" / ".env")
 
 from dashboard import db
+from agents.context import RunContext, current as _current_ctx, use as _use_ctx
+from agents import profiler as _profiler
+from agents import outbox as _outbox
 
 # SSE broadcast queue — dashboard/app.py injects this at startup
 _sse_queue = None
@@ -57,32 +61,60 @@ class BaseAgent:
 
     # ── Lifecycle ────────────────────────────────────────────────────────────
 
-    def execute(self):
-        """Called by scheduler. Wraps run() with status + error handling."""
-        db.agent_set_status(self.agent_id, "running")
-        self.log("info", f"{self.name} started")
-        try:
-            self.run()
-            db.agent_set_status(self.agent_id, "idle")
-            self.log("info", f"{self.name} finished")
-        except Exception as exc:
-            db.agent_set_status(self.agent_id, "error")
-            db.agent_increment_error(self.agent_id)
-            msg = f"{self.name} crashed: {exc}"
-            self.log("error", msg)
-            self.send_email(
-                subject=f"[IYS Agent ERROR] {self.name}",
-                body=f"{msg}\n\n{traceback.format_exc()}",
-            )
+    def execute(self, ctx: Optional[RunContext] = None) -> bool:
+        """Called by scheduler. Wraps run() with status + error handling.
+
+        ctx carries the run mode / trigger / correlation id for this run only —
+        it is installed in a ContextVar, so concurrent runs never see each other's.
+        Returns True if run() completed, False if it raised.
+        """
+        ctx = ctx or RunContext()
+        with _use_ctx(ctx):
+            db.agent_set_status(self.agent_id, "running")
+            started = f"{self.name} started" + (f" [{ctx.mode}]" if ctx.mode else "")
+            self.log("info", f"{started} via {ctx.trigger}")
+            try:
+                if ctx.profile or _profiler.take(self.agent_id):
+                    _profiler.profile_call(self.agent_id, ctx, self.run)
+                else:
+                    self.run()
+                db.agent_set_status(self.agent_id, "idle")
+                self.log("info", f"{self.name} finished")
+                return True
+            except Exception as exc:
+                db.agent_set_status(self.agent_id, "error")
+                db.agent_increment_error(self.agent_id)
+                msg = f"{self.name} crashed: {exc}"
+                self.log("error", msg)
+                self.send_email(
+                    subject=f"[IYS Agent ERROR] {self.name}",
+                    body=f"{msg}\n\nRun: {ctx.run_id}\n\n{traceback.format_exc()}",
+                )
+                return False
 
     def run(self):
         raise NotImplementedError
 
+    # ── Run context ──────────────────────────────────────────────────────────
+
+    @property
+    def ctx(self) -> RunContext:
+        """The RunContext of the run executing on this thread."""
+        return _current_ctx() or RunContext()
+
+    def run_mode(self, default: str = "") -> str:
+        """Mode for this run. RUN_MODE env is still honoured for CLI diagnostics."""
+        ctx = _current_ctx()
+        if ctx and ctx.mode:
+            return ctx.mode
+        return os.environ.get("RUN_MODE", default)
+
     # ── Logging ──────────────────────────────────────────────────────────────
 
     def log(self, level: str, message: str):
         """Write event to DB and push to SSE stream."""
-        event = db.event_log(self.agent_id, level, message)
+        ctx = _current_ctx()
+        event = db.event_log(self.agent_id, level, message, run_id=ctx.run_id if ctx else None)
         if _sse_queue:
             try:
                 _sse_queue.put_nowait({"type": "event", "data": event})
@@ -101,7 +133,10 @@ class BaseAgent:
     # ── Tasks ────────────────────────────────────────────────────────────────
 
     def create_task(self, task_type: str, title: str) -> int:
-        task_id = db.task_create(self.agent_id, task_type, title)
+        ctx = _current_ctx()
+        task_id = db.task_create(self.agent_id, task_type, title, run_id=ctx.run_id if ctx else None)
+        if ctx:
+            ctx.task_ids.append(task_id)
         if _sse_queue:
             try:
                 _sse_queue.put_nowait({"type": "task_created", "data": {
@@ -111,6 +146,7 @@ class BaseAgent:
                     "type": task_type,
                     "status": "running",
                     "progress": 0,
+                    "run_id": ctx.run_id if ctx else None,
                     "created_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
                 }})
             except Exception:
@@ -205,7 +241,7 @@ class BaseAgent:
     # ── Email ────────────────────────────────────────────────────────────────
 
     def send_email(self, subject: str, body: str, html: Optional[str] = None):
-        """Send an email to James via Gmail SMTP."""
+        """Queue an email to James on the SMTP outbox (agents/outbox.py)."""
         if not GMAIL_USER or not GMAIL_PASS:
             self.log("warn", "Email skipped — GMAIL_USER / GMAIL_APP_PASS not set in .env")
             return
@@ -217,9 +253,7 @@ class BaseAgent:
             msg.attach(MIMEText(body, "plain"))
             if html:
                 msg.attach(MIMEText(html, "html"))
-            with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-                server.login(GMAIL_USER, GMAIL_PASS)
-                server.sendmail(GMAIL_USER, JAMES_EMAIL, msg.as_string())
-            self.log("info", f"Email sent: {subject}")
+            _outbox.enqueue(msg, JAMES_EMAIL, from_addr=GMAIL_USER, agent_id=self.agent_id)
+            self.log("info", f"Email queued: {subject}")
         except Exception as exc:
             self.log("warn", f"Email failed: {exc}")
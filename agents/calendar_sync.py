@@ -0,0 +1,365 @@
+"""
+agents/calendar_sync.py — Debounced, merging sync of social/leads_calendar.json.
+
+_write_calendar used to GET the file's SHA and PUT the whole base64 file to
+the GitHub contents API on every call, in the middle of the reply loop, and
+a stale SHA silently lost the write. Now:
+
+  - upsert() merges entries into the local file by "id" straight away, and
+    records their ids as pending
+  - a push is scheduled SYNC_DEBOUNCE seconds after the last change (at most
+    SYNC_MAX_DELAY after the first), so a burst of replies becomes one commit
+  - a push reads the remote file and its version (blob SHA / commit),
+    overlays the pending entries on it by id and writes it back against that
+    version. If someone else committed in between, it re-reads, re-merges and
+    retries. Remote-only entries are kept, and the merged file is written
+    back locally
+  - an id stays pending after a push if it was upserted again meanwhile —
+    its local entry no longer matches what was pushed — so the newer
+    version is kept locally and goes out with the next push
+  - failed pushes back off exponentially (SYNC_DEBOUNCE doubling, up to
+    SYNC_BACKOFF_MAX). If the remote refuses us outright (401/403/404 — a
+    revoked PAT, no access, no such repo) retries stop until the next upsert()
+  - pending ids survive a restart (dashboard/calendar_sync/state.json);
+    flush() runs at exit
+
+Backends:
+  GitHub contents API (default) — GITHUB_PAT, repo GITHUB_REPO
+  Any git remote — IYS_CALENDAR_GIT_REMOTE=/path/to/bare.git (or URL), branch
+  IYS_CALENDAR_GIT_BRANCH (default main). Uses a clone under
+  dashboard/calendar_sync/; this is how the sync is tested locally:
+      git init --bare /tmp/cal.git
+      IYS_CALENDAR_GIT_REMOTE=/tmp/cal.git python agents/calendar_sync.py --push
+
+Usage:
+    from agents import calendar_sync
+    calendar_sync.upsert([{"id": "reply_42_2026-03-01", "date": "2026-03-01", ...}])
+    calendar_sync.flush()     # optional — push now instead of after the debounce
+"""
+
+from __future__ import annotations
+
+import atexit
+import base64
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import httpclient as _http
+
+ROOT          = Path(__file__).parent.parent
+CALENDAR_PATH = "social/leads_calendar.json"          # same path locally and in the repo
+CALENDAR_FILE = ROOT / CALENDAR_PATH
+STATE_DIR     = ROOT / "dashboard" / "calendar_sync"
+GITHUB_REPO   = "anon8597299/smart-tech-innovations"
+GITHUB_API    = os.environ.get("IYS_GITHUB_API_BASE", "https://api.github.com")
+
+SYNC_DEBOUNCE  = float(os.environ.get("IYS_CALENDAR_SYNC_SECS", "30"))
+SYNC_MAX_DELAY = float(os.environ.get("IYS_CALENDAR_SYNC_MAX_SECS", "300"))
+SYNC_BACKOFF_MAX = 3600          # longest wait between retries of a failing push
+PUSH_ATTEMPTS  = 4
+COMMIT_MESSAGE = "Auto: sync leads calendar"
+
+
+class _Conflict(Exception):
+    """The remote moved since we read it — re-read, re-merge, retry."""
+
+
+class _Refused(Exception):
+    """Bad credentials, no access or no such repo — retrying won't help until something changes."""
+
+
+def _github_refused(exc: urllib.error.HTTPError) -> bool:
+    if exc.code == 403 and exc.headers.get("X-RateLimit-Remaining") == "0":
+        return False     # rate limited — transient
+    return exc.code in (401, 403, 404)
+
+
+_GIT_REFUSED = ("authentication failed", "permission denied", "could not read username",
+                "repository not found", "does not appear to be a git repository", "does not exist")
+
+
+def _dump(entries: list[dict]) -> str:
+    return json.dumps(entries, indent=2) + "\n"
+
+
+def merge(base: list[dict], changes: list[dict]) -> list[dict]:
+    """base with each change replacing the entry of the same id (or appended), order kept."""
+    by_id = {e.get("id"): e for e in changes}
+    out = [by_id.pop(e.get("id"), e) for e in base]
+    return out + [e for e in changes if e.get("id") in by_id]
+
+
+# ── Backends ─────────────────────────────────────────────────────────────────
+
+class _GitHubBackend:
+    name = "github"
+
+    def __init__(self, pat: str):
+        self.url = f"{GITHUB_API}/repos/{GITHUB_REPO}/contents/{CALENDAR_PATH}"
+        self.headers = {"Authorization": f"token {pat}", "Accept": "application/vnd.github.v3+json"}
+
+    def read(self) -> tuple[list[dict], Optional[str]]:
+        try:
+            with _http.urlopen(urllib.request.Request(self.url, headers=self.headers), timeout=10) as resp:
+                data = json.loads(resp.read())
+        except urllib.error.HTTPError as exc:
+            if exc.code == 404:
+                return [], None   # no file yet (a missing repo shows up on write)
+            if _github_refused(exc):
+                raise _Refused(f"GitHub {exc.code} reading {CALENDAR_PATH}")
+            raise
+        return json.loads(base64.b64decode(data.get("content", "")) or b"[]"), data.get("sha")
+
+    def write(self, entries: list[dict], version: Optional[str], message: str):
+        body = {"message": message, "content": base64.b64encode(_dump(entries).encode()).decode()}
+        if version:
+            body["sha"] = version
+        req = urllib.request.Request(
+            self.url, data=json.dumps(body).encode(), method="PUT",
+            headers={**self.headers, "Content-Type": "application/json"},
+        )
+        try:
+            _http.urlopen(req, timeout=15)
+        except urllib.error.HTTPError as exc:
+            if exc.code in (409, 422):   # sha doesn't match the file's current blob
+                raise _Conflict(str(exc))
+            if _github_refused(exc):
+                raise _Refused(f"GitHub {exc.code} writing {CALENDAR_PATH} to {GITHUB_REPO}")
+            raise
+
+
+class _GitBackend:
+    name = "git"
+
+    def __init__(self, remote: str, branch: str = "main"):
+        self.remote = remote
+        self.branch = branch
+        self.dir    = STATE_DIR / "repo"
+
+    def _git(self, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["git", "-C", str(self.dir), "-c", "user.name=IYS Leads Agent",
+             "-c", "user.email=hello@improveyoursite.com", *args],
+            capture_output=True, text=True, check=check, timeout=60,
+        )
+
+    def _refused(self, exc: subprocess.CalledProcessError):
+        err = (exc.stderr or "").strip()
+        if any(s in err.lower() for s in _GIT_REFUSED):
+            raise _Refused(f"git remote {self.remote}: {err}") from exc
+        raise exc
+
+    def read(self) -> tuple[list[dict], Optional[str]]:
+        try:
+            if not (self.dir / ".git").exists():
+                self.dir.parent.mkdir(parents=True, exist_ok=True)
+                subprocess.run(["git", "clone", "--quiet", self.remote, str(self.dir)],
+                               capture_output=True, text=True, check=True, timeout=120)
+            self._git("fetch", "--quiet", "origin")
+        except subprocess.CalledProcessError as exc:
+            self._refused(exc)
+        head = self._git("rev-parse", "--verify", "--quiet", f"origin/{self.branch}", check=False)
+        if head.returncode == 0:
+            self._git("checkout", "--quiet", "-B", self.branch, f"origin/{self.branch}")
+            self._git("reset", "--quiet", "--hard", f"origin/{self.branch}")
+        else:
+            self._git("checkout", "--quiet", "--orphan", self.branch, check=False)   # empty remote
+        path = self.dir / CALENDAR_PATH
+        entries = json.loads(path.read_text() or "[]") if path.exists() else []
+        return entries, head.stdout.strip() or None
+
+    def write(self, entries: list[dict], version: Optional[str], message: str):
+        path = self.dir / CALENDAR_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_dump(entries))
+        self._git("add", CALENDAR_PATH)
+        if self._git("diff", "--cached", "--quiet", check=False).returncode == 0:
+            return   # remote already has exactly this
+        self._git("commit", "--quiet", "-m", message)
+        push = self._git("push", "--quiet", "origin", f"HEAD:refs/heads/{self.branch}", check=False)
+        if push.returncode != 0:
+            if "rejected" in push.stderr or "fetch first" in push.stderr or "non-fast-forward" in push.stderr:
+                raise _Conflict(push.stderr.strip())
+            if any(s in push.stderr.lower() for s in _GIT_REFUSED):
+                raise _Refused(f"git remote {self.remote}: {push.stderr.strip()}")
+            raise RuntimeError(push.stderr.strip())
+
+
+def _backend():
+    remote = os.environ.get("IYS_CALENDAR_GIT_REMOTE", "")
+    if remote:
+        return _GitBackend(remote, os.environ.get("IYS_CALENDAR_GIT_BRANCH", "main"))
+    pat = os.environ.get("GITHUB_PAT", "")
+    return _GitHubBackend(pat) if pat else None
+
+
+# ── Sync ─────────────────────────────────────────────────────────────────────
+
+class _Sync:
+    def __init__(self):
+        self._lock        = threading.RLock()
+        self._push_lock   = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._first_dirty = 0.0
+        self._failures    = 0            # consecutive failed pushes → backoff
+        self._refused: Optional[str] = None   # set → no retries until the next upsert()
+        self._stats = {"upserts": 0, "pushes": 0, "conflicts": 0, "errors": 0, "last_error": None}
+
+    # ── Local file + pending ids ───────────────────────────────────────────
+
+    def read(self) -> list[dict]:
+        if CALENDAR_FILE.exists():
+            try:
+                return json.loads(CALENDAR_FILE.read_text())
+            except Exception:
+                pass
+        return []
+
+    def _write_local(self, entries: list[dict]):
+        CALENDAR_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CALENDAR_FILE.with_suffix(".json.tmp")
+        tmp.write_text(_dump(entries))
+        tmp.replace(CALENDAR_FILE)
+
+    def _pending(self) -> set[str]:
+        try:
+            return set(json.loads((STATE_DIR / "state.json").read_text()).get("pending", []))
+        except Exception:
+            return set()
+
+    def _set_pending(self, ids: set[str]):
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        (STATE_DIR / "state.json").write_text(json.dumps({"pending": sorted(ids)}))
+
+    # ── Public ─────────────────────────────────────────────────────────────
+
+    def upsert(self, entries: list[dict]):
+        entries = [e for e in entries if e.get("id")]
+        if not entries:
+            return
+        with self._lock:
+            self._write_local(merge(self.read(), entries))
+            self._set_pending(self._pending() | {e["id"] for e in entries})
+            self._stats["upserts"] += len(entries)
+            self._refused = None
+            self._schedule()
+
+    def _schedule(self):
+        now = time.time()
+        if not self._first_dirty:
+            self._first_dirty = now
+        delay = max(0.0, min(SYNC_DEBOUNCE, self._first_dirty + SYNC_MAX_DELAY - now))
+        if self._failures:
+            delay = max(delay, min(SYNC_BACKOFF_MAX, SYNC_DEBOUNCE * 2 ** self._failures))
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self) -> bool:
+        """Push pending entries now. True if nothing is left pending."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            self._first_dirty = 0.0
+        with self._push_lock:
+            return self._push()
+
+    def _push(self) -> bool:
+        with self._lock:
+            pending = self._pending()
+        if not pending:
+            return True
+        backend = _backend()
+        if backend is None:
+            return False      # no credentials — the local file is still current
+        try:
+            for _ in range(PUSH_ATTEMPTS):
+                remote, version = backend.read()
+                with self._lock:
+                    local   = self.read()
+                    changes = [e for e in local if e.get("id") in pending]
+                merged = merge(remote, changes)
+                try:
+                    backend.write(merged, version, f"{COMMIT_MESSAGE} ({len(changes)} entr{'y' if len(changes) == 1 else 'ies'})")
+                except _Conflict:
+                    self._stats["conflicts"] += 1
+                    continue
+                with self._lock:
+                    # Entries upserted while we were pushing — new ids, or pushed ids
+                    # whose local entry has changed since — stay pending for the next push
+                    pushed = {e.get("id"): e for e in changes}
+                    latest = {e.get("id"): e for e in self.read()}
+                    newer  = {i for i in self._pending()
+                              if i not in pending or latest.get(i) != pushed.get(i)}
+                    self._write_local(merge(merged, [latest[i] for i in newer if i in latest]))
+                    self._set_pending(newer)
+                    self._stats["pushes"] += 1
+                    self._failures = 0
+                    if newer:
+                        self._schedule()
+                return not newer
+            raise RuntimeError(f"gave up after {PUSH_ATTEMPTS} conflicting pushes")
+        except Exception as exc:
+            self._stats["errors"] += 1
+            self._stats["last_error"] = f"{type(exc).__name__}: {exc}"[:300]
+            with self._lock:
+                if isinstance(exc, _Refused):
+                    self._refused  = str(exc)[:300]   # wait for the next upsert()
+                    self._failures = 0
+                else:
+                    self._failures += 1
+                    self._schedule()   # try again after the backoff
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending()), "failures": self._failures,
+                    "refused": self._refused, "backend": getattr(_backend(), "name", None)}
+
+
+_sync = _Sync()
+
+
+def read() -> list[dict]:
+    """The local calendar (always current, pushed or not)."""
+    return _sync.read()
+
+
+def upsert(entries: list[dict]):
+    _sync.upsert(entries)
+
+
+def flush() -> bool:
+    return _sync.flush()
+
+
+def stats() -> dict:
+    return _sync.stats()
+
+
+def _flush_at_exit():
+    if _sync._pending():
+        _sync.flush()
+
+
+atexit.register(_flush_at_exit)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--push":
+        print("pushed" if flush() else f"not pushed: {stats()}")
+    else:
+        print(__doc__)
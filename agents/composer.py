@@ -0,0 +1,387 @@
+"""
+agents/composer.py — Shared LLM composition service for outreach emails.
+
+Every outreach, follow-up, win-back and re-engagement email used to build its
+own anthropic.Anthropic client and send the large leads system prompt
+uncached, one lead at a time. This module centralises that:
+
+  - one client per process, created lazily and reused (keep-alive connections)
+  - the system prompt is sent as a cache_control block, so every call after
+    the first reads it from the provider's prompt cache
+  - compose_batch() submits many prompts through the Message Batches API
+    (half price, no per-request rate limit) and collects the results. Small
+    batches, batch failures and batches that miss IYS_BATCH_TIMEOUT fall back
+    to direct calls for whatever didn't come back
+  - a "fake" backend (IYS_LLM_BACKEND=fake) returns deterministic text after
+    a simulated latency, with token/cost accounting, for offline benchmarks
+
+Usage:
+    from agents import composer
+
+    body  = composer.compose(prompt, system=_SYSTEM)
+    bodies = composer.compose_batch([
+        composer.Request("lead-12", prompt, system=_SYSTEM_FOLLOWUP_1),
+        ...
+    ])                       # → {"lead-12": "...", ...}
+    composer.stats()         # calls, tokens, cache hits, estimated cost
+
+Benchmark offline:
+    IYS_LLM_BACKEND=fake python agents/composer.py --bench 200
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import ratelimit as _ratelimit
+
+MODEL              = os.environ.get("IYS_COMPOSE_MODEL", "claude-opus-4-6")
+BACKEND            = os.environ.get("IYS_LLM_BACKEND", "anthropic")      # anthropic | fake
+BATCH_MIN          = int(os.environ.get("IYS_BATCH_MIN", "5"))          # fewer → direct calls
+BATCH_TIMEOUT      = float(os.environ.get("IYS_BATCH_TIMEOUT", "120"))  # seconds to wait inline for a batch
+BATCH_POLL         = 10.0
+DIRECT_WORKERS     = 4       # concurrency for fallback / small-batch direct calls
+FAKE_LATENCY       = float(os.environ.get("IYS_FAKE_LLM_LATENCY", "0.8"))  # seconds per fake call
+
+# USD per million tokens: input, output. Cache writes cost 1.25× input, cache
+# reads 0.1× input; batch requests are billed at half price.
+PRICING = {
+    "claude-opus-4-6": (5.00, 25.00),
+}
+_CACHE_WRITE_MULT = 1.25
+_CACHE_READ_MULT  = 0.10
+_BATCH_MULT       = 0.50
+
+_ID_RE = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+@dataclass
+class Request:
+    id: str
+    prompt: str
+    system: str = ""
+    max_tokens: int = 600
+
+
+# ── Accounting ───────────────────────────────────────────────────────────────
+
+_stats_lock = threading.Lock()
+_stats = {
+    "calls": 0, "batches": 0, "batch_requests": 0, "fallbacks": 0,
+    "input_tokens": 0, "output_tokens": 0,
+    "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0,
+    "cost_usd": 0.0, "secs": 0.0,
+}
+
+
+def _record(usage, secs: float = 0.0, batched: bool = False):
+    """Add one response's usage to the running totals."""
+    get = (lambda k: usage.get(k) or 0) if isinstance(usage, dict) else (lambda k: getattr(usage, k, 0) or 0)
+    inp, out = get("input_tokens"), get("output_tokens")
+    c_write, c_read = get("cache_creation_input_tokens"), get("cache_read_input_tokens")
+    in_price, out_price = PRICING.get(MODEL, PRICING["claude-opus-4-6"])
+    cost = (
+        inp * in_price + c_write * in_price * _CACHE_WRITE_MULT
+        + c_read * in_price * _CACHE_READ_MULT + out * out_price
+    ) / 1_000_000
+    if batched:
+        cost *= _BATCH_MULT
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["input_tokens"] += inp
+        _stats["output_tokens"] += out
+        _stats["cache_creation_input_tokens"] += c_write
+        _stats["cache_read_input_tokens"] += c_read
+        _stats["cost_usd"] += cost
+        _stats["secs"] += secs
+
+
+def stats() -> dict:
+    with _stats_lock:
+        out = dict(_stats)
+    out["cost_usd"] = round(out["cost_usd"], 4)
+    out["secs"] = round(out["secs"], 1)
+    cached = out["cache_read_input_tokens"]
+    total_in = out["input_tokens"] + out["cache_creation_input_tokens"] + cached
+    out["cache_hit_ratio"] = round(cached / total_in, 2) if total_in else 0.0
+    out["backend"] = BACKEND
+    return out
+
+
+def reset_stats():
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0.0 if isinstance(_stats[k], float) else 0
+
+
+# ── Backends ─────────────────────────────────────────────────────────────────
+
+def _params(req: Request) -> dict:
+    params = {
+        "model": MODEL,
+        "max_tokens": req.max_tokens,
+        "messages": [{"role": "user", "content": req.prompt}],
+    }
+    if req.system:
+        # Shared prefix across every lead — cached by the provider after the first call
+        params["system"] = [{"type": "text", "text": req.system, "cache_control": {"type": "ephemeral"}}]
+    return params
+
+
+class _AnthropicBackend:
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import anthropic
+                    self._client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+        return self._client
+
+    def create(self, req: Request) -> str:
+        _ratelimit.acquire("api.anthropic.com")
+        started = time.time()
+        resp = self.client.messages.create(**_params(req))
+        _record(resp.usage, time.time() - started)
+        return resp.content[0].text.strip()
+
+    def submit(self, reqs: list[Request]) -> str:
+        _ratelimit.acquire("api.anthropic.com")
+        batch = self.client.messages.batches.create(
+            requests=[{"custom_id": r.id, "params": _params(r)} for r in reqs]
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> bool:
+        """True once the batch has finished processing."""
+        return self.client.messages.batches.retrieve(batch_id).processing_status == "ended"
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        out = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                continue
+            message = entry.result.message
+            _record(message.usage, batched=True)
+            out[entry.custom_id] = message.content[0].text.strip()
+        return out
+
+    def cancel(self, batch_id: str):
+        try:
+            self.client.messages.batches.cancel(batch_id)
+        except Exception:
+            pass
+
+
+class _FakeBackend:
+    """
+    Offline stand-in: deterministic text, FAKE_LATENCY per call, provider-like
+    usage (≈4 chars per token, system prompt cached after its first use).
+    Batches "finish" after one poll.
+    """
+
+    def __init__(self):
+        self._seen_systems: set[str] = set()
+        self._batches: dict[str, list[Request]] = {}
+        self._lock = threading.Lock()
+
+    def _usage(self, req: Request, text: str) -> dict:
+        sys_tokens = len(req.system) // 4
+        with self._lock:
+            key = hashlib.sha1(req.system.encode()).hexdigest()
+            hit = key in self._seen_systems
+            self._seen_systems.add(key)
+        return {
+            "input_tokens": len(req.prompt) // 4,
+            "output_tokens": len(text) // 4,
+            "cache_creation_input_tokens": 0 if hit else sys_tokens,
+            "cache_read_input_tokens": sys_tokens if hit else 0,
+        }
+
+    def _text(self, req: Request) -> str:
+        digest = hashlib.sha1(f"{req.system}\n{req.prompt}".encode()).hexdigest()[:8]
+        first = req.prompt.strip().splitlines()[0] if req.prompt.strip() else ""
+        return (
+            f"Hi there,\n\n[fake:{digest}] {first[:120]}\n\n"
+            "Our system flagged a few things worth a quick look. "
+            "Happy to walk you through the full audit on a free 20-minute call.\n\nCheers,\nJames"
+        )
+
+    def create(self, req: Request) -> str:
+        started = time.time()
+        time.sleep(FAKE_LATENCY)
+        text = self._text(req)
+        _record(self._usage(req, text), time.time() - started)
+        return text
+
+    def submit(self, reqs: list[Request]) -> str:
+        batch_id = f"fakebatch_{hashlib.sha1(repr([r.id for r in reqs]).encode()).hexdigest()[:10]}"
+        with self._lock:
+            self._batches[batch_id] = list(reqs)
+        return batch_id
+
+    def poll(self, batch_id: str) -> bool:
+        return True
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        with self._lock:
+            reqs = self._batches.pop(batch_id, [])
+        out = {}
+        for r in reqs:
+            text = self._text(r)
+            _record(self._usage(r, text), batched=True)
+            out[r.id] = text
+        return out
+
+    def cancel(self, batch_id: str):
+        with self._lock:
+            self._batches.pop(batch_id, None)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _FakeBackend() if BACKEND == "fake" else _AnthropicBackend()
+    return _backend
+
+
+def use_backend(name: str):
+    """Switch backend at runtime ("anthropic" | "fake") — used by the benchmark."""
+    global _backend, BACKEND
+    with _backend_lock:
+        BACKEND  = name
+        _backend = None
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+
+def compose(prompt: str, system: str = "", max_tokens: int = 600) -> str:
+    """One completion, with the system prompt cached across calls."""
+    return _get_backend().create(Request("single", prompt, system, max_tokens))
+
+
+def _compose_direct(reqs: list[Request]) -> dict[str, str]:
+    """Direct calls on a small thread pool; failed requests are left out."""
+    backend = _get_backend()
+
+    def _one(r: Request):
+        try:
+            return r.id, backend.create(r)
+        except Exception:
+            return r.id, None
+
+    with ThreadPoolExecutor(max_workers=DIRECT_WORKERS) as pool:
+        return {rid: text for rid, text in pool.map(_one, reqs) if text is not None}
+
+
+def compose_batch(reqs: list[Request], timeout: float = BATCH_TIMEOUT) -> dict[str, str]:
+    """
+    Compose many emails at once. Returns {request id: text}; ids missing from
+    the result failed both in the batch and on the direct-call retry.
+    Ids are sanitised to the API's custom_id charset internally; results come
+    back under the caller's original ids and the Requests are not modified.
+    The default timeout is short because callers wait inline (the leads run);
+    a batch that misses it is cancelled and the rest go out as direct calls.
+    """
+    if not reqs:
+        return {}
+    original: dict[str, str] = {}
+    wire: list[Request] = []
+    for n, r in enumerate(reqs):
+        cid = base = _ID_RE.sub("_", str(r.id))[:64]
+        while cid in original:      # two ids sanitised to the same custom_id
+            suffix = f"_{n}"
+            cid = base[:64 - len(suffix)] + suffix
+            n += len(reqs)
+        original[cid] = r.id
+        wire.append(replace(r, id=cid))
+
+    if len(wire) < BATCH_MIN:
+        results = _compose_direct(wire)
+    else:
+        results = _compose_batched(wire, timeout)
+    return {original[cid]: text for cid, text in results.items() if cid in original}
+
+
+def _compose_batched(reqs: list[Request], timeout: float) -> dict[str, str]:
+    """Message Batches submission with direct-call fallback for whatever didn't come back."""
+    backend = _get_backend()
+    results: dict[str, str] = {}
+    batch_id = None
+    try:
+        batch_id = backend.submit(reqs)
+        with _stats_lock:
+            _stats["batches"] += 1
+            _stats["batch_requests"] += len(reqs)
+        deadline = time.time() + timeout
+        while not backend.poll(batch_id):
+            if time.time() >= deadline:
+                backend.cancel(batch_id)
+                break
+            time.sleep(min(BATCH_POLL, max(0.0, deadline - time.time())))
+        else:
+            results = backend.results(batch_id)
+    except Exception:
+        if batch_id:
+            backend.cancel(batch_id)
+
+    missing = [r for r in reqs if r.id not in results]
+    if missing:
+        with _stats_lock:
+            _stats["fallbacks"] += len(missing)
+        results.update(_compose_direct(missing))
+    return results
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+def _bench(n: int):
+    """Compare one-at-a-time vs batched composition on the fake backend."""
+    use_backend("fake")
+    system = "You are writing cold outreach emails. " * 200
+    reqs = lambda: [Request(f"lead-{i}", f"Business name: Test {i}\nCity: Sydney", system) for i in range(n)]
+
+    reset_stats()
+    started = time.time()
+    for r in reqs():
+        _get_backend().create(r)
+    seq = stats()
+    seq["wall"] = round(time.time() - started, 1)
+
+    use_backend("fake")     # fresh prompt cache for a fair comparison
+    reset_stats()
+    started = time.time()
+    compose_batch(reqs())
+    bat = stats()
+    bat["wall"] = round(time.time() - started, 1)
+
+    for label, s in (("sequential", seq), ("batch", bat)):
+        print(f"{label:>10}: {n} emails in {s['wall']}s · ${s['cost_usd']} est. · "
+              f"cache hit {int(s['cache_hit_ratio'] * 100)}%")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--bench":
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 50)
+    else:
+        print(__doc__)
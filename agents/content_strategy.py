@@ -31,6 +31,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base import BaseAgent
+from agents import ratelimit as _ratelimit
 from dashboard import db
 
 PROJECT_ROOT  = Path(__file__).parent.parent
@@ -112,6 +113,7 @@ def _validate_and_fix(hook: str, client) -> str:
 
     problems = "; ".join(issues)
     try:
+        _ratelimit.acquire("api.anthropic.com")
         r = client.messages.create(
             model="claude-opus-4-6",
             max_tokens=60,
@@ -609,6 +611,7 @@ Return ONLY valid JSON matching this exact structure. No markdown fences, no com
 }}"""
 
         try:
+            _ratelimit.acquire("api.anthropic.com")
             r = client.messages.create(
                 model="claude-opus-4-6",
                 max_tokens=4000,
@@ -0,0 +1,116 @@
+"""
+agents/context.py — RunContext: per-run state for a single agent execution.
+
+Replaces the old pattern of mutating os.environ["RUN_MODE"] around
+agent.execute(), which leaked the mode into every other agent thread running
+at the same time.
+
+A RunContext carries:
+  - mode       → what the agent should do this run ("insights", "reels", ...)
+  - trigger    → who started it: "schedule" | "dashboard" | "chat" | "scheduled_task" | ...
+  - run_id     → correlation id stamped on every event + task the run creates
+  - deadline   → optional epoch seconds; long loops check ctx.expired()
+  - profile    → capture a profile of this run (see agents/profiler.py)
+  - threads    → idents of worker threads currently running on this run's
+                 behalf (registered by run_in_thread_target; the profiler
+                 samples them alongside the execute() thread)
+
+The active context lives in a ContextVar, so it's per-thread and never shared
+between concurrently running agents. BaseAgent.execute() installs it; agent
+code reads it via self.ctx / self.run_mode().
+
+Usage:
+    ctx = RunContext(mode="insights", trigger="schedule")
+    _instagram.execute(ctx)
+
+    # inside an agent
+    if self.ctx.expired():
+        break
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+def _new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+@dataclass
+class RunContext:
+    mode: str = ""
+    trigger: str = "manual"
+    run_id: str = field(default_factory=_new_run_id)
+    deadline: Optional[float] = None
+    profile: bool = False
+    task_ids: list[int] = field(default_factory=list)
+    threads: set[int] = field(default_factory=set, repr=False, compare=False)
+
+    @classmethod
+    def with_timeout(cls, seconds: float, **kwargs) -> "RunContext":
+        """Build a context whose deadline is `seconds` from now."""
+        return cls(deadline=time.time() + seconds, **kwargs)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None if no deadline)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def follow_on(self, trigger: str = "") -> "RunContext":
+        """Context for a chained run (e.g. analyst after social) — same run_id, no mode."""
+        return RunContext(trigger=trigger or self.trigger, run_id=self.run_id, deadline=self.deadline)
+
+
+_current: contextvars.ContextVar[Optional[RunContext]] = contextvars.ContextVar(
+    "iys_run_context", default=None
+)
+
+
+def current() -> Optional[RunContext]:
+    """Return the RunContext for the calling thread, or None outside a run."""
+    return _current.get()
+
+
+@contextmanager
+def use(ctx: RunContext):
+    """Install ctx as the current run context for the duration of the block."""
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def run_in_thread_target(fn):
+    """
+    Wrap fn so it runs inside a copy of the caller's context.
+    Use when an agent spawns a worker thread that should keep the same run_id:
+        threading.Thread(target=context.run_in_thread_target(work)).start()
+    While fn runs, the thread is registered in the run's RunContext.threads so
+    a profiled run samples it too.
+    """
+    ctx = contextvars.copy_context()
+    run_ctx = ctx.get(_current)
+
+    def _target(*a, **kw):
+        if run_ctx is None:
+            return ctx.run(fn, *a, **kw)
+        ident = threading.get_ident()
+        run_ctx.threads.add(ident)
+        try:
+            return ctx.run(fn, *a, **kw)
+        finally:
+            run_ctx.threads.discard(ident)
+
+    return _target
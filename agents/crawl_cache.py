@@ -0,0 +1,151 @@
+"""
+agents/crawl_cache.py — Short-lived page cache shared by email discovery and the website audit.
+
+Outreach used to download a prospect's homepage twice: once in
+_find_email_on_website (first 60 KB) and again in _audit_website (first 40 KB,
+mobile UA). Contact pages were re-fetched on every re-audit. Now both go
+through fetch(), which:
+
+  - keys pages by URL + User-Agent; both callers use CRAWL_UA, so a homepage
+    is downloaded once per TTL
+  - keeps the raw HTML zlib-compressed under dashboard/crawl_cache/, indexed
+    in the crawl_cache table (status, load time, signals, fetched_at)
+  - caches HTTP error responses too (a 404 /contact-us stays a 404), but never
+    connection failures
+  - runs extract_signals() once per download: email candidates, viewport,
+    structured data, reviews, CTA, local mentions, word count. Cache hits reuse
+    the stored signals without re-parsing
+
+TTL: IYS_CRAWL_TTL_HOURS (default 24). prune() removes expired entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import httpclient as _http
+from dashboard import db
+
+CACHE_DIR      = Path(__file__).parent.parent / "dashboard" / "crawl_cache"
+CRAWL_TTL_HOURS = float(os.environ.get("IYS_CRAWL_TTL_HOURS", "24"))
+CRAWL_UA = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148"
+)
+FETCH_MAX_BYTES  = 1_000_000   # read whole pages so the keep-alive socket is reusable
+STORE_MAX_BYTES  = 200_000     # what we keep on disk
+SIGNAL_MAX_CHARS = 60_000      # what extract_signals() looks at
+
+_EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}")
+_TAG_RE   = re.compile(r"<[^>]+>")
+_SKIP_EMAIL_DOMAINS = {"example.com", "sentry.io", "wixpress.com", "googleapis.com",
+                       "placeholder.com", "yoursite.com", "domain.com"}
+
+_SCHEMA_MARKERS = ("schema", "application/ld+json", "itemtype")
+_REVIEW_MARKERS = ("review", "testimonial", "★", "star", "rating")
+_CTA_MARKERS    = ("book", "quote", "enquire", "contact", "call now", "get a quote")
+_LOCAL_MARKERS  = ("suburb", "local", "serving", "nsw", "vic", "qld", "wa", "sa", "nt", "act")
+
+
+@dataclass
+class Page:
+    url: str
+    status: int
+    elapsed: float
+    html: str = ""
+    signals: dict = field(default_factory=dict)
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+
+def extract_signals(html: str) -> dict:
+    """Everything the email finder and the auditor need from a page, in one pass over the HTML."""
+    head  = html[:SIGNAL_MAX_CHARS]
+    lower = head.lower()
+    emails = []
+    for email in _EMAIL_RE.findall(head):
+        email  = email.lower()
+        domain = email.split("@")[1]
+        if domain not in _SKIP_EMAIL_DOMAINS and not domain.endswith(".png") and email not in emails:
+            emails.append(email)
+    return {
+        "emails":      emails,
+        "viewport":    "viewport" in head,
+        "schema":      any(k in lower for k in _SCHEMA_MARKERS),
+        "reviews":     any(k in lower for k in _REVIEW_MARKERS),
+        "cta":         any(k in lower for k in _CTA_MARKERS),
+        "local":       any(k in lower for k in _LOCAL_MARKERS),
+        "word_count":  len(_TAG_RE.sub(" ", head).split()),
+    }
+
+
+def _key(url: str, ua: str) -> str:
+    return hashlib.sha1(f"{url}\n{ua}".encode()).hexdigest()
+
+
+def _read_body(key: str) -> str:
+    try:
+        return zlib.decompress((CACHE_DIR / f"{key}.z").read_bytes()).decode("utf-8", errors="ignore")
+    except (OSError, zlib.error):
+        return ""
+
+
+def fetch(url: str, ua: str = CRAWL_UA, timeout: float = 8,
+          ttl_hours: float = CRAWL_TTL_HOURS, with_html: bool = False) -> Optional[Page]:
+    """
+    Cached GET. Returns a Page (check .ok) or None if the site couldn't be reached.
+    Pass with_html=True to also load the cached HTML body; signals are always included.
+    """
+    if not url.startswith("http"):
+        url = "https://" + url
+    key = _key(url, ua)
+    row = db.crawl_get(key, ttl_hours)
+    if row:
+        return Page(url, row["status"], row["elapsed"],
+                    html=_read_body(key) if with_html else "",
+                    signals=json.loads(row["signals"] or "{}"), from_cache=True)
+
+    resp = _http.get(url, headers={"User-Agent": ua}, timeout=timeout, max_bytes=FETCH_MAX_BYTES)
+    raw  = resp.body[:STORE_MAX_BYTES]
+    html = raw.decode("utf-8", errors="ignore")
+    signals = extract_signals(html) if resp.status < 400 else {}
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (CACHE_DIR / f"{key}.z").write_bytes(zlib.compress(raw, 6))
+        db.crawl_put(key, url, ua, resp.status, resp.elapsed, json.dumps(signals))
+    except OSError:
+        pass
+    return Page(url, resp.status, resp.elapsed, html=html, signals=signals)
+
+
+def safe_fetch(url: str, **kwargs) -> tuple[Optional[Page], Optional[Exception]]:
+    """fetch() that returns (None, exc) instead of raising on connection errors."""
+    try:
+        return fetch(url, **kwargs), None
+    except Exception as exc:
+        return None, exc
+
+
+def prune(ttl_hours: float = CRAWL_TTL_HOURS) -> int:
+    """Delete expired entries and their files. Returns how many were removed."""
+    keys = db.crawl_prune(ttl_hours)
+    for key in keys:
+        try:
+            (CACHE_DIR / f"{key}.z").unlink()
+        except OSError:
+            pass
+    return len(keys)
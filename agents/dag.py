@@ -0,0 +1,238 @@
+"""
+agents/dag.py — Artifact-driven pipeline on top of the scheduler.
+
+The social stack used to be chained by wall-clock guesses (intel at 7:30 AM,
+strategy Sunday 8 PM, analyst tacked on after social). Here each step is a
+Node that declares the artifacts it reads and writes:
+
+    social_intel (via Social morning) ─► intel_report.json ─► content_strategy
+    instagram insights ─► instagram_insights.json ┄┄┄┄┄┄┄┄┄┄┄┄┄┄┄┄┄┄┘   │
+                                          weekly_strategy.json ◄───────┘
+                                          ┆ ─► social, instagram stories
+    social / content ─► carousel + blog rows ─► analyst
+
+Rules:
+  - When a node finishes successfully, every downstream node whose inputs
+    include one of its outputs is considered straight away (same thread,
+    same run_id) instead of waiting for its cron slot.
+  - A downstream node only fires when all required inputs exist and are
+    fresher than max_input_age, and its `when` gate (e.g. Sundays) passes.
+  - Before running, the node's required inputs are content-hashed. If the
+    hash matches the one recorded at its last successful run, the run is
+    skipped.
+  - Optional inputs (┄ above) are read when present but never trigger a
+    run: they don't wake the node when they change and aren't part of its
+    hash. The daily insights refresh must not re-plan a week already planned
+    from that morning's intel report.
+  - Pipeline.tick() (scheduled every 15 min) re-checks auto nodes, which picks
+    up artifacts produced by manual dashboard runs.
+  - `when` gates see the pipeline's timezone (the scheduler's), not the host's.
+
+Cron-driven nodes (auto=False) are still fired by their cron jobs via
+Pipeline.run() and always run there: their inputs (e.g. weekly_strategy.json
+for social and the Instagram stories) are declared for the graph and the run
+record, not as a trigger or a reason to skip.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.context import RunContext
+from dashboard import db
+
+
+# ── Artifacts ────────────────────────────────────────────────────────────────
+
+class Artifact:
+    """Something a node produces or consumes. Subclasses fingerprint it."""
+
+    name: str = ""
+
+    def fingerprint(self) -> Optional[str]:
+        """Content hash, or None if the artifact doesn't exist yet."""
+        raise NotImplementedError
+
+    def updated_at(self) -> Optional[float]:
+        """Epoch seconds of last change, or None if unknown/missing."""
+        raise NotImplementedError
+
+
+class FileArtifact(Artifact):
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.name = self.path.name
+
+    def fingerprint(self) -> Optional[str]:
+        try:
+            return hashlib.sha256(self.path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def updated_at(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+
+class QueryArtifact(Artifact):
+    """A DB-backed artifact, fingerprinted by a cheap aggregate query."""
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql  = sql
+
+    def fingerprint(self) -> Optional[str]:
+        row = db.get_conn().execute(self.sql).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return hashlib.sha256(repr(tuple(row)).encode()).hexdigest()
+
+    def updated_at(self) -> Optional[float]:
+        return time.time() if self.fingerprint() else None
+
+
+def _zone(name: str):
+    """tzinfo for an IANA name; the host's local zone if empty or unknown."""
+    if not name:
+        return None
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        return datetime.now(timezone.utc).astimezone().tzinfo
+
+
+# ── Nodes ────────────────────────────────────────────────────────────────────
+
+@dataclass
+class Node:
+    id: str
+    agent: object
+    inputs: list[Artifact] = field(default_factory=list)
+    optional_inputs: list[Artifact] = field(default_factory=list)
+    outputs: list[Artifact] = field(default_factory=list)
+    mode: str = ""
+    auto: bool = True                     # fire automatically when inputs change
+    max_input_age: Optional[timedelta] = None
+    when: Optional[Callable[[datetime], bool]] = None
+
+    def input_hash(self) -> Optional[str]:
+        """Combined hash over the required inputs; None if one is missing. Optional inputs don't count."""
+        h = hashlib.sha256()
+        for art in self.inputs:
+            fp = art.fingerprint()
+            if fp is None:
+                return None
+            h.update(f"{art.name}={fp};".encode())
+        return h.hexdigest()
+
+    def stale_input(self) -> Optional[str]:
+        """Name of the first required input older than max_input_age, else None."""
+        if self.max_input_age is None:
+            return None
+        cutoff = time.time() - self.max_input_age.total_seconds()
+        for art in self.inputs:
+            ts = art.updated_at()
+            if ts is None or ts < cutoff:
+                return art.name
+        return None
+
+
+class Pipeline:
+    def __init__(self, nodes: list[Node], tz: str = ""):
+        self.nodes = {n.id: n for n in nodes}
+        self.tz    = _zone(tz)
+        self._locks = {n.id: threading.Lock() for n in nodes}
+
+    # ── Graph ──────────────────────────────────────────────────────────────
+
+    def downstream(self, node_id: str) -> list[Node]:
+        produced = {a.name for a in self.nodes[node_id].outputs}
+        return [
+            n for n in self.nodes.values()
+            if n.id != node_id and n.auto and produced & {a.name for a in n.inputs}
+        ]
+
+    # ── Execution ──────────────────────────────────────────────────────────
+
+    def run(self, node_id: str, ctx: Optional[RunContext] = None, force: bool = False) -> bool:
+        """
+        Run one node (if its inputs warrant it), then propagate downstream.
+        Returns True if the node actually executed.
+        """
+        node = self.nodes[node_id]
+        ctx  = ctx or RunContext(trigger="schedule", mode=node.mode)
+        lock = self._locks[node_id]
+        if not lock.acquire(blocking=False):
+            db.event_log(node.agent.agent_id, "info",
+                         f"Pipeline: {node_id} already running — skipped", run_id=ctx.run_id)
+            return False
+        try:
+            input_hash = node.input_hash()
+            if not force and node.auto and node.inputs:
+                reason = self._skip_reason(node, input_hash)
+                if reason:
+                    db.event_log(node.agent.agent_id, "info",
+                                 f"Pipeline: {node_id} skipped — {reason}", run_id=ctx.run_id)
+                    return False
+            ok = node.agent.execute(ctx)
+            db.dag_record_run(node_id, input_hash, "ok" if ok else "error")
+        finally:
+            lock.release()
+
+        if ok:
+            for child in self.downstream(node_id):
+                child_ctx = ctx.follow_on(f"pipeline:{node_id}")
+                child_ctx.mode = child.mode
+                self.run(child.id, child_ctx)
+        return True
+
+    def _skip_reason(self, node: Node, input_hash: Optional[str]) -> Optional[str]:
+        if input_hash is None:
+            return "required input missing"
+        stale = node.stale_input()
+        if stale:
+            return f"{stale} is older than {node.max_input_age}"
+        if node.when and not node.when(datetime.now(self.tz)):
+            return "outside its run window"
+        state = db.dag_state(node.id)
+        if state and state.get("last_status") == "ok" and state.get("input_hash") == input_hash:
+            return "inputs unchanged since last run"
+        return None
+
+    def tick(self):
+        """Fire any auto node whose inputs have changed (catches manual upstream runs)."""
+        for node in self.nodes.values():
+            if node.auto and node.inputs and self._skip_reason(node, node.input_hash()) is None:
+                self.run(node.id, RunContext(trigger="pipeline:tick", mode=node.mode))
+
+    # ── Introspection (dashboard) ──────────────────────────────────────────
+
+    def describe(self) -> list[dict]:
+        states = {s["node_id"]: s for s in db.dag_states()}
+        return [
+            {
+                "id":       n.id,
+                "agent_id": n.agent.agent_id,
+                "auto":     n.auto,
+                "inputs":   [a.name for a in n.inputs],
+                "optional_inputs": [a.name for a in n.optional_inputs],
+                "outputs":  [a.name for a in n.outputs],
+                "downstream": [d.id for d in self.downstream(n.id)],
+                "last_run_at": states.get(n.id, {}).get("last_run_at"),
+                "last_status": states.get(n.id, {}).get("last_status"),
+            }
+            for n in self.nodes.values()
+        ]
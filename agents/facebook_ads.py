@@ -37,6 +37,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base import BaseAgent
+from agents import httpclient as _http
 from dashboard import db
 
 # ── KPI targets (above AU industry avg for professional services on Meta) ──────
@@ -207,7 +208,7 @@ class FacebookAdsAgent(BaseAgent):
         })
 
         url = f"https://graph.facebook.com/v21.0/{account_id}/insights?{params}"
-        with urllib.request.urlopen(
+        with _http.urlopen(
             urllib.request.Request(url, method="GET"), timeout=15
         ) as r:
             data = json.loads(r.read())
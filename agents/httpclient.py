@@ -0,0 +1,487 @@
+"""
+agents/httpclient.py — Shared pooled HTTP client for every agent.
+
+Before this, each urllib.request.urlopen() call opened a fresh TCP+TLS
+connection, and outreach hit the same prospect host up to six times
+(homepage, /contact, /contact-us, /about, /about-us, audit fetch).
+
+What it adds over plain urllib:
+  - Per-host keep-alive connection pool (MAX_IDLE_PER_HOST idle sockets)
+  - HTTP/2 via httpx when httpx + h2 are installed; otherwise the stdlib
+    http.client pool with HTTP/1.1 keep-alive
+  - gzip/deflate content encoding, decoded transparently
+  - Conditional GETs: ETag / Last-Modified are remembered per URL (LRU) and a
+    304 response is served from the remembered body
+  - Redirects, max_bytes body caps and the agents/ratelimit.py token buckets
+    (with 429/503 Retry-After backoff) on every hop
+  - Per-host timing metrics: see stats()
+  - Record / replay for agents/replay.py: IYS_HTTP_RECORD=<file> appends
+    every response as a fixture; IYS_HTTP_REPLAY=<url> sends every request
+    to a local stand-in that serves those fixtures
+
+Named httpclient (not http) so it never shadows the stdlib package when a
+script in agents/ is run directly.
+
+Usage:
+    from agents import httpclient as _http
+
+    resp = _http.get(url, headers={...}, timeout=8, max_bytes=60_000)
+    resp.status, resp.text(), resp.json(), resp.elapsed, resp.not_modified
+
+    with _http.urlopen(req, timeout=10) as r:    # drop-in for urllib.request.urlopen
+        data = json.loads(r.read())
+"""
+
+from __future__ import annotations
+
+import base64
+import email.message
+import hashlib
+import http.client
+import io
+import json
+import os
+import ssl
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import ratelimit as _ratelimit
+
+MAX_IDLE_PER_HOST  = int(os.environ.get("IYS_HTTP_POOL_SIZE", "4"))
+DEFAULT_TIMEOUT    = 30.0
+DEFAULT_MAX_BYTES  = 5_000_000
+MAX_REDIRECTS      = 5
+VALIDATOR_CACHE    = 512          # URLs whose ETag/Last-Modified + body we keep
+VALIDATOR_MAX_BODY = 512_000
+USER_AGENT         = "Mozilla/5.0 (compatible; IYS-agents/1.0)"
+
+RECORD_FILE = os.environ.get("IYS_HTTP_RECORD", "")   # append every response here as a fixture
+REPLAY_URL  = os.environ.get("IYS_HTTP_REPLAY", "")   # send every request to this stand-in instead
+
+_SECRET_PARAMS = {"key", "api_key", "apikey", "access_token", "token"}
+_RECORD_HEADERS = ("Content-Type", "Location", "Retry-After", "ETag", "Last-Modified")
+_record_lock = threading.Lock()
+
+_RETRYABLE_CONN_ERRORS = (
+    http.client.RemoteDisconnected, http.client.BadStatusLine,
+    ConnectionResetError, BrokenPipeError,
+)
+
+
+# ── Response ─────────────────────────────────────────────────────────────────
+
+def _headers(pairs) -> email.message.Message:
+    msg = email.message.Message()
+    for k, v in pairs:
+        msg[k] = v
+    return msg
+
+
+class Response:
+    """Fully-read response. Also works where code expects urlopen()'s file-like object."""
+
+    def __init__(self, url: str, status: int, reason: str, headers: email.message.Message,
+                 body: bytes, elapsed: float, not_modified: bool = False, truncated: bool = False):
+        self.url          = url
+        self.status       = status
+        self.reason       = reason
+        self.headers      = headers
+        self.body         = body
+        self.elapsed      = elapsed
+        self.not_modified = not_modified     # served from the validator cache after a 304
+        self.truncated    = truncated        # body cut at max_bytes
+        self._pos         = 0
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding, errors="ignore")
+
+    def json(self):
+        return json.loads(self.body)
+
+    # file-like compatibility with urllib responses
+    def read(self, n: int = -1) -> bytes:
+        end = len(self.body) if n is None or n < 0 else self._pos + n
+        chunk, self._pos = self.body[self._pos:end], min(end, len(self.body))
+        return chunk
+
+    def getcode(self) -> int:
+        return self.status
+
+    def geturl(self) -> str:
+        return self.url
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _decode(body: bytes, encoding: str) -> bytes:
+    encoding = (encoding or "").lower()
+    if encoding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompressobj(-zlib.MAX_WBITS).decompress(body)
+    return body
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "new_conns", "reused_conns", "not_modified", "bytes", "total_secs", "recent")
+
+    def __init__(self):
+        self.requests = self.errors = self.new_conns = self.reused_conns = self.not_modified = self.bytes = 0
+        self.total_secs = 0.0
+        self.recent: deque[float] = deque(maxlen=200)
+
+
+_stats: dict[str, _HostStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(host: str, elapsed: float, nbytes: int = 0, reused: Optional[bool] = None,
+            not_modified: bool = False, error: bool = False):
+    with _stats_lock:
+        s = _stats.setdefault(host, _HostStats())
+        s.requests   += 1
+        s.total_secs += elapsed
+        s.bytes      += nbytes
+        s.recent.append(elapsed)
+        if error:
+            s.errors += 1
+        if reused is True:
+            s.reused_conns += 1
+        elif reused is False:
+            s.new_conns += 1
+        if not_modified:
+            s.not_modified += 1
+
+
+def stats() -> dict[str, dict]:
+    """Per-host request counts, connection reuse, 304s and latency (ms)."""
+    with _stats_lock:
+        out = {}
+        for host, s in _stats.items():
+            recent = sorted(s.recent)
+            out[host] = {
+                "requests":     s.requests,
+                "errors":       s.errors,
+                "new_conns":    s.new_conns,
+                "reused_conns": s.reused_conns,
+                "not_modified": s.not_modified,
+                "kb":           round(s.bytes / 1024, 1),
+                "avg_ms":       round(1000 * s.total_secs / max(s.requests, 1)),
+                "p95_ms":       round(1000 * recent[int(0.95 * (len(recent) - 1))]) if recent else 0,
+            }
+        return out
+
+
+# ── Conditional-GET validator cache ──────────────────────────────────────────
+
+_validators: OrderedDict[str, dict] = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+def _validator_get(url: str) -> Optional[dict]:
+    with _validators_lock:
+        entry = _validators.get(url)
+        if entry:
+            _validators.move_to_end(url)
+        return entry
+
+
+def _validator_put(url: str, resp: Response):
+    etag = resp.headers.get("ETag")
+    last = resp.headers.get("Last-Modified")
+    if not (etag or last) or resp.truncated or len(resp.body) > VALIDATOR_MAX_BODY:
+        return
+    with _validators_lock:
+        _validators[url] = {"etag": etag, "last_modified": last,
+                            "body": resp.body, "headers": resp.headers}
+        _validators.move_to_end(url)
+        while len(_validators) > VALIDATOR_CACHE:
+            _validators.popitem(last=False)
+
+
+# ── Stdlib keep-alive pool ───────────────────────────────────────────────────
+
+_ssl_ctx = ssl.create_default_context()
+
+
+class _Pool:
+    def __init__(self):
+        self._idle: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def get(self, scheme: str, host: str, port: int, timeout: float):
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=_ssl_ctx), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def put(self, scheme: str, host: str, port: int, conn):
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_PER_HOST:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for c in conns:
+            c.close()
+
+
+_pool = _Pool()
+
+
+def _send_stdlib(method: str, url: str, headers: dict, body: Optional[bytes],
+                 timeout: float, max_bytes: int):
+    parts  = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    host   = parts.hostname or ""
+    port   = parts.port or (443 if scheme == "https" else 80)
+    path   = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    for attempt in range(2):
+        conn, reused = _pool.get(scheme, host, port, timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            raw = conn.getresponse()
+            data = raw.read(max_bytes + 1) if method != "HEAD" else b""
+        except _RETRYABLE_CONN_ERRORS:
+            conn.close()
+            if reused and attempt == 0:
+                continue        # server closed an idle keep-alive socket — retry on a fresh one
+            raise
+        except Exception:
+            conn.close()
+            raise
+        truncated = len(data) > max_bytes
+        if truncated or raw.will_close:
+            conn.close()
+        else:
+            _pool.put(scheme, host, port, conn)
+        return raw.status, raw.reason, list(raw.getheaders()), data[:max_bytes], truncated, reused
+    raise http.client.RemoteDisconnected("connection closed")
+
+
+# ── Optional httpx backend (HTTP/2) ──────────────────────────────────────────
+
+_httpx_client = None
+_httpx_lock   = threading.Lock()
+
+
+def _get_httpx():
+    """httpx.Client with HTTP/2 when httpx and h2 are installed, else None."""
+    global _httpx_client
+    if os.environ.get("IYS_HTTP_BACKEND", "").lower() == "stdlib":
+        return None
+    if _httpx_client is None:
+        with _httpx_lock:
+            if _httpx_client is None:
+                try:
+                    import httpx
+                    import h2  # noqa: F401 — only needed for http2=True
+                except ImportError:
+                    _httpx_client = False
+                else:
+                    _httpx_client = httpx.Client(
+                        http2=True, follow_redirects=False,
+                        limits=httpx.Limits(max_keepalive_connections=MAX_IDLE_PER_HOST * 8),
+                    )
+    return _httpx_client or None
+
+
+def _send_httpx(client, method: str, url: str, headers: dict, body: Optional[bytes],
+                timeout: float, max_bytes: int):
+    # httpx decodes gzip itself — ask for raw bytes so _decode() applies uniformly
+    with client.stream(method, url, headers=headers, content=body, timeout=timeout) as r:
+        data = b""
+        for chunk in r.iter_raw():
+            data += chunk
+            if len(data) > max_bytes:
+                break
+        truncated = len(data) > max_bytes
+        return r.status_code, r.reason_phrase, list(r.headers.multi_items()), data[:max_bytes], truncated, None
+
+
+# ── Record / replay ──────────────────────────────────────────────────────────
+
+def fixture_key(method: str, url: str, body: Optional[bytes] = None) -> str:
+    """
+    Stable identity of a request for fixtures: method + URL with sorted query
+    and API keys dropped, + a body digest for POSTs.
+    """
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.urlencode(sorted(
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _SECRET_PARAMS
+    ))
+    key = f"{method.upper()} {parts.scheme}://{parts.netloc.lower()}{parts.path or '/'}"
+    if query:
+        key += f"?{query}"
+    if body:
+        key += f" #{hashlib.sha1(body).hexdigest()[:16]}"
+    return key
+
+
+def _route(url: str) -> str:
+    """Where a request is actually sent — the replay stand-in when one is set."""
+    if not REPLAY_URL:
+        return url
+    return f"{REPLAY_URL.rstrip('/')}/__replay__?u={urllib.parse.quote(url, safe='')}"
+
+
+def _fixture_put(method: str, url: str, body: Optional[bytes], status: int, headers, data: bytes):
+    try:
+        data = _decode(data, headers.get("Content-Encoding", ""))
+    except zlib.error:
+        pass
+    line = json.dumps({
+        "key": fixture_key(method, url, body),
+        "status": status,
+        "headers": {h: headers[h] for h in _RECORD_HEADERS if headers.get(h)},
+        "body": base64.b64encode(data).decode(),
+    })
+    with _record_lock, open(RECORD_FILE, "a") as f:
+        f.write(line + "\n")
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+
+def request(method: str, url: str, headers: Optional[dict] = None, body: Optional[bytes] = None,
+            timeout: float = DEFAULT_TIMEOUT, max_bytes: int = DEFAULT_MAX_BYTES,
+            follow_redirects: bool = True, conditional: bool = True, retries: int = 2,
+            raise_for_status: bool = False) -> Response:
+    """
+    Send a request through the shared pool. Redirects, rate limits, gzip and
+    conditional GETs are handled here; connection errors propagate.
+    """
+    method = method.upper()
+    hdrs = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+    hdrs.update({k.title(): v for k, v in (headers or {}).items()})   # urllib stores "User-agent"
+    started = time.time()
+
+    for _hop in range(MAX_REDIRECTS + 1):
+        host = (urllib.parse.urlsplit(url).hostname or "").lower()
+        cached = _validator_get(url) if (conditional and method == "GET" and not RECORD_FILE) else None
+        send_hdrs = dict(hdrs)
+        if cached:
+            if cached["etag"]:
+                send_hdrs["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                send_hdrs["If-Modified-Since"] = cached["last_modified"]
+
+        for attempt in range(retries + 1):
+            _ratelimit.acquire(url)
+            t0 = time.time()
+            try:
+                client = _get_httpx()
+                if client is not None:
+                    status, reason, pairs, data, truncated, reused = _send_httpx(
+                        client, method, _route(url), send_hdrs, body, timeout, max_bytes)
+                else:
+                    status, reason, pairs, data, truncated, reused = _send_stdlib(
+                        method, _route(url), send_hdrs, body, timeout, max_bytes)
+            except Exception:
+                _record(host, time.time() - t0, error=True)
+                raise
+            resp_headers = _headers(pairs)
+            if status in _ratelimit.RETRY_STATUS and attempt < retries:
+                _ratelimit.penalize(url, _ratelimit.parse_retry_after(resp_headers.get("Retry-After")))
+                _record(host, time.time() - t0, len(data), reused, error=True)
+                continue
+            break
+
+        elapsed = time.time() - t0
+        if status < 400:
+            _ratelimit.succeed(url)
+        if RECORD_FILE:
+            _fixture_put(method, url, body, status, resp_headers, data)
+
+        if status in (301, 302, 303, 307, 308) and follow_redirects and resp_headers.get("Location"):
+            _record(host, elapsed, len(data), reused)
+            url = urllib.parse.urljoin(url, resp_headers["Location"])
+            if status == 303 or (status in (301, 302) and method == "POST"):
+                method, body = "GET", None
+            continue
+
+        if status == 304 and cached:
+            _record(host, elapsed, len(data), reused, not_modified=True)
+            return Response(url, 200, "OK (not modified)", cached["headers"], cached["body"],
+                            time.time() - started, not_modified=True)
+
+        try:
+            data = _decode(data, resp_headers.get("Content-Encoding", ""))
+        except zlib.error:
+            pass
+        _record(host, elapsed, len(data), reused, error=status >= 400)
+        resp = Response(url, status, reason, resp_headers, data, time.time() - started, truncated=truncated)
+        if raise_for_status and status >= 400:
+            raise urllib.error.HTTPError(url, status, reason, resp_headers, io.BytesIO(data))
+        if method == "GET" and status == 200 and conditional:
+            _validator_put(url, resp)
+        return resp
+
+    raise urllib.error.HTTPError(url, 310, "Too many redirects", _headers([]), io.BytesIO(b""))
+
+
+def get(url: str, **kwargs) -> Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, body: Optional[bytes] = None, **kwargs) -> Response:
+    return request("POST", url, body=body, **kwargs)
+
+
+def urlopen(url, data: Optional[bytes] = None, timeout: float = DEFAULT_TIMEOUT) -> Response:
+    """
+    Drop-in for urllib.request.urlopen(): accepts a URL or urllib Request and
+    raises urllib.error.HTTPError for 4xx/5xx, so existing call sites keep
+    their error handling.
+    """
+    if isinstance(url, urllib.request.Request):
+        req     = url
+        body    = data if data is not None else req.data
+        method  = req.get_method() if data is None else "POST"
+        headers = dict(req.header_items())
+        target  = req.full_url
+    else:
+        body, headers, target = data, {}, url
+        method  = "POST" if data is not None else "GET"
+    return request(method, target, headers=headers, body=body, timeout=timeout, raise_for_status=True)
+
+
+def close():
+    """Close pooled connections (tests / shutdown)."""
+    _pool.close_all()
+    if _httpx_client:
+        _httpx_client.close()
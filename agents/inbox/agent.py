@@ -41,6 +41,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from agents.base import BaseAgent
+from agents import intent as _intent
+from agents import ratelimit as _ratelimit
 from dashboard import db
 
 PROJECT_ROOT   = Path(__file__).parent.parent.parent
@@ -49,11 +51,18 @@ TRIAGE_LOG     = PROJECT_ROOT / "social" / "triage_queue.json"
 BOOKING_URL    = "https://improveyoursite.com/book.html"
 IMAP_HOST      = "imap.gmail.com"
 
+# Notes for emails settled without Claude (agents/intent.py)
+_LOCAL_NOTES = {
+    "spam":       "Likely spam",
+    "auto_reply": "Auto-reply / out of office",
+}
+
 CATEGORIES = {
     "lead":           "Potential new customer",
     "customer_reply": "Existing customer reply",
     "order_form":     "Order form submission",
     "spam":           "Spam / irrelevant",
+    "auto_reply":     "Auto-reply / out of office",
     "other":          "Other",
 }
 
@@ -63,7 +72,7 @@ class InboxAgent(BaseAgent):
     name     = "Inbox"
 
     def run(self):
-        mode = os.environ.get("RUN_MODE", "triage")
+        mode = self.run_mode("triage")
         if mode == "diagnose":
             self._run_diagnostics()
             return
@@ -180,11 +189,11 @@ class InboxAgent(BaseAgent):
 
             # Classify + draft
             category, draft_reply, notes = self._classify_email(
-                sender_name, sender_email, subject, body
+                sender_name, sender_email, subject, body, headers=msg
             )
 
-            if category == "spam":
-                return None  # skip spam silently
+            if category in ("spam", "auto_reply"):
+                return None  # skip spam and auto-responders silently
 
             return {
                 "id":           f"{date_str}_{sender_email}",
@@ -203,13 +212,31 @@ class InboxAgent(BaseAgent):
             return None
 
     def _classify_email(
-        self, name: str, email: str, subject: str, body: str
+        self, name: str, email: str, subject: str, body: str, headers=None
     ) -> tuple[str, str, str]:
-        """Use Claude to classify email and draft a reply. Falls back to heuristics."""
+        """
+        Classify email and draft a reply. Spam and auto-responders are settled
+        locally by agents/intent.py (headers, rules, a model trained on past
+        verdicts); everything else goes to Claude, which also drafts the reply.
+        Falls back to heuristics.
+        """
         api_key = os.environ.get("ANTHROPIC_API_KEY", "")
-        if not api_key:
-            return self._heuristic_classify(subject, body)
+        result = _intent.classify(
+            "inbox", subject, body, headers=headers,
+            message_id=headers.get("Message-ID", "") if headers is not None else "",
+            llm=(lambda s, b: self._claude_classify(name, email, s, b)) if api_key else None,
+        )
+        if result.tier == "llm":
+            return result.payload
+        if result.tier != "fallback":
+            return result.label, "", _LOCAL_NOTES.get(result.label, "")
+        return self._heuristic_classify(subject, body)
 
+    def _claude_classify(
+        self, name: str, email: str, subject: str, body: str
+    ) -> tuple[str, tuple[str, str, str]] | None:
+        """One Claude call → (category, (category, draft_reply, notes)), or None if it failed."""
+        api_key = os.environ.get("ANTHROPIC_API_KEY", "")
         try:
             import anthropic
             client = anthropic.Anthropic(api_key=api_key)
@@ -240,6 +267,7 @@ Return ONLY valid JSON:
 
 Draft should sound like James wrote it personally. First person. Sign off as 'James'."""
 
+            _ratelimit.acquire("api.anthropic.com")
             r = client.messages.create(
                 model="claude-haiku-4-5-20251001",
                 max_tokens=600,
@@ -251,14 +279,11 @@ Draft should sound like James wrote it personally. First person. Sign off as 'Ja
                 if raw.startswith("json"):
                     raw = raw[4:]
             result = json.loads(raw.strip())
-            return (
-                result.get("category", "other"),
-                result.get("draft_reply", ""),
-                result.get("notes", ""),
-            )
+            category = result.get("category", "other")
+            return category, (category, result.get("draft_reply", ""), result.get("notes", ""))
         except Exception as exc:
             self.log_warn(f"Inbox: Claude classification failed: {exc}")
-            return self._heuristic_classify(subject, body)
+            return None
 
     def _heuristic_classify(self, subject: str, body: str) -> tuple[str, str, str]:
         text = (subject + " " + body).lower()
@@ -41,6 +41,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from agents.base import BaseAgent
+from agents import httpclient as _http
+from agents import ratelimit as _ratelimit
 from dashboard import db
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
@@ -98,7 +100,7 @@ class InstagramAgent(BaseAgent):
     name     = "Instagram"
 
     def run(self):
-        mode = os.environ.get("RUN_MODE", "post")
+        mode = self.run_mode("post")
         if mode == "diagnose":
             self._run_diagnostics()
             return
@@ -106,7 +108,11 @@ class InstagramAgent(BaseAgent):
         # Always check Make.com webhook is active before posting
         self._ensure_make_webhook_active()
 
-        slot = os.environ.get("IG_SLOT", self._get_slot())
+        # Scheduler passes "insights" / "reels" as the run mode; otherwise pick by time of day
+        if mode in ("story", "insights", "reels"):
+            slot = mode
+        else:
+            slot = os.environ.get("IG_SLOT", self._get_slot())
 
         if slot == "story":
             self._run_story()
@@ -152,7 +158,7 @@ class InstagramAgent(BaseAgent):
                     method="POST",
                     headers={"Content-Type": "application/json"},
                 )
-                with urllib.request.urlopen(req, timeout=10) as r:
+                with _http.urlopen(req, timeout=10) as r:
                     results.append(f"  ✓ Make.com story webhook reachable (HTTP {r.status})")
                     self.log_info(f"Diag webhook: reachable (HTTP {r.status})")
             except Exception as exc:
@@ -169,7 +175,7 @@ class InstagramAgent(BaseAgent):
         if ig_token and account_id:
             try:
                 url = f"{GRAPH_BASE}/{account_id}?fields=username,followers_count&access_token={ig_token}"
-                with urllib.request.urlopen(url, timeout=10) as r:
+                with _http.urlopen(url, timeout=10) as r:
                     data = json.loads(r.read())
                 username  = data.get("username", "?")
                 followers = data.get("followers_count", "?")
@@ -193,6 +199,7 @@ class InstagramAgent(BaseAgent):
             try:
                 import anthropic
                 client = anthropic.Anthropic(api_key=ant_key)
+                _ratelimit.acquire("api.anthropic.com")
                 r = client.messages.create(
                     model="claude-haiku-4-5-20251001",
                     max_tokens=10,
@@ -229,7 +236,7 @@ class InstagramAgent(BaseAgent):
                     f"https://eu1.make.com/api/v2/scenarios/{scenario_id}",
                     headers={"Authorization": f"Token {api_key}", "Content-Type": "application/json"},
                 )
-                with urllib.request.urlopen(req, timeout=10) as r:
+                with _http.urlopen(req, timeout=10) as r:
                     data = json.loads(r.read())
                 is_active = data.get("scenario", {}).get("isActive", True)
                 if not is_active:
@@ -239,7 +246,7 @@ class InstagramAgent(BaseAgent):
                         data=payload, method="PATCH",
                         headers={"Authorization": f"Token {api_key}", "Content-Type": "application/json"},
                     )
-                    with urllib.request.urlopen(req, timeout=10) as r:
+                    with _http.urlopen(req, timeout=10) as r:
                         pass
                     self.log_info("Instagram: Make.com scenario was paused — re-activated ✓")
                 else:
@@ -403,6 +410,7 @@ Return ONLY valid JSON:
   "alt_text": "Accessibility description"
 }}"""
 
+            _ratelimit.acquire("api.anthropic.com")
             r = client.messages.create(
                 model="claude-opus-4-6",
                 max_tokens=400,
@@ -565,7 +573,7 @@ body{{width:1080px;height:1920px;overflow:hidden;background:{bg};position:relati
                 method="POST",
                 headers={"Content-Type": "application/json"},
             )
-            with urllib.request.urlopen(req, timeout=30) as r:
+            with _http.urlopen(req, timeout=30) as r:
                 return r.status == 200
         except Exception as exc:
             self.log_error(f"Make.com story webhook failed: {exc}")
@@ -589,7 +597,7 @@ body{{width:1080px;height:1920px;overflow:hidden;background:{bg};position:relati
                 data=params.encode(),
                 method="POST",
             )
-            with urllib.request.urlopen(req, timeout=15) as r:
+            with _http.urlopen(req, timeout=15) as r:
                 container = json.loads(r.read())
             container_id = container.get("id")
             if not container_id:
@@ -605,7 +613,7 @@ body{{width:1080px;height:1920px;overflow:hidden;background:{bg};position:relati
                 data=pub_params.encode(),
                 method="POST",
             )
-            with urllib.request.urlopen(req, timeout=15) as r:
+            with _http.urlopen(req, timeout=15) as r:
                 result = json.loads(r.read())
             return bool(result.get("id"))
         except Exception as exc:
@@ -633,7 +641,7 @@ body{{width:1080px;height:1920px;overflow:hidden;background:{bg};position:relati
                 f"{GRAPH_BASE}/{account_id}/insights"
                 f"?metric={metrics}&period=week&access_token={ig_token}"
             )
-            with urllib.request.urlopen(url, timeout=10) as r:
+            with _http.urlopen(url, timeout=10) as r:
                 data = json.loads(r.read())
 
             account_metrics = {
@@ -648,7 +656,7 @@ body{{width:1080px;height:1920px;overflow:hidden;background:{bg};position:relati
                 f"?fields=id,timestamp,like_count,comments_count,reach,saved,media_type"
                 f"&limit=10&access_token={ig_token}"
             )
-            with urllib.request.urlopen(posts_url, timeout=10) as r:
+            with _http.urlopen(posts_url, timeout=10) as r:
                 posts_data = json.loads(r.read())
             posts = posts_data.get("data", [])
             self.update_progress(tid, 70)
@@ -766,6 +774,7 @@ Return ONLY valid JSON:
   "on_screen_text": ["Text overlay 1", "Text overlay 2", "Text overlay 3"]
 }}"""
 
+            _ratelimit.acquire("api.anthropic.com")
             r = client.messages.create(
                 model="claude-opus-4-6",
                 max_tokens=800,
@@ -851,7 +860,7 @@ Return ONLY valid JSON:
                     api_url,
                     headers={"Authorization": f"token {pat}", "Accept": "application/vnd.github.v3+json"},
                 )
-                with urllib.request.urlopen(req) as r:
+                with _http.urlopen(req) as r:
                     sha = json.loads(r.read()).get("sha")
             except Exception:
                 pass
@@ -870,7 +879,7 @@ Return ONLY valid JSON:
                     "Content-Type":  "application/json",
                 },
             )
-            with urllib.request.urlopen(req, timeout=120) as r:
+            with _http.urlopen(req, timeout=120) as r:
                 pass
 
             video_url = (
@@ -891,7 +900,7 @@ Return ONLY valid JSON:
                 method="POST",
                 headers={"Content-Type": "application/json"},
             )
-            with urllib.request.urlopen(req, timeout=30) as r:
+            with _http.urlopen(req, timeout=30) as r:
                 return r.status == 200
         except Exception as exc:
             self.log_error(f"Make.com reel webhook failed: {exc}")
@@ -939,7 +948,7 @@ Return ONLY valid JSON:
                     api_url,
                     headers={"Authorization": f"token {pat}", "Accept": "application/vnd.github.v3+json"},
                 )
-                with urllib.request.urlopen(req) as r:
+                with _http.urlopen(req) as r:
                     sha = json.loads(r.read()).get("sha")
             except Exception:
                 pass
@@ -958,7 +967,7 @@ Return ONLY valid JSON:
                     "Content-Type":   "application/json",
                 },
             )
-            with urllib.request.urlopen(req, timeout=20) as r:
+            with _http.urlopen(req, timeout=20) as r:
                 pass
 
             return f"https://raw.githubusercontent.com/anon8597299/smart-tech-innovations/main/social/{subfolder}/{image_path.name}"
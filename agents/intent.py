@@ -0,0 +1,476 @@
+"""
+agents/intent.py — Tiered intent classifier for inbound email.
+
+The reply checker in leads.py decided booking intent from a bare keyword
+list ("when", "time", "yes", "call", ...) matched anywhere in the message,
+our own quoted outreach included. Out-of-office notices and "no thanks"
+replies got the booking link. InboxAgent._classify_email sent every unread
+email to Claude. Now each message goes through cheap tiers first:
+
+  1. headers — Auto-Submitted, X-Autoreply / X-Autorespond, Precedence and
+     List-Id / List-Unsubscribe identify auto-responders and bulk mail
+  2. rules — regexes for out-of-office, "not interested" / unsubscribe and
+     explicit booking language. Lead replies are matched with the quoted
+     history stripped
+  3. model — naive Bayes over word unigrams and bigrams, trained on our own
+     labelled history: every LLM verdict and manual correction in
+     intent_log, plus the inbox triage queue. It is retrained as that grows
+  4. LLM — only when the local tiers disagree or aren't confident
+     (IYS_INTENT_CONFIDENCE), or when a scope's protected label can't be
+     ruled out (booking, for lead replies — a missed booking costs far more
+     than one call)
+
+Every decision is logged to intent_log with its tier, confidence and
+latency. A sample of local decisions (IYS_INTENT_AUDIT_RATE) also goes to
+the LLM, so accuracy is measured on live traffic and the verdicts become
+training data.
+
+Scopes:
+  reply — replies from leads: booking | not_interested | auto_reply | other
+  inbox — hello@ triage: lead | customer_reply | order_form | spam | auto_reply | other.
+          Only spam and auto_reply are decided locally; the rest need the
+          LLM's drafted reply anyway
+
+Usage:
+    from agents import intent
+    result = intent.classify("reply", subject, body, headers=msg)
+    if result.label == "booking": ...
+
+    python agents/intent.py --stats          # tiers, LLM calls, latency, audited accuracy
+    python agents/intent.py --eval reply     # cross-validated accuracy on the labelled history
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from email.message import Message
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import ratelimit as _ratelimit
+from dashboard import db
+
+CONFIDENCE    = float(os.environ.get("IYS_INTENT_CONFIDENCE", "0.9"))     # model posterior to decide locally
+PROTECT_FLOOR = float(os.environ.get("IYS_INTENT_PROTECT_FLOOR", "0.05"))  # P(protected label) that forces the LLM
+AUDIT_RATE    = float(os.environ.get("IYS_INTENT_AUDIT_RATE", "0.05"))     # local decisions double-checked by the LLM
+MIN_TRAIN     = int(os.environ.get("IYS_INTENT_MIN_TRAIN", "30"))          # labelled examples before the model is used
+MIN_LABEL     = 5            # examples of a label before the model may predict it
+MODEL_TTL     = 900.0        # seconds before the model is retrained from intent_log
+RULE_CONFIDENCE = 0.97
+TEXT_CHARS    = 2000
+LLM_MODEL     = os.environ.get("IYS_INTENT_MODEL", "claude-haiku-4-5-20251001")
+TRIAGE_LOG    = Path(__file__).parent.parent / "social" / "triage_queue.json"
+
+# The old booking test, kept as the last resort when the LLM is unavailable
+BOOKING_KEYWORDS = [
+    "book", "booking", "schedule", "call", "chat", "catch up", "catch-up",
+    "available", "availability", "when", "time", "slot", "appointment",
+    "interested", "yes", "sure", "happy to", "love to", "keen", "sounds good",
+    "how much", "pricing", "price", "cost", "quote", "package",
+]
+
+
+# ── Scopes ───────────────────────────────────────────────────────────────────
+
+_OUT_OF_OFFICE = (
+    r"\b(out of (the )?office|on (annual |parental |maternity |sick )?leave|away from (my|the) (desk|office)"
+    r"|auto(matic|mated)?[- ]?(reply|response|responder)|limited access to (my )?e-?mail"
+    r"|(will|shall) (respond|reply|get back to you|be back) .{0,40}(return|back in the office)"
+    r"|thank(s| you) for (your|contacting).{0,60}(we|i) (will|'ll) (respond|reply|be in touch|get back)"
+    r"|this (mailbox|inbox|address) is (not|no longer) (monitored|in use))"
+)
+
+
+@dataclass(frozen=True)
+class _Scope:
+    labels: tuple[str, ...]
+    local: tuple[str, ...]                     # labels the local tiers may decide on their own
+    protect: Optional[str]                     # never ruled out locally on weak evidence
+    rules: dict[str, re.Pattern]
+    auto_label: str                            # auto-responder headers
+    bulk_label: str                            # list / bulk headers
+    strip_quoted: bool
+    fallback: Callable[[str], str]             # best guess when nothing else applies
+    prompt: str = ""                           # default LLM prompt ({subject}, {body}); "" → caller supplies llm=
+    seed: Callable[[], list[tuple[str, str]]] = field(default=lambda: [])
+
+
+def _reply_fallback(text: str) -> str:
+    lower = text.lower()
+    return "booking" if any(kw in lower for kw in BOOKING_KEYWORDS) else "other"
+
+
+def _inbox_seed() -> list[tuple[str, str]]:
+    """The inbox triage queue — past LLM verdicts from before intent_log existed."""
+    try:
+        items = json.loads(TRIAGE_LOG.read_text())
+    except Exception:
+        return []
+    return [(f"{t.get('subject', '')}\n{t.get('body_preview', '')}", t["category"])
+            for t in items if t.get("category")]
+
+
+_REPLY_PROMPT = """Classify this reply to a cold outreach email from ImproveYourSite, an Australian web agency \
+offering a free website audit call.
+
+Subject: {subject}
+Reply:
+{body}
+
+Labels:
+- booking: wants to talk or book a call, asks about price, times or availability, or is otherwise interested
+- not_interested: declines, asks to be removed, or says they're sorted
+- auto_reply: out-of-office, auto-responder or ticket acknowledgement
+- other: anything else (wrong person, unrelated question, ...)
+
+Return ONLY the label."""
+
+SCOPES: dict[str, _Scope] = {
+    "reply": _Scope(
+        labels=("booking", "not_interested", "auto_reply", "other"),
+        local=("booking", "not_interested", "auto_reply", "other"),
+        protect="booking",
+        rules={
+            "auto_reply": re.compile(_OUT_OF_OFFICE, re.I),
+            "not_interested": re.compile(
+                r"\b(not interested|no,? thanks|no,? thank you|not at this (stage|time)|unsubscribe"
+                r"|remove (me|us|my)|take (me|us) off|stop (emailing|contacting|sending)"
+                r"|(do not|don'?t) (contact|email)|we'?re (all )?(good|sorted|fine)|already have (a|an|someone)"
+                r"|not (looking|required|needed))\b", re.I),
+            "booking": re.compile(
+                r"\b(book(ed|ing)? (a|in|the|me)|(give|gimme) (me|us) a (call|ring|bell)|call me|ring me"
+                r"|(happy|keen|love|like) to (chat|talk|hear|discuss|catch up|book)|sounds good|how much"
+                r"|what (does|would|will) (it|that) cost|(send|get) (me |us )?a quote|pricing"
+                r"|what times?|when (are|is|would) you (free|available)|let'?s (chat|talk|do it)"
+                r"|interested in (hearing|learning|a call|chatting|talking)|yes,? please)\b", re.I),
+        },
+        auto_label="auto_reply",
+        bulk_label="auto_reply",
+        strip_quoted=True,
+        fallback=_reply_fallback,
+        prompt=_REPLY_PROMPT,
+    ),
+    "inbox": _Scope(
+        labels=("lead", "customer_reply", "order_form", "spam", "auto_reply", "other"),
+        local=("spam", "auto_reply"),
+        protect="lead",
+        rules={
+            "auto_reply": re.compile(_OUT_OF_OFFICE, re.I),
+            "spam": re.compile(
+                r"\b(unsubscribe|click here|offer expires|dear friend|limited time offer|guest post"
+                r"|backlinks?|link building|crypto|bitcoin|wire transfer)\b", re.I),
+            # Never decided locally — a hit only stops spam being assumed
+            "lead": re.compile(r"\b(quote|website|enquiry|inquiry|price|pricing|how much|new site|redesign)\b", re.I),
+        },
+        auto_label="auto_reply",
+        bulk_label="spam",
+        strip_quoted=False,
+        fallback=lambda text: "other",
+        seed=_inbox_seed,
+    ),
+}
+
+
+# ── Result ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class Intent:
+    label: str
+    confidence: float
+    tier: str                  # header | rule | model | llm | fallback
+    latency_ms: float = 0.0
+    payload: Any = None        # whatever a caller-supplied llm returned alongside its label
+    log_id: Optional[int] = None
+
+
+# ── Text ─────────────────────────────────────────────────────────────────────
+
+_QUOTE_START = re.compile(
+    r"^\s*(on\b.{0,200}\bwrote:|-{2,}\s*original message\s*-{2,}|_{8,}|from:\s.+|sent from my\b.*)\s*$",
+    re.I | re.M,
+)
+
+
+def reply_text(body: str) -> str:
+    """The new part of a reply — quoted history and "> " lines removed."""
+    m = _QUOTE_START.search(body)
+    if m:
+        body = body[:m.start()]
+    return "\n".join(line for line in body.splitlines() if not line.lstrip().startswith(">")).strip()
+
+
+def _text(scope: _Scope, subject: str, body: str) -> str:
+    body = reply_text(body) if scope.strip_quoted else body
+    return f"{subject}\n{body}"[:TEXT_CHARS]
+
+
+def header_label(scope: str, headers: Message | dict | None) -> Optional[str]:
+    """The label headers alone settle, if any: auto-responders and bulk/list mail."""
+    return _header_label(SCOPES[scope], headers)
+
+
+def _header_label(sc: _Scope, headers: Message | dict | None) -> Optional[str]:
+    if headers is None:
+        return None
+    get = lambda k: (headers.get(k) or "").strip().lower()
+    auto_submitted = get("Auto-Submitted")
+    precedence     = get("Precedence")
+    if (auto_submitted and auto_submitted != "no") or get("X-Autoreply") or get("X-Autorespond") \
+            or precedence == "auto_reply":
+        return sc.auto_label
+    if get("List-Id") or get("List-Unsubscribe") or precedence in ("bulk", "list", "junk"):
+        return sc.bulk_label
+    return None
+
+
+# ── Model ────────────────────────────────────────────────────────────────────
+
+_WORD_RE = re.compile(r"[a-z][a-z']*|\d+")
+
+
+def _features(text: str) -> set[str]:
+    words = _WORD_RE.findall(text.lower())
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class _NaiveBayes:
+    """Bernoulli-style (binarised) multinomial naive Bayes — suits short, noisy email text."""
+
+    def __init__(self, examples: list[tuple[str, str]], alpha: float = 0.5):
+        self.alpha  = alpha
+        self.docs   = Counter(label for _, label in examples)
+        self.counts: dict[str, Counter] = {label: Counter() for label in self.docs}
+        for text, label in examples:
+            self.counts[label].update(_features(text))
+        self.totals = {label: sum(c.values()) for label, c in self.counts.items()}
+        self.vocab  = set().union(*self.counts.values()) if self.counts else set()
+        n = sum(self.docs.values())
+        self.prior  = {label: math.log(k / n) for label, k in self.docs.items()}
+
+    def predict(self, text: str) -> dict[str, float]:
+        feats = [f for f in _features(text) if f in self.vocab]
+        denom = self.alpha * len(self.vocab)
+        scores = {}
+        for label, counts in self.counts.items():
+            total = self.totals[label] + denom
+            scores[label] = self.prior[label] + sum(math.log((counts[f] + self.alpha) / total) for f in feats)
+        top = max(scores.values())
+        exp = {label: math.exp(s - top) for label, s in scores.items()}
+        z = sum(exp.values())
+        return {label: v / z for label, v in exp.items()}
+
+
+_models: dict[str, tuple[float, Optional[_NaiveBayes]]] = {}
+_models_lock = threading.Lock()
+
+
+def _train(scope: str, examples: list[tuple[str, str]]) -> Optional[_NaiveBayes]:
+    labels = set(SCOPES[scope].labels)
+    examples = [(t, l) for t, l in examples if l in labels]
+    if len(examples) < MIN_TRAIN or len({l for _, l in examples}) < 2:
+        return None
+    return _NaiveBayes(examples)
+
+
+def _model(scope: str) -> Optional[_NaiveBayes]:
+    with _models_lock:
+        cached = _models.get(scope)
+        if cached and time.time() - cached[0] < MODEL_TTL:
+            return cached[1]
+    try:
+        model = _train(scope, db.intent_labelled(scope) + SCOPES[scope].seed())
+    except Exception:
+        model = None
+    with _models_lock:
+        _models[scope] = (time.time(), model)
+    return model
+
+
+# ── Tiers ────────────────────────────────────────────────────────────────────
+
+def _decide_locally(sc: _Scope, text: str, headers, model: Optional[_NaiveBayes]) -> tuple[Intent, bool]:
+    """(best local guess, whether it's safe to act on without the LLM)."""
+    label = _header_label(sc, headers)
+    if label:
+        return Intent(label, 1.0, "header"), True
+
+    hits  = {label for label, rx in sc.rules.items() if rx.search(text)}
+    probs = model.predict(text) if model else {}
+    # The model may only speak for labels it has seen enough of
+    probs = {l: p for l, p in probs.items() if model.docs[l] >= MIN_LABEL} if probs else {}
+    protect_hint = sc.protect is not None and (sc.protect in hits or probs.get(sc.protect, 0.0) >= PROTECT_FLOOR)
+
+    def _safe(label: str) -> bool:
+        return label in sc.local and (label == sc.protect or not protect_hint)
+
+    if len(hits) == 1:
+        (label,) = hits
+        return Intent(label, RULE_CONFIDENCE, "rule"), _safe(label)
+    if probs:
+        label = max(probs, key=probs.get)
+        ok = probs[label] >= CONFIDENCE and (not hits or label in hits) and _safe(label)
+        return Intent(label, probs[label], "model"), ok
+    if sc.protect in hits:
+        return Intent(sc.protect, 0.0, "fallback"), False
+    return Intent(sc.fallback(text), 0.0, "fallback"), False
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _default_llm(sc: _Scope) -> Optional[Callable[[str, str], Optional[tuple[str, Any]]]]:
+    if not sc.prompt or not os.environ.get("ANTHROPIC_API_KEY"):
+        return None
+
+    def _call(subject: str, body: str) -> Optional[tuple[str, Any]]:
+        global _client
+        if _client is None:
+            with _client_lock:
+                if _client is None:
+                    import anthropic
+                    _client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+        _ratelimit.acquire("api.anthropic.com")
+        r = _client.messages.create(
+            model=LLM_MODEL, max_tokens=10,
+            messages=[{"role": "user", "content": sc.prompt.format(subject=subject, body=body[:TEXT_CHARS])}],
+        )
+        words = re.findall(r"[a-z_]+", r.content[0].text.lower())
+        label = next((w for w in words if w in sc.labels), None)
+        return (label, None) if label else None
+
+    return _call
+
+
+def classify(scope: str, subject: str, body: str, headers: Message | dict | None = None,
+             message_id: str = "",
+             llm: Optional[Callable[[str, str], Optional[tuple[str, Any]]]] = None) -> Intent:
+    """
+    Label one message. llm(subject, body) → (label, payload) | None replaces
+    the scope's default LLM call (InboxAgent uses it to get a drafted reply
+    in the same call). When the LLM is needed but unavailable, the result is
+    the best local guess with tier="fallback".
+    """
+    sc      = SCOPES[scope]
+    started = time.perf_counter()
+    text    = _text(sc, subject, body)
+    guess, decisive = _decide_locally(sc, text, headers, _model(scope))
+
+    result = guess if decisive else None
+    truth  = None
+    audit  = decisive and guess.tier != "header" and random.random() < AUDIT_RATE
+    if not decisive or audit:
+        call = llm or _default_llm(sc)
+        verdict = None
+        if call is not None:
+            try:
+                verdict = call(subject, body)
+            except Exception:
+                verdict = None
+        if verdict and verdict[0] in sc.labels:
+            truth = verdict[0]
+            if not decisive:
+                result = Intent(truth, 1.0, "llm", payload=verdict[1])
+    if result is None:
+        result = Intent(guess.label, guess.confidence, "fallback")
+    result.latency_ms = (time.perf_counter() - started) * 1000
+
+    try:
+        result.log_id = db.intent_log_add(
+            scope, message_id, text, result.label, result.tier, result.confidence, result.latency_ms,
+            truth=truth, truth_source="llm" if truth else None,
+        )
+    except Exception:
+        pass
+    return result
+
+
+# ── Reporting ────────────────────────────────────────────────────────────────
+
+def stats(days: float = 7) -> dict:
+    """Per scope: messages, decisions per tier, LLM calls, latency, audited accuracy, protected recall."""
+    out: dict[str, dict] = {}
+    for row in db.intent_log_since(days):
+        s = out.setdefault(row["scope"], {
+            "messages": 0, "tiers": Counter(), "llm_calls": 0, "_lat": {},
+            "audited": 0, "audited_correct": 0, "_protect": [0, 0],
+        })
+        s["messages"] += 1
+        s["tiers"][row["tier"]] += 1
+        s["_lat"].setdefault(row["tier"], []).append(row["latency_ms"])
+        if row["tier"] == "llm" or row["truth_source"] == "llm":
+            s["llm_calls"] += 1
+        if row["truth"] and row["tier"] in ("header", "rule", "model"):
+            s["audited"] += 1
+            s["audited_correct"] += row["label"] == row["truth"]
+        protect = SCOPES.get(row["scope"]) and SCOPES[row["scope"]].protect
+        if protect and row["truth"] == protect:
+            s["_protect"][0] += 1
+            s["_protect"][1] += row["label"] == protect
+    for s in out.values():
+        lat = s.pop("_lat")
+        found, kept = s.pop("_protect")
+        s["tiers"] = dict(s["tiers"])
+        s["llm_share"] = round(s["llm_calls"] / s["messages"], 3) if s["messages"] else 0.0
+        s["avg_latency_ms"] = {t: round(sum(v) / len(v), 2) for t, v in lat.items()}
+        s["audited_accuracy"] = round(s["audited_correct"] / s["audited"], 3) if s["audited"] else None
+        s["protected_recall"] = round(kept / found, 3) if found else None
+    return out
+
+
+def evaluate(scope: str, folds: int = 5) -> dict:
+    """
+    k-fold cross-validation of the local tiers on the labelled history.
+    Messages the local tiers would escalate count as correct (the LLM labelled
+    them); protected recall is the share of true protected-label messages
+    that weren't decided locally as something else.
+    """
+    sc = SCOPES[scope]
+    examples = [(t, l) for t, l in db.intent_labelled(scope) + sc.seed() if l in sc.labels]
+    random.Random(0).shuffle(examples)
+    n = len(examples)
+    local = correct = protect_total = protect_lost = 0
+    secs = 0.0
+    for k in range(folds):
+        test  = examples[k::folds]
+        train = [e for i, e in enumerate(examples) if i % folds != k]
+        model = _train(scope, train)
+        for text, truth in test:
+            t0 = time.perf_counter()
+            guess, decisive = _decide_locally(sc, text, None, model)
+            secs += time.perf_counter() - t0
+            if decisive:
+                local += 1
+                correct += guess.label == truth
+            if truth == sc.protect:
+                protect_total += 1
+                protect_lost += decisive and guess.label != truth
+    return {
+        "examples": n,
+        "local_share": round(local / n, 3) if n else 0.0,
+        "local_accuracy": round(correct / local, 3) if local else None,
+        "protected_recall": round(1 - protect_lost / protect_total, 3) if protect_total else None,
+        "local_ms_per_message": round(secs / n * 1000, 3) if n else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    db.init_db()
+    if len(sys.argv) >= 2 and sys.argv[1] == "--stats":
+        print(json.dumps(stats(float(sys.argv[2]) if len(sys.argv) > 2 else 7), indent=2))
+    elif len(sys.argv) >= 2 and sys.argv[1] == "--eval":
+        for name in (sys.argv[2:] or list(SCOPES)):
+            print(name, json.dumps(evaluate(name)))
+    else:
+        print(__doc__)
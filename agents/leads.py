@@ -9,8 +9,8 @@ The website audit is proof the AI works — the real product is the full automat
 (lead gen, social media, SEO monitoring, follow-ups, customer success) running 24/7.
 
 Pipeline:
-  1. Source real AU business leads from Yellow Pages AU (scraper)
-     or Google Places API if key is set
+  1. Source real AU business leads from the Yellow Pages AU backlog
+     (agents/prospects.py) or Google Places API if key is set
   2. Filter out anyone already in the DB (no double-contact)
   3. AI-audit their website + Google presence for specific issues
   4. Generate a personalised email via Claude — positioned as AI business system, not web design
@@ -31,21 +31,22 @@ Schedule: Daily 10:00 AM AEST (new leads) + Tuesday 11:00 AM (follow-ups)
 
 from __future__ import annotations
 
-import base64
-import html as html_lib
 import imaplib
 import json
+import math
 import os
 import random
 import re
 import sys
-import time
+import threading
 import urllib.parse
 import urllib.request
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from email import message_from_bytes
+from email.message import Message
 from email.header import decode_header as _decode_header
 from pathlib import Path
+from typing import Callable
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -53,14 +54,62 @@ from dotenv import load_dotenv
 load_dotenv(Path(__file__).parent.parent / "builder" / ".env")
 
 from agents.base import BaseAgent
+from agents import httpclient as _http
+from agents import intent as _intent
+from agents import calendar_sync as _calendar
+from agents import composer as _composer
+from agents import crawl_cache as _crawl
+from agents import outbox as _outbox
+from agents import pdf_renderer as _pdf
+from agents import prospects as _prospects
+from agents import score_sheet as _score_sheet
+from agents import send_plan as _send_plan
+from agents.staged import StagedPipeline, Stage
 from dashboard import db
 
-import anthropic
-
 # ── Config ────────────────────────────────────────────────────────────────────
 
 DAILY_LIMIT     = 100
 FOLLOW_UP_LIMIT = 20
+
+# Worker threads per outreach stage (see _run_new_outreach).
+# Override with IYS_OUTREACH_WORKERS="verify=4,email=8,..."
+OUTREACH_WORKERS = {
+    "verify": 4, "safety": 1, "email": 6, "audit": 4, "compose": 3, "render": 2,
+    **{
+        k.strip(): int(v)
+        for k, v in (
+            part.split("=", 1)
+            for part in os.environ.get("IYS_OUTREACH_WORKERS", "").split(",") if "=" in part
+        )
+    },
+}
+
+# Safe Browsing — verdicts cached per site URL; sites per request (API max 500
+# threatEntries, up to 3 per site: http/https root + the actual URL)
+SAFE_BROWSING_TTL_DAYS = int(os.environ.get("IYS_SAFE_BROWSING_TTL_DAYS", "7"))
+SAFE_BROWSING_BATCH    = 160
+
+# Business verification cache (see _verify_business)
+VERIFY_TTL_DAYS        = float(os.environ.get("IYS_VERIFY_TTL_DAYS", "30"))
+VERIFY_NEG_TTL_DAYS    = float(os.environ.get("IYS_VERIFY_NEG_TTL_DAYS", "14"))
+VERIFY_CLOSED_TTL_DAYS = float(os.environ.get("IYS_VERIFY_CLOSED_TTL_DAYS", "180"))
+
+# PageSpeed Insights cache — fresh for PSI_TTL_DAYS, then served stale (and
+# refreshed in the background) until PSI_STALE_DAYS
+PSI_TTL_DAYS   = float(os.environ.get("IYS_PSI_TTL_DAYS", "14"))
+PSI_STALE_DAYS = float(os.environ.get("IYS_PSI_STALE_DAYS", "60"))
+
+# Prospect scoring (see _score_prospects) — only the top PROSPECT_TOP_K candidates
+# are enriched; the pool they're picked from is PROSPECT_POOL_FACTOR × larger
+PROSPECT_TOP_K       = int(os.environ.get("IYS_PROSPECT_TOP_K", str(DAILY_LIMIT * 3)))
+PROSPECT_POOL_FACTOR = float(os.environ.get("IYS_PROSPECT_POOL_FACTOR", "1.5"))
+
+# API endpoints — overridable so the agent can run against local stand-in servers
+PLACES_API_BASE        = os.environ.get("IYS_PLACES_API_BASE", "https://maps.googleapis.com/maps/api/place")
+SAFE_BROWSING_API_BASE = os.environ.get("IYS_SAFE_BROWSING_API_BASE", "https://safebrowsing.googleapis.com/v4")
+PSI_API_BASE           = os.environ.get("IYS_PSI_API_BASE", "https://www.googleapis.com/pagespeedonline/v5")
+OSM_API_BASE           = os.environ.get("IYS_OSM_API_BASE", "https://nominatim.openstreetmap.org")
 BOOKING_URL     = "https://improveyoursite.com/book.html"
 FROM_NAME       = "James from ImproveYourSite"
 REPLY_TO        = "hello@improveyoursite.com"
@@ -86,114 +135,103 @@ AU_CITIES = [
 # ── Claude helper ─────────────────────────────────────────────────────────────
 
 def _claude(prompt: str, system: str = "", max_tokens: int = 600) -> str:
-    client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-    kwargs = {
-        "model": "claude-opus-4-6",
-        "max_tokens": max_tokens,
-        "messages": [{"role": "user", "content": prompt}],
-    }
-    if system:
-        kwargs["system"] = system
-    return client.messages.create(**kwargs).content[0].text.strip()
-
+    """Single completion via the shared composer (one client, cached system prompt)."""
+    return _composer.compose(prompt, system=system, max_tokens=max_tokens)
 
-# ── Lead sourcing — Yellow Pages AU scraper ───────────────────────────────────
 
-_YP_HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "en-AU,en;q=0.9",
-}
-
-
-def _yellowpages_search(keyword: str, location: str, max_results: int = 5) -> list[dict]:
+def _compose_for_leads(leads: list[dict], follow_up_num: int) -> dict[int, str]:
     """
-    Scrape Yellow Pages AU for businesses matching keyword in location.
-    Returns list of {name, phone, website, address, place_id}.
+    Email bodies for a list of DB leads in one composer batch.
+    Returns {lead id: body}; leads whose body couldn't be generated are left out.
     """
-    params = urllib.parse.urlencode({
-        "clue": keyword,
-        "locationClue": f"{location} Australia",
-        "pageNumber": "1",
-    })
-    url = f"https://www.yellowpages.com.au/search/listings?{params}"
-    try:
-        req = urllib.request.Request(url, headers=_YP_HEADERS)
-        with urllib.request.urlopen(req, timeout=12) as resp:
-            raw = resp.read().decode("utf-8", errors="ignore")
-    except Exception:
-        return []
+    reqs = []
+    for lead in leads:
+        system, prompt = _build_prompt(
+            lead["business_name"], lead["industry"], lead["city"],
+            lead["audit_issues"], follow_up_num=follow_up_num,
+        )
+        reqs.append(_composer.Request(f"lead-{lead['id']}", prompt, system=system))
+    bodies = _composer.compose_batch(reqs)
+    return {lead["id"]: bodies[f"lead-{lead['id']}"] for lead in leads if f"lead-{lead['id']}" in bodies}
 
-    results = []
 
-    # Extract listing blocks — YP wraps each in a div with data-analytics or listing- id
-    blocks = re.findall(
-        r'<(?:div|li)[^>]+class="[^"]*listing[^"]*"[^>]*>(.*?)</(?:div|li)>',
-        raw, re.DOTALL
-    )
-    if not blocks:
-        # Fallback: find h2/h3 business names near phone/website patterns
-        blocks = re.findall(r'<article[^>]*>(.*?)</article>', raw, re.DOTALL)
+def _verify_norm(name: str, city: str) -> str:
+    """Normalised (name, city) cache key — case, punctuation and company suffixes ignored."""
+    words = re.sub(r"[^\w\s]", " ", re.sub(r"['’]", "", name.lower())).split()
+    words = [w for w in words if w not in {"the", "pty", "ltd", "limited", "co"}]
+    return f"nc:{' '.join(words)}|{city.strip().lower()}"
 
-    for block in blocks[:max_results * 2]:
-        name = _extract_text(re.search(r'<(?:h2|h3)[^>]*>(.*?)</(?:h2|h3)>', block, re.DOTALL))
-        if not name or len(name) < 3:
-            continue
 
-        phone = _extract_text(re.search(
-            r'(?:href="tel:[^"]*">|class="[^"]*phone[^"]*"[^>]*>)(.*?)<',
-            block, re.DOTALL
-        ))
-        if not phone:
-            phone_match = re.search(r'(?:0[2-9]\d{8}|13\d{4,8}|\(0\d\)\s?\d{4}\s?\d{4})', block)
-            phone = phone_match.group(0) if phone_match else ""
-
-        website = ""
-        web_match = re.search(r'href="(https?://[^"]+)"[^>]*>[^<]*[Ww]ebsite', block)
-        if not web_match:
-            web_match = re.search(r'href="(https?://(?!www\.yellowpages)[^"]+)"', block)
-        if web_match:
-            website = web_match.group(1).split("?")[0].rstrip("/")
-
-        address = _extract_text(re.search(
-            r'(?:class="[^"]*address[^"]*"[^>]*>)(.*?)</(?:p|div|span)>',
-            block, re.DOTALL
-        ))
-
-        place_id = f"yp_{re.sub(r'[^a-z0-9]', '_', name.lower())}_{location.lower().replace(' ', '_')}"
-
-        results.append({
-            "name": name.strip(),
-            "phone": phone.strip(),
-            "website": website,
-            "address": address.strip() if address else f"{location}, Australia",
-            "industry": keyword,
-            "city": location,
-            "place_id": place_id,
-            "email": "",
-        })
+def _verification_ttl_days(result: dict) -> float | None:
+    """How long to trust a verification outcome; None = don't cache."""
+    if result.get("maps_source") == "none":
+        return None  # no source answered — likely a network/key problem, retry next run
+    if result["verified"]:
+        return VERIFY_TTL_DAYS
+    if "permanently closed" in result.get("reason", ""):
+        return VERIFY_CLOSED_TTL_DAYS
+    return VERIFY_NEG_TTL_DAYS
 
-        if len(results) >= max_results:
-            break
 
-    time.sleep(1)  # polite rate limiting
-    return results
+def _verification_cache_get(keys: list[str]) -> dict | None:
+    import sqlite3
+    keys = [k for k in keys if k]
+    if not keys:
+        return None
+    try:
+        conn = sqlite3.connect(db.DB_PATH)
+        row = conn.execute(
+            f"SELECT result FROM verification_cache WHERE key IN ({','.join('?' * len(keys))}) "
+            f"AND expires_at > datetime('now') ORDER BY checked_at DESC LIMIT 1",
+            keys,
+        ).fetchone()
+        conn.close()
+    except sqlite3.Error:
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def _verification_cache_put(keys: list[str], result: dict, ttl_days: float):
+    import sqlite3
+    try:
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.executemany(
+            "INSERT OR REPLACE INTO verification_cache (key, verified, result, checked_at, expires_at) "
+            "VALUES (?,?,?,datetime('now'),datetime('now', ?))",
+            [(k, int(result["verified"]), json.dumps(result), f"+{ttl_days} days") for k in keys if k],
+        )
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        pass
 
 
-def _extract_text(match) -> str:
-    if not match:
-        return ""
-    raw = match.group(1) if match.lastindex else match.group(0)
-    raw = re.sub(r'<[^>]+>', ' ', raw)
-    raw = html_lib.unescape(raw)
-    return re.sub(r'\s+', ' ', raw).strip()
+def _verify_business(name: str, city: str, website: str = "", phone: str = "",
+                     place_id: str = "") -> dict:
+    """
+    _verify_business_live() behind the verification_cache table.
+
+    Looked up by the candidate's place_id (YP / seed / Places id) and by the
+    normalised (name, city), so a business rejected yesterday from one source
+    isn't re-verified today from another. Positive outcomes are kept
+    VERIFY_TTL_DAYS, rejections VERIFY_NEG_TTL_DAYS and permanent closures
+    VERIFY_CLOSED_TTL_DAYS. Results with no maps source (nothing answered) are
+    not cached. Cached results carry "cached": True.
+    """
+    keys = [f"pid:{place_id}" if place_id else "", _verify_norm(name, city)]
+    cached = _verification_cache_get(keys)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    result = _verify_business_live(name, city, website=website, phone=phone)
+    ttl = _verification_ttl_days(result)
+    if ttl:
+        maps_pid = result.get("maps_place_id", "")
+        _verification_cache_put(keys + [f"pid:{maps_pid}" if maps_pid else ""], result, ttl)
+    return result
 
 
-def _verify_business(name: str, city: str, website: str = "", phone: str = "") -> dict:
+def _verify_business_live(name: str, city: str, website: str = "", phone: str = "") -> dict:
     """
     Cross-reference a business against Google Places + OpenStreetMap (Nominatim)
     to confirm it exists, is operational, and the data we have is accurate.
@@ -224,10 +262,10 @@ def _verify_business(name: str, city: str, website: str = "", phone: str = "") -
         try:
             query = urllib.parse.quote(f"{name} {city} Australia")
             search_url = (
-                f"https://maps.googleapis.com/maps/api/place/textsearch/json"
+                f"{PLACES_API_BASE}/textsearch/json"
                 f"?query={query}&key={api_key}"
             )
-            with urllib.request.urlopen(search_url, timeout=10) as resp:
+            with _http.urlopen(search_url, timeout=10) as resp:
                 data = json.loads(resp.read())
 
             places = data.get("results", [])
@@ -256,12 +294,12 @@ def _verify_business(name: str, city: str, website: str = "", phone: str = "") -
 
             # Get Place Details: business_status, website, phone
             details_url = (
-                f"https://maps.googleapis.com/maps/api/place/details/json"
+                f"{PLACES_API_BASE}/details/json"
                 f"?place_id={place_id}"
                 f"&fields=business_status,website,formatted_phone_number"
                 f"&key={api_key}"
             )
-            with urllib.request.urlopen(details_url, timeout=10) as resp:
+            with _http.urlopen(details_url, timeout=10) as resp:
                 detail = json.loads(resp.read()).get("result", {})
 
             status = detail.get("business_status", "UNKNOWN")
@@ -276,11 +314,8 @@ def _verify_business(name: str, city: str, website: str = "", phone: str = "") -
             # Website domain cross-check
             corrected_web = ""
             if maps_web:
-                def _domain(u):
-                    m = re.search(r"(?:https?://)?(?:www\.)?([^/?#]+)", u.lower())
-                    return m.group(1) if m else ""
-                our_dom   = _domain(website)
-                maps_dom  = _domain(maps_web)
+                our_dom   = _site_domain(website)
+                maps_dom  = _site_domain(maps_web)
                 if our_dom and maps_dom and our_dom != maps_dom:
                     # Different domains — trust Google Maps; flag corrected website
                     corrected_web = maps_web
@@ -295,6 +330,7 @@ def _verify_business(name: str, city: str, website: str = "", phone: str = "") -
                 "corrected_website": corrected_web,
                 "corrected_phone":   maps_phone if not phone else "",
                 "maps_source":       "google",
+                "maps_place_id":     place_id,
             }
 
         except Exception:
@@ -314,7 +350,7 @@ def _verify_business(name: str, city: str, website: str = "", phone: str = "") -
             req = urllib.request.Request(apple_url, headers={
                 "Authorization": f"Bearer {apple_token}",
             })
-            with urllib.request.urlopen(req, timeout=10) as resp:
+            with _http.urlopen(req, timeout=10) as resp:
                 data = json.loads(resp.read())
 
             places = data.get("results", [])
@@ -340,13 +376,13 @@ def _verify_business(name: str, city: str, website: str = "", phone: str = "") -
     try:
         query = urllib.parse.quote(f"{name}, {city}, Australia")
         osm_url = (
-            f"https://nominatim.openstreetmap.org/search"
+            f"{OSM_API_BASE}/search"
             f"?q={query}&format=json&limit=3&addressdetails=1&countrycodes=au"
         )
         req = urllib.request.Request(osm_url, headers={
             "User-Agent": "IYSLeadsAgent/1.0 (hello@improveyoursite.com)"
         })
-        with urllib.request.urlopen(req, timeout=10) as resp:
+        with _http.urlopen(req, timeout=10) as resp:
             places = json.loads(resp.read())
 
         if not places:
@@ -381,9 +417,9 @@ def _google_places_search(keyword: str, location: str) -> list[dict]:
     if not api_key:
         return []
     query = urllib.parse.quote(f"{keyword} in {location} Australia")
-    url = f"https://maps.googleapis.com/maps/api/place/textsearch/json?query={query}&key={api_key}"
+    url = f"{PLACES_API_BASE}/textsearch/json?query={query}&key={api_key}"
     try:
-        with urllib.request.urlopen(url, timeout=10) as resp:
+        with _http.urlopen(url, timeout=10) as resp:
             data = json.loads(resp.read())
         return [
             {
@@ -403,33 +439,18 @@ def _google_places_search(keyword: str, location: str) -> list[dict]:
 def _find_email_on_website(url: str) -> str:
     """
     Visit a business website and hunt for a contact email address.
-    Tries homepage first, then /contact and /contact-us pages.
+    Tries homepage first, then /contact, /contact-us, /about and /about-us.
+    Pages come from the crawl cache, so the audit reuses the homepage fetch.
     """
     if not url:
         return ""
     if not url.startswith("http"):
         url = "https://" + url
 
-    EMAIL_RE = re.compile(
-        r'[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}',
-        re.IGNORECASE
-    )
-    SKIP_DOMAINS = {"example.com", "sentry.io", "wixpress.com", "googleapis.com",
-                    "placeholder.com", "yoursite.com", "domain.com"}
-
     def _scrape(target_url: str) -> str:
-        try:
-            req = urllib.request.Request(target_url, headers={
-                "User-Agent": "Mozilla/5.0 (compatible; IYS-contact-finder/1.0)"
-            })
-            with urllib.request.urlopen(req, timeout=8) as resp:
-                text = resp.read(60_000).decode("utf-8", errors="ignore")
-            for email in EMAIL_RE.findall(text):
-                domain = email.split("@")[1].lower()
-                if domain not in SKIP_DOMAINS and not domain.endswith(".png") and "." in domain:
-                    return email.lower()
-        except Exception:
-            pass
+        page, _err = _crawl.safe_fetch(target_url)
+        if page and page.ok and page.signals.get("emails"):
+            return page.signals["emails"][0]
         return ""
 
     # Try homepage
@@ -437,51 +458,250 @@ def _find_email_on_website(url: str) -> str:
     if email:
         return email
 
-    # Try /contact and /contact-us
     base = url.rstrip("/")
     for path in ["/contact", "/contact-us", "/about", "/about-us"]:
         email = _scrape(base + path)
         if email:
             return email
-        time.sleep(0.5)
 
     return ""
 
 
+def _site_domain(url: str) -> str:
+    """Bare lowercase host for a website URL ("https://www.Foo.com.au/x" → "foo.com.au")."""
+    m = re.search(r"(?:https?://)?(?:www\.)?([^/?#:]+)", (url or "").strip().lower())
+    return m.group(1) if m else ""
+
+
+def _safe_browsing_key(url: str) -> str:
+    """
+    Cache key for a Safe Browsing verdict: the PSI key plus any query string.
+    A bare homepage keys as its domain ("foo.com.au"), a deep link as
+    "foo.com.au/promo/login?ref=x", so the two get separate verdicts.
+    """
+    query = urllib.parse.urlsplit(url if "://" in url else "https://" + url).query
+    return _psi_key(url) + (f"?{query}" if query else "")
+
+
+def _safe_browsing_cached(keys: list[str]) -> dict[str, bool]:
+    """Cached verdicts younger than SAFE_BROWSING_TTL_DAYS, keyed by _safe_browsing_key."""
+    import sqlite3
+    if not keys:
+        return {}
+    conn = sqlite3.connect(db.DB_PATH)
+    rows = conn.execute(
+        f"SELECT domain, safe FROM safe_browsing_cache "
+        f"WHERE checked_at >= datetime('now', ?) AND domain IN ({','.join('?' * len(keys))})",
+        (f"-{SAFE_BROWSING_TTL_DAYS} days", *keys),
+    ).fetchall()
+    conn.close()
+    return {d: bool(safe) for d, safe in rows}
+
+
+def _safe_browsing_store(verdicts: dict[str, bool]):
+    import sqlite3
+    if not verdicts:
+        return
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.executemany(
+        "INSERT INTO safe_browsing_cache (domain, safe, checked_at) VALUES (?,?,datetime('now')) "
+        "ON CONFLICT(domain) DO UPDATE SET safe=excluded.safe, checked_at=excluded.checked_at",
+        [(key, int(safe)) for key, safe in verdicts.items()],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _safe_browsing_batch(urls: list[str]) -> dict[str, bool]:
+    """
+    Check many websites against Google Safe Browsing in as few requests as possible.
+    Returns {url: True if safe / False if flagged as malware or phishing}.
+
+    Each site is checked as its http/https root plus the actual URL, so a
+    compromised deep link on an otherwise clean domain is caught. Verdicts
+    are cached per site URL for SAFE_BROWSING_TTL_DAYS, so repeat runs only
+    query sites they haven't seen recently. Uncached sites go out in chunks
+    of SAFE_BROWSING_BATCH per POST. Fails open — a network error or missing
+    key counts as safe and is not cached.
+    """
+    sites: dict[str, str] = {}
+    for url in urls:
+        key = _safe_browsing_key(url) if _site_domain(url) else ""
+        if key:
+            sites.setdefault(key, url)
+    verdicts = {key: True for key in sites}
+
+    api_key = os.environ.get("GOOGLE_PLACES_API_KEY", "")  # same key covers Safe Browsing
+    if api_key and sites:
+        try:
+            cached = _safe_browsing_cached(list(sites))
+        except Exception:
+            cached = {}
+        verdicts.update(cached)
+        pending = [key for key in sites if key not in cached]
+        for i in range(0, len(pending), SAFE_BROWSING_BATCH):
+            chunk = {key: sites[key] for key in pending[i:i + SAFE_BROWSING_BATCH]}
+            try:
+                flagged = _safe_browsing_lookup(chunk, api_key)
+            except Exception:
+                continue  # fail open — don't block on network error
+            fresh = {key: key not in flagged for key in chunk}
+            verdicts.update(fresh)
+            try:
+                _safe_browsing_store(fresh)
+            except Exception:
+                pass
+
+    return {url: verdicts.get(_safe_browsing_key(url), True) if _site_domain(url) else True
+            for url in urls}
+
+
+def _safe_browsing_lookup(sites: dict[str, str], api_key: str) -> set[str]:
+    """
+    One threatMatches:find POST for {site key: website URL} → flagged site keys.
+    Matches are mapped back through the exact threatEntry URL that was sent;
+    a root match flags every site on that domain in the chunk.
+    """
+    sent: dict[str, set[str]] = {}
+    for key, url in sites.items():
+        dom = _site_domain(url)
+        entries = [f"http://{dom}/", f"https://{dom}/"]
+        if key != dom:      # deep link — check the page itself, not only the root
+            entries.append(url if "://" in url else "https://" + url)
+        for entry in entries:
+            sent.setdefault(entry, set()).add(key)
+    payload = json.dumps({
+        "client": {"clientId": "iys-leads", "clientVersion": "1.0"},
+        "threatInfo": {
+            "threatTypes":      ["MALWARE", "SOCIAL_ENGINEERING", "UNWANTED_SOFTWARE"],
+            "platformTypes":    ["ANY_PLATFORM"],
+            "threatEntryTypes": ["URL"],
+            "threatEntries":    [{"url": entry} for entry in sent],
+        },
+    }).encode()
+    req = urllib.request.Request(
+        f"{SAFE_BROWSING_API_BASE}/threatMatches:find?key={api_key}",
+        data=payload,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with _http.urlopen(req, timeout=15) as resp:
+        data = json.loads(resp.read())
+    flagged: set[str] = set()
+    for m in data.get("matches", []):
+        matched = m.get("threat", {}).get("url", "")
+        if matched in sent:
+            flagged |= sent[matched]
+        else:   # not echoed verbatim — fall back to the site key, then the domain
+            key = _safe_browsing_key(matched)
+            flagged |= {k for k, url in sites.items()
+                        if k == key or (key == _site_domain(matched) and _site_domain(url) == key)}
+    return flagged
+
+
 def _safe_browsing_check(url: str) -> bool:
     """
     Returns True if the URL is safe, False if flagged as malware/phishing.
     Skips check gracefully if no API key or network error.
     """
-    api_key = os.environ.get("GOOGLE_PLACES_API_KEY", "")  # same key covers Safe Browsing
-    if not api_key or not url:
+    if not url:
         return True
+    return _safe_browsing_batch([url])[url]
+
+
+def _psi_key(url: str) -> str:
+    """Cache key for a website: host without www + path, no scheme/query/fragment/trailing slash."""
+    parts = urllib.parse.urlsplit(url if "://" in url else "https://" + url)
+    host  = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host + parts.path.rstrip("/")
+
+
+def _psi_cache_get(key: str, strategy: str) -> tuple[dict, float] | None:
+    """(cached result, age in days) or None."""
+    import sqlite3
+    try:
+        conn = sqlite3.connect(db.DB_PATH)
+        row = conn.execute(
+            "SELECT result, julianday('now') - julianday(fetched_at) FROM psi_cache "
+            "WHERE url_key=? AND strategy=?",
+            (key, strategy),
+        ).fetchone()
+        conn.close()
+    except sqlite3.Error:
+        return None
+    return (json.loads(row[0]), row[1]) if row else None
+
+
+def _psi_cache_put(key: str, strategy: str, result: dict):
+    import sqlite3
     try:
-        payload = json.dumps({
-            "client": {"clientId": "iys-leads", "clientVersion": "1.0"},
-            "threatInfo": {
-                "threatTypes":      ["MALWARE", "SOCIAL_ENGINEERING", "UNWANTED_SOFTWARE"],
-                "platformTypes":    ["ANY_PLATFORM"],
-                "threatEntryTypes": ["URL"],
-                "threatEntries":    [{"url": url}],
-            },
-        }).encode()
-        req = urllib.request.Request(
-            f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={api_key}",
-            data=payload,
-            headers={"Content-Type": "application/json"},
-            method="POST",
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute(
+            "INSERT INTO psi_cache (url_key, strategy, result, fetched_at) VALUES (?,?,?,datetime('now')) "
+            "ON CONFLICT(url_key, strategy) DO UPDATE SET result=excluded.result, fetched_at=excluded.fetched_at",
+            (key, strategy, json.dumps(result)),
         )
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            data = json.loads(resp.read())
-        return len(data.get("matches", [])) == 0  # empty = safe
-    except Exception:
-        return True  # fail open — don't block on network error
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+_psi_refreshing: set[tuple[str, str]] = set()
+_psi_refresh_lock = threading.Lock()
+
+
+def _psi_refresh_async(url: str, key: str, strategy: str):
+    """Re-run PSI for a stale entry in the background (at most one refresh per key)."""
+    with _psi_refresh_lock:
+        if (key, strategy) in _psi_refreshing:
+            return
+        _psi_refreshing.add((key, strategy))
 
+    def _work():
+        try:
+            fresh = _pagespeed_fetch(url, strategy)
+            if fresh:
+                _psi_cache_put(key, strategy, fresh)
+        finally:
+            with _psi_refresh_lock:
+                _psi_refreshing.discard((key, strategy))
+
+    threading.Thread(target=_work, daemon=True, name=f"psi-refresh-{key[:40]}").start()
+
+
+def _pagespeed_audit(url: str, strategy: str = "mobile") -> dict:
+    """
+    PageSpeed Insights result for url, served from psi_cache when possible.
+
+      age < PSI_TTL_DAYS                 → cached result
+      age < PSI_STALE_DAYS               → cached result now, refreshed in the background
+      older / missing                    → live API call (10–30s), then cached
 
-def _pagespeed_audit(url: str) -> dict:
+    Failed audits ({}) are never cached.
     """
-    Run Google PageSpeed Insights (mobile) and return structured issues.
+    if not url:
+        return {}
+    key    = _psi_key(url)
+    cached = _psi_cache_get(key, strategy)
+    if cached:
+        result, age = cached
+        if age < PSI_TTL_DAYS:
+            return result
+        if age < PSI_STALE_DAYS:
+            _psi_refresh_async(url, key, strategy)
+            return result
+    result = _pagespeed_fetch(url, strategy)
+    if result:
+        _psi_cache_put(key, strategy, result)
+    return result
+
+
+def _pagespeed_fetch(url: str, strategy: str = "mobile") -> dict:
+    """
+    Run Google PageSpeed Insights and return structured issues.
     Falls back to empty dict if API key missing or request fails.
     """
     api_key = os.environ.get("GOOGLE_PLACES_API_KEY", "")
@@ -491,11 +711,11 @@ def _pagespeed_audit(url: str) -> dict:
         url = "https://" + url
     try:
         psi_url = (
-            f"https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
-            f"?url={urllib.parse.quote(url)}&strategy=mobile&key={api_key}"
+            f"{PSI_API_BASE}/runPagespeed"
+            f"?url={urllib.parse.quote(url)}&strategy={strategy}&key={api_key}"
             f"&category=performance&category=seo&category=best-practices"
         )
-        with urllib.request.urlopen(psi_url, timeout=30) as resp:
+        with _http.urlopen(psi_url, timeout=30) as resp:
             data = json.loads(resp.read())
 
         cats    = data.get("lighthouseResult", {}).get("categories", {})
@@ -591,55 +811,49 @@ def _audit_website(url: str) -> dict:
             return result
 
     # ── HTML fallback audit (when PSI fails or gives few issues) ────────────
-    try:
-        req = urllib.request.Request(url, headers={
-            "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) "
-                          "AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148"
-        })
-        start = time.time()
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            elapsed = time.time() - start
-            html = resp.read(40_000).decode("utf-8", errors="ignore")
-            html_lower = html.lower()
-        result["loads"] = True
+    # Same crawl-cache entry the email finder used — no second download
+    page, exc = _crawl.safe_fetch(url)
+    if page is None or not page.ok:
+        if not result["loads"]:
+            reason = exc or f"HTTP {page.status}"
+            result["issues"].append(f"site wouldn't load when we checked — {reason}")
+        return result
 
-        if not psi and elapsed > 3.5:
-            result["slow"] = True
-            result["issues"].append(
-                f"site takes {elapsed:.1f}s to load on mobile — "
-                "most people leave after 3 seconds"
-            )
+    sig = page.signals
+    result["loads"] = True
 
-        if "viewport" not in html:
-            result["issues"].append("not built for mobile — probably looks broken on phones")
+    if not psi and page.elapsed > 3.5:
+        result["slow"] = True
+        result["issues"].append(
+            f"site takes {page.elapsed:.1f}s to load on mobile — "
+            "most people leave after 3 seconds"
+        )
 
-        if not any(k in html_lower for k in ["schema", "application/ld+json", "itemtype"]):
-            result["issues"].append(
-                "missing structured data — Google can't read the business details properly"
-            )
+    if not sig.get("viewport"):
+        result["issues"].append("not built for mobile — probably looks broken on phones")
 
-        if not any(k in html_lower for k in ["review", "testimonial", "★", "star", "rating"]):
-            result["issues"].append("no reviews or social proof visible on the site")
+    if not sig.get("schema"):
+        result["issues"].append(
+            "missing structured data — Google can't read the business details properly"
+        )
 
-        if not any(k in html_lower for k in ["book", "quote", "enquire", "contact", "call now", "get a quote"]):
-            result["issues"].append("no clear call-to-action — visitors don't know what to do next")
+    if not sig.get("reviews"):
+        result["issues"].append("no reviews or social proof visible on the site")
 
-        if not any(k in html_lower for k in ["suburb", "local", "serving", "nsw", "vic", "qld", "wa", "sa", "nt", "act"]):
-            result["issues"].append(
-                "no local area mentions — Google won't rank it for local searches"
-            )
+    if not sig.get("cta"):
+        result["issues"].append("no clear call-to-action — visitors don't know what to do next")
 
-        text_content = re.sub(r'<[^>]+>', ' ', html)
-        word_count = len(text_content.split())
-        if word_count < 300:
-            result["issues"].append(
-                f"very thin content ({word_count} words) — "
-                "Google ranks sites with real information higher"
-            )
+    if not sig.get("local"):
+        result["issues"].append(
+            "no local area mentions — Google won't rank it for local searches"
+        )
 
-    except Exception as exc:
-        if not result["loads"]:
-            result["issues"].append(f"site wouldn't load when we checked — {exc}")
+    word_count = sig.get("word_count", 0)
+    if word_count < 300:
+        result["issues"].append(
+            f"very thin content ({word_count} words) — "
+            "Google ranks sites with real information higher"
+        )
 
     return result
 
@@ -671,69 +885,10 @@ def _generic_issues(industry: str, city: str) -> list[str]:
 
 
 SEED_FILE     = Path(__file__).parent.parent / "social" / "leads_seed.json"
-CALENDAR_FILE = Path(__file__).parent.parent / "social" / "leads_calendar.json"
-GITHUB_REPO   = "anon8597299/smart-tech-innovations"
-
-
-# ── Calendar helpers ──────────────────────────────────────────────────────────
-
-def _read_calendar() -> list[dict]:
-    if CALENDAR_FILE.exists():
-        try:
-            return json.loads(CALENDAR_FILE.read_text())
-        except Exception:
-            pass
-    return []
-
-
-def _write_calendar(cal_leads: list[dict]):
-    """Write calendar locally and push to GitHub so ops.html picks it up."""
-    CALENDAR_FILE.write_text(json.dumps(cal_leads, indent=2) + "\n")
-    pat = os.environ.get("GITHUB_PAT", "")
-    if not pat:
-        return
-    content_b64 = base64.b64encode(
-        (json.dumps(cal_leads, indent=2) + "\n").encode()
-    ).decode()
-    api_url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/social/leads_calendar.json"
-    sha = None
-    try:
-        req = urllib.request.Request(api_url, headers={
-            "Authorization": f"token {pat}",
-            "Accept": "application/vnd.github.v3+json",
-        })
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            sha = json.loads(resp.read()).get("sha")
-    except Exception:
-        pass
-    body: dict = {"message": "Auto: sync leads calendar from reply check", "content": content_b64}
-    if sha:
-        body["sha"] = sha
-    try:
-        req = urllib.request.Request(
-            api_url,
-            data=json.dumps(body).encode(),
-            headers={
-                "Authorization": f"token {pat}",
-                "Accept": "application/vnd.github.v3+json",
-                "Content-Type": "application/json",
-            },
-            method="PUT",
-        )
-        urllib.request.urlopen(req, timeout=10)
-    except Exception:
-        pass  # Non-critical — file is still written locally
 
 
 # ── Auto-reply: booking intent ───────────────────────────────────────────────
 
-_BOOKING_INTENT_KEYWORDS = [
-    "book", "booking", "schedule", "call", "chat", "catch up", "catch-up",
-    "available", "availability", "when", "time", "slot", "appointment",
-    "interested", "yes", "sure", "happy to", "love to", "keen", "sounds good",
-    "how much", "pricing", "price", "cost", "quote", "package",
-]
-
 _BOOKING_REPLY_TEMPLATE = """\
 Hi {name},
 
@@ -756,29 +911,23 @@ hello@improveyoursite.com
 """
 
 
-def _maybe_send_booking_reply(
+def _send_booking_reply(
     to_email: str,
     biz_name: str,
     subject: str,
-    body_text: str,
     gmail_user: str,
     gmail_pass: str,
 ) -> bool:
     """
-    Send a single auto-reply with the booking link if the email body
-    contains booking intent keywords. Returns True if email was sent.
+    Send a single auto-reply with the booking link (the caller has classified
+    the reply as booking intent — agents/intent.py). Returns True if email was queued.
     """
-    import smtplib
     from email.mime.multipart import MIMEMultipart
     from email.mime.text import MIMEText
 
     if not gmail_user or not gmail_pass:
         return False
 
-    combined = (subject + " " + body_text).lower()
-    if not any(kw in combined for kw in _BOOKING_INTENT_KEYWORDS):
-        return False
-
     name = biz_name or "there"
     reply_body = _BOOKING_REPLY_TEMPLATE.format(
         name=name,
@@ -794,9 +943,8 @@ def _maybe_send_booking_reply(
         msg["Reply-To"] = REPLY_TO
         msg.attach(MIMEText(reply_body, "plain"))
 
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(gmail_user, gmail_pass)
-            server.sendmail(gmail_user, to_email, msg.as_string())
+        _outbox.enqueue(msg, to_email, from_addr=gmail_user, agent_id="leads",
+                        ref=f"lead:{to_email.lower()}")
         return True
     except Exception:
         return False
@@ -815,12 +963,153 @@ def _decode_subject(raw: str) -> str:
     return out
 
 
+_IMAP_HEADER_FIELDS = (
+    "FROM SUBJECT MESSAGE-ID CONTENT-TYPE AUTO-SUBMITTED "
+    "X-AUTOREPLY X-AUTORESPOND PRECEDENCE LIST-ID LIST-UNSUBSCRIBE"
+)
+_IMAP_FETCH_CHUNK   = 500     # UIDs per FETCH command
+_IMAP_MAX_ATTEMPTS  = int(os.environ.get("IYS_IMAP_MAX_ATTEMPTS", "3"))   # then a failing message is skipped
+_IMAP_UID_RE        = re.compile(rb"UID (\d+)")
+# Overrides for a local stand-in (agents/replay.py): every inbox is read from
+# IYS_IMAP_HOST, over plain IMAP unless the port is 993
+IMAP_HOST = os.environ.get("IYS_IMAP_HOST", "")
+IMAP_PORT = int(os.environ.get("IYS_IMAP_PORT", "993"))
+
+
+def _imap_connect(host: str) -> imaplib.IMAP4:
+    host = IMAP_HOST or host
+    if IMAP_PORT == 993:
+        return imaplib.IMAP4_SSL(host, IMAP_PORT)
+    return imaplib.IMAP4(host, IMAP_PORT)
+
+
+def _imap_last_uid(account: str, scan: str, uidvalidity: int) -> tuple[int | None, dict[int, int]]:
+    """(highest UID recorded, {uid: attempts} for messages still to retry)."""
+    import sqlite3
+    conn = sqlite3.connect(db.DB_PATH)
+    row = conn.execute(
+        "SELECT MAX(uid) FROM imap_seen WHERE account=? AND scan=? AND uidvalidity=?",
+        (account, scan, uidvalidity),
+    ).fetchone()
+    pending = dict(conn.execute(
+        "SELECT uid, attempts FROM imap_seen WHERE account=? AND scan=? AND uidvalidity=? AND done=0",
+        (account, scan, uidvalidity),
+    ).fetchall())
+    conn.close()
+    return (row[0] if row else None), pending
+
+
+def _imap_record(account: str, scan: str, uidvalidity: int, uids: dict[int, tuple[bool, int, bool]]):
+    """uids: {uid: (matched, failed attempts, done)} — not-done UIDs are retried next scan."""
+    import sqlite3
+    if not uids:
+        return
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.executemany(
+        "INSERT INTO imap_seen (account, scan, uidvalidity, uid, matched, attempts, done) "
+        "VALUES (?,?,?,?,?,?,?) ON CONFLICT (account, scan, uidvalidity, uid) DO UPDATE SET "
+        "matched=excluded.matched, attempts=excluded.attempts, done=excluded.done",
+        [(account, scan, uidvalidity, uid, int(matched), attempts, int(done))
+         for uid, (matched, attempts, done) in uids.items()],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _imap_fetch(mail, uids: list[int], what: str) -> dict[int, bytes]:
+    """UID FETCH in as few round trips as possible → {uid: literal bytes}."""
+    out: dict[int, bytes] = {}
+    for i in range(0, len(uids), _IMAP_FETCH_CHUNK):
+        chunk = ",".join(str(u) for u in uids[i:i + _IMAP_FETCH_CHUNK])
+        typ, data = mail.uid("FETCH", chunk, f"(UID {what})")
+        if typ != "OK":
+            continue
+        for item in data:
+            if isinstance(item, tuple):
+                m = _IMAP_UID_RE.search(item[0])
+                if m:
+                    out[int(m.group(1))] = item[1]
+    return out
+
+
+def _imap_scan(host: str, user: str, passwd: str, scan: str,
+               wanted: Callable[[dict[int, Message]], set[int]],
+               handle: Callable[[int, Message], None]) -> int:
+    """
+    Header-first inbox scan shared by the reply and bounce checkers.
+
+      1. UID SEARCH for messages newer than the last UID this scan recorded
+         (first run: UNSEEN, as before)
+      2. one UID FETCH of BODY.PEEK[HEADER.FIELDS (...)] for all of them
+      3. wanted({uid: headers}) picks the few that matter (one call for the
+         whole batch, so it can do one DB lookup); only those are downloaded
+         in full (one more batched FETCH) and passed to handle(uid, msg)
+      4. every scanned UID is recorded in imap_seen so it's never processed twice.
+         A wanted message whose body can't be fetched or whose handle() raises
+         is recorded as not done and retried on the next scans; after
+         _IMAP_MAX_ATTEMPTS failures it is logged and skipped, so one bad
+         message never holds up the rest of the inbox
+
+    PEEK fetches leave the \\Seen flag alone. Returns the number of messages handled.
+    """
+    mail = _imap_connect(host)
+    try:
+        mail.login(user, passwd)
+        mail.select("INBOX", readonly=True)
+        _, status = mail.status("INBOX", "(UIDVALIDITY)")
+        m = re.search(rb"UIDVALIDITY (\d+)", status[0] or b"")
+        uidvalidity = int(m.group(1)) if m else 0
+
+        last, pending = _imap_last_uid(user, scan, uidvalidity)
+        criteria = f"UID {last + 1}:*" if last is not None else "UNSEEN"
+        _, data = mail.uid("SEARCH", None, criteria)
+        # "n:*" always returns the newest message, even if it's older than n
+        uids = sorted({u for u in map(int, (data[0] or b"").split()) if last is None or u > last}
+                      | set(pending))
+        if not uids:
+            return 0
+
+        headers = {uid: message_from_bytes(raw) for uid, raw in
+                   _imap_fetch(mail, uids, f"BODY.PEEK[HEADER.FIELDS ({_IMAP_HEADER_FIELDS})]").items()}
+        selected = wanted(headers)
+        matched  = [uid for uid in uids if uid in selected]
+        bodies  = _imap_fetch(mail, matched, "BODY.PEEK[]") if matched else {}
+
+        wanted_set = set(matched)
+        seen: dict[int, tuple[bool, int, bool]] = {}
+        try:
+            for uid in uids:
+                if uid not in wanted_set:
+                    seen[uid] = (False, pending.get(uid, 0), True)
+                    continue
+                try:
+                    if uid not in bodies:
+                        raise RuntimeError("body not returned by FETCH")
+                    handle(uid, message_from_bytes(bodies[uid]))
+                    seen[uid] = (True, pending.get(uid, 0), True)
+                except Exception as exc:
+                    attempts = pending.get(uid, 0) + 1
+                    gave_up  = attempts >= _IMAP_MAX_ATTEMPTS
+                    seen[uid] = (False, attempts, gave_up)
+                    db.event_log("leads", "warn",
+                        f"IMAP {scan}: UID {uid} in {user} failed ({attempts}/{_IMAP_MAX_ATTEMPTS}) — {exc}"
+                        + (" — skipping it" if gave_up else " — will retry"))
+        finally:
+            _imap_record(user, scan, uidvalidity, seen)
+        return sum(1 for matched, _, _ in seen.values() if matched)
+    finally:
+        try:
+            mail.logout()
+        except Exception:
+            pass
+
+
 def _check_email_replies() -> int:
     """
     Connect to hello@improveyoursite.com via IMAP and check for replies
     from leads in our database. For each match:
       - Update lead status to 'replied' in SQLite
-      - Add a calendar entry to leads_calendar.json and push to GitHub
+      - Add a calendar entry to leads_calendar.json (pushed to GitHub by agents/calendar_sync.py)
 
     Supports Gmail (App Password) and Microsoft 365 / Outlook accounts.
     IMAP server is auto-detected from the email address domain.
@@ -829,8 +1118,6 @@ def _check_email_replies() -> int:
       HELLO_EMAIL_USER / HELLO_EMAIL_PASS  — hello@improveyoursite.com (Gmail)
       ADMIN_EMAIL_USER / ADMIN_EMAIL_PASS  — admin@improveyoursite.com (Outlook/M365)
     """
-    import sqlite3
-
     # Prefer admin@ if configured, fall back to hello@
     user   = os.environ.get("ADMIN_EMAIL_USER") or os.environ.get("HELLO_EMAIL_USER", "")
     passwd = os.environ.get("ADMIN_EMAIL_PASS") or os.environ.get("HELLO_EMAIL_PASS", "")
@@ -845,107 +1132,123 @@ def _check_email_replies() -> int:
         # Microsoft 365 / Outlook (covers custom domains on M365 too)
         imap_host = "outlook.office365.com"
 
-    added = 0
-    try:
-        mail = imaplib.IMAP4_SSL(imap_host)
-        mail.login(user, passwd)
-        mail.select("INBOX")
-
-        # Only look at unseen (new) emails
-        _, data = mail.search(None, "UNSEEN")
-        msg_ids = data[0].split()
-        if not msg_ids:
-            mail.logout()
-            return 0
+    def _sender(msg: Message) -> str:
+        from_raw = msg.get("From", "")
+        m = re.search(r"<([^>]+)>", from_raw)
+        return m.group(1).lower() if m else from_raw.lower().strip()
 
-        cal_leads = _read_calendar()
+    # Senders of the whole header batch → leads, in one indexed email_norm query
+    leads_by_email: dict[str, dict] = {}
 
-        for msg_id in msg_ids:
-            _, msg_data = mail.fetch(msg_id, "(RFC822)")
-            msg = message_from_bytes(msg_data[0][1])
+    def _wanted(headers: dict[int, Message]) -> set[int]:
+        leads_by_email.update(_leads_by_email([_sender(h) for h in headers.values()]))
+        wanted = set()
+        for uid, h in headers.items():
+            if _norm_email(_sender(h)) not in leads_by_email:
+                continue
+            # Auto-responders from a lead's address are settled by their headers —
+            # logged, but the body is never downloaded
+            if _intent.header_label("reply", h):
+                _intent.classify("reply", _decode_subject(h.get("Subject", "")), "",
+                                 headers=h, message_id=h.get("Message-ID", ""))
+                continue
+            wanted.add(uid)
+        return wanted
+
+    cal_ids   = None
+    new_cal   = []
+
+    def _handle(uid: int, msg: Message):
+        nonlocal cal_ids
+        sender  = _sender(msg)
+        subject = _decode_subject(msg.get("Subject", ""))
+        today   = date.today().isoformat()
+        lead    = leads_by_email[_norm_email(sender)]
+        lead_id, biz_name, industry, city, phone, lead_status = (
+            lead["id"], lead["business_name"], lead["industry"], lead["city"], lead["phone"], lead["status"]
+        )
 
-            # Extract sender address
-            from_raw = msg.get("From", "")
-            m = re.search(r"<([^>]+)>", from_raw)
-            sender = m.group(1).lower() if m else from_raw.lower().strip()
+        # Extract plain-text body for intent analysis
+        body_text = ""
+        if msg.is_multipart():
+            for part in msg.walk():
+                if part.get_content_type() == "text/plain":
+                    charset = part.get_content_charset() or "utf-8"
+                    try:
+                        body_text = part.get_payload(decode=True).decode(charset, errors="ignore")
+                    except Exception:
+                        pass
+                    break
+        else:
+            charset = msg.get_content_charset() or "utf-8"
+            try:
+                body_text = msg.get_payload(decode=True).decode(charset, errors="ignore")
+            except Exception:
+                pass
+
+        intent = _intent.classify("reply", subject, body_text, headers=msg,
+                                  message_id=msg.get("Message-ID", ""))
+        if intent.label == "auto_reply":
+            return   # out-of-office / auto-responder — not a reply, the sequence carries on
+
+        # A step still waiting in the outbox never reached them — drop it, and
+        # answer as the lead stood before it was queued
+        restored = _unqueue_lead(lead["email_norm"], "lead replied", statuses=("contacted", "new"))
+        if restored:
+            lead_status = restored
+
+        # Update status → replied (only if still in contacted/new state)
+        with db.transaction() as c:
+            c.execute(
+                "UPDATE leads SET status='replied' WHERE id=? AND status IN ('contacted','new')",
+                (lead_id,),
+            )
+            # Outcome for prospect scoring — kept even after the lead later goes cold
+            c.execute("UPDATE leads SET replied_at=? WHERE id=? AND replied_at IS NULL",
+                      (date.today().isoformat(), lead_id))
+
+        # Add to calendar (one entry per lead per day)
+        if cal_ids is None:
+            cal_ids = {c.get("id") for c in _calendar.read()}
+        cal_id = f"reply_{lead_id}_{today}"
+        if cal_id not in cal_ids:
+            cal_ids.add(cal_id)
+            new_cal.append({
+                "id": cal_id,
+                "date": today,
+                "business_name": biz_name,
+                "industry": industry or "",
+                "city": city or "",
+                "phone": phone or "",
+                "email": sender,
+                "status": "replied",
+                "notes": f'Replied to outreach email — "{subject[:80]}"',
+            })
 
-            subject = _decode_subject(msg.get("Subject", ""))
-            today = date.today().isoformat()
-
-            # Extract plain-text body for intent analysis
-            body_text = ""
-            if msg.is_multipart():
-                for part in msg.walk():
-                    if part.get_content_type() == "text/plain":
-                        charset = part.get_content_charset() or "utf-8"
-                        try:
-                            body_text = part.get_payload(decode=True).decode(charset, errors="ignore")
-                        except Exception:
-                            pass
-                        break
-            else:
-                charset = msg.get_content_charset() or "utf-8"
-                try:
-                    body_text = msg.get_payload(decode=True).decode(charset, errors="ignore")
-                except Exception:
-                    pass
-
-            # Is this sender a known lead?
-            conn = sqlite3.connect(db.DB_PATH)
-            row = conn.execute(
-                "SELECT id, business_name, industry, city, phone, status "
-                "FROM leads WHERE LOWER(email)=?",
-                (sender,),
-            ).fetchone()
-
-            if row:
-                lead_id, biz_name, industry, city, phone, lead_status = row
-                # Update status → replied (only if still in contacted/new state)
-                conn.execute(
-                    "UPDATE leads SET status='replied' WHERE id=? AND status IN ('contacted','new')",
-                    (lead_id,),
-                )
-                conn.commit()
-
-                # Add to calendar (one entry per lead per day)
-                cal_id = f"reply_{lead_id}_{today}"
-                if not any(c.get("id") == cal_id for c in cal_leads):
-                    cal_leads.append({
-                        "id": cal_id,
-                        "date": today,
-                        "business_name": biz_name,
-                        "industry": industry or "",
-                        "city": city or "",
-                        "phone": phone or "",
-                        "email": sender,
-                        "status": "replied",
-                        "notes": f'Replied to outreach email — "{subject[:80]}"',
-                    })
-                    added += 1
-
-                # Auto-reply with booking link if this looks like booking intent
-                # Only send once — skip if lead was already beyond 'contacted'/'new'
-                if lead_status in ("contacted", "new"):
-                    _maybe_send_booking_reply(sender, biz_name, subject, body_text, user, passwd)
-
-            conn.close()
-
-        if added:
-            _write_calendar(cal_leads)
-
-        mail.logout()
+        # Auto-reply with booking link if this is booking intent
+        # Only send once — skip if lead was already beyond 'contacted'/'new'
+        if lead_status in ("contacted", "new"):
+            if intent.label == "booking":
+                _send_booking_reply(sender, biz_name, subject, user, passwd)
+            lead["status"] = "replied"
 
+    try:
+        _imap_scan(imap_host, user, passwd, "replies", wanted=_wanted, handle=_handle)
     except Exception:
         pass  # Don't crash the agent if inbox check fails
 
-    return added
+    # Written locally now; one debounced, merged commit to GitHub
+    _calendar.upsert(new_cal)
+
+    return len(new_cal)
 
 
 def _check_bounces() -> int:
     """
     Scan the outreach Gmail inbox for bounce-backs and delivery failures.
     Marks the lead as 'bounced' in the DB and logs the bad email address.
-    Also scans hello@ inbox for any misdirected bounce notifications.
+    Also scans hello@ inbox for any misdirected bounce notifications, and
+    picks up outreach the SMTP server rejected outright (5xx in the outbox).
 
     Bounce signals detected:
       - From: MAILER-DAEMON, postmaster, Mail Delivery Subsystem
@@ -977,81 +1280,86 @@ def _check_bounces() -> int:
     bounced_count = 0
     bad_emails: list[dict] = []
 
-    for imap_user, imap_pass, imap_host in inboxes:
-        try:
-            mail = imaplib.IMAP4_SSL(imap_host)
-            mail.login(imap_user, imap_pass)
-            mail.select("INBOX")
-
-            # Search recent unseen
-            _, data = mail.search(None, "UNSEEN")
-            msg_ids = data[0].split()
-
-            for msg_id in msg_ids:
-                _, msg_data = mail.fetch(msg_id, "(RFC822)")
-                msg = message_from_bytes(msg_data[0][1])
-
-                from_raw = msg.get("From", "").lower()
-                subject  = _decode_subject(msg.get("Subject", "")).lower()
-
-                is_bounce = (
-                    any(s in from_raw for s in BOUNCE_SENDERS) or
-                    any(s in subject   for s in BOUNCE_SUBJECTS)
-                )
-                if not is_bounce:
-                    continue
+    def _is_bounce(headers: Message) -> bool:
+        from_raw = headers.get("From", "").lower()
+        subject  = _decode_subject(headers.get("Subject", "")).lower()
+        return (
+            any(s in from_raw for s in BOUNCE_SENDERS) or
+            any(s in subject   for s in BOUNCE_SUBJECTS) or
+            "report-type=delivery-status" in headers.get("Content-Type", "").lower().replace('"', "")
+        )
 
-                # Extract the failed recipient from body
-                body_text = ""
-                if msg.is_multipart():
-                    for part in msg.walk():
-                        ct = part.get_content_type()
-                        if ct in ("text/plain", "message/delivery-status"):
-                            try:
-                                charset = part.get_content_charset() or "utf-8"
-                                body_text += part.get_payload(decode=True).decode(charset, errors="ignore") + "\n"
-                            except Exception:
-                                pass
-                else:
+    def _mark_bounced(bad_email: str, reason: str):
+        nonlocal bounced_count
+        _unqueue_lead(bad_email, "lead bounced")
+        # Mark in DB using shared thread-local connection
+        with db.transaction() as _conn:
+            rows_updated = _conn.execute(
+                "UPDATE leads SET status='bounced' WHERE email_norm=? AND status NOT IN ('bounced','cold')",
+                (bad_email,),
+            ).rowcount
+            if rows_updated:
+                biz = _conn.execute(
+                    "SELECT business_name FROM leads WHERE email_norm=?", (bad_email,)
+                ).fetchone()
+                biz_name = biz[0] if biz else "Unknown"
+                bad_emails.append({"email": bad_email, "business": biz_name, "reason": reason[:120]})
+                bounced_count += 1
+        if rows_updated:
+            db.event_log("leads", "warn",
+                f"Bounce detected — {bad_email} ({biz_name}): marked bounced. Subject: {reason[:80]}")
+
+    def _handle(uid: int, msg: Message):
+        subject = _decode_subject(msg.get("Subject", "")).lower()
+
+        # Extract the failed recipient from body
+        body_text = ""
+        if msg.is_multipart():
+            for part in msg.walk():
+                ct = part.get_content_type()
+                if ct in ("text/plain", "message/delivery-status"):
                     try:
-                        body_text = msg.get_payload(decode=True).decode("utf-8", errors="ignore")
+                        charset = part.get_content_charset() or "utf-8"
+                        body_text += part.get_payload(decode=True).decode(charset, errors="ignore") + "\n"
                     except Exception:
                         pass
+        else:
+            try:
+                body_text = msg.get_payload(decode=True).decode("utf-8", errors="ignore")
+            except Exception:
+                pass
+
+        # Find email addresses in bounce body — the failed recipient
+        found_emails = re.findall(r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}", body_text)
+        # Filter out our own domains
+        failed_addrs = [
+            e for e in found_emails
+            if "improveyoursite" not in e and "google" not in e and "mailer" not in e
+        ]
+        # Most DSNs quote the original headers — match its Message-ID against the outbox
+        own_id = msg.get("Message-ID", "")
+        quoted = {m for m in re.findall(r"(?im)^message-id:\s*(<[^>\s]+>)", msg.as_string())
+                  if m != own_id}
+        for row in _outbox.lookup_message_ids(list(quoted)):
+            failed_addrs.append(row["to_addr"])
+            db.outbox_mark(row["id"], "bounced", error=subject[:200])
 
-                # Find email addresses in bounce body — the failed recipient
-                found_emails = re.findall(r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}", body_text)
-                # Filter out our own domains
-                failed_addrs = [
-                    e for e in found_emails
-                    if "improveyoursite" not in e and "google" not in e and "mailer" not in e
-                ]
-
-                for bad_email in set(failed_addrs):
-                    bad_email = bad_email.lower().strip()
-                    # Mark in DB using shared thread-local connection
-                    with db.transaction() as _conn:
-                        rows_updated = _conn.execute(
-                            "UPDATE leads SET status='bounced' WHERE LOWER(email)=? AND status NOT IN ('bounced','cold')",
-                            (bad_email,),
-                        ).rowcount
-                        if rows_updated:
-                            biz = _conn.execute(
-                                "SELECT business_name FROM leads WHERE LOWER(email)=?", (bad_email,)
-                            ).fetchone()
-                            biz_name = biz[0] if biz else "Unknown"
-                            bad_emails.append({"email": bad_email, "business": biz_name, "reason": subject[:120]})
-                            bounced_count += 1
-                    if rows_updated:
-                        db.event_log("leads", "warn",
-                            f"Bounce detected — {bad_email} ({biz_name}): marked bounced. Subject: {subject[:80]}")
-
-                # Mark the bounce email as seen so we don't re-process
-                mail.store(msg_id, "+FLAGS", "\\Seen")
+        for bad_email in {_norm_email(e) for e in failed_addrs}:
+            _mark_bounced(bad_email, subject)
 
-            mail.logout()
+    for imap_user, imap_pass, imap_host in inboxes:
+        try:
+            _imap_scan(imap_host, imap_user, imap_pass, "bounces", handle=_handle,
+                       wanted=lambda headers: {uid for uid, h in headers.items() if _is_bounce(h)})
         except Exception as exc:
             db.event_log("leads", "warn", f"Bounce check failed for {imap_user}: {exc}")
 
+    # Refused at send time (5xx) — no DSN will ever arrive, so handle them here
+    rejected = _outbox.rejections("leads")
+    for row in rejected:
+        _mark_bounced(_norm_email(row["to_addr"]), f"rejected by SMTP server: {row['last_error'] or ''}")
+    _outbox.mark_reported([row["id"] for row in rejected])
+
     # Email James a summary of new bad emails
     if bad_emails:
         lines = "\n".join(
@@ -1072,8 +1380,7 @@ def _check_bounces() -> int:
 
 
 def _send_notification_email(to: str, subject: str, body: str):
-    """Send a plain-text notification email via the outreach Gmail account."""
-    import smtplib
+    """Queue a plain-text notification email from the outreach Gmail account."""
     from email.mime.text import MIMEText
     gmail_user = os.environ.get("GMAIL_USER", "")
     gmail_pass = os.environ.get("GMAIL_APP_PASS", "")
@@ -1084,9 +1391,7 @@ def _send_notification_email(to: str, subject: str, body: str):
         msg["Subject"] = subject
         msg["From"]    = gmail_user
         msg["To"]      = to
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as s:
-            s.login(gmail_user, gmail_pass)
-            s.sendmail(gmail_user, [to], msg.as_string())
+        _outbox.enqueue(msg, to, from_addr=gmail_user, agent_id="leads")
     except Exception:
         pass
 
@@ -1101,29 +1406,158 @@ def _load_seed_targets() -> list[dict]:
         return []
 
 
-def _generate_lead_targets(n: int = 30) -> list[dict]:
-    targets = []
+# ── Prospect scoring ──────────────────────────────────────────────────────────
+#
+# Ranks candidates on signals that cost nothing to read, so PSI / Places /
+# scraping / Opus calls are spent on the likeliest replies first:
+#
+#   p_reply    — smoothed reply rate per industry, city and source (seed /
+#                places / yp) from the leads table, combined in log-odds
+#                around the overall rate. Each value's rate is shrunk towards
+#                the overall rate until it has ~PRIOR_WEIGHT sends behind it,
+#                plus a small upper-confidence bonus so rarely tried values
+#                still get explored. Recomputed every run, so it keeps
+#                learning from replied_at.
+#   p_verified — share of candidates in that city that passed Maps
+#                verification (verification_cache)
+#   p_email    — 1 if we already have an address, else the chance of
+#                scraping one (website) or nothing (no website)
+#
+# score = p_verified × p_email × p_reply / expected enrichment cost
+
+_PRIOR_WEIGHT  = 20      # pseudo-sends behind the overall rate
+_EXPLORE       = 0.5     # UCB bonus, in standard errors
+_BASE_REPLY    = 0.03    # overall reply rate before we have data
+_P_SCRAPE_HIT  = 0.45    # chance a website yields an email
+# Relative cost of each enrichment step (verify ≈ 1)
+_COST_VERIFY, _COST_SCRAPE, _COST_AUDIT, _COST_COMPOSE = 1.0, 1.0, 2.0, 4.0
+
+
+def _logit(p: float) -> float:
+    p = min(max(p, 1e-4), 1 - 1e-4)
+    return math.log(p / (1 - p))
+
+
+def _prospect_source(place_id: str) -> str:
+    if place_id.startswith("seed_"):
+        return "seed"
+    if place_id.startswith("yp_"):
+        return "yp"
+    return "places" if place_id else "unknown"
+
+
+def _prospect_model() -> dict:
+    """Reply and verification statistics the scorer reads (one pass over leads + verification_cache)."""
+    import sqlite3
+    conn = sqlite3.connect(db.DB_PATH)
+    sent = replied = 0
+    by = {"industry": {}, "city": {}, "source": {}}
+    for industry, city, place_id, did_reply in conn.execute(
+        "SELECT LOWER(COALESCE(industry,'')), LOWER(COALESCE(city,'')), COALESCE(place_id,''), "
+        "replied_at IS NOT NULL OR status IN ('replied','low_interest') "
+        "FROM leads WHERE email_count >= 1"
+    ):
+        sent += 1
+        replied += did_reply
+        for feature, value in (("industry", industry), ("city", city), ("source", _prospect_source(place_id))):
+            n, r = by[feature].get(value, (0, 0))
+            by[feature][value] = (n + 1, r + did_reply)
+
+    verified = {}
+    for key, ok in conn.execute("SELECT key, verified FROM verification_cache WHERE key LIKE 'nc:%'"):
+        city = key.rsplit("|", 1)[-1]
+        n, v = verified.get(city, (0, 0))
+        verified[city] = (n + 1, v + ok)
+    conn.close()
+
+    base = (replied + _PRIOR_WEIGHT * _BASE_REPLY) / (sent + _PRIOR_WEIGHT)
+    total_checked = sum(n for n, _ in verified.values())
+    base_verified = (sum(v for _, v in verified.values()) + 7) / (total_checked + 10)
+    return {"sent": sent, "replied": replied, "base": base, "by": by,
+            "verified": verified, "base_verified": base_verified}
+
+
+def _smoothed(counts: tuple[int, int] | None, base: float) -> float:
+    n, r = counts or (0, 0)
+    rate = (r + _PRIOR_WEIGHT * base) / (n + _PRIOR_WEIGHT)
+    return rate + _EXPLORE * math.sqrt(rate * (1 - rate) / (n + _PRIOR_WEIGHT))
+
+
+def _score_prospect(p: dict, model: dict) -> float:
+    base = model["base"]
+    place_id = p.get("place_id", "") or ""
+    logit = _logit(base)
+    for feature, value in (
+        ("industry", (p.get("industry") or "").lower()),
+        ("city",     (p.get("city") or "").lower()),
+        ("source",   _prospect_source(place_id)),
+    ):
+        logit += _logit(_smoothed(model["by"][feature].get(value), base)) - _logit(base)
+    p_reply = 1 / (1 + math.exp(-logit))
+
+    n, v = model["verified"].get((p.get("city") or "").strip().lower(), (0, 0))
+    p_verified = (v + 10 * model["base_verified"]) / (n + 10)
+
+    has_email   = bool((p.get("email") or "").strip())
+    has_website = bool((p.get("website") or "").strip())
+    p_email = 1.0 if has_email else (_P_SCRAPE_HIT if has_website else 0.0)
+
+    cost = (
+        _COST_VERIFY
+        + p_verified * (0 if has_email else _COST_SCRAPE * has_website)
+        + p_verified * p_email * (_COST_AUDIT + _COST_COMPOSE)
+    )
+    return p_verified * p_email * p_reply / cost
+
+
+def _score_prospects(prospects: list[dict], model: dict | None = None) -> list[dict]:
+    """Prospects sorted best-first; each gets a "score"."""
+    model = model or _prospect_model()
+    for p in prospects:
+        p["score"] = round(_score_prospect(p, model), 6)
+    return sorted(prospects, key=lambda p: p["score"], reverse=True)
+
+
+def _generate_lead_targets(n: int = 30, known: "_KnownLeads | None" = None) -> list[dict]:
+    """
+    Build a candidate pool of ~n × PROSPECT_POOL_FACTOR — seed file first, then
+    the Yellow Pages backlog (agents/prospects.py, topped up from stale pages
+    of the best-scoring industry/city searches), then Google Places — drop
+    anything already in the leads table, and return the top n by
+    _score_prospect().
+    """
+    pool_size = int(n * PROSPECT_POOL_FACTOR)
+    model = _prospect_model()
+
+    def _is_new(p: dict) -> bool:
+        return not (known and known.match(p.get("place_id", ""), p.get("email", ""),
+                                          p.get("website", ""), p.get("phone", "")))
+
+    pairs = [{"industry": i, "city": c, "website": "x", "place_id": "yp_"}
+             for i in TARGET_INDUSTRIES for c in AU_CITIES]
+    random.shuffle(pairs)   # break ties between untried pairs
+    pairs = _score_prospects(pairs, model)
 
     # Seed file first — real prospects with known websites
-    for prospect in _load_seed_targets():
-        if len(targets) >= n:
-            break
-        targets.append(prospect)
+    targets = [p for p in _load_seed_targets() if _is_new(p)]
+
+    # Yellow Pages backlog — refresh stale pages, most promising searches first
+    if len(targets) < pool_size:
+        _prospects.refresh([(p["industry"], p["city"]) for p in pairs])
+        backlog = _prospects.backlog(pool_size * 4)
+        fresh   = [p for p in backlog if _is_new(p)]
+        # Already a lead under another id — nothing left to enrich
+        _prospects.mark_enriched([p["place_id"] for p in backlog if not _is_new(p)])
+        targets.extend(fresh)
 
     # Supplement with Google Places if API key is set
-    if len(targets) < n:
-        industries = TARGET_INDUSTRIES.copy()
-        cities = AU_CITIES.copy()
-        random.shuffle(industries)
-        random.shuffle(cities)
-        for i, industry in enumerate(industries):
-            if len(targets) >= n:
+    if len(targets) < pool_size and os.environ.get("GOOGLE_PLACES_API_KEY"):
+        for pair in pairs[:len(TARGET_INDUSTRIES)]:
+            if len(targets) >= pool_size:
                 break
-            city = cities[i % len(cities)]
-            found = _google_places_search(industry, city)
-            targets.extend(found)
+            targets.extend(p for p in _google_places_search(pair["industry"], pair["city"]) if _is_new(p))
 
-    return targets[:n]
+    return _score_prospects(targets, model)[:n]
 
 
 # ── Email generation ──────────────────────────────────────────────────────────
@@ -1497,40 +1931,215 @@ def _ensure_leads_table():
         ("maps_verified",     "INTEGER DEFAULT 0"),
         ("maps_confidence",   "TEXT"),
         ("maps_source",       "TEXT"),
+        ("email_norm",        "TEXT"),
+        ("website_domain",    "TEXT"),
+        ("replied_at",        "TEXT"),
+        ("next_action",       "TEXT"),
+        ("next_action_at",    "TEXT"),
     ]:
         try:
             conn.execute(f"ALTER TABLE leads ADD COLUMN {col} {typedef}")
         except Exception:
             pass  # already exists
+    _backfill_lead_keys(conn)
+    # One lead per normalised address (NULL = no email, or a legacy duplicate)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_email_norm ON leads(email_norm)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_website_domain ON leads(website_domain)")
+    _ensure_lead_sequence(conn)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS verification_cache (
+            key         TEXT PRIMARY KEY,
+            verified    INTEGER NOT NULL,
+            result      TEXT NOT NULL,
+            checked_at  TEXT NOT NULL,
+            expires_at  TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS psi_cache (
+            url_key     TEXT NOT NULL,
+            strategy    TEXT NOT NULL,
+            result      TEXT NOT NULL,
+            fetched_at  TEXT NOT NULL,
+            PRIMARY KEY (url_key, strategy)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS safe_browsing_cache (
+            domain      TEXT PRIMARY KEY,       -- _safe_browsing_key: domain, or domain + path for deep links
+            safe        INTEGER NOT NULL,
+            checked_at  TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS imap_seen (
+            account      TEXT NOT NULL,
+            scan         TEXT NOT NULL,
+            uidvalidity  INTEGER NOT NULL,
+            uid          INTEGER NOT NULL,
+            matched      INTEGER NOT NULL DEFAULT 0,
+            attempts     INTEGER NOT NULL DEFAULT 0,
+            done         INTEGER NOT NULL DEFAULT 1,
+            seen_at      TEXT NOT NULL DEFAULT (datetime('now')),
+            PRIMARY KEY (account, scan, uidvalidity, uid)
+        )
+    """)
+    for col in ("attempts INTEGER NOT NULL DEFAULT 0", "done INTEGER NOT NULL DEFAULT 1"):
+        try:
+            conn.execute(f"ALTER TABLE imap_seen ADD COLUMN {col}")
+        except sqlite3.OperationalError:
+            pass  # already exists
     conn.commit()
     conn.close()
 
 
-def _lead_exists(place_id: str) -> bool:
+def _backfill_lead_keys(conn):
+    """Fill email_norm / website_domain for rows written before those columns existed."""
+    # website_domain is always set ('' if none) once a row has been keyed
+    rows = conn.execute(
+        "SELECT id, email, website FROM leads WHERE website_domain IS NULL ORDER BY id"
+    ).fetchall()
+    if not rows:
+        return
+    taken = {r[0] for r in conn.execute("SELECT email_norm FROM leads WHERE email_norm IS NOT NULL")}
+    updates = []
+    for lead_id, email, website in rows:
+        norm = _norm_email(email or "") or None
+        if norm in taken:
+            norm = None   # later duplicate of an existing lead — keep the row, not the key
+        taken.add(norm)
+        updates.append((norm, _site_domain(website or ""), lead_id))
+    conn.executemany("UPDATE leads SET email_norm=?, website_domain=? WHERE id=?", updates)
+
+
+# Hosts many unrelated businesses "have" as a website — never a dedup signal
+_SHARED_SITE_DOMAINS = {"facebook.com", "m.facebook.com", "instagram.com", "linktr.ee",
+                        "google.com", "business.google.com", "sites.google.com", "yellowpages.com.au"}
+
+
+def _norm_email(email: str) -> str:
+    """Lowercased, trimmed, "+tag" dropped: " Jo+Quotes@Foo.com " → "jo@foo.com"."""
+    email = (email or "").strip().lower()
+    local, at, domain = email.partition("@")
+    if not at:
+        return email
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def _leads_by_email(emails: list[str]) -> dict[str, dict]:
+    """Batch lookup on the email_norm index → {normalised email: lead row}."""
     import sqlite3
+    norms = sorted({_norm_email(e) for e in emails if _norm_email(e)})
+    if not norms:
+        return {}
     conn = sqlite3.connect(db.DB_PATH)
-    row = conn.execute("SELECT id FROM leads WHERE place_id=?", (place_id,)).fetchone()
+    conn.row_factory = sqlite3.Row
+    out = {}
+    for i in range(0, len(norms), 500):
+        chunk = norms[i:i + 500]
+        for r in conn.execute(
+            "SELECT id, email_norm, email, business_name, industry, city, phone, status FROM leads "
+            f"WHERE email_norm IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ):
+            out[r["email_norm"]] = dict(r)
     conn.close()
-    return row is not None
+    return out
+
+
+def _norm_phone(phone: str) -> str:
+    """Last 9 digits, so "+61 2 9876 5432" and "(02) 9876 5432" match."""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-9:] if len(digits) >= 8 else ""
+
+
+class _KnownLeads:
+    """
+    Run-scoped dedup index over the leads table: place_ids, emails, website
+    domains and phone numbers, loaded with one query at the start of a run.
+    Prospects are checked against it before any network work (and again once
+    verification/scraping reveals a corrected website or an email), instead of
+    being fully enriched only for INSERT OR IGNORE to drop them.
+
+    Plain hash sets: a few thousand leads is well under a megabyte.
+    add() records prospects claimed during the run, so two candidates for the
+    same business from different sources don't both go through.
+    """
+
+    def __init__(self):
+        self.place_ids: set[str] = set()
+        self.emails:    set[str] = set()
+        self.domains:   set[str] = set()
+        self.phones:    set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls) -> "_KnownLeads":
+        import sqlite3
+        idx  = cls()
+        conn = sqlite3.connect(db.DB_PATH)
+        for place_id, email, website, phone in conn.execute(
+            "SELECT place_id, email_norm, website_domain, phone FROM leads"
+        ):
+            idx._add(place_id or "", email or "", website or "", phone or "")
+        conn.close()
+        return idx
+
+    def _add(self, place_id: str, email: str, website: str, phone: str):
+        if place_id:
+            self.place_ids.add(place_id)
+        if _norm_email(email):
+            self.emails.add(_norm_email(email))
+        domain = _site_domain(website)
+        if domain and domain not in _SHARED_SITE_DOMAINS:
+            self.domains.add(domain)
+        if _norm_phone(phone):
+            self.phones.add(_norm_phone(phone))
+
+    def match(self, place_id: str = "", email: str = "", website: str = "", phone: str = "") -> str:
+        """Which identifier is already known ("place_id", "email", ...), or "" if none."""
+        if place_id and place_id in self.place_ids:
+            return "place_id"
+        if email and _norm_email(email) in self.emails:
+            return "email"
+        if website and _site_domain(website) in self.domains:
+            return "website"
+        if phone and _norm_phone(phone) and _norm_phone(phone) in self.phones:
+            return "phone"
+        return ""
+
+    def claim(self, place_id: str = "", email: str = "", website: str = "", phone: str = "") -> str:
+        """Atomic match() + add(): returns "" and records the prospect if it's new."""
+        with self._lock:
+            hit = self.match(place_id, email, website, phone)
+            if not hit:
+                self._add(place_id, email, website, phone)
+            return hit
+
+    def __len__(self) -> int:
+        return len(self.place_ids) + len(self.emails) + len(self.domains) + len(self.phones)
 
 
 def _insert_lead(lead: dict) -> int:
+    """Record a contacted lead; lead["last_emailed"] (a date) defaults to today."""
     import sqlite3
     conn = sqlite3.connect(db.DB_PATH)
     cur = conn.execute(
         """INSERT OR IGNORE INTO leads
            (business_name,industry,city,email,website,phone,place_id,
             audit_issues,status,email_count,last_emailed,
-            maps_verified,maps_confidence,maps_source)
-           VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
+            maps_verified,maps_confidence,maps_source,email_norm,website_domain)
+           VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
         (
             lead["business_name"], lead.get("industry",""), lead.get("city",""),
             lead.get("email",""), lead.get("website",""), lead.get("phone",""),
             lead.get("place_id",""), json.dumps(lead.get("audit_issues",[])),
-            "contacted", 1, date.today().isoformat(),
+            "contacted", 1, (lead.get("last_emailed") or date.today()).isoformat(),
             1 if lead.get("maps_verified") else 0,
             lead.get("maps_confidence",""),
             lead.get("maps_source",""),
+            _norm_email(lead.get("email","")) or None,
+            _site_domain(lead.get("website","")),
         ),
     )
     conn.commit()
@@ -1539,78 +2148,176 @@ def _insert_lead(lead: dict) -> int:
     return lid
 
 
-def _leads_due_followup(email_count: int, days_since: int) -> list[dict]:
+# ── Lead sequence ─────────────────────────────────────────────────────────────
+#
+# Every lead carries its next scheduled step in next_action / next_action_at,
+# kept current by SQLite triggers built from _LEAD_SEQUENCE — so it stays right
+# however the row changes (our sends, replies, bounces, or James setting
+# status='low_interest' by hand). Due work is one range scan on
+# idx_leads_next_action. Adding a step means adding a row here: the triggers
+# and existing leads are rebuilt once, on the next _ensure_leads_table().
+
+# (action, applies when (SQL on the lead row), due (SQL date), follow_up for _claude, after sending → (email_count, status))
+_LEAD_SEQUENCE = (
+    # Follow-up #1 — day 4 after first contact
+    ("followup1", "status='contacted' AND email_count=1", "date(last_emailed,'+4 days')", 1,  (2, "contacted")),
+    # Follow-up #2 (final) — day 10 after first contact, then go cold
+    ("followup2", "status='contacted' AND email_count=2", "date(last_emailed,'+6 days')", 2,  (3, "cold")),
+    # Low interest (set manually) — one win-back, then cold for good
+    ("winback",   "status='low_interest'",                "date('now','localtime')",      99, (99, "cold")),
+    # Cold — "here's what you missed" at the 90-day mark, once (email_count 98)
+    ("reengage",  "status='cold' AND email_count<98 AND reengagement_date IS NOT NULL",
+                  "reengagement_date",                                                   98, (98, "cold")),
+)
+_SEQUENCE_STEPS = {action: (follow_up, then) for action, _, _, follow_up, then in _LEAD_SEQUENCE}
+
+
+def _sequence_sql() -> str:
+    """SET clause recomputing next_action / next_action_at from the row's own columns."""
+    action = " ".join(f"WHEN {when} THEN '{name}'" for name, when, _, _, _ in _LEAD_SEQUENCE)
+    due    = " ".join(f"WHEN {when} THEN {at}" for _, when, at, _, _ in _LEAD_SEQUENCE)
+    return f"next_action = CASE {action} END, next_action_at = CASE {due} END"
+
+
+def _ensure_lead_sequence(conn):
+    """(Re)build the next-action triggers and index; recompute every lead only if the rules changed."""
+    sql = {
+        "leads_next_action_ins":
+            f"CREATE TRIGGER leads_next_action_ins AFTER INSERT ON leads "
+            f"BEGIN UPDATE leads SET {_sequence_sql()} WHERE id = NEW.id; END",
+        "leads_next_action_upd":
+            f"CREATE TRIGGER leads_next_action_upd "
+            f"AFTER UPDATE OF status, email_count, last_emailed, reengagement_date ON leads "
+            f"BEGIN UPDATE leads SET {_sequence_sql()} WHERE id = NEW.id; END",
+    }
+    current = dict(conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='trigger' AND name IN (?, ?)", tuple(sql)
+    ).fetchall())
+    if current != sql:
+        for name, create in sql.items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(create)
+        conn.execute(f"UPDATE leads SET {_sequence_sql()}")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_leads_next_action ON leads(next_action_at) "
+        "WHERE next_action IS NOT NULL"
+    )
+
+
+def _leads_due_actions(limit: int = 500) -> list[dict]:
+    """Leads whose next step is due today or earlier, oldest first (one scan of idx_leads_next_action)."""
     import sqlite3
-    cutoff = (date.today() - timedelta(days=days_since)).isoformat()
     conn = sqlite3.connect(db.DB_PATH)
     rows = conn.execute(
-        """SELECT id,business_name,industry,city,email,audit_issues
+        """SELECT id,business_name,industry,city,email,audit_issues,next_action,next_action_at,
+                  place_id,website
            FROM leads
-           WHERE status='contacted' AND email_count=? AND last_emailed<=?""",
-        (email_count, cutoff),
+           WHERE next_action IS NOT NULL AND next_action_at <= ?
+           ORDER BY next_action_at, id
+           LIMIT ?""",
+        (date.today().isoformat(), limit),
     ).fetchall()
     conn.close()
     return [
-        {"id":r[0],"business_name":r[1],"industry":r[2],
-         "city":r[3],"email":r[4],"audit_issues":json.loads(r[5] or "[]")}
+        {"id": r[0], "business_name": r[1], "industry": r[2], "city": r[3], "email": r[4],
+         "audit_issues": json.loads(r[5] or "[]"), "next_action": r[6], "next_action_at": r[7],
+         "place_id": r[8] or "", "website": r[9] or ""}
         for r in rows
     ]
 
 
-def _leads_low_interest() -> list[dict]:
-    """Leads James manually marked as low_interest — get one win-back email, then cold."""
-    import sqlite3
-    conn = sqlite3.connect(db.DB_PATH)
-    rows = conn.execute(
-        "SELECT id,business_name,industry,city,email,audit_issues FROM leads WHERE status='low_interest'"
-    ).fetchall()
-    conn.close()
-    return [
-        {"id":r[0],"business_name":r[1],"industry":r[2],
-         "city":r[3],"email":r[4],"audit_issues":json.loads(r[5] or "[]")}
-        for r in rows
-    ]
+def _due_sequence() -> list[dict]:
+    """Today's sequence sends (follow-ups capped at FOLLOW_UP_LIMIT), each with a prospect "score"."""
+    due, followups = [], 0
+    for lead in _leads_due_actions():
+        if lead["next_action"] not in _SEQUENCE_STEPS:
+            continue
+        if lead["next_action"].startswith("followup"):
+            if followups >= FOLLOW_UP_LIMIT:
+                continue
+            followups += 1
+        due.append(lead)
+    return _score_prospects(due) if due else []
 
 
-def _update_lead(lead_id: int, email_count: int, status: str):
+def _update_lead(lead_id: int, email_count: int, status: str, sent_on: date | None = None):
+    """Advance a lead after an email; sent_on (the planned send date) defaults to today."""
     import sqlite3
+    sent_on = sent_on or date.today()
     conn = sqlite3.connect(db.DB_PATH)
     # When a lead first goes cold, schedule a 3-month re-engagement
     if status == "cold" and email_count < 98:
-        reengagement_date = (date.today() + timedelta(days=90)).isoformat()
+        reengagement_date = (sent_on + timedelta(days=90)).isoformat()
         conn.execute(
             "UPDATE leads SET email_count=?,last_emailed=?,status=?,reengagement_date=? WHERE id=?",
-            (email_count, date.today().isoformat(), status, reengagement_date, lead_id),
+            (email_count, sent_on.isoformat(), status, reengagement_date, lead_id),
         )
     else:
         conn.execute(
             "UPDATE leads SET email_count=?,last_emailed=?,status=? WHERE id=?",
-            (email_count, date.today().isoformat(), status, lead_id),
+            (email_count, sent_on.isoformat(), status, lead_id),
         )
     conn.commit()
     conn.close()
 
 
-def _leads_due_reengagement() -> list[dict]:
-    """Cold leads whose 90-day re-engagement date has arrived."""
+# Sequence mail waits in the outbox until its send-plan slot, but the lead is
+# advanced when it's queued (so the next run doesn't queue the step again).
+# Each message carries a guard — the lead state it was planned for, and the
+# state before — so a reply, bounce or status change in between stops it.
+
+def _lead_guard(email: str, then: tuple[int, str], lead_id: int | None = None) -> dict:
+    """Outbox guard for a lead email: expected (email_count, status) at delivery + the state it replaces."""
+    import sqlite3
+    prev = None
+    if lead_id is not None:
+        conn = sqlite3.connect(db.DB_PATH)
+        row = conn.execute(
+            "SELECT email_count, status, last_emailed, reengagement_date FROM leads WHERE id=?", (lead_id,)
+        ).fetchone()
+        conn.close()
+        if row:
+            prev = dict(zip(("email_count", "status", "last_emailed", "reengagement_date"), row))
+    return {"email": _norm_email(email), "expect": list(then), "prev": prev}
+
+
+def _lead_still_due(guard: dict) -> str | None:
+    """Outbox guard check: None if the lead is still where the email was planned for, else why not."""
+    import sqlite3
+    conn = sqlite3.connect(db.DB_PATH)
+    row = conn.execute("SELECT email_count, status FROM leads WHERE email_norm=?", (guard["email"],)).fetchone()
+    conn.close()
+    if row is None or list(row) == guard["expect"]:
+        return None    # new outreach is queued just before its lead row is written
+    return f"lead is now {row[1]} (email planned for {guard['expect'][1]})"
+
+
+_outbox.register_guard("leads", _lead_still_due)
+
+
+def _unqueue_lead(email_norm: str, reason: str, statuses: tuple[str, ...] | None = None) -> str | None:
+    """
+    Cancel a lead's sequence mail still waiting in the outbox. If any was, put
+    the lead back to its state before the first of them (when that status is
+    in `statuses`, or always) and return that status; else None.
+    """
     import sqlite3
-    today = date.today().isoformat()
     conn = sqlite3.connect(db.DB_PATH)
-    rows = conn.execute(
-        """SELECT id,business_name,industry,city,email,audit_issues
-           FROM leads
-           WHERE status='cold'
-             AND reengagement_date IS NOT NULL
-             AND reengagement_date <= ?
-             AND email_count < 98""",
-        (today,),
-    ).fetchall()
+    row = conn.execute("SELECT email FROM leads WHERE email_norm=?", (email_norm,)).fetchone()
     conn.close()
-    return [
-        {"id": r[0], "business_name": r[1], "industry": r[2],
-         "city": r[3], "email": r[4], "audit_issues": json.loads(r[5] or "[]")}
-        for r in rows
-    ]
+    if not row or not row[0]:
+        return None
+    cancelled = _outbox.cancel("leads", f"lead:{row[0].lower()}", reason)
+    prev = next((r["guard"]["prev"] for r in cancelled if r["guard"] and r["guard"].get("prev")), None)
+    if not prev or (statuses is not None and prev["status"] not in statuses):
+        return None
+    with db.transaction() as c:
+        c.execute(
+            "UPDATE leads SET email_count=?, status=?, last_emailed=?, reengagement_date=? WHERE email_norm=?",
+            (prev["email_count"], prev["status"], prev["last_emailed"], prev["reengagement_date"], email_norm),
+        )
+    db.event_log("leads", "info", f"{email_norm}: {len(cancelled)} queued email(s) cancelled — {reason}")
+    return prev["status"]
 
 
 # ── Agent ─────────────────────────────────────────────────────────────────────
@@ -1618,6 +2325,7 @@ def _leads_due_reengagement() -> list[dict]:
 class LeadsAgent(BaseAgent):
     agent_id = "leads"
     name     = "Leads"
+    pipeline_metrics: dict | None = None   # last outreach run, per stage (agents/replay.py reads it)
 
     def run(self):
         _ensure_leads_table()
@@ -1631,206 +2339,301 @@ class LeadsAgent(BaseAgent):
         if new_replies:
             self.log_info(f"{new_replies} new reply/replies found — added to leads calendar")
 
-        # 3. Outreach pipeline
-        self._run_new_outreach()
-        self._run_followups()
-        self._run_winbacks()
-        self._run_reengagements()
+        # 3. Lay today's sends out over the send window (agents/send_plan.py),
+        #    then run the outreach pipeline and the sequence into that plan
+        sequence = _due_sequence()
+        plan = _send_plan.plan_day(
+            [_send_plan.Item("outreach") for _ in range(DAILY_LIMIT)]
+            + [_send_plan.Item(l["next_action"], f"lead:{l['id']}", l["score"]) for l in sequence],
+            mailbox=os.environ.get("GMAIL_USER", ""),
+        )
+        self.log_info(f"Send plan: {plan.summary()}")
+        try:
+            self._run_new_outreach(plan)
+            self._run_sequence(sequence, plan)
+        finally:
+            released = plan.release()
+            if released:
+                self.log_info(f"Send plan: {released} unused slot(s) released")
 
     # ── New outreach ──────────────────────────────────────────────────────
 
-    def _run_new_outreach(self):
+    def _run_new_outreach(self, plan: "_send_plan.Plan | None" = None):
+        """
+        Stream prospects through verify → safety → email → audit → compose →
+        render → send (agents/staged.py). Each stage has its own worker pool
+        and bounded queue; the pipeline stops as soon as DAILY_LIMIT emails are
+        sent or the run deadline passes.
+        """
         tid  = self.create_task("leads", "Source & email new prospects")
-        sent = 0
+        sent = {"n": 0, "emails": set()}
 
-        targets = _generate_lead_targets(n=DAILY_LIMIT * 4)
+        _crawl.prune()
+        # Existing leads + everything claimed this run, checked before any network work
+        known   = _KnownLeads.load()
+        targets = _generate_lead_targets(n=PROSPECT_TOP_K, known=known)
+        if targets:
+            self.log_info(
+                f"Prospects: top {len(targets)} by score "
+                f"({targets[0]['score']:.4f} → {targets[-1]['score']:.4f}), best: "
+                + ", ".join(f"{t.get('business_name') or t.get('name')} ({t.get('industry')}, {t.get('city')})"
+                            for t in targets[:3])
+            )
+        # Warm the Safe Browsing cache for every known candidate site in one pass;
+        # the safety stage then only looks up Maps-corrected websites
+        _safe_browsing_batch([t["website"] for t in targets if t.get("website")])
         self.update_progress(tid, 10)
 
-        for prospect in targets:
-            if sent >= DAILY_LIMIT:
-                break
-
-            place_id = prospect.get("place_id", "")
-            if place_id and _lead_exists(place_id):
-                continue
-
-            industry = prospect.get("industry", "business")
-            city     = prospect.get("city", "Australia")
-            name     = (prospect.get("business_name") or prospect.get("name") or "").strip()
-            website  = prospect.get("website", "") or ""
-            phone    = prospect.get("phone", "") or ""
-
-            if not name:
-                continue  # no business name — nothing to send to
-
-            # ── Maps verification — confirm business exists and is operational ──
-            verification = _verify_business(name, city, website=website, phone=phone)
+        dupes   = {"n": 0}
+        sourced = []
+
+        def _source():
+            for prospect in targets:
+                sourced.append(prospect.get("place_id", ""))
+                place_id = prospect.get("place_id", "")
+                name     = (prospect.get("business_name") or prospect.get("name") or "").strip()
+                if not name:
+                    continue  # no business name — nothing to send to
+                p = {
+                    "place_id": place_id,
+                    "name":     name,
+                    "industry": prospect.get("industry", "business"),
+                    "city":     prospect.get("city", "Australia"),
+                    "website":  prospect.get("website", "") or "",
+                    "phone":    prospect.get("phone", "") or "",
+                    "email":    prospect.get("email", "").strip(),
+                }
+                if known.claim(p["place_id"], p["email"], p["website"], p["phone"]):
+                    dupes["n"] += 1
+                    continue
+                yield p
+
+        def _is_known(p, **ids) -> bool:
+            """
+            Re-check identifiers discovered mid-pipeline (Maps place_id, corrected
+            website/phone, scraped email). Values the prospect was already claimed
+            with are left out so it doesn't match itself.
+            """
+            own = {"place_id": p["place_id"], "email": _norm_email(p["email"]),
+                   "website": _site_domain(p["website"]), "phone": _norm_phone(p["phone"])}
+            norm = {"place_id": str, "email": _norm_email, "website": _site_domain, "phone": _norm_phone}
+            ids = {k: v for k, v in ids.items() if v and norm[k](v) != own[k]}
+            hit = known.claim(**ids) if ids else ""
+            if hit:
+                dupes["n"] += 1
+                self.log_info(f"Outreach: {p['name']} already a lead (same {hit}) — skipping")
+            return bool(hit)
+
+        # ── Maps verification — confirm business exists and is operational ──
+        def _verify(p):
+            verification = _verify_business(p["name"], p["city"], website=p["website"],
+                                            phone=p["phone"], place_id=p["place_id"])
             if not verification["verified"]:
                 self.log_info(
-                    f"Maps: skipped {name} ({city}) — {verification['reason']} "
+                    f"Maps: skipped {p['name']} ({p['city']}) — {verification['reason']} "
                     f"[{verification['maps_source']}]"
                 )
-                continue
-
+                return None
+            if _is_known(p, place_id=verification.get("maps_place_id", ""),
+                         website=verification["corrected_website"],
+                         phone=verification["corrected_phone"]):
+                return None
             # Use Maps-corrected data if available (more reliable than scraped data)
             if verification["corrected_website"]:
                 self.log_info(
-                    f"Maps: corrected website for {name}: "
-                    f"{website or '(none)'} → {verification['corrected_website']}"
+                    f"Maps: corrected website for {p['name']}: "
+                    f"{p['website'] or '(none)'} → {verification['corrected_website']}"
                 )
-                website = verification["corrected_website"]
-            if verification["corrected_phone"] and not phone:
-                phone = verification["corrected_phone"]
-
-            # ── Safe Browsing — skip malware/phishing sites ──────────────────
-            if website and not _safe_browsing_check(website):
-                self.log_warn(f"Safe Browsing: flagged {website} ({name}) — skipping")
-                continue
-
-            # ── Find email — scrape website if needed ────────────────────────
-            email = prospect.get("email", "").strip()
-            if not email and website:
-                email = _find_email_on_website(website)
-
-            if not email:
+                p["website"] = verification["corrected_website"]
+            if verification["corrected_phone"] and not p["phone"]:
+                p["phone"] = verification["corrected_phone"]
+            p["verification"] = verification
+            return p
+
+        # ── Safe Browsing — skip malware/phishing sites ──────────────────────
+        # Batch stage: one threatMatches:find per batch, verdicts cached per domain
+        def _safety(batch):
+            verdicts = _safe_browsing_batch([p["website"] for p in batch if p["website"]])
+            passed = []
+            for p in batch:
+                if p["website"] and not verdicts.get(p["website"], True):
+                    self.log_warn(f"Safe Browsing: flagged {p['website']} ({p['name']}) — skipping")
+                    continue
+                passed.append(p)
+            return passed
+
+        # ── Find email — scrape website if needed ────────────────────────────
+        def _email(p):
+            if not p["email"] and p["website"]:
+                email = _find_email_on_website(p["website"])
+                if email and _is_known(p, email=email):
+                    return None
+                p["email"] = email
+            if not p["email"]:
                 self.log_info(
-                    f"No email found for {name} ({city}) "
-                    f"[maps:{verification['confidence']}] — skipping"
+                    f"No email found for {p['name']} ({p['city']}) "
+                    f"[maps:{p['verification']['confidence']}] — skipping"
                 )
-                continue
-
-            audit    = _audit_website(website)
-            issues   = audit["issues"] or _generic_issues(industry, city)
-            psi_data = audit.get("psi") or {}
-
-            system, prompt = _build_prompt(name, industry, city, issues,
-                                           follow_up_num=0, psi=psi_data)
-            body    = _claude(prompt, system=system)
-            subject = _subject(name, issues, follow_up=0)
-
-            # Build branded score sheet PDF if we have PSI data
-            pdf_bytes = None
-            pdf_name  = None
-            if psi_data:
-                pdf_bytes = self._build_score_sheet(name, website, psi_data, issues)
-                if pdf_bytes:
-                    slug = re.sub(r"[^\w]", "-", name.lower())[:30]
-                    pdf_name = f"website-audit-{slug}.pdf"
-
-            self._send(email, name, subject, body,
-                       pdf_attachment=pdf_bytes, pdf_filename=pdf_name or "website-audit.pdf")
+                return None
+            return p
+
+        def _audit(p):
+            audit       = _audit_website(p["website"])
+            p["issues"] = audit["issues"] or _generic_issues(p["industry"], p["city"])
+            p["psi"]    = audit.get("psi") or {}
+            return p
+
+        def _compose(p):
+            if pipe.stopped:
+                return None
+            system, prompt = _build_prompt(p["name"], p["industry"], p["city"], p["issues"],
+                                           follow_up_num=0, psi=p["psi"])
+            p["body"]    = _claude(prompt, system=system)
+            p["subject"] = _subject(p["name"], p["issues"], follow_up=0)
+            return p
+
+        # Build branded score sheet PDF if we have PSI data
+        def _render(p):
+            p["pdf_bytes"] = None
+            p["pdf_name"]  = None
+            if p["psi"] and not pipe.stopped:
+                p["pdf_bytes"] = self._build_score_sheet(p["name"], p["website"], p["psi"], p["issues"])
+                if p["pdf_bytes"]:
+                    slug = re.sub(r"[^\w]", "-", p["name"].lower())[:30]
+                    p["pdf_name"] = f"website-audit-{slug}.pdf"
+            return p
+
+        def _deliver(p):
+            if sent["n"] >= DAILY_LIMIT:
+                pipe.stop()
+                return None
+            if self.ctx.expired():
+                self.log_warn(f"Outreach: run deadline reached after {sent['n']} send(s) — stopping early")
+                pipe.stop()
+                return None
+            if p["email"].lower() in sent["emails"]:
+                return None
+            verification = p["verification"]
+            try:
+                slot = plan.take("outreach") if plan else None
+            except _send_plan.PlanFull as exc:
+                self.log_warn(f"Outreach: {exc} — stopping after {sent['n']} send(s), the rest wait for the next run")
+                pipe.stop()
+                return None
+            message_id = self._send(p["email"], p["name"], p["subject"], p["body"],
+                                    pdf_attachment=p["pdf_bytes"], pdf_filename=p["pdf_name"] or "website-audit.pdf",
+                                    send_after=slot.at if slot else None,
+                                    guard=_lead_guard(p["email"], (1, "contacted")))
+            if plan:
+                plan.fill(slot, message_id, ref=f"lead:{p['email'].lower()}")
 
             _insert_lead({
-                "business_name":  name,
-                "industry":       industry,
-                "city":           city,
-                "email":          email,
-                "website":        website,
-                "phone":          phone,
-                "place_id":       place_id,
-                "audit_issues":   issues,
+                "business_name":  p["name"],
+                "industry":       p["industry"],
+                "city":           p["city"],
+                "email":          p["email"],
+                "website":        p["website"],
+                "phone":          p["phone"],
+                "place_id":       p["place_id"],
+                "audit_issues":   p["issues"],
                 "maps_verified":  verification["verified"],
                 "maps_confidence": verification["confidence"],
                 "maps_source":    verification["maps_source"],
+                "last_emailed":   slot.day if slot else None,
             })
 
             self.log_info(
-                f"Outreach → {name} <{email}> "
+                f"Outreach → {p['name']} <{p['email']}> "
                 f"[maps:{verification['confidence']}/{verification['maps_source']}] "
-                f"| {issues[0][:55]}"
+                f"| {p['issues'][0][:55]}"
             )
-            sent += 1
-            time.sleep(3)
+            sent["n"] += 1
+            sent["emails"].add(p["email"].lower())
+            self.update_progress(tid, 10 + int(80 * sent["n"] / DAILY_LIMIT))
+            if sent["n"] >= DAILY_LIMIT:
+                pipe.stop()
+            return p
+
+        def _on_error(stage, p, exc):
+            self.log_warn(f"Outreach: {stage.name} failed for {p.get('name', '?')} — {exc}")
+
+        w = OUTREACH_WORKERS
+        pipe = StagedPipeline([
+            Stage("verify",  _verify,  workers=w["verify"]),
+            Stage("safety",  _safety,  workers=w["safety"], batch_size=50, batch_wait=2.0),
+            Stage("email",   _email,   workers=w["email"]),
+            Stage("audit",   _audit,   workers=w["audit"]),
+            Stage("compose", _compose, workers=w["compose"]),
+            Stage("render",  _render,  workers=w["render"]),
+            Stage("send",    _deliver, workers=1),   # single sender — SMTP pacing via ratelimit
+        ], on_error=_on_error)
+        pipe.run(_source())
+        self.pipeline_metrics = pipe.metrics()
+        _prospects.mark_enriched(sourced)
+        backlog = _prospects.stats()
+        self.log_info(f"Outreach pipeline: {pipe.summary()} · {dupes['n']} known lead(s) skipped · "
+                      f"{backlog['backlog']} of {backlog['total']} sourced prospect(s) still unenriched")
+        pdfs = _pdf.stats()
+        if pdfs["rendered"]:
+            self.log_info(f"Score sheets: {pdfs['rendered']} PDF(s), {pdfs['avg_secs']}s avg, "
+                          f"{pdfs['pdfs_per_min']}/min on {pdfs['pool_size']} page(s)")
+        llm = _composer.stats()
+        self.log_info(
+            f"Composer: {llm['calls']} call(s), cache hit {int(llm['cache_hit_ratio'] * 100)}%, "
+            f"~${llm['cost_usd']} so far this process"
+        )
 
         self.update_progress(tid, 90)
-        self.complete_task(tid, preview=f"{sent} outreach email(s) sent")
-
-    # ── Follow-ups ────────────────────────────────────────────────────────
-
-    def _run_followups(self):
-        tid  = self.create_task("leads", "Follow-up sequence")
-        sent = 0
-
-        # Follow-up #1 — day 4 after first contact
-        for lead in _leads_due_followup(email_count=1, days_since=4):
-            if sent >= FOLLOW_UP_LIMIT:
-                break
-            system, prompt = _build_prompt(
-                lead["business_name"], lead["industry"], lead["city"],
-                lead["audit_issues"], follow_up_num=1,
-            )
-            body    = _claude(prompt, system=system)
-            subject = _subject(lead["business_name"], lead["audit_issues"], follow_up=1)
-            self._send(lead["email"], lead["business_name"], subject, body)
-            _update_lead(lead["id"], email_count=2, status="contacted")
-            self.log_info(f"Follow-up #1 → {lead['business_name']} <{lead['email']}>")
-            sent += 1
-            time.sleep(3)
-
-        # Follow-up #2 (final) — day 10 after first contact, then go cold
-        for lead in _leads_due_followup(email_count=2, days_since=6):
-            if sent >= FOLLOW_UP_LIMIT:
-                break
-            system, prompt = _build_prompt(
-                lead["business_name"], lead["industry"], lead["city"],
-                lead["audit_issues"], follow_up_num=2,
-            )
-            body    = _claude(prompt, system=system)
-            subject = _subject(lead["business_name"], lead["audit_issues"], follow_up=2)
-            self._send(lead["email"], lead["business_name"], subject, body)
-            _update_lead(lead["id"], email_count=3, status="cold")
-            self.log_info(f"Follow-up #2 (final) → {lead['business_name']} — marked cold")
-            sent += 1
-            time.sleep(3)
-
-        self.complete_task(tid, preview=f"{sent} follow-up(s) sent")
+        self.complete_task(tid, preview=f"{sent['n']} outreach email(s) sent")
 
-    # ── Win-backs (low interest leads) ───────────────────────────────────
+    # ── Follow-ups, win-backs, re-engagements ─────────────────────────────
 
-    def _run_winbacks(self):
-        leads = _leads_low_interest()
-        if not leads:
-            return
-        tid  = self.create_task("leads", "Win-back emails")
-        sent = 0
-        for lead in leads:
-            system, prompt = _build_prompt(
-                lead["business_name"], lead["industry"], lead["city"],
-                lead["audit_issues"], follow_up_num=99,
-            )
-            body    = _claude(prompt, system=system)
-            subject = _subject(lead["business_name"], lead["audit_issues"], follow_up=99)
-            self._send(lead["email"], lead["business_name"], subject, body)
-            # After one win-back, go cold — never contact again
-            _update_lead(lead["id"], email_count=99, status="cold")
-            self.log_info(f"Win-back → {lead['business_name']} — now cold")
-            sent += 1
-            time.sleep(3)
-        self.complete_task(tid, preview=f"{sent} win-back email(s) sent")
-
-    # ── 3-month re-engagement ─────────────────────────────────────────────
-
-    def _run_reengagements(self):
-        """Send a 'here's what you missed' email to cold leads at the 90-day mark."""
-        leads = _leads_due_reengagement()
-        if not leads:
+    def _run_sequence(self, due: list[dict] | None = None, plan: "_send_plan.Plan | None" = None):
+        """
+        Send every due step of _LEAD_SEQUENCE (follow-ups #1/#2, win-backs,
+        3-month re-engagements) from one scan of the next-action index, then
+        advance each lead — the triggers schedule its next step. Each email is
+        queued for its slot in the day's send plan, guarded so it's dropped if
+        the lead replies, bounces or changes status before then (_lead_guard).
+        """
+        due = _due_sequence() if due is None else due
+        if not due:
             return
-        tid  = self.create_task("leads", "3-month re-engagement emails")
-        sent = 0
-        for lead in leads:
-            system, prompt = _build_prompt(
-                lead["business_name"], lead["industry"], lead["city"],
-                lead["audit_issues"], follow_up_num=98,
-            )
-            body    = _claude(prompt, system=system)
-            subject = _subject(lead["business_name"], lead["audit_issues"], follow_up=98)
-            self._send(lead["email"], lead["business_name"], subject, body)
-            # email_count=98 flags that re-engagement has been sent — never contact again
-            _update_lead(lead["id"], email_count=98, status="cold")
-            self.log_info(f"3-month re-engagement → {lead['business_name']}")
-            sent += 1
-            time.sleep(3)
-        self.complete_task(tid, preview=f"{sent} re-engagement email(s) sent")
+        tid  = self.create_task("leads", "Follow-up sequence")
+        sent = {}
+
+        by_action: dict[str, list[dict]] = {}
+        for lead in due:
+            by_action.setdefault(lead["next_action"], []).append(lead)
+
+        for action, leads in by_action.items():
+            follow_up, (email_count, status) = _SEQUENCE_STEPS[action]
+            bodies = _compose_for_leads(leads, follow_up)
+            for lead in leads:
+                body = bodies.get(lead["id"])
+                if not body:
+                    self.log_warn(f"{action}: no email generated for {lead['business_name']} — retry next run")
+                    continue
+                subject = _subject(lead["business_name"], lead["audit_issues"], follow_up=follow_up)
+                try:
+                    slot = plan.take(action, f"lead:{lead['id']}") if plan else None
+                except _send_plan.PlanFull as exc:
+                    self.log_warn(f"{action}: {exc} — {lead['business_name']} left for the next run")
+                    continue
+                message_id = self._send(lead["email"], lead["business_name"], subject, body,
+                                        send_after=slot.at if slot else None,
+                                        guard=_lead_guard(lead["email"], (email_count, status), lead["id"]))
+                if plan:
+                    plan.fill(slot, message_id)
+                # The next step's timer runs from the planned send date, not today
+                _update_lead(lead["id"], email_count=email_count, status=status,
+                             sent_on=slot.day if slot else None)
+                self.log_info(f"{action} → {lead['business_name']} <{lead['email']}> — now {status}")
+                sent[action] = sent.get(action, 0) + 1
+
+        self.complete_task(
+            tid, preview=", ".join(f"{n} {a}" for a, n in sent.items()) or "nothing sent",
+        )
 
     # ── Score sheet (PDF attachment) ──────────────────────────────────────
 
@@ -1842,459 +2645,13 @@ class LeadsAgent(BaseAgent):
         issues: list[str],
     ) -> bytes | None:
         """
-        Render a branded PDF score sheet using Playwright → HTML → PNG → PDF.
-        Returns raw PDF bytes, or None if Playwright is unavailable.
-
-        Layout:
-          - IYS header bar (indigo + mint gradient)
-          - Business name + website + date
-          - 4 score gauges: Performance, SEO, Best Practices, LCP
-          - Issues list with traffic-light indicators
-          - Footer CTA: "Book your free 20-min audit"
+        Branded PDF score sheet for the outreach email (agents/score_sheet.py,
+        rendered on the warm browser in agents/pdf_renderer.py).
+        Returns raw PDF bytes, or None without PSI data or Playwright.
         """
         if not psi:
             return None
-        try:
-            from playwright.sync_api import sync_playwright
-        except ImportError:
-            return None
-
-        perf = psi.get("perf_score", 0)
-        seo  = psi.get("seo_score", 0)
-        bp   = psi.get("bp_score", 0)
-        lcp  = psi.get("lcp", 0.0)
-        tbt  = psi.get("tbt", 0)
-        issues_list = issues[:5]
-
-        def _score_colour(score: int) -> str:
-            if score >= 90: return "#22c55e"   # green
-            if score >= 50: return "#f59e0b"   # amber
-            return "#ef4444"                   # red
-
-        def _lcp_colour(lcp_val: float) -> str:
-            if lcp_val <= 2.5: return "#22c55e"
-            if lcp_val <= 4.0: return "#f59e0b"
-            return "#ef4444"
-
-        def _gauge(label: str, score: int, suffix: str = "/100") -> str:
-            colour = _score_colour(score)
-            pct    = min(score, 100)
-            return f"""
-            <div style="text-align:center;flex:1;min-width:120px;">
-              <svg width="100" height="100" viewBox="0 0 100 100" style="display:block;margin:0 auto 8px;">
-                <circle cx="50" cy="50" r="42" fill="none" stroke="#e2e8f0" stroke-width="10"/>
-                <circle cx="50" cy="50" r="42" fill="none" stroke="{colour}" stroke-width="10"
-                  stroke-dasharray="{int(2*3.14159*42*pct/100)} {int(2*3.14159*42*(100-pct)/100)}"
-                  stroke-dashoffset="{int(2*3.14159*42*0.25)}"
-                  stroke-linecap="round" transform="rotate(-90 50 50)"/>
-                <text x="50" y="46" text-anchor="middle"
-                  style="font-family:Inter,sans-serif;font-size:22px;font-weight:900;fill:{colour};">{score}</text>
-                <text x="50" y="62" text-anchor="middle"
-                  style="font-family:Inter,sans-serif;font-size:11px;font-weight:600;fill:#64748b;">{suffix}</text>
-              </svg>
-              <div style="font-family:Inter,sans-serif;font-size:13px;font-weight:700;color:#0f172a;">{label}</div>
-            </div>"""
-
-        def _lcp_gauge() -> str:
-            colour  = _lcp_colour(lcp)
-            display = f"{lcp}s"
-            rating  = "Good" if lcp <= 2.5 else "Needs work" if lcp <= 4.0 else "Poor"
-            return f"""
-            <div style="text-align:center;flex:1;min-width:120px;">
-              <svg width="100" height="100" viewBox="0 0 100 100" style="display:block;margin:0 auto 8px;">
-                <circle cx="50" cy="50" r="42" fill="none" stroke="#e2e8f0" stroke-width="10"/>
-                <circle cx="50" cy="50" r="42" fill="none" stroke="{colour}" stroke-width="10"
-                  stroke-dasharray="{int(2*3.14159*42*min(lcp/10,1)*100/100)} {int(2*3.14159*42*(1-min(lcp/10,1)))}"
-                  stroke-dashoffset="{int(2*3.14159*42*0.25)}"
-                  stroke-linecap="round" transform="rotate(-90 50 50)"/>
-                <text x="50" y="46" text-anchor="middle"
-                  style="font-family:Inter,sans-serif;font-size:18px;font-weight:900;fill:{colour};">{display}</text>
-                <text x="50" y="62" text-anchor="middle"
-                  style="font-family:Inter,sans-serif;font-size:10px;font-weight:600;fill:#64748b;">{rating}</text>
-              </svg>
-              <div style="font-family:Inter,sans-serif;font-size:13px;font-weight:700;color:#0f172a;">Page Load (LCP)</div>
-            </div>"""
-
-        # Map each issue to a plain-English fix + business outcome
-        _FIX_MAP = [
-            (
-                ["performance", "speed", "load", "slow", "/100"],
-                "Speed & performance optimisation",
-                "We compress images, remove unused code, and configure caching so the site loads fast on any device.",
-                "Faster sites rank higher, keep visitors on the page longer, and convert more browsers into enquiries. A site that loads in under 2 seconds can see 2–3x more contact form submissions than one that takes 5+ seconds.",
-            ),
-            (
-                ["lcp", "largest contentful paint", "content"],
-                "Core Web Vitals — LCP fix",
-                "We identify and optimise the largest element on each page (usually the hero image or headline block) so it renders immediately.",
-                "Fixing LCP moves the site from Google's 'Poor' category into 'Good', removing the active ranking penalty. More customers find the business on page 1 instead of scrolling past to a competitor.",
-            ),
-            (
-                ["structured data", "schema", "google can't read"],
-                "Structured data & local schema markup",
-                "We add JSON-LD schema markup so Google can clearly read the business name, address, phone, hours, and services.",
-                "Google shows richer search results — star ratings, address, opening hours — directly in search. This increases click-through rates by up to 30% for local searches.",
-            ),
-            (
-                ["mobile", "viewport", "phone", "responsive"],
-                "Mobile-first rebuild",
-                "We rebuild the layout to work properly on all screen sizes — the way 70%+ of local search traffic arrives.",
-                "A site that looks broken on phones loses the majority of potential customers before they've even read a word. Fixing mobile typically doubles the time visitors spend on the site.",
-            ),
-            (
-                ["call-to-action", "cta", "visitors don't know", "no clear"],
-                "Clear calls-to-action on every page",
-                "We add prominent, specific CTAs — 'Call now', 'Get a quote', 'Book online' — in the right places so visitors know exactly what to do next.",
-                "Most websites lose leads not because the visitor wasn't interested, but because there was no obvious next step. A well-placed CTA can increase contact rate by 40–80%.",
-            ),
-            (
-                ["local", "suburb", "area", "nsw", "vic", "qld", "wa", "sa"],
-                "Local SEO — suburb & area targeting",
-                "We add suburb-specific content, location pages, and Google Business Profile optimisation so the site appears for local searches.",
-                "For most local businesses, appearing in the top 3 Google results for their suburb drives 5–10 new enquiries per month from people actively searching for exactly what they offer.",
-            ),
-            (
-                ["review", "testimonial", "social proof", "rating"],
-                "Social proof integration",
-                "We pull in Google reviews, add a testimonials section, and display trust signals that visitors look for before making contact.",
-                "Businesses with visible reviews convert 3–4x more website visitors into enquiries. For service businesses, seeing real reviews from local customers is often the deciding factor.",
-            ),
-            (
-                ["content", "thin", "words", "information"],
-                "Content depth & authority",
-                "We build out service pages with specific, helpful content that answers the questions customers actually search for.",
-                "Google rewards sites with real, useful information. More content depth also means the site ranks for a wider range of search terms — more entry points, more leads.",
-            ),
-            (
-                ["seo", "meta", "title", "description", "crawl", "index"],
-                "Technical SEO & on-page optimisation",
-                "We audit and fix all on-page SEO signals — page titles, meta descriptions, heading structure, internal links, and crawlability.",
-                "Even a technically sound business website loses ranking to competitors who have the SEO basics properly configured. Small fixes compound into significantly more organic traffic over time.",
-            ),
-            (
-                ["security", "https", "browser", "best practices"],
-                "Security & best practices audit",
-                "We resolve any HTTPS issues, fix browser console errors, and update any outdated code that modern browsers flag.",
-                "Visitors who see a security warning in their browser almost always leave immediately — before reading anything. A secure, error-free site builds trust passively, just by loading correctly.",
-            ),
-        ]
-
-        def _match_fix(issue_text: str) -> tuple:
-            text_lower = issue_text.lower()
-            for keywords, fix_title, what_we_do, business_impact in _FIX_MAP:
-                if any(kw in text_lower for kw in keywords):
-                    return fix_title, what_we_do, business_impact
-            # Fallback
-            return (
-                "Website audit & optimisation",
-                "We review and fix the specific issues flagged, optimising each element for speed, search visibility, and conversion.",
-                "A fully optimised website consistently generates more enquiries, ranks higher for local searches, and converts more visitors into paying customers.",
-            )
-
-        def _fix_card(issue_text: str, idx: int) -> str:
-            fix_title, what_we_do, impact = _match_fix(issue_text)
-            return f"""
-            <div style="background:#ffffff;border:1px solid #e8edf2;border-radius:10px;
-              padding:16px 20px;margin-bottom:10px;">
-              <div style="display:flex;align-items:flex-start;gap:14px;">
-                <div style="width:24px;height:24px;border-radius:50%;background:#5b4dff;
-                  flex-shrink:0;display:flex;align-items:center;justify-content:center;
-                  font-size:11px;font-weight:800;color:#ffffff;margin-top:1px;">{idx}</div>
-                <div style="flex:1;">
-                  <div style="font-size:12.5px;font-weight:800;color:#0f172a;
-                    margin-bottom:5px;">{fix_title}</div>
-                  <div style="font-size:11px;font-weight:600;color:#ef4444;
-                    margin-bottom:8px;line-height:1.5;">Issue: {issue_text}</div>
-                  <div style="display:flex;gap:12px;">
-                    <div style="flex:1;background:#f8fafc;border-radius:7px;padding:10px 13px;">
-                      <div style="font-size:10px;font-weight:700;letter-spacing:.08em;
-                        text-transform:uppercase;color:#5b4dff;margin-bottom:5px;">What we fix</div>
-                      <div style="font-size:11.5px;color:#475569;line-height:1.6;">{what_we_do}</div>
-                    </div>
-                    <div style="flex:1;background:#f0fdf4;border:1px solid #bbf7d0;
-                      border-radius:7px;padding:10px 13px;">
-                      <div style="font-size:10px;font-weight:700;letter-spacing:.08em;
-                        text-transform:uppercase;color:#16a34a;margin-bottom:5px;">Business impact</div>
-                      <div style="font-size:11.5px;color:#15803d;line-height:1.6;">{impact}</div>
-                    </div>
-                  </div>
-                </div>
-              </div>
-            </div>"""
-
-        today   = date.today().strftime("%-d %B %Y")
-        domain  = re.sub(r"https?://(www\.)?", "", website).rstrip("/") if website else "—"
-        gauges  = (
-            _gauge("Performance", perf) +
-            _gauge("SEO", seo) +
-            _gauge("Best Practices", bp) +
-            _lcp_gauge()
-        )
-        # issue_rows no longer used — page 2 uses _fix_card() directly
-
-        def _metric_card(label: str, score_html: str, bar_html: str, rating: str,
-                         rating_colour: str, body: str) -> str:
-            return f"""
-            <div style="width:calc(50% - 8px);box-sizing:border-box;background:#ffffff;
-              border:1px solid #e8edf2;border-radius:10px;padding:16px 18px;">
-              <div style="display:flex;align-items:baseline;justify-content:space-between;
-                margin-bottom:6px;">
-                <div style="font-size:12px;font-weight:700;color:#0f172a;
-                  letter-spacing:-.01em;">{label}</div>
-                <div style="font-size:19px;font-weight:900;
-                  color:{rating_colour};line-height:1;">{score_html}</div>
-              </div>
-              {bar_html}
-              <div style="font-size:11px;font-weight:700;color:{rating_colour};
-                text-transform:uppercase;letter-spacing:.06em;margin-bottom:8px;">{rating}</div>
-              <div style="font-size:11.5px;color:#64748b;line-height:1.65;">{body}</div>
-            </div>"""
-
-        def _bar(pct: int, colour: str) -> str:
-            return f"""<div style="height:5px;background:#e8edf2;border-radius:3px;margin-bottom:6px;">
-              <div style="height:5px;width:{min(pct,100)}%;background:{colour};
-                border-radius:3px;"></div></div>"""
-
-        def _lcp_bar() -> str:
-            c1 = "#22c55e" if lcp <= 2.5 else "#e8edf2"
-            c2 = "#f59e0b" if 2.5 < lcp <= 4.0 else "#e8edf2"
-            c3 = "#ef4444" if lcp > 4.0 else "#e8edf2"
-            return f"""<div style="display:flex;gap:4px;margin-bottom:4px;">
-              <div style="flex:1;height:5px;border-radius:3px;background:{c1};"></div>
-              <div style="flex:1;height:5px;border-radius:3px;background:{c2};"></div>
-              <div style="flex:1;height:5px;border-radius:3px;background:{c3};"></div>
-            </div>
-            <div style="display:flex;justify-content:space-between;
-              font-size:9.5px;font-weight:600;color:#94a3b8;margin-bottom:6px;">
-              <span>&lt;2.5s Good</span><span>2.5–4s Needs work</span><span>&gt;4s Poor</span>
-            </div>"""
-
-        lcp_rating        = "Poor" if lcp > 4 else "Needs Improvement" if lcp > 2.5 else "Good"
-        perf_rating       = "Poor" if perf < 50 else "Needs Improvement" if perf < 90 else "Good"
-        seo_rating        = "Needs Improvement" if seo < 90 else "Good"
-        bp_rating         = "Needs Improvement" if bp < 90 else "Good"
-
-        _perf_note = (
-            "Under 50 is classified as Poor — these sites are actively penalised in search."
-            if perf < 50 else
-            "Under 90 means competitors scoring higher rank above this site for the same searches."
-            if perf < 90 else
-            "Within Google's good range."
-        )
-        _seo_note = (
-            "Missing signals mean Google gets an incomplete picture, limiting how well it ranks the site locally."
-            if seo < 90 else
-            "SEO fundamentals are in place."
-        )
-        _bp_note = (
-            "Issues here can trigger browser security warnings, damaging trust before a visitor even reads the page."
-            if bp < 90 else
-            "Meeting modern technical standards, which supports trust and ranking."
-        )
-
-        card_perf = _metric_card(
-            "Performance", f"{perf}/100", _bar(perf, _score_colour(perf)),
-            perf_rating, _score_colour(perf),
-            f"Google's overall mobile speed score. {_perf_note} "
-            f"Every 0.1s improvement in load time increases conversions by up to 8%."
-        )
-        card_lcp = _metric_card(
-            "LCP — Page Load Speed", f"{lcp}s", _lcp_bar(),
-            lcp_rating, _lcp_colour(lcp),
-            f"How long the main content takes to appear after a visitor opens the page — "
-            f"Google's most heavily weighted speed signal. "
-            f"At {lcp}s this site is in the {lcp_rating} range. "
-            f"53% of mobile visitors leave if a page takes over 3 seconds — "
-            f"each one goes back and clicks a competitor instead."
-        )
-        card_seo = _metric_card(
-            "SEO Score", f"{seo}/100", _bar(seo, _score_colour(seo)),
-            seo_rating, _score_colour(seo),
-            f"Whether Google can fully read and index the site — page titles, meta descriptions, "
-            f"structured data, crawlability. {_seo_note} "
-            f"Gaps compound: a competitor who ticks every box consistently outranks a site that doesn't."
-        )
-        card_bp = _metric_card(
-            "Best Practices", f"{bp}/100", _bar(bp, _score_colour(bp)),
-            bp_rating, _score_colour(bp),
-            f"How securely and correctly the site is built — HTTPS, no browser errors, "
-            f"correct image sizing, privacy-safe scripts. {_bp_note} "
-            f"Low scores compound the impact of a poor Performance or LCP result."
-        )
-
-        html = f"""<!DOCTYPE html>
-<html><head><meta charset="UTF-8">
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800;900&display=swap" rel="stylesheet">
-</head>
-<body style="margin:0;padding:0;background:#f1f5f9;font-family:Inter,sans-serif;">
-<div style="width:680px;margin:0 auto;background:#f1f5f9;padding-bottom:0;">
-
-  <!-- Header -->
-  <div style="background:#0f172a;padding:26px 36px;display:flex;
-    align-items:center;justify-content:space-between;">
-    <div>
-      <span style="font-size:20px;font-weight:900;color:rgba(255,255,255,.92);
-        letter-spacing:-.02em;">Improve<span style="color:#2dd4bf;">YourSite</span></span>
-      <div style="font-size:10.5px;font-weight:600;color:rgba(255,255,255,.35);
-        letter-spacing:.1em;text-transform:uppercase;margin-top:3px;">Website Performance Report</div>
-    </div>
-    <div style="text-align:right;">
-      <div style="font-size:11px;color:rgba(255,255,255,.35);">{today}</div>
-      <div style="font-size:12px;font-weight:600;color:rgba(255,255,255,.55);
-        margin-top:2px;">{domain}</div>
-    </div>
-  </div>
-  <div style="height:3px;background:linear-gradient(90deg,#5b4dff 0%,#2dd4bf 100%);"></div>
-
-  <!-- Business + summary strip -->
-  <div style="background:#ffffff;padding:20px 36px 18px;
-    border-bottom:1px solid #e8edf2;">
-    <div style="font-size:10px;font-weight:700;letter-spacing:.1em;text-transform:uppercase;
-      color:#5b4dff;margin-bottom:4px;">Audited for</div>
-    <div style="display:flex;align-items:baseline;justify-content:space-between;">
-      <div style="font-size:22px;font-weight:900;color:#0f172a;
-        letter-spacing:-.025em;">{business_name}</div>
-      <div style="font-size:11px;color:#94a3b8;">Google PageSpeed Insights · mobile</div>
-    </div>
-  </div>
-
-  <!-- 4 Score gauges -->
-  <div style="background:#ffffff;padding:20px 36px 22px;border-bottom:1px solid #e8edf2;">
-    <div style="font-size:10px;font-weight:700;letter-spacing:.1em;text-transform:uppercase;
-      color:#94a3b8;margin-bottom:16px;">Google Scores</div>
-    <div style="display:flex;justify-content:space-between;gap:12px;">
-      {gauges}
-    </div>
-  </div>
-
-  <!-- Ranking penalty banner -->
-  <div style="margin:14px 36px;background:#fffbeb;border:1px solid #fcd34d;
-    border-left:4px solid #f59e0b;border-radius:8px;padding:14px 18px;">
-    <div style="font-size:12px;font-weight:800;color:#92400e;margin-bottom:4px;">
-      Google Core Web Vitals — Active Ranking Penalty
-    </div>
-    <div style="font-size:12px;color:#78350f;line-height:1.65;">
-      Since 2021, Google uses these scores as a direct ranking factor. A performance score
-      of <strong>{perf}/100</strong> means faster competitors are currently ranked above this
-      site for the same local searches — this is happening now, not a future risk.
-    </div>
-  </div>
-
-  <!-- 4 Metric cards — 2x2 grid -->
-  <div style="margin:0 36px 14px;">
-    <div style="font-size:10px;font-weight:700;letter-spacing:.1em;text-transform:uppercase;
-      color:#94a3b8;margin-bottom:12px;">What Each Score Means for Your Ranking</div>
-    <div style="display:flex;flex-wrap:wrap;gap:12px;">
-      {card_perf}
-      {card_lcp}
-      {card_seo}
-      {card_bp}
-    </div>
-  </div>
-
-  <!-- Issues & what we fix — continues below scores -->
-  <div style="background:#f1f5f9;padding-top:0;">
-
-    <!-- Page 2 header -->
-    <div style="background:#0f172a;padding:20px 36px;display:flex;
-      align-items:center;justify-content:space-between;">
-      <span style="font-size:16px;font-weight:900;color:rgba(255,255,255,.9);
-        letter-spacing:-.02em;">Improve<span style="color:#2dd4bf;">YourSite</span></span>
-      <div style="text-align:right;">
-        <div style="font-size:11px;font-weight:600;color:rgba(255,255,255,.4);">{business_name}</div>
-        <div style="font-size:10px;color:rgba(255,255,255,.3);margin-top:2px;">Issues &amp; Recommendations</div>
-      </div>
-    </div>
-    <div style="height:3px;background:linear-gradient(90deg,#5b4dff 0%,#2dd4bf 100%);"></div>
-
-    <!-- Intro copy -->
-    <div style="background:#ffffff;padding:20px 36px 16px;border-bottom:1px solid #e8edf2;">
-      <div style="font-size:18px;font-weight:900;color:#0f172a;letter-spacing:-.02em;
-        margin-bottom:6px;">What's holding the site back</div>
-      <div style="font-size:12.5px;color:#64748b;line-height:1.65;max-width:560px;">
-        Below are the specific issues found during the audit, what we'd do to fix each one,
-        and what that fix typically means for a local business in terms of more enquiries,
-        better rankings, and stronger conversions.
-      </div>
-    </div>
-
-    <!-- Fix cards -->
-    <div style="padding:16px 36px 16px;">
-      {"".join(_fix_card(issue, i + 1) for i, issue in enumerate(issues_list))}
-    </div>
-
-    <!-- What a fixed site looks like -->
-    <div style="margin:0 36px 16px;background:#0f172a;border-radius:10px;padding:22px 24px;">
-      <div style="font-size:13px;font-weight:800;color:#ffffff;margin-bottom:12px;
-        letter-spacing:-.01em;">What this looks like once it's done</div>
-      <div style="display:flex;gap:10px;flex-wrap:wrap;">
-        <div style="flex:1;min-width:140px;background:rgba(255,255,255,.06);
-          border-radius:8px;padding:12px 14px;">
-          <div style="font-size:20px;font-weight:900;color:#2dd4bf;margin-bottom:4px;">90+</div>
-          <div style="font-size:11px;color:rgba(255,255,255,.6);line-height:1.5;">
-            Google performance score — out of the penalty zone and competing for page 1
-          </div>
-        </div>
-        <div style="flex:1;min-width:140px;background:rgba(255,255,255,.06);
-          border-radius:8px;padding:12px 14px;">
-          <div style="font-size:20px;font-weight:900;color:#2dd4bf;margin-bottom:4px;">&lt;2.5s</div>
-          <div style="font-size:11px;color:rgba(255,255,255,.6);line-height:1.5;">
-            Page load time — keeps visitors on the page instead of bouncing to a competitor
-          </div>
-        </div>
-        <div style="flex:1;min-width:140px;background:rgba(255,255,255,.06);
-          border-radius:8px;padding:12px 14px;">
-          <div style="font-size:20px;font-weight:900;color:#2dd4bf;margin-bottom:4px;">More calls</div>
-          <div style="font-size:11px;color:rgba(255,255,255,.6);line-height:1.5;">
-            Clear CTAs and local SEO turn search traffic into actual enquiries every week
-          </div>
-        </div>
-        <div style="flex:1;min-width:140px;background:rgba(255,255,255,.06);
-          border-radius:8px;padding:12px 14px;">
-          <div style="font-size:20px;font-weight:900;color:#2dd4bf;margin-bottom:4px;">Page 1</div>
-          <div style="font-size:11px;color:rgba(255,255,255,.6);line-height:1.5;">
-            Local suburb ranking for the searches customers are already doing right now
-          </div>
-        </div>
-      </div>
-    </div>
-
-    <!-- Page 2 footer CTA -->
-    <div style="background:#5b4dff;padding:20px 36px;display:flex;align-items:center;
-      justify-content:space-between;">
-      <div>
-        <div style="font-size:14px;font-weight:800;color:#ffffff;letter-spacing:-.01em;">
-          See exactly what we'd fix — book a free 20-min call
-        </div>
-        <div style="font-size:11.5px;color:rgba(255,255,255,.65);margin-top:3px;">
-          No obligation. You get a written summary of every recommendation.
-        </div>
-      </div>
-      <div style="background:#ffffff;color:#5b4dff;font-size:12px;font-weight:800;
-        padding:10px 20px;border-radius:7px;white-space:nowrap;">
-        improveyoursite.com
-      </div>
-    </div>
-
-  </div><!-- end page 2 -->
-
-</div>
-</body></html>"""
-
-        try:
-            with sync_playwright() as pw:
-                browser = pw.chromium.launch()
-                page    = browser.new_page(viewport={"width": 720, "height": 1080})
-                page.set_content(html, wait_until="networkidle")
-                pdf_bytes = page.pdf(
-                    width="720px",
-                    print_background=True,
-                    margin={"top": "0", "bottom": "0", "left": "0", "right": "0"},
-                )
-                browser.close()
-            return pdf_bytes
-        except Exception:
-            return None
+        return _score_sheet.render(_score_sheet.ScoreSheet.from_psi(business_name, website, psi, issues))
 
     # ── Email sender ──────────────────────────────────────────────────────
 
@@ -2306,8 +2663,14 @@ class LeadsAgent(BaseAgent):
         body: str,
         pdf_attachment: bytes | None = None,
         pdf_filename: str = "website-audit.pdf",
-    ):
-        import smtplib
+        send_after: datetime | None = None,
+        guard: dict | None = None,
+    ) -> str | None:
+        """
+        Queue an outreach email, for send_after (naive UTC, its send-plan slot)
+        if given, checked against guard before it goes out (_lead_still_due);
+        returns its Message-ID, or None if it was skipped.
+        """
         from email.mime.multipart import MIMEMultipart
         from email.mime.text import MIMEText
         from email.mime.application import MIMEApplication
@@ -2342,6 +2705,6 @@ class LeadsAgent(BaseAgent):
             part["Content-Disposition"] = f'attachment; filename="{pdf_filename}"'
             msg.attach(part)
 
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(gmail_user, gmail_pass)
-            server.sendmail(gmail_user, to_email, msg.as_string())
+        # Durable outbox — one reused SMTP session, paced and retried by the sender thread
+        return _outbox.enqueue(msg, to_email, from_addr=gmail_user, agent_id=self.agent_id,
+                               ref=f"lead:{to_email.lower()}", send_after=send_after, guard=guard)
@@ -0,0 +1,413 @@
+"""
+agents/outbox.py — Durable SMTP outbox with a single background sender.
+
+Agents used to open smtplib.SMTP_SSL("smtp.gmail.com", 465), log in, send
+one message and disconnect — blocking their own loop on SMTP each time. Now:
+
+  - enqueue() stamps a Message-ID (and Date), stores the full message in the
+    outbox table and returns immediately with the Message-ID
+  - one sender thread per process drains the table. It keeps an
+    authenticated SMTP session open across messages (reconnecting after
+    SESSION_MAX_MESSAGES, SESSION_IDLE seconds idle, or a dropped connection)
+  - sends are paced by agents/ratelimit.py on the SMTP host's bucket
+    (IYS_SMTP_PER_MINUTE overrides it)
+  - transient failures (4xx, disconnects, network errors) are retried with
+    exponential backoff up to MAX_ATTEMPTS; 5xx rejections are marked
+    'rejected' straight away (the owning agent picks them up via
+    outbox.rejections(), as leads does with bounces)
+  - each claim records its owner (host:pid) and time. Rows left 'sending'
+    are only requeued once their owner is gone — its pid no longer exists on
+    this host, or the claim is older than STALE_CLAIM_SECS — so a one-shot
+    CLI run can't resend mail run.py's sender is still delivering
+  - mail queued for later (send_after) can carry a guard: a small dict the
+    owning agent's checker (register_guard) re-reads at delivery time. If the
+    agent says the message no longer applies — the lead replied, bounced or
+    changed status meanwhile — the row is 'cancelled' unsent. cancel() drops
+    an agent's unsent rows for a ref outright
+  - the Message-ID is kept in the outbox, so a bounce that quotes the
+    original headers can be traced back to its recipient (see
+    outbox.lookup_message_ids)
+
+Server: SMTP_HOST / SMTP_PORT (default smtp.gmail.com:465, implicit TLS).
+Any other port uses plain SMTP with STARTTLS if the server offers it, so a
+local stand-in works too:
+    python -m aiosmtpd -n -l localhost:8025
+    SMTP_HOST=localhost SMTP_PORT=8025 python run.py
+Credentials: GMAIL_USER / GMAIL_APP_PASS (login is skipped if the server
+doesn't offer AUTH).
+
+Usage:
+    from agents import outbox
+    mid = outbox.enqueue(msg, to_addr, agent_id="leads", ref="lead:42")
+    outbox.register_guard("leads", lambda guard: None)   # reason to skip, or None to send
+    outbox.cancel("leads", "lead:42")                     # unsent rows for the ref → cancelled
+    outbox.flush(timeout=60)     # optional — wait for the queue to drain
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import smtplib
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.message import Message
+from email.utils import formatdate, make_msgid, parseaddr
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import ratelimit as _ratelimit
+from dashboard import db
+
+SMTP_HOST  = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT  = int(os.environ.get("SMTP_PORT", "465"))
+SMTP_TIMEOUT = 30
+
+MAX_ATTEMPTS         = int(os.environ.get("IYS_OUTBOX_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECS      = 60        # 1m, 2m, 4m, 8m ... capped at RETRY_MAX_SECS
+RETRY_MAX_SECS       = 3600
+SESSION_MAX_MESSAGES = 50        # reconnect after this many messages on one session
+SESSION_IDLE         = 120       # close the session after this long without sending
+CLAIM_BATCH          = 20
+POLL_SECS            = 30        # wake at least this often to pick up due retries
+STALE_CLAIM_SECS     = 1800      # a claim from another host this old is presumed dead
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_guards: dict[str, Callable[[dict], Optional[str]]] = {}
+
+if os.environ.get("IYS_SMTP_PER_MINUTE"):
+    _ratelimit.configure(SMTP_HOST, float(os.environ["IYS_SMTP_PER_MINUTE"]) / 60, 1)
+
+
+class _Permanent(Exception):
+    """SMTP rejected the message for good (5xx) — don't retry."""
+
+
+def _ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _domain(addr: str) -> str:
+    return parseaddr(addr)[1].rpartition("@")[2] or "improveyoursite.com"
+
+
+def _owner_gone(owner: Optional[str], claimed_at: Optional[str]) -> bool:
+    """True if the sender that claimed rows can no longer be delivering them."""
+    if owner == _OWNER:
+        return False
+    host, _, pid = (owner or "").rpartition(":")
+    if host == socket.gethostname() and pid.isdigit():
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass          # exists, owned by someone else
+        return False
+    cutoff = _ts(datetime.utcnow() - timedelta(seconds=STALE_CLAIM_SECS))
+    return not claimed_at or claimed_at < cutoff
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+
+def enqueue(msg: Message, to_addr: str, from_addr: str = "", agent_id: str = "",
+            ref: str = "", send_after: Optional[datetime] = None, guard: Optional[dict] = None) -> str:
+    """
+    Queue a message for delivery and return its Message-ID.
+    from_addr is the envelope sender (defaults to the From header, then GMAIL_USER).
+    send_after (naive UTC) defers delivery; the Date header is then set to it.
+    guard is handed to the agent's register_guard checker just before sending.
+    """
+    from_addr = from_addr or parseaddr(msg.get("From", ""))[1] or os.environ.get("GMAIL_USER", "")
+    if not msg.get("Message-ID"):
+        msg["Message-ID"] = make_msgid(domain=_domain(from_addr))
+    if not msg.get("Date"):
+        msg["Date"] = formatdate(send_after.replace(tzinfo=timezone.utc).timestamp() if send_after else None,
+                                 localtime=True)
+    message_id = msg["Message-ID"]
+    db.outbox_enqueue(
+        message_id, from_addr, to_addr, msg.get("Subject", ""), msg.as_string(),
+        agent_id=agent_id, ref=ref, send_after=_ts(send_after) if send_after else None,
+        guard=json.dumps(guard) if guard is not None else None,
+    )
+    _sender.start()
+    _sender.wake()
+    return message_id
+
+
+def start():
+    """Start the sender thread (also done lazily by enqueue())."""
+    _sender.start()
+
+
+def flush(timeout: float = 60) -> bool:
+    """Wait until nothing is due or in flight. Returns False on timeout."""
+    _sender.start()
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        counts = db.outbox_counts()
+        due    = db.outbox_next_due()
+        if not counts.get("sending") and (due is None or due > _ts(datetime.utcnow())):
+            return True
+        _sender.wake()
+        time.sleep(0.2)
+    return False
+
+
+def stop(timeout: float = 10):
+    _sender.stop(timeout)
+
+
+def stats() -> dict:
+    return {**_sender.stats(), "queue": db.outbox_counts()}
+
+
+def register_guard(agent_id: str, check: Callable[[dict], Optional[str]]):
+    """
+    check(guard) runs in the sender just before an agent's guarded message goes
+    out; a non-empty return is the reason to cancel it instead. If it raises,
+    the message is retried later.
+    """
+    _guards[agent_id] = check
+
+
+def cancel(agent_id: str, ref: str, reason: str = "cancelled by agent") -> list[dict]:
+    """
+    Cancel an agent's not-yet-sent messages for ref and free their send-plan
+    slots. Returns them oldest first, each with its guard dict (or None).
+    A message the sender has already claimed is not touched.
+    """
+    rows = db.outbox_cancel(agent_id, ref, reason)
+    for row in rows:
+        row["guard"] = json.loads(row["guard"]) if row["guard"] else None
+    return rows
+
+
+def rejections(agent_id: str) -> list[dict]:
+    """An agent's messages the server refused (5xx) that it hasn't handled yet — see mark_reported."""
+    return db.outbox_unreported("rejected", agent_id)
+
+
+def mark_reported(outbox_ids: list[int]):
+    db.outbox_mark_reported(outbox_ids)
+
+
+def lookup_message_ids(message_ids: list[str]) -> list[dict]:
+    """Outbox rows for the given Message-IDs (bounce correlation)."""
+    return db.outbox_by_message_ids(message_ids)
+
+
+# ── Sender ───────────────────────────────────────────────────────────────────
+
+class _Sender:
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._wake   = threading.Event()
+        self._stop   = threading.Event()
+        self._lock   = threading.Lock()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._session_sent = 0
+        self._last_used    = 0.0
+        self._stats = {"sent": 0, "retried": 0, "failed": 0, "cancelled": 0, "sessions": 0}
+
+    # ── Thread ─────────────────────────────────────────────────────────────
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._release_stale()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="outbox-sender")
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._disconnect()
+
+    def _release_stale(self):
+        try:
+            dead = [c["claimed_by"] for c in db.outbox_claims() if _owner_gone(c["claimed_by"], c["claimed_at"])]
+            if dead and db.outbox_release_stale(dead):
+                self._log({}, "warn", f"Outbox: requeued mail left 'sending' by {', '.join(map(str, dead))}")
+        except Exception:
+            pass
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                batch = db.outbox_claim(_OWNER, CLAIM_BATCH)
+            except Exception:
+                batch = []
+            for row in batch:
+                if self._stop.is_set():
+                    db.outbox_mark(row["id"], "queued")
+                    continue
+                try:
+                    self._deliver(row)
+                except Exception as exc:   # never let one bad row kill the sender
+                    db.outbox_mark(row["id"], "retry", error=f"{type(exc).__name__}: {exc}"[:500],
+                                   next_attempt_at=_ts(datetime.utcnow() + timedelta(seconds=RETRY_BASE_SECS)))
+            if batch:
+                continue
+            if self._smtp and time.time() - self._last_used > SESSION_IDLE:
+                self._disconnect()
+            self._release_stale()
+            self._wake.wait(self._sleep_for())
+            self._wake.clear()
+
+    def _sleep_for(self) -> float:
+        due = db.outbox_next_due()
+        if not due:
+            return POLL_SECS
+        try:
+            wait = (datetime.strptime(due, "%Y-%m-%dT%H:%M:%SZ") - datetime.utcnow()).total_seconds()
+        except ValueError:
+            return POLL_SECS
+        return min(POLL_SECS, max(0.5, wait))
+
+    # ── SMTP session ───────────────────────────────────────────────────────
+
+    def _connect(self) -> smtplib.SMTP:
+        if SMTP_PORT == 465:
+            smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        else:
+            smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            smtp.ehlo()
+            if smtp.has_extn("starttls"):
+                smtp.starttls()
+                smtp.ehlo()
+        user, password = os.environ.get("GMAIL_USER", ""), os.environ.get("GMAIL_APP_PASS", "")
+        if user and password and smtp.has_extn("auth"):
+            smtp.login(user, password)
+        self._stats["sessions"] += 1
+        self._session_sent = 0
+        return smtp
+
+    def _disconnect(self):
+        if self._smtp:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+        self._smtp = None
+
+    def _session(self) -> smtplib.SMTP:
+        if self._smtp and self._session_sent >= SESSION_MAX_MESSAGES:
+            self._disconnect()
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def _send(self, row: dict):
+        """One SMTP transaction on the shared session; reconnects once if the session went stale."""
+        for attempt in (1, 2):
+            smtp = self._session()
+            try:
+                refused = smtp.sendmail(row["from_addr"], [row["to_addr"]], row["raw"].encode("utf-8"))
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = None
+                if attempt == 2:
+                    raise
+                continue
+            except smtplib.SMTPRecipientsRefused as exc:
+                code, resp = next(iter(exc.recipients.values()))
+                if 400 <= code < 500:
+                    raise
+                raise _Permanent(f"{code} {resp!r}")
+            except smtplib.SMTPResponseException as exc:
+                if exc.smtp_code >= 500:
+                    self._reset()
+                    raise _Permanent(f"{exc.smtp_code} {exc.smtp_error!r}")
+                raise
+            if refused:
+                raise _Permanent(repr(refused))
+            self._session_sent += 1
+            self._last_used = time.time()
+            return
+
+    def _reset(self):
+        """RSET after a rejected transaction so the session can be reused."""
+        try:
+            self._smtp.rset()
+        except Exception:
+            self._smtp = None
+
+    # ── Delivery ───────────────────────────────────────────────────────────
+
+    def _deliver(self, row: dict):
+        check = _guards.get(row.get("agent_id") or "")
+        if row.get("guard") and check:
+            reason = check(json.loads(row["guard"]))
+            if reason:
+                db.outbox_skip(row["id"], row["message_id"], reason[:500])
+                self._bump("cancelled")
+                self._log(row, "info", f"Outbox: {row['to_addr']} not sent — {reason}")
+                return
+        _ratelimit.acquire(SMTP_HOST)
+        try:
+            self._send(row)
+        except _Permanent as exc:
+            db.outbox_mark(row["id"], "rejected", error=str(exc)[:500])
+            self._bump("failed")
+            self._log(row, "warn", f"Outbox: {row['to_addr']} rejected — {exc}")
+            return
+        except (smtplib.SMTPException, OSError, socket.timeout) as exc:
+            self._disconnect()
+            if isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code in (421, 450, 451, 452):
+                _ratelimit.penalize(SMTP_HOST)   # server is throttling us — slow the bucket down
+            attempts = row["attempts"] + 1
+            if attempts >= MAX_ATTEMPTS:
+                db.outbox_mark(row["id"], "failed", error=str(exc)[:500])
+                self._bump("failed")
+                self._log(row, "warn", f"Outbox: giving up on {row['to_addr']} after {attempts} attempts — {exc}")
+                return
+            delay = min(RETRY_MAX_SECS, RETRY_BASE_SECS * 2 ** (attempts - 1))
+            db.outbox_mark(row["id"], "retry", error=str(exc)[:500],
+                           next_attempt_at=_ts(datetime.utcnow() + timedelta(seconds=delay)))
+            self._bump("retried")
+            return
+        _ratelimit.succeed(SMTP_HOST)
+        db.outbox_mark(row["id"], "sent")
+        self._bump("sent")
+
+    def _bump(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _log(self, row: dict, level: str, message: str):
+        try:
+            db.event_log(row.get("agent_id") or "outbox", level, message)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "running": bool(self._thread and self._thread.is_alive()),
+                    "session_open": self._smtp is not None}
+
+
+_sender = _Sender()
+
+
+def _drain_at_exit():
+    """Give queued mail a chance to go out when a one-shot CLI run exits."""
+    if _sender.stats()["running"]:
+        flush(timeout=float(os.environ.get("IYS_OUTBOX_EXIT_WAIT", "30")))
+        _sender.stop()
+
+
+atexit.register(_drain_at_exit)
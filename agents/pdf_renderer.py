@@ -0,0 +1,282 @@
+"""
+agents/pdf_renderer.py — Warm headless-browser service for HTML → PDF.
+
+LeadsAgent._build_score_sheet used to start a fresh Chromium per lead, wait
+for Google Fonts to settle under wait_until="networkidle", print one PDF and
+tear everything down — seconds per PDF across up to 100 leads a run. Here:
+
+  - one browser per process, launched on first use on a dedicated thread
+    that runs Playwright's async API on its own event loop (Playwright objects
+    are bound to the thread that created them)
+  - a pool of IYS_PDF_PAGES reusable pages. render() is thread-safe and
+    renders in parallel across the pool. A page that errors is replaced
+  - no network: every non-inline request is aborted, and font_css() embeds
+    the bundled Inter from assets/fonts/ (variable weight 100–900, Latin
+    subset, SIL OFL — see assets/fonts/OFL.txt), so pages are ready at
+    "load" instead of waiting on networkidle
+  - if the browser dies it is relaunched on the next render — once, under a
+    lock, however many renders notice. Pages from the dead browser are
+    dropped instead of going back into the pool
+  - shutdown() is registered with atexit; stats() reports PDFs per minute
+
+Usage:
+    from agents import pdf_renderer
+
+    html = f"<html><head>{pdf_renderer.font_css()}</head>..."
+    pdf  = pdf_renderer.render(html, width="720px")   # bytes, or None if unavailable
+
+Benchmark:
+    python agents/pdf_renderer.py --bench 40
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import base64
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+POOL_SIZE      = int(os.environ.get("IYS_PDF_PAGES", "3"))
+RENDER_TIMEOUT = float(os.environ.get("IYS_PDF_TIMEOUT", "60"))
+FONT_DIR       = Path(__file__).parent.parent / "assets" / "fonts"
+VIEWPORT       = {"width": 720, "height": 1080}
+LAUNCH_ARGS    = ["--no-sandbox", "--disable-dev-shm-usage", "--font-render-hinting=none"]
+
+_INLINE_SCHEMES = ("data:", "about:", "blob:")
+
+
+@lru_cache(maxsize=1)
+def font_css() -> str:
+    """
+    <style> block declaring Inter from local sources only.
+
+    Any Inter*.woff2 in assets/fonts/ is embedded as a data: URI (a variable
+    font covers all weights). Otherwise the system's Inter is used if
+    installed, falling back to the page's sans-serif stack.
+    """
+    srcs = ['local("Inter")']
+    for path in sorted(FONT_DIR.glob("Inter*.woff2")):
+        try:
+            data = base64.b64encode(path.read_bytes()).decode()
+        except OSError:
+            continue
+        srcs.append(f'url(data:font/woff2;base64,{data}) format("woff2")')
+    return (
+        "<style>@font-face{font-family:Inter;font-weight:100 900;font-display:block;"
+        f"src:{','.join(srcs)};}}</style>"
+    )
+
+
+class _Renderer:
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.pool_size = max(1, pool_size)
+        self._lock     = threading.Lock()
+        self._ready    = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pw       = None
+        self._browser  = None
+        self._pages: Optional[asyncio.Queue] = None     # (generation, page)
+        self._generation = 0                            # bumped per browser launch
+        self._relaunch: Optional[asyncio.Lock] = None
+        self.error: Optional[str] = None
+        self._stats    = {"rendered": 0, "failed": 0, "busy_secs": 0.0, "launches": 0,
+                          "first_at": 0.0, "last_at": 0.0}
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────
+
+    def _ensure_started(self) -> bool:
+        if self._ready.is_set():
+            return self.error is None
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_loop, daemon=True, name="pdf-renderer")
+                self._thread.start()
+        self._ready.wait()
+        return self.error is None
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._relaunch = asyncio.Lock()
+        self._pages    = asyncio.Queue()
+        try:
+            self._loop.run_until_complete(self._launch())
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _launch(self):
+        from playwright.async_api import async_playwright
+        if self._pw is None:
+            self._pw = await async_playwright().start()
+        old, self._browser = self._browser, await self._pw.chromium.launch(args=LAUNCH_ARGS)
+        self._generation += 1
+        while not self._pages.empty():     # idle pages of the old browser
+            self._pages.get_nowait()
+        for _ in range(self.pool_size):
+            self._pages.put_nowait((self._generation, await self._new_page()))
+        self._stats["launches"] += 1
+        if old is not None:
+            try:
+                await old.close()
+            except Exception:
+                pass
+
+    async def _ensure_browser(self):
+        """Relaunch a crashed browser — only once, whichever render notices first."""
+        if self._browser is not None and self._browser.is_connected():
+            return
+        async with self._relaunch:
+            if self._browser is None or not self._browser.is_connected():
+                await self._launch()
+
+    async def _new_page(self):
+        page = await self._browser.new_page(viewport=VIEWPORT)
+
+        async def _offline(route):
+            if route.request.url.startswith(_INLINE_SCHEMES):
+                await route.continue_()
+            else:
+                await route.abort()
+
+        await page.route("**/*", _offline)
+        return page
+
+    async def _close(self):
+        try:
+            if self._browser:
+                await self._browser.close()
+            if self._pw:
+                await self._pw.stop()
+        finally:
+            self._browser = self._pw = None
+
+    def shutdown(self):
+        """Close the browser and stop the loop thread (safe to call twice)."""
+        loop = self._loop
+        if not loop or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=10)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    # ── Rendering ──────────────────────────────────────────────────────────
+
+    async def _render(self, html: str, pdf_opts: dict) -> bytes:
+        await self._ensure_browser()
+        generation, page = await self._pages.get()
+        while generation != self._generation:        # left over from a browser that died
+            generation, page = await self._pages.get()
+        try:
+            await page.set_content(html, wait_until="load")
+            await page.evaluate("document.fonts.ready")
+            pdf = await page.pdf(**pdf_opts)
+        except Exception:
+            try:
+                await page.close()
+            except Exception:
+                pass
+            page = None
+            if generation == self._generation and self._browser.is_connected():
+                page = await self._new_page()
+            raise
+        finally:
+            # A page whose browser was replaced meanwhile is dropped; the new
+            # browser came with a full pool of its own
+            if page is not None and generation == self._generation:
+                self._pages.put_nowait((generation, page))
+        return pdf
+
+    def render(self, html: str, width: str = "720px", timeout: float = RENDER_TIMEOUT,
+               **pdf_opts) -> Optional[bytes]:
+        """HTML → PDF bytes on the warm browser. None if Playwright is unavailable or rendering failed."""
+        if not self._ensure_started():
+            return None
+        opts = {"width": width, "print_background": True,
+                "margin": {"top": "0", "bottom": "0", "left": "0", "right": "0"}, **pdf_opts}
+        started = time.time()
+        try:
+            pdf = asyncio.run_coroutine_threadsafe(self._render(html, opts), self._loop).result(timeout)
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            return None
+        ended = time.time()
+        with self._lock:
+            s = self._stats
+            s["rendered"]  += 1
+            s["busy_secs"] += ended - started
+            s["first_at"]   = s["first_at"] or started
+            s["last_at"]    = ended
+        return pdf
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        window = s.pop("last_at") - s.pop("first_at")
+        return {
+            **s,
+            "busy_secs":   round(s["busy_secs"], 1),
+            "pool_size":   self.pool_size,
+            "available":   self.error is None if self._ready.is_set() else None,
+            "error":       self.error,
+            "avg_secs":    round(s["busy_secs"] / s["rendered"], 2) if s["rendered"] else None,
+            "pdfs_per_min": round(60 * s["rendered"] / window, 1) if window > 0 else None,
+        }
+
+
+_renderer = _Renderer()
+atexit.register(_renderer.shutdown)
+
+
+def render(html: str, width: str = "720px", timeout: float = RENDER_TIMEOUT, **pdf_opts) -> Optional[bytes]:
+    return _renderer.render(html, width=width, timeout=timeout, **pdf_opts)
+
+
+def stats() -> dict:
+    return _renderer.stats()
+
+
+def shutdown():
+    _renderer.shutdown()
+
+
+def _bench(n: int):
+    html = (
+        f"<html><head>{font_css()}</head><body style='font-family:Inter,sans-serif'>"
+        + "".join(f"<h2>Section {i}</h2><p>{'Lorem ipsum dolor sit amet. ' * 40}</p>" for i in range(12))
+        + "</body></html>"
+    )
+    started = time.time()
+    render(html)   # warm-up: browser launch + page pool
+    print(f"warm-up (launch): {time.time() - started:.1f}s")
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=POOL_SIZE) as pool:
+        ok = sum(1 for pdf in pool.map(lambda _: render(html), range(n)) if pdf)
+    wall = time.time() - started
+    print(f"{ok}/{n} PDFs in {wall:.1f}s → {60 * ok / wall:.0f} PDFs/min on {POOL_SIZE} page(s)")
+    print(stats())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--bench":
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 20)
+    else:
+        print(__doc__)
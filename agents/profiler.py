@@ -0,0 +1,247 @@
+"""
+agents/profiler.py — On-demand profiling of a single agent run.
+
+Two ways to profile a run:
+  - Dashboard "Profile next run" toggle → arm(agent_id); the next execute() of
+    that agent is profiled, then the toggle clears itself
+  - POST /api/trigger/{id}?profile=1 → RunContext(profile=True)
+
+Profilers:
+  sample   (default) — py-spy-style wall-clock sampler. A background thread
+             reads the stacks of the run thread and of every worker thread
+             carrying the run's context (RunContext.threads, registered by
+             context.run_in_thread_target) via sys._current_frames() every
+             PROFILE_INTERVAL seconds and counts collapsed stacks. Captures
+             time blocked on network/SMTP/Playwright, which is usually what
+             makes an agent run slow. Percentages are of sampled thread-time,
+             so a coordinator parked in join() shows up next to the workers
+             doing the actual work.
+  cprofile (IYS_PROFILER=cprofile) — deterministic cProfile of the run thread
+             only (cProfile cannot follow worker threads; the artifact says so).
+             Also writes a .prof file loadable in snakeviz / pstats.
+
+Each capture is written to dashboard/profiles/<run_id>.json and recorded in the
+profiles table, linked to the first task the run created.
+
+When nothing is armed, the only cost on execute() is one set lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dashboard import db
+
+PROFILES_DIR     = Path(__file__).parent.parent / "dashboard" / "profiles"
+PROFILE_INTERVAL = float(os.environ.get("IYS_PROFILE_INTERVAL", "0.005"))
+MAX_STACK_DEPTH  = 64
+TOP_N            = 40
+
+_armed: set[str] = set()
+_armed_lock = threading.Lock()
+
+
+# ── Arming ───────────────────────────────────────────────────────────────────
+
+def arm(agent_id: str):
+    with _armed_lock:
+        _armed.add(agent_id)
+
+
+def disarm(agent_id: str):
+    with _armed_lock:
+        _armed.discard(agent_id)
+
+
+def armed_agents() -> list[str]:
+    with _armed_lock:
+        return sorted(_armed)
+
+
+def take(agent_id: str) -> bool:
+    """True (and disarm) if agent_id is armed. Called once per execute()."""
+    if not _armed:
+        return False
+    with _armed_lock:
+        if agent_id in _armed:
+            _armed.discard(agent_id)
+            return True
+    return False
+
+
+# ── Sampling profiler ────────────────────────────────────────────────────────
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    short = f"{path.parent.name}/{path.name}" if path.parent.name else path.name
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the call stacks of a run's threads at a fixed interval into
+    collapsed-stack counts. `workers` is a live set of extra thread idents
+    (RunContext.threads) re-read on every tick, so pool threads that pick up
+    and drop the run's work mid-capture are followed.
+    """
+
+    def __init__(self, thread_id: int, workers: set[int] | None = None,
+                 interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.workers   = workers if workers is not None else set()
+        self.interval  = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples   = 0
+        self.seen_threads: set[int] = set()
+        self._stop     = threading.Event()
+        self._thread   = threading.Thread(target=self._loop, daemon=True, name="iys-profiler")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for tid in {self.thread_id, *tuple(self.workers)}:
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.reverse()
+                self.stacks[";".join(labels)] += 1
+                self.samples += 1
+                self.seen_threads.add(tid)
+
+    def top_functions(self, n: int = TOP_N) -> list[dict]:
+        """Self + inclusive sample counts per function, heaviest inclusive first (% of thread-samples)."""
+        self_counts: Counter[str] = Counter()
+        total_counts: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for fn in set(frames):
+                total_counts[fn] += count
+        total = max(self.samples, 1)
+        return [
+            {
+                "function": fn,
+                "self":     self_counts[fn],
+                "total":    cnt,
+                "self_pct":  round(100 * self_counts[fn] / total, 1),
+                "total_pct": round(100 * cnt / total, 1),
+            }
+            for fn, cnt in total_counts.most_common(n)
+        ]
+
+
+# ── cProfile fallback ────────────────────────────────────────────────────────
+
+def _cprofile_top(prof, n: int = TOP_N) -> list[dict]:
+    import pstats
+    stats = pstats.Stats(prof)
+    total = max(stats.total_tt, 1e-9)
+    rows = []
+    for (filename, line, name), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        path = Path(filename)
+        label = f"{name} ({path.parent.name}/{path.name}:{line})" if line else name
+        rows.append({
+            "function":  label,
+            "calls":     nc,
+            "self":      round(tt, 4),
+            "total":     round(ct, 4),
+            "self_pct":  round(100 * tt / total, 1),
+            "total_pct": round(100 * ct / total, 1),
+        })
+    rows.sort(key=lambda r: r["total"], reverse=True)
+    return rows[:n]
+
+
+# ── Entry point ──────────────────────────────────────────────────────────────
+
+def profile_call(agent_id: str, ctx, fn):
+    """
+    Run fn() under the configured profiler and persist the artifact.
+    Exceptions from fn propagate unchanged — BaseAgent.execute() still handles them.
+    """
+    kind = os.environ.get("IYS_PROFILER", "sample").lower()
+    started = time.time()
+    sampler = None
+    prof    = None
+    if kind == "cprofile":
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+    else:
+        kind = "sample"
+        sampler = StackSampler(threading.get_ident(), ctx.threads)
+        sampler.start()
+    try:
+        return fn()
+    finally:
+        wall = time.time() - started
+        if prof is not None:
+            prof.disable()
+        if sampler is not None:
+            sampler.stop()
+        try:
+            _save(agent_id, ctx, kind, wall, sampler, prof)
+        except Exception as exc:
+            db.event_log(agent_id, "warn", f"Profiler: could not save profile — {exc}",
+                         run_id=ctx.run_id)
+
+
+def _save(agent_id: str, ctx, kind: str, wall: float, sampler, prof):
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    artifact = {
+        "agent_id": agent_id,
+        "run_id":   ctx.run_id,
+        "kind":     kind,
+        "wall_secs": round(wall, 3),
+    }
+    if sampler is not None:
+        artifact["interval"]  = sampler.interval
+        artifact["samples"]   = sampler.samples
+        artifact["threads"]   = len(sampler.seen_threads)
+        artifact["collapsed"] = dict(sampler.stacks)
+        artifact["top"]       = sampler.top_functions()
+    else:
+        prof_path = PROFILES_DIR / f"{ctx.run_id}.prof"
+        prof.dump_stats(str(prof_path))
+        artifact["samples"]   = 0
+        artifact["collapsed"] = {}
+        artifact["top"]       = _cprofile_top(prof)
+        artifact["prof_file"] = prof_path.name
+        artifact["note"]      = "cProfile covers the execute() thread only; worker threads are not profiled."
+
+    path = PROFILES_DIR / f"{ctx.run_id}.json"
+    path.write_text(json.dumps(artifact))
+    task_id = ctx.task_ids[0] if ctx.task_ids else None
+    profile_id = db.profile_add(
+        agent_id, ctx.run_id, task_id, kind, path.name, wall, artifact["samples"],
+    )
+    db.event_log(
+        agent_id, "info",
+        f"Profiler: captured {kind} profile #{profile_id} ({wall:.1f}s wall)",
+        run_id=ctx.run_id,
+    )
+
+
+def load_artifact(profile: dict) -> dict:
+    """Read the JSON artifact for a profiles row."""
+    return json.loads((PROFILES_DIR / profile["path"]).read_text())
@@ -0,0 +1,232 @@
+"""
+agents/prospects.py — Yellow Pages AU sourcing into a persistent prospect backlog.
+
+The old scraper fetched pageNumber=1 for one keyword/location at a time and
+threw the parsed listings away after each run, so the same pages were
+re-scraped every day. Now:
+
+  - refresh() crawls industry × city searches concurrently (YP_WORKERS
+    threads), paging through up to YP_PAGES result pages per search.
+    Requests go through agents/httpclient.py, so the shared
+    www.yellowpages.com.au token bucket in agents/ratelimit.py paces them
+  - each results page is recorded in prospect_pages; a page fetched within
+    YP_TTL_DAYS is not fetched again. A search stops at an empty or
+    repeated page
+  - listings are upserted into the prospects table (first_seen / last_seen),
+    so every run adds to a backlog of unenriched targets
+  - LeadsAgent takes candidates from backlog() and calls mark_enriched() once
+    the outreach pipeline has consumed them
+  - YP_PAGE_BUDGET and YP_TIMEOUT bound how much one run crawls; the stale
+    pages it doesn't reach are picked up by the next run
+
+Usage:
+    from agents import prospects
+    prospects.refresh([("plumber", "Sydney"), ("dentist", "Hobart")])
+    for p in prospects.backlog(200): ...
+    prospects.mark_enriched([p["place_id"] for p in used])
+"""
+
+from __future__ import annotations
+
+import html as html_lib
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import httpclient as _http
+from agents.context import run_in_thread_target
+from dashboard import db
+
+YELLOWPAGES_BASE = os.environ.get("IYS_YELLOWPAGES_BASE", "https://www.yellowpages.com.au")
+SOURCE           = "yp"
+
+YP_PAGES       = int(os.environ.get("IYS_YP_PAGES", "3"))           # result pages per search
+YP_TTL_DAYS    = float(os.environ.get("IYS_YP_TTL_DAYS", "7"))      # re-fetch a page after this long
+YP_WORKERS     = int(os.environ.get("IYS_YP_WORKERS", "4"))
+YP_PAGE_BUDGET = int(os.environ.get("IYS_YP_PAGE_BUDGET", "120"))   # max pages fetched per refresh()
+YP_TIMEOUT     = float(os.environ.get("IYS_YP_TIMEOUT", "300"))     # seconds per refresh()
+
+_YP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-AU,en;q=0.9",
+}
+
+
+# ── Scraping ─────────────────────────────────────────────────────────────────
+
+def fetch_page(keyword: str, location: str, page: int = 1) -> list[dict] | None:
+    """One Yellow Pages results page → listings. None if the fetch failed."""
+    params = urllib.parse.urlencode({
+        "clue": keyword,
+        "locationClue": f"{location} Australia",
+        "pageNumber": str(page),
+    })
+    url = f"{YELLOWPAGES_BASE}/search/listings?{params}"
+    try:
+        req = urllib.request.Request(url, headers=_YP_HEADERS)
+        with _http.urlopen(req, timeout=12) as resp:
+            raw = resp.read().decode("utf-8", errors="ignore")
+    except Exception:
+        return None
+    return parse_listings(raw, keyword, location)
+
+
+def parse_listings(raw: str, keyword: str, location: str) -> list[dict]:
+    """
+    Listings on a Yellow Pages results page.
+    Each is {name, phone, website, address, industry, city, place_id, email}.
+    """
+    results = []
+
+    # Extract listing blocks — YP wraps each in a div with data-analytics or listing- id
+    blocks = re.findall(
+        r'<(?:div|li)[^>]+class="[^"]*listing[^"]*"[^>]*>(.*?)</(?:div|li)>',
+        raw, re.DOTALL
+    )
+    if not blocks:
+        # Fallback: find h2/h3 business names near phone/website patterns
+        blocks = re.findall(r'<article[^>]*>(.*?)</article>', raw, re.DOTALL)
+
+    seen = set()
+    for block in blocks:
+        name = _extract_text(re.search(r'<(?:h2|h3)[^>]*>(.*?)</(?:h2|h3)>', block, re.DOTALL))
+        if not name or len(name) < 3:
+            continue
+
+        phone = _extract_text(re.search(
+            r'(?:href="tel:[^"]*">|class="[^"]*phone[^"]*"[^>]*>)(.*?)<',
+            block, re.DOTALL
+        ))
+        if not phone:
+            phone_match = re.search(r'(?:0[2-9]\d{8}|13\d{4,8}|\(0\d\)\s?\d{4}\s?\d{4})', block)
+            phone = phone_match.group(0) if phone_match else ""
+
+        website = ""
+        web_match = re.search(r'href="(https?://[^"]+)"[^>]*>[^<]*[Ww]ebsite', block)
+        if not web_match:
+            web_match = re.search(r'href="(https?://(?!www\.yellowpages)[^"]+)"', block)
+        if web_match:
+            website = web_match.group(1).split("?")[0].rstrip("/")
+
+        address = _extract_text(re.search(
+            r'(?:class="[^"]*address[^"]*"[^>]*>)(.*?)</(?:p|div|span)>',
+            block, re.DOTALL
+        ))
+
+        place_id = f"yp_{re.sub(r'[^a-z0-9]', '_', name.lower())}_{location.lower().replace(' ', '_')}"
+        if place_id in seen:
+            continue
+        seen.add(place_id)
+
+        results.append({
+            "name": name.strip(),
+            "phone": phone.strip(),
+            "website": website,
+            "address": address.strip() if address else f"{location}, Australia",
+            "industry": keyword,
+            "city": location,
+            "place_id": place_id,
+            "email": "",
+        })
+
+    return results
+
+
+def _extract_text(match) -> str:
+    if not match:
+        return ""
+    raw = match.group(1) if match.lastindex else match.group(0)
+    raw = re.sub(r'<[^>]+>', ' ', raw)
+    raw = html_lib.unescape(raw)
+    return re.sub(r'\s+', ' ', raw).strip()
+
+
+# ── Crawl ────────────────────────────────────────────────────────────────────
+
+def refresh(searches: list[tuple[str, str]], pages: int = YP_PAGES, budget: int = YP_PAGE_BUDGET,
+            ttl_days: float = YP_TTL_DAYS, timeout: float = YP_TIMEOUT) -> dict:
+    """
+    Fetch the stale result pages of each (keyword, city) search, in order of
+    priority, until the page budget or timeout runs out.
+    Returns {"pages", "listings", "new", "errors", "fresh", "skipped"}.
+    """
+    fresh    = db.prospect_pages_fresh(SOURCE, ttl_days * 24)
+    deadline = time.time() + timeout
+    lock     = threading.Lock()
+    stats    = {"pages": 0, "listings": 0, "new": 0, "errors": 0, "fresh": 0, "skipped": 0}
+
+    def _take_budget() -> bool:
+        with lock:
+            if stats["pages"] >= budget or time.time() > deadline:
+                stats["skipped"] += 1
+                return False
+            stats["pages"] += 1
+            return True
+
+    def _crawl(search: tuple[str, str]):
+        keyword, city = search
+        previous: set[str] = set()
+        for page in range(1, pages + 1):
+            cached = fresh.get((keyword, city, page))
+            if cached is not None:
+                with lock:
+                    stats["fresh"] += 1
+                if cached == 0:
+                    return          # known end of results
+                previous = set()    # can't compare against a page we didn't fetch
+                continue
+            if not _take_budget():
+                return
+            listings = fetch_page(keyword, city, page)
+            if listings is None:
+                with lock:
+                    stats["errors"] += 1
+                return              # retried next run — the page isn't recorded
+            ids = {p["place_id"] for p in listings}
+            if page > 1 and ids and ids == previous:
+                listings = []       # YP repeats the last page past the end
+            new = db.prospect_page_put(SOURCE, keyword, city, page, listings)
+            with lock:
+                stats["listings"] += len(listings)
+                stats["new"]      += new
+            if not listings:
+                return
+            previous = ids
+
+    if searches:
+        with ThreadPoolExecutor(max_workers=max(1, YP_WORKERS), thread_name_prefix="yp") as pool:
+            # one context copy per task — a Context can't be entered by two threads at once
+            futures = [pool.submit(run_in_thread_target(_crawl), search) for search in searches]
+        for f in futures:
+            if f.exception():
+                stats["errors"] += 1
+    return stats
+
+
+# ── Backlog ──────────────────────────────────────────────────────────────────
+
+def backlog(limit: int) -> list[dict]:
+    """Unenriched prospects, oldest first."""
+    return db.prospects_backlog(limit)
+
+
+def mark_enriched(place_ids: list[str]):
+    """Take prospects out of the backlog once outreach has processed them (other ids are ignored)."""
+    db.prospects_mark_enriched(list(place_ids))
+
+
+def stats() -> dict:
+    return db.prospects_counts()
@@ -0,0 +1,215 @@
+"""
+agents/ratelimit.py — Process-wide token-bucket rate limiter for outbound calls.
+
+Replaces the fixed time.sleep() throttles that used to sit in leads.py (1s per
+Yellow Pages page, 0.5s between contact pages, 3s after every email). Every
+outbound call acquires a token from the bucket for its host, so agents run at
+the fastest rate each API allows and only wait when they actually need to.
+
+Buckets are keyed by hostname (or a logical key like "smtp.gmail.com").
+Hosts without an explicit limit, such as prospect websites, share
+DEFAULT_RATE per host.
+
+Configure with IYS_RATE_LIMITS (comma-separated host=rate[/unit][:burst]):
+    IYS_RATE_LIMITS="maps.googleapis.com=20/s:20,api.anthropic.com=50/m"
+
+Adaptive backoff:
+  - A 429/503 response (or an explicit penalize() call) blocks the bucket
+    until Retry-After has passed, or uses exponential backoff if no
+    Retry-After was sent. It also halves the bucket's rate.
+  - Each success after that raises the rate again in small steps until it
+    is back at the configured value (AIMD).
+
+HTTP calls made through agents/httpclient.py acquire tokens automatically.
+
+Usage:
+    from agents import ratelimit
+
+    ratelimit.acquire("smtp.gmail.com")                # non-HTTP calls
+    await ratelimit.acquire_async("api.anthropic.com") # from async code
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import os
+import threading
+import time
+import urllib.parse
+from typing import Optional
+
+# (rate per second, burst)
+_DEFAULT_LIMITS: dict[str, tuple[float, float]] = {
+    "api.anthropic.com":                 (50 / 60, 5),
+    "maps.googleapis.com":               (10.0, 10),
+    "places.googleapis.com":             (10.0, 10),
+    "www.googleapis.com":                (4.0, 4),     # PageSpeed Insights
+    "safebrowsing.googleapis.com":       (10.0, 10),
+    "graph.facebook.com":                (3.0, 5),
+    "graph.instagram.com":               (3.0, 5),
+    "api.stripe.com":                    (25.0, 25),
+    "api.perplexity.ai":                 (1.0, 2),
+    "api.github.com":                    (1.0, 3),
+    "www.yellowpages.com.au":            (1.0, 1),
+    "nominatim.openstreetmap.org":       (1.0, 1),     # OSM usage policy: max 1 req/s
+    "smtp.gmail.com":                    (1 / 3, 1),   # ~20 emails/min
+    "localhost":                         (100.0, 100), # our own dashboard (security scan)
+    "127.0.0.1":                         (100.0, 100),
+}
+DEFAULT_RATE  = float(os.environ.get("IYS_RATE_DEFAULT", "2"))
+DEFAULT_BURST = 2.0
+MAX_BACKOFF   = 300.0
+RETRY_STATUS  = {429, 503}
+
+_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_limits(spec: str) -> dict[str, tuple[float, float]]:
+    """Parse IYS_RATE_LIMITS. Malformed entries are ignored."""
+    out = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if "=" not in part:
+            continue
+        host, value = part.split("=", 1)
+        try:
+            burst = None
+            if ":" in value:
+                value, burst_s = value.split(":", 1)
+                burst = float(burst_s)
+            unit = "s"
+            if "/" in value:
+                value, unit = value.split("/", 1)
+            rate = float(value) / _UNITS.get(unit.strip().lower()[:1], 1.0)
+            out[host.strip().lower()] = (rate, burst if burst is not None else max(1.0, rate))
+        except ValueError:
+            continue
+    return out
+
+
+class TokenBucket:
+    """Thread-safe token bucket with adaptive (AIMD) backoff."""
+
+    def __init__(self, rate: float, burst: float):
+        self.base_rate     = rate
+        self.rate          = rate
+        self.burst         = burst
+        self.tokens        = burst
+        self.updated       = time.monotonic()
+        self.blocked_until = 0.0
+        self.failures      = 0
+        self._lock         = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens  = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token, returning how many seconds the caller must wait first."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """Back off after a 429/503: block until retry_after and halve the rate."""
+        with self._lock:
+            self.failures += 1
+            delay = retry_after if retry_after is not None else min(MAX_BACKOFF, 2.0 ** self.failures)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.rate = max(self.base_rate / 16, self.rate / 2)
+
+    def succeed(self):
+        """Recover the rate step by step after successful calls."""
+        if self.rate >= self.base_rate and not self.failures:
+            return
+        with self._lock:
+            self.failures = 0
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+_limits  = {**_DEFAULT_LIMITS, **_parse_limits(os.environ.get("IYS_RATE_LIMITS", ""))}
+_buckets: dict[str, TokenBucket] = {}
+_registry_lock = threading.Lock()
+
+
+def _key(target: str) -> str:
+    """Bucket key for a URL, Request or bare host name."""
+    if "://" in target:
+        return (urllib.parse.urlsplit(target).hostname or target).lower()
+    return target.lower()
+
+
+def bucket(target: str) -> TokenBucket:
+    key = _key(target)
+    b = _buckets.get(key)
+    if b is None:
+        with _registry_lock:
+            b = _buckets.get(key)
+            if b is None:
+                rate, burst = _limits.get(key, (DEFAULT_RATE, DEFAULT_BURST))
+                b = _buckets[key] = TokenBucket(rate, burst)
+    return b
+
+
+def configure(host: str, rate: float, burst: Optional[float] = None):
+    """Override the limit for a host at runtime (rate in requests/second)."""
+    key = _key(host)
+    with _registry_lock:
+        _limits[key] = (rate, burst if burst is not None else max(1.0, rate))
+        _buckets.pop(key, None)
+
+
+def acquire(target: str):
+    """Block until a request to target is allowed."""
+    wait = bucket(target).reserve()
+    if wait > 0:
+        time.sleep(wait)
+
+
+async def acquire_async(target: str):
+    """Async variant of acquire() — yields to the event loop instead of sleeping the thread."""
+    wait = bucket(target).reserve()
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+def penalize(target: str, retry_after: Optional[float] = None):
+    bucket(target).penalize(retry_after)
+
+
+def succeed(target: str):
+    bucket(target).succeed()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+        return max(0.0, dt.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def stats() -> dict[str, dict]:
+    """Current bucket state per host (for the dashboard / debugging)."""
+    now = time.monotonic()
+    return {
+        key: {
+            "rate":       round(b.rate, 3),
+            "base_rate":  round(b.base_rate, 3),
+            "tokens":     round(max(b.tokens, 0.0), 2),
+            "blocked_for": round(max(0.0, b.blocked_until - now), 1),
+        }
+        for key, b in list(_buckets.items())
+    }
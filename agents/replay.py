@@ -0,0 +1,541 @@
+"""
+agents/replay.py — Offline record / replay harness and benchmark for LeadsAgent.
+
+LeadsAgent.run touches Yellow Pages, Places, OSM, PSI, Safe Browsing,
+prospect websites, Anthropic, SMTP and IMAP, so there was no way to measure
+it without hitting all of them for real. This records one run and then
+replays it as often as needed:
+
+  record  — runs the agent once against the real HTTP services, with
+            agents/httpclient.py writing every response to
+            dashboard/replay/<name>/http.jsonl. The last --imap-last messages
+            of each configured inbox are saved as .eml files and served to
+            the run from the IMAP stand-in. Outgoing mail goes to the SMTP
+            stand-in, so nothing is sent. The run uses a snapshot of the
+            database (caches and imap_seen cleared), so the live DB is never
+            touched and every replay starts from the same state
+  bench   — starts local stand-ins (HTTP, SMTP, IMAP) serving those fixtures
+            with configurable latency. It routes all HTTP to the stand-in
+            (IYS_HTTP_REPLAY), SMTP to SMTP_HOST/SMTP_PORT and IMAP to
+            IYS_IMAP_HOST, and uses the composer's fake LLM backend. It then
+            runs the whole agent on a fresh copy of the snapshot and reports
+            prospects/minute, per-stage latency and API call counts per host
+
+Requests are matched by httpclient.fixture_key() (method, URL without API
+keys, body digest). A POST whose body differs from the recording falls back
+to the same method + URL. Anything never recorded gets a 404 and is listed
+as a miss.
+
+Usage:
+    python agents/replay.py record --name baseline --imap-last 200
+    python agents/replay.py bench  --name baseline --latency 0.08 --llm-latency 0.8
+    python agents/replay.py bench  --name baseline --no-limits --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import imaplib
+import json
+import os
+import random
+import re
+import shutil
+import socketserver
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from email.utils import parseaddr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import httpclient as _http
+
+FIXTURE_ROOT = Path(__file__).parent.parent / "dashboard" / "replay"
+
+# Credentials the leads pipeline reads; bench sets the ones present at record time to dummies
+_CRED_ENV  = ("GOOGLE_PLACES_API_KEY", "APPLE_MAPS_TOKEN")
+_INBOX_ENV = (("ADMIN_EMAIL_USER", "ADMIN_EMAIL_PASS"), ("HELLO_EMAIL_USER", "HELLO_EMAIL_PASS"),
+              ("GMAIL_USER", "GMAIL_APP_PASS"))
+# Tables that hold caches or scan progress — emptied in the snapshot
+_CACHE_TABLES = ("verification_cache", "psi_cache", "safe_browsing_cache", "crawl_cache",
+                 "imap_seen", "outbox", "prospect_pages")
+
+
+# ── HTTP stand-in ────────────────────────────────────────────────────────────
+
+class _Fixtures:
+    """Recorded responses by fixture key; repeated requests cycle through the recordings."""
+
+    def __init__(self, path: Path):
+        self.by_key: dict[str, list[dict]] = defaultdict(list)
+        self.by_url: dict[str, list[dict]] = defaultdict(list)
+        if path.exists():
+            for line in path.read_text().splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self.by_key[entry["key"]].append(entry)
+                    self.by_url[entry["key"].split(" #")[0]].append(entry)
+        self._next: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.by_key.values())
+
+    def lookup(self, key: str) -> tuple[dict | None, str]:
+        for table, kind in ((self.by_key, "hit"), (self.by_url, "fuzzy")):
+            k = key if kind == "hit" else key.split(" #")[0]
+            entries = table.get(k)
+            if entries:
+                with self._lock:
+                    i = self._next[kind + k]
+                    self._next[kind + k] = i + 1
+                return entries[i % len(entries)], kind
+        return None, "miss"
+
+
+class _Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.misses: list[str] = []
+
+    def add(self, bucket: str, kind: str, detail: str = ""):
+        with self._lock:
+            self.counts[bucket][kind] += 1
+            if kind == "miss" and len(self.misses) < 50:
+                self.misses.append(detail)
+
+
+def _http_standin(fixtures: _Fixtures, latency: float, counter: _Counter) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _serve(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body   = self.rfile.read(length) if length else None
+            target = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get("u", [""])[0]
+            key    = _http.fixture_key(self.command, target, body)
+            entry, kind = fixtures.lookup(key)
+            counter.add(urllib.parse.urlsplit(target).hostname or "?", kind, key)
+            time.sleep(latency)
+            if entry is None:
+                status, headers, data = 404, {"Content-Type": "text/plain"}, b"not recorded"
+            else:
+                status, headers, data = entry["status"], entry["headers"], base64.b64decode(entry["body"])
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_HEAD = do_DELETE = _serve
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    return server
+
+
+# ── SMTP stand-in ────────────────────────────────────────────────────────────
+
+def _smtp_standin(latency: float, counter: _Counter, save_dir: Path | None = None) -> socketserver.ThreadingTCPServer:
+    class Handler(socketserver.StreamRequestHandler):
+        def _reply(self, line: str):
+            self.wfile.write(line.encode() + b"\r\n")
+
+        def handle(self):
+            counter.add("smtp", "sessions")
+            self._reply("220 replay ESMTP")
+            rcpts: list[str] = []
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                verb = line.decode(errors="ignore").strip().split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    self.wfile.write(b"250-replay\r\n250-8BITMIME\r\n250 SIZE 35882577\r\n")
+                elif verb == "RCPT":
+                    rcpts.append(parseaddr(line.decode(errors="ignore").split(":", 1)[-1])[1])
+                    self._reply("250 OK")
+                elif verb == "DATA":
+                    self._reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = b""
+                    while True:
+                        chunk = self.rfile.readline()
+                        if not chunk or chunk in (b".\r\n", b".\n"):
+                            break
+                        data += chunk[1:] if chunk.startswith(b"..") else chunk
+                    time.sleep(latency)
+                    counter.add("smtp", "messages")
+                    if save_dir is not None:
+                        save_dir.mkdir(parents=True, exist_ok=True)
+                        (save_dir / f"{time.time_ns()}.eml").write_bytes(data)
+                    rcpts = []
+                    self._reply("250 OK queued")
+                elif verb == "QUIT":
+                    self._reply("221 Bye")
+                    return
+                elif verb in ("HELO", "MAIL", "RSET", "NOOP"):
+                    if verb == "RSET":
+                        rcpts = []
+                    self._reply("250 OK")
+                else:
+                    self._reply("502 Command not implemented")
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    return server
+
+
+# ── IMAP stand-in ────────────────────────────────────────────────────────────
+
+def _uid_set(spec: str, uids: list[int]) -> list[int]:
+    top, out = (uids[-1] if uids else 0), set()
+    for part in spec.split(","):
+        lo, _, hi = part.partition(":")
+        lo_n = top if lo == "*" else int(lo)
+        hi_n = lo_n if not hi else (top if hi == "*" else int(hi))
+        lo_n, hi_n = min(lo_n, hi_n), max(lo_n, hi_n)
+        out.update(u for u in uids if lo_n <= u <= hi_n)
+    return sorted(out)
+
+
+def _header_fields(raw: bytes, names: list[str]) -> bytes:
+    head = re.split(rb"\r?\n\r?\n", raw, maxsplit=1)[0]
+    keep, lines = False, []
+    for line in re.split(rb"\r?\n", head):
+        if line[:1] in (b" ", b"\t"):
+            if keep:
+                lines.append(line)
+            continue
+        keep = line.split(b":", 1)[0].strip().upper().decode(errors="ignore") in names
+        if keep:
+            lines.append(line)
+    return b"\r\n".join(lines) + b"\r\n\r\n"
+
+
+def _imap_standin(mailboxes: dict[str, list[bytes]], latency: float, counter: _Counter) -> socketserver.ThreadingTCPServer:
+    class Handler(socketserver.StreamRequestHandler):
+        def _send(self, data: bytes):
+            self.wfile.write(data)
+
+        def handle(self):
+            self._send(b"* OK [CAPABILITY IMAP4rev1] replay ready\r\n")
+            counter.add("imap", "sessions")
+            messages: list[bytes] = []
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                parts = line.decode(errors="ignore").strip().split(" ", 2)
+                if len(parts) < 2:
+                    continue
+                tag, cmd, args = parts[0], parts[1].upper(), (parts[2] if len(parts) > 2 else "")
+                counter.add("imap", cmd.lower())
+                time.sleep(latency)
+                uids = list(range(1, len(messages) + 1))
+                if cmd == "CAPABILITY":
+                    self._send(b"* CAPABILITY IMAP4rev1\r\n")
+                elif cmd == "LOGIN":
+                    user = args.split(" ", 1)[0].strip('"')
+                    messages = mailboxes.get(user.lower(), [])
+                elif cmd in ("SELECT", "EXAMINE"):
+                    self._send(f"* {len(messages)} EXISTS\r\n* OK [UIDVALIDITY 1] UIDs valid\r\n".encode())
+                elif cmd == "STATUS":
+                    self._send(b"* STATUS INBOX (UIDVALIDITY 1)\r\n")
+                elif cmd == "UID":
+                    sub, _, rest = args.partition(" ")
+                    if sub.upper() == "SEARCH":
+                        m = re.search(r"UID (\S+)", rest, re.I)
+                        found = _uid_set(m.group(1), uids) if m else uids   # UNSEEN / ALL → everything
+                        self._send(f"* SEARCH {' '.join(map(str, found))}\r\n".encode())
+                    elif sub.upper() == "FETCH":
+                        spec, _, what = rest.partition(" ")
+                        fields = re.search(r"HEADER\.FIELDS \(([^)]*)\)", what, re.I)
+                        for uid in _uid_set(spec, uids):
+                            raw = messages[uid - 1]
+                            if fields:
+                                section = f"BODY[HEADER.FIELDS ({fields.group(1)})]"
+                                data = _header_fields(raw, fields.group(1).upper().split())
+                            else:
+                                section, data = "BODY[]", raw
+                            self._send(f"* {uid} FETCH (UID {uid} {section} {{{len(data)}}}\r\n".encode()
+                                       + data + b")\r\n")
+                elif cmd == "LOGOUT":
+                    self._send(b"* BYE replay\r\n" + f"{tag} OK LOGOUT completed\r\n".encode())
+                    return
+                self._send(f"{tag} OK {cmd} completed\r\n".encode())
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def _serve(server) -> int:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+# ── Fixtures on disk ─────────────────────────────────────────────────────────
+
+def _configured_inboxes() -> list[tuple[str, str, str]]:
+    """(user env, user, password) for each inbox the agent would scan."""
+    out = []
+    for user_env, pass_env in _INBOX_ENV:
+        if os.environ.get(user_env) and os.environ.get(pass_env):
+            out.append((user_env, os.environ[user_env], os.environ[pass_env]))
+    return out
+
+
+def _save_inbox(user: str, passwd: str, last: int, dest: Path) -> int:
+    """Copy the newest `last` messages of a real inbox (read-only, PEEK) into dest/*.eml."""
+    host = "imap.gmail.com" if "gmail" in user.lower() else "outlook.office365.com"
+    mail = imaplib.IMAP4_SSL(host)
+    try:
+        mail.login(user, passwd)
+        mail.select("INBOX", readonly=True)
+        _, data = mail.uid("SEARCH", None, "ALL")
+        uids = (data[0] or b"").split()[-last:] if last else []
+        dest.mkdir(parents=True, exist_ok=True)
+        saved = 0
+        for uid in uids:
+            typ, msg = mail.uid("FETCH", uid, "(BODY.PEEK[])")
+            if typ == "OK" and msg and isinstance(msg[0], tuple):
+                (dest / f"{int(uid):08d}.eml").write_bytes(msg[0][1])
+                saved += 1
+        return saved
+    finally:
+        try:
+            mail.logout()
+        except Exception:
+            pass
+
+
+def _load_mailboxes(fixture: Path) -> dict[str, list[bytes]]:
+    boxes = {}
+    for folder in sorted((fixture / "imap").glob("*")):
+        boxes[folder.name.lower()] = [p.read_bytes() for p in sorted(folder.glob("*.eml"))]
+    return boxes
+
+
+def _snapshot_db(dest: Path):
+    """Copy the live DB (consistent, via the backup API) and empty caches / scan progress."""
+    from dashboard import db
+    db.init_db()
+    src = sqlite3.connect(str(db.DB_PATH))
+    out = sqlite3.connect(str(dest))
+    src.backup(out)
+    src.close()
+    for table in _CACHE_TABLES:
+        try:
+            out.execute(f"DELETE FROM {table}")
+        except sqlite3.OperationalError:
+            pass   # table not created yet
+    out.commit()
+    out.close()
+
+
+@contextmanager
+def _isolated(fixture: Path):
+    """Point the DB, crawl cache and calendar at a throwaway copy for the duration of a run."""
+    from dashboard import db
+    from agents import calendar_sync, crawl_cache
+
+    work = Path(tempfile.mkdtemp(prefix="iys-replay-"))
+    shutil.copy(fixture / "db.sqlite", work / "db.sqlite")
+    saved = (db.DB_PATH, crawl_cache.CACHE_DIR, calendar_sync.CALENDAR_FILE, calendar_sync.STATE_DIR)
+    db.DB_PATH = work / "db.sqlite"
+    db._local.conn = None
+    crawl_cache.CACHE_DIR        = work / "crawl_cache"
+    calendar_sync.CALENDAR_FILE  = work / "leads_calendar.json"
+    calendar_sync.STATE_DIR      = work / "calendar_sync"
+    random.seed(0)   # same prospect order every time
+    try:
+        yield work
+    finally:
+        db.DB_PATH, crawl_cache.CACHE_DIR, calendar_sync.CALENDAR_FILE, calendar_sync.STATE_DIR = saved
+        db._local.conn = None
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def _point_mail_at(smtp_port: int, imap_port: int):
+    """
+    SMTP and IMAP go to the stand-ins (set before agents.leads / outbox are
+    imported). The send plan is off, so every message is due at once.
+    """
+    os.environ.update({"SMTP_HOST": "127.0.0.1", "SMTP_PORT": str(smtp_port),
+                       "IYS_IMAP_HOST": "127.0.0.1", "IYS_IMAP_PORT": str(imap_port),
+                       "GITHUB_PAT": "", "IYS_CALENDAR_GIT_REMOTE": ""})
+    from agents import leads, outbox, send_plan
+    send_plan.ENABLED = False
+    outbox.SMTP_HOST, outbox.SMTP_PORT = "127.0.0.1", smtp_port
+    leads.IMAP_HOST, leads.IMAP_PORT   = "127.0.0.1", imap_port
+
+
+def _run_agent() -> tuple[object, bool, float]:
+    from agents import outbox
+    from agents.context import RunContext
+    from agents.leads import LeadsAgent
+
+    agent   = LeadsAgent()
+    started = time.time()
+    ok      = agent.execute(RunContext(trigger="replay"))
+    outbox.flush(timeout=300)
+    return agent, ok, time.time() - started
+
+
+# ── Commands ─────────────────────────────────────────────────────────────────
+
+def record(name: str, imap_last: int = 200) -> dict:
+    fixture = FIXTURE_ROOT / name
+    if fixture.exists():
+        shutil.rmtree(fixture)
+    fixture.mkdir(parents=True)
+
+    inboxes = _configured_inboxes()
+    for _env, user, passwd in inboxes:
+        _save_inbox(user, passwd, imap_last, fixture / "imap" / user.lower())
+    _snapshot_db(fixture / "db.sqlite")
+
+    counter   = _Counter()
+    smtp_port = _serve(_smtp_standin(0, counter, save_dir=fixture / "sent"))
+    imap_port = _serve(_imap_standin(_load_mailboxes(fixture), 0, counter))
+    _point_mail_at(smtp_port, imap_port)
+    _http.RECORD_FILE = str(fixture / "http.jsonl")
+    try:
+        with _isolated(fixture):
+            _agent, ok, wall = _run_agent()
+    finally:
+        _http.RECORD_FILE = ""
+
+    meta = {
+        "recorded_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "ok": ok,
+        "wall_secs": round(wall, 1),
+        "credentials": [k for k in _CRED_ENV if os.environ.get(k)],
+        "inboxes": {env: user for env, user, _ in inboxes},
+        "http_responses": len(_Fixtures(fixture / "http.jsonl")),
+        "smtp_messages": counter.counts["smtp"]["messages"],
+    }
+    (fixture / "meta.json").write_text(json.dumps(meta, indent=2) + "\n")
+    return meta
+
+
+def bench(name: str, latency: float = 0.05, smtp_latency: float = 0.05, imap_latency: float = 0.02,
+          llm_latency: float = 0.8, no_limits: bool = False) -> dict:
+    fixture = FIXTURE_ROOT / name
+    meta = json.loads((fixture / "meta.json").read_text())
+
+    fixtures  = _Fixtures(fixture / "http.jsonl")
+    counter   = _Counter()
+    http_port = _serve(_http_standin(fixtures, latency, counter))
+    smtp_port = _serve(_smtp_standin(smtp_latency, counter))
+    imap_port = _serve(_imap_standin(_load_mailboxes(fixture), imap_latency, counter))
+
+    for key in meta["credentials"]:
+        os.environ[key] = "replay"
+    for user_env, pass_env in _INBOX_ENV:
+        user = meta["inboxes"].get(user_env)
+        os.environ[user_env] = user or ""
+        os.environ[pass_env] = "replay" if user else ""
+    os.environ["IYS_LLM_BACKEND"]      = "fake"
+    os.environ["IYS_FAKE_LLM_LATENCY"] = str(llm_latency)
+    _point_mail_at(smtp_port, imap_port)
+    _http.REPLAY_URL = f"http://127.0.0.1:{http_port}"
+
+    from agents import composer, ratelimit
+    composer.use_backend("fake")
+    composer.FAKE_LATENCY = llm_latency
+    if no_limits:
+        ratelimit.DEFAULT_RATE = ratelimit.DEFAULT_BURST = 1000
+        for host in list(ratelimit._limits) + [os.environ["SMTP_HOST"]]:
+            ratelimit.configure(host, 1000, 1000)
+
+    try:
+        with _isolated(fixture):
+            agent, ok, wall = _run_agent()
+    finally:
+        _http.REPLAY_URL = ""
+
+    stages = agent.pipeline_metrics or {}
+    prospects = stages.get("verify", {}).get("received", 0)
+    return {
+        "fixture": name,
+        "ok": ok,
+        "wall_secs": round(wall, 2),
+        "prospects": prospects,
+        "prospects_per_min": round(60 * prospects / wall, 1) if wall else None,
+        "emails_sent": counter.counts["smtp"]["messages"],
+        "stages": {
+            stage: {**m, "avg_ms": round(1000 * m["busy_secs"] / m["received"]) if m["received"] else None}
+            for stage, m in stages.items()
+        },
+        "api_calls": {host: dict(c) for host, c in sorted(counter.counts.items())},
+        "http_client": _http.stats(),
+        "llm": composer.stats(),
+        "misses": counter.misses,
+        "settings": {"latency": latency, "smtp_latency": smtp_latency, "imap_latency": imap_latency,
+                     "llm_latency": llm_latency, "no_limits": no_limits},
+    }
+
+
+def _print_report(r: dict):
+    print(f"{r['fixture']}: {'ok' if r['ok'] else 'FAILED'} in {r['wall_secs']}s — "
+          f"{r['prospects']} prospects ({r['prospects_per_min']}/min), {r['emails_sent']} email(s) sent")
+    print(f"\n{'stage':<10}{'in':>6}{'out':>6}{'drop':>6}{'err':>5}{'avg ms':>9}{'/min':>8}{'busy':>7}")
+    for stage, m in r["stages"].items():
+        print(f"{stage:<10}{m['received']:>6}{m['passed']:>6}{m['dropped']:>6}{m['errors']:>5}"
+              f"{m['avg_ms'] if m['avg_ms'] is not None else '-':>9}{m['per_min']:>8}"
+              f"{int(m['utilisation'] * 100):>6}%")
+    print(f"\n{'calls':<36}{'hit':>6}{'fuzzy':>7}{'miss':>6}")
+    for host, c in r["api_calls"].items():
+        if host in ("smtp", "imap"):
+            print(f"{host:<36}" + ", ".join(f"{k} {v}" for k, v in sorted(c.items())))
+        else:
+            print(f"{host:<36}{c.get('hit', 0):>6}{c.get('fuzzy', 0):>7}{c.get('miss', 0):>6}")
+    llm = r["llm"]
+    print(f"\nLLM (fake, {r['settings']['llm_latency']}s/call): {llm.get('calls')} call(s)")
+    if r["misses"]:
+        print("\nNot recorded (first few):")
+        for key in r["misses"][:10]:
+            print(f"  {key}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="run once against the real services and save fixtures")
+    rec.add_argument("--name", default="baseline")
+    rec.add_argument("--imap-last", type=int, default=200, help="messages to copy from each inbox")
+    ben = sub.add_parser("bench", help="replay a recording on local stand-ins and report throughput")
+    ben.add_argument("--name", default="baseline")
+    ben.add_argument("--latency", type=float, default=0.05, help="seconds per HTTP response")
+    ben.add_argument("--smtp-latency", type=float, default=0.05, help="seconds per message")
+    ben.add_argument("--imap-latency", type=float, default=0.02, help="seconds per command")
+    ben.add_argument("--llm-latency", type=float, default=0.8, help="seconds per fake completion")
+    ben.add_argument("--no-limits", action="store_true", help="lift the per-host rate limits")
+    ben.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.cmd == "record":
+        print(json.dumps(record(args.name, args.imap_last), indent=2))
+    else:
+        report = bench(args.name, args.latency, args.smtp_latency, args.imap_latency,
+                       args.llm_latency, args.no_limits)
+        print(json.dumps(report, indent=2) if args.json else "", end="")
+        if not args.json:
+            _print_report(report)
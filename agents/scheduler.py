@@ -3,15 +3,35 @@ agents/scheduler.py — APScheduler cron definitions for all IYS agents.
 
 All times in AEST (Australia/Sydney).
 Scheduler is started from run.py alongside the FastAPI app.
+
+Jobs are declared once in JOBS and all scheduled through run_job(job_id), so
+the only thing APScheduler has to pickle is a module-level function plus a
+string. That lets the job store live in iys_agents.db (SQLAlchemyJobStore;
+SQLAlchemy is in requirements-agents.txt) instead of in memory. Without
+SQLAlchemy it falls back to an in-memory store and logs an error at startup.
+
+Restarts:
+  Each job run is recorded in the job_runs table. On startup, any catch_up job
+  whose most recent cron slot (within IYS_CATCHUP_HOURS) has no recorded run
+  is replayed once — coalesced to a single run however many slots were
+  missed — via a one-off DateTrigger. Replays are spread IYS_CATCHUP_STAGGER
+  seconds apart so a 9 AM restart doesn't fire manager, social, ads and
+  leads into the APIs at the same instant.
 """
 
+from __future__ import annotations
+
+import os
 import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 
 from agents.manager           import ManagerAgent
 from agents.social            import SocialAgent
@@ -28,6 +48,10 @@ from agents.seo_monitor.agent      import SEOMonitorAgent
 from agents.inbox.agent            import InboxAgent
 from agents.facebook_ads           import FacebookAdsAgent
 from agents.security               import SecurityAgent
+from agents.context                import RunContext
+from agents.dag                    import Pipeline, Node, FileArtifact, QueryArtifact
+from agents.social_intel           import REPORT_FILE as _INTEL_FILE
+from agents.content_strategy       import INSIGHTS_FILE as _INSIGHTS_FILE, STRATEGY_FILE as _STRATEGY_FILE
 from dashboard       import db
 
 # ── Agent instances (singletons) ─────────────────────────────────────────────
@@ -68,26 +92,80 @@ AGENT_MAP = {
 
 TIMEZONE = "Australia/Sydney"
 
-
-def _run(agent, run_analyst_after: bool = False):
-    """Execute an agent and optionally follow with the analyst."""
-    agent.execute()
-    if run_analyst_after:
-        _analyst.execute()
+# ── Content pipeline ─────────────────────────────────────────────────────────
+# Downstream nodes run as soon as their inputs change, not at a guessed offset
+# after the upstream cron slot. See agents/dag.py.
+_intel_report    = FileArtifact(_INTEL_FILE)
+_ig_insights     = FileArtifact(_INSIGHTS_FILE)
+_weekly_strategy = FileArtifact(_STRATEGY_FILE)
+# Only what social (carousel) and content (blog) deliver — inbox, Stripe,
+# Instagram and builder rows must not wake the analyst every tick
+_delivered       = QueryArtifact(
+    "delivered_content",
+    "SELECT MAX(id), COUNT(*) FROM content WHERE status='delivered' AND content_type IN ('carousel','blog')",
+)
+
+PIPELINE = Pipeline([
+    Node("social",  _social,  optional_inputs=[_weekly_strategy], outputs=[_intel_report, _delivered],
+         auto=False),
+    Node("content", _content, outputs=[_delivered], auto=False),
+    Node("instagram_story", _instagram, optional_inputs=[_weekly_strategy], auto=False),
+    Node("instagram_insights", _instagram, outputs=[_ig_insights], mode="insights", auto=False),
+    Node(
+        "content_strategy", _content_strategy,
+        inputs=[_intel_report], optional_inputs=[_ig_insights], outputs=[_weekly_strategy],
+        max_input_age=timedelta(days=2),
+        when=lambda now: now.weekday() == 6,    # plans the coming week — Sundays only
+    ),
+    Node("analyst", _analyst, inputs=[_delivered]),
+], tz=TIMEZONE)
+
+
+CATCHUP_HOURS   = float(os.environ.get("IYS_CATCHUP_HOURS", "12"))
+CATCHUP_DELAY   = int(os.environ.get("IYS_CATCHUP_DELAY", "60"))     # seconds after startup
+CATCHUP_STAGGER = int(os.environ.get("IYS_CATCHUP_STAGGER", "120"))  # seconds between replays
+COALESCE        = os.environ.get("IYS_SCHED_COALESCE", "1").lower() not in ("0", "false", "no")
+
+
+# ── Job table ────────────────────────────────────────────────────────────────
+
+@dataclass
+class _Job:
+    id: str
+    name: str
+    trigger: CronTrigger
+    agent: object = None          # BaseAgent to execute, or
+    node: str = ""                # PIPELINE node to run, or
+    fn: object = None             # plain callable (no RunContext)
+    mode: str = ""
+    timeout: float | None = None  # soft deadline on the RunContext
+    grace: int = 300
+    catch_up: bool = True         # replay once after a restart if the slot was missed
+
+
+def _cron(**kw) -> CronTrigger:
+    return CronTrigger(timezone=TIMEZONE, **kw)
+
+
+# ── Watcher jobs (self-contained, not agents) ────────────────────────────────
+
+_tag_done = {"v": False}
+
+
+def _run_tag_watcher():
+    """Polls hello@ for Tim's photos — becomes a no-op once they've been published."""
+    from agents.tag_projects_watcher import run_once as _tag_run_once, WATCH_PASS as _tag_pass
+    if _tag_done["v"] or not _tag_pass:
+        return
+    if _tag_run_once():
+        _tag_done["v"] = True
+        db.event_log("inbox", "info", "TAG Projects: Tim's photos received and published live")
 
 
-def _run_with_mode(agent, mode: str):
-    """Execute an agent with a specific RUN_MODE env override."""
-    import os
-    prev = os.environ.get("RUN_MODE", "")
-    os.environ["RUN_MODE"] = mode
-    try:
-        agent.execute()
-    finally:
-        if prev:
-            os.environ["RUN_MODE"] = prev
-        else:
-            os.environ.pop("RUN_MODE", None)
+def _run_scs_watcher():
+    """Polls outreach@ for the South Coast Solar reply — removes demo if negative."""
+    from agents.scs_reply_watcher import run_once as _scs_run_once
+    _scs_run_once()
 
 
 def _run_scheduled_tasks():
@@ -101,209 +179,171 @@ def _run_scheduled_tasks():
             db.event_log("manager", "info", f"Running scheduled task: {t['title']} → {t['agent_id']}")
             db.scheduled_task_mark_triggered(t["id"])
             import threading
-            threading.Thread(target=agent.execute, daemon=True).start()
-
+            ctx = RunContext(trigger="scheduled_task")
+            threading.Thread(target=agent.execute, args=(ctx,), daemon=True).start()
 
-def build_scheduler() -> BackgroundScheduler:
-    """Create and configure the scheduler. Call .start() in run.py."""
-    scheduler = BackgroundScheduler(timezone=TIMEZONE)
 
+JOBS: dict[str, _Job] = {j.id: j for j in [
     # Manager — daily 7:00 AM
-    scheduler.add_job(
-        lambda: _run(_manager),
-        CronTrigger(hour=7, minute=0, timezone=TIMEZONE),
-        id="manager", name="Manager digest",
-        misfire_grace_time=300,
-    )
+    _Job("manager", "Manager digest", _cron(hour=7, minute=0), agent=_manager),
 
     # Social — 7:30 AM morning post (peak engagement: commute/coffee)
-    scheduler.add_job(
-        lambda: _run(_social, run_analyst_after=True),
-        CronTrigger(hour=7, minute=30, timezone=TIMEZONE),
-        id="social", name="Social morning post",
-        misfire_grace_time=300,
-    )
-
+    # Refreshes intel_report.json → content_strategy / analyst follow via PIPELINE
+    _Job("social", "Social morning post", _cron(hour=7, minute=30), node="social"),
     # Social — 6:30 PM evening post (peak engagement: after work)
-    scheduler.add_job(
-        lambda: _run(_social),
-        CronTrigger(hour=18, minute=30, timezone=TIMEZONE),
-        id="social_evening", name="Social evening post",
-        misfire_grace_time=300,
-    )
+    _Job("social_evening", "Social evening post", _cron(hour=18, minute=30), node="social"),
 
     # Ads — daily 9:00 AM (owner account + all active client accounts)
-    scheduler.add_job(
-        _run_all_ads_clients,
-        CronTrigger(hour=9, minute=0, timezone=TIMEZONE),
-        id="ads", name="Google Ads report",
-        misfire_grace_time=300,
-    )
-
+    _Job("ads", "Google Ads report", _cron(hour=9, minute=0), fn=_run_all_ads_clients),
     # Facebook Ads — daily 9:15 AM
-    scheduler.add_job(
-        lambda: _run(_facebook_ads),
-        CronTrigger(hour=9, minute=15, timezone=TIMEZONE),
-        id="facebook_ads", name="Facebook Ads report",
-        misfire_grace_time=300,
-    )
+    _Job("facebook_ads", "Facebook Ads report", _cron(hour=9, minute=15), agent=_facebook_ads),
 
-    # Content — Monday 6:00 AM, run analyst after
-    scheduler.add_job(
-        lambda: _run(_content, run_analyst_after=True),
-        CronTrigger(day_of_week="mon", hour=6, minute=0, timezone=TIMEZONE),
-        id="content", name="Auto-blog content",
-        misfire_grace_time=600,
-    )
+    # Content — Monday 6:00 AM (analyst follows via PIPELINE)
+    _Job("content", "Auto-blog content", _cron(day_of_week="mon", hour=6, minute=0),
+         node="content", grace=600),
 
     # Leads — new outreach 9:00 AM daily, follow-ups 2:00 PM daily
-    scheduler.add_job(
-        lambda: _run(_leads),
-        CronTrigger(hour=9, minute=0, timezone=TIMEZONE),
-        id="leads", name="Leads outreach",
-        misfire_grace_time=300,
-    )
-    scheduler.add_job(
-        lambda: _run(_leads),
-        CronTrigger(hour=14, minute=0, timezone=TIMEZONE),
-        id="leads_followup", name="Leads follow-up",
-        misfire_grace_time=300,
-    )
+    _Job("leads", "Leads outreach", _cron(hour=9, minute=0), agent=_leads, timeout=4 * 3600),
+    _Job("leads_followup", "Leads follow-up", _cron(hour=14, minute=0), agent=_leads, timeout=2 * 3600),
 
     # Scheduled tasks — check at 6:00 AM daily and trigger assigned agents
-    scheduler.add_job(
-        _run_scheduled_tasks,
-        CronTrigger(hour=6, minute=0, timezone=TIMEZONE),
-        id="scheduled_tasks", name="Scheduled task runner",
-        misfire_grace_time=300,
-    )
-
-    # Security Manager — 6:00 AM daily scan
-    scheduler.add_job(
-        lambda: _run(_security),
-        CronTrigger(hour=6, minute=5, timezone=TIMEZONE),
-        id="security", name="Security Manager daily scan",
-        misfire_grace_time=300,
-    )
-
-    # ── Content Strategy — Sunday 8:00 PM ────────────────────────────────
-    scheduler.add_job(
-        lambda: _run(_content_strategy),
-        CronTrigger(day_of_week="sun", hour=20, minute=0, timezone=TIMEZONE),
-        id="content_strategy", name="Weekly content strategy planner",
-        misfire_grace_time=600,
-    )
-
-    # ── Instagram agent ──────────────────────────────────────────────────
-    # Morning story: 8:00 AM
-    scheduler.add_job(
-        lambda: _run(_instagram),
-        CronTrigger(hour=8, minute=0, timezone=TIMEZONE),
-        id="instagram_morning", name="Instagram morning story",
-        misfire_grace_time=300,
-    )
-    # Evening story: 7:00 PM
-    scheduler.add_job(
-        lambda: _run(_instagram),
-        CronTrigger(hour=19, minute=0, timezone=TIMEZONE),
-        id="instagram_evening", name="Instagram evening story",
-        misfire_grace_time=300,
-    )
-    # Insights pull: 9:30 AM
-    scheduler.add_job(
-        lambda: _run_with_mode(_instagram, "insights"),
-        CronTrigger(hour=9, minute=30, timezone=TIMEZONE),
-        id="instagram_insights", name="Instagram insights",
-        misfire_grace_time=300,
-    )
-    # Reels planning: Wednesday 8:00 AM
-    scheduler.add_job(
-        lambda: _run_with_mode(_instagram, "reels"),
-        CronTrigger(day_of_week="wed", hour=8, minute=0, timezone=TIMEZONE),
-        id="instagram_reels", name="Instagram Reels planning",
-        misfire_grace_time=600,
-    )
-
-    # ── Stripe Monitor ───────────────────────────────────────────────────
-    # Every 30 minutes
-    scheduler.add_job(
-        lambda: _run(_stripe_monitor),
-        CronTrigger(minute="*/30", timezone=TIMEZONE),
-        id="stripe_monitor", name="Stripe order monitor",
-        misfire_grace_time=120,
-    )
-
-    # ── Customer Success ─────────────────────────────────────────────────
-    # Lifecycle check: 10:30 AM daily
-    scheduler.add_job(
-        lambda: _run(_customer_success),
-        CronTrigger(hour=10, minute=30, timezone=TIMEZONE),
-        id="customer_success", name="Customer lifecycle check",
-        misfire_grace_time=300,
-    )
-    # Site health audit: Sunday 9:00 AM
-    scheduler.add_job(
-        lambda: _run_with_mode(_customer_success, "health"),
-        CronTrigger(day_of_week="sun", hour=9, minute=0, timezone=TIMEZONE),
-        id="customer_health", name="Customer site health audit",
-        misfire_grace_time=600,
-    )
-
-    # ── SEO Monitor ──────────────────────────────────────────────────────
-    # Daily check: 8:30 AM
-    scheduler.add_job(
-        lambda: _run(_seo_monitor),
-        CronTrigger(hour=8, minute=30, timezone=TIMEZONE),
-        id="seo_monitor", name="SEO daily check",
-        misfire_grace_time=300,
-    )
-    # PageSpeed: Wednesday 9:00 AM
-    scheduler.add_job(
-        lambda: _run_with_mode(_seo_monitor, "pagespeed"),
-        CronTrigger(day_of_week="wed", hour=9, minute=0, timezone=TIMEZONE),
-        id="seo_pagespeed", name="PageSpeed audit",
-        misfire_grace_time=300,
-    )
-
-    # ── Inbox ────────────────────────────────────────────────────────────
-    # Triage: every 30 minutes
-    scheduler.add_job(
-        lambda: _run(_inbox),
-        CronTrigger(minute="*/30", timezone=TIMEZONE),
-        id="inbox", name="Inbox triage",
-        misfire_grace_time=120,
-    )
+    _Job("scheduled_tasks", "Scheduled task runner", _cron(hour=6, minute=0), fn=_run_scheduled_tasks),
+
+    # Security Manager — 6:05 AM daily scan
+    _Job("security", "Security Manager daily scan", _cron(hour=6, minute=5), agent=_security),
+
+    # Content Strategy — Sunday 8:00 PM
+    # Fallback slot: normally already run by PIPELINE once Sunday's intel lands,
+    # in which case this is skipped as "inputs unchanged".
+    _Job("content_strategy", "Weekly content strategy planner",
+         _cron(day_of_week="sun", hour=20, minute=0), node="content_strategy", grace=600),
+
+    # Pipeline tick — picks up artifacts produced outside the cron slots (dashboard / chat runs)
+    _Job("pipeline_tick", "Content pipeline tick", _cron(minute="*/15"),
+         fn=PIPELINE.tick, grace=120, catch_up=False),
+
+    # Instagram — stories 8:00 AM / 7:00 PM, insights 9:30 AM, Reels planning Wed 8:00 AM
+    # (stories read weekly_strategy.json, insights feed content_strategy — both via PIPELINE)
+    _Job("instagram_morning", "Instagram morning story", _cron(hour=8, minute=0), node="instagram_story"),
+    _Job("instagram_evening", "Instagram evening story", _cron(hour=19, minute=0), node="instagram_story"),
+    _Job("instagram_insights", "Instagram insights", _cron(hour=9, minute=30),
+         node="instagram_insights", mode="insights"),
+    _Job("instagram_reels", "Instagram Reels planning", _cron(day_of_week="wed", hour=8, minute=0),
+         agent=_instagram, mode="reels", grace=600),
+
+    # Stripe Monitor — every 30 minutes
+    _Job("stripe_monitor", "Stripe order monitor", _cron(minute="*/30"),
+         agent=_stripe_monitor, grace=120, catch_up=False),
+
+    # Customer Success — lifecycle 10:30 AM daily, site health audit Sunday 9:00 AM
+    _Job("customer_success", "Customer lifecycle check", _cron(hour=10, minute=30), agent=_customer_success),
+    _Job("customer_health", "Customer site health audit", _cron(day_of_week="sun", hour=9, minute=0),
+         agent=_customer_success, mode="health", grace=600),
+
+    # SEO Monitor — daily 8:30 AM, PageSpeed Wednesday 9:00 AM
+    _Job("seo_monitor", "SEO daily check", _cron(hour=8, minute=30), agent=_seo_monitor),
+    _Job("seo_pagespeed", "PageSpeed audit", _cron(day_of_week="wed", hour=9, minute=0),
+         agent=_seo_monitor, mode="pagespeed"),
+
+    # Inbox triage — every 30 minutes
+    _Job("inbox", "Inbox triage", _cron(minute="*/30"), agent=_inbox, grace=120, catch_up=False),
+
+    # TAG Projects photo watcher / SCS reply watcher — every 30 minutes
+    _Job("tag_photo_watcher", "TAG Projects photo watcher", _cron(minute="*/30"),
+         fn=_run_tag_watcher, grace=120, catch_up=False),
+    _Job("scs_reply_watcher", "SCS reply watcher", _cron(minute="*/30"),
+         fn=_run_scs_watcher, grace=120, catch_up=False),
+]}
+
+
+# ── Job execution ────────────────────────────────────────────────────────────
+
+def run_job(job_id: str, catch_up: bool = False):
+    """Single entry point for every scheduled job (picklable: module function + str)."""
+    job = JOBS.get(job_id)
+    if job is None:
+        db.event_log("manager", "warn", f"Scheduler: unknown job '{job_id}' — skipped")
+        return
+    trigger = "catch_up" if catch_up else "schedule"
+    ctx = (RunContext.with_timeout(job.timeout, trigger=trigger, mode=job.mode) if job.timeout
+           else RunContext(trigger=trigger, mode=job.mode))
+    run_id = db.job_run_start(job_id, ctx.run_id, catch_up)
+    ok = False
+    try:
+        if job.node:
+            PIPELINE.run(job.node, ctx)
+            ok = (db.dag_state(job.node) or {}).get("last_status") != "error"
+        elif job.agent is not None:
+            ok = job.agent.execute(ctx)
+        else:
+            job.fn()
+            ok = True
+    finally:
+        db.job_run_finish(run_id, "ok" if ok else "error")
+
+
+def _missed_slot(job: _Job, now: datetime) -> datetime | None:
+    """Most recent cron slot in the catch-up window that has no recorded run."""
+    window_start = now - timedelta(hours=CATCHUP_HOURS)
+    last, t = None, job.trigger.get_next_fire_time(None, window_start)
+    while t is not None and t <= now:
+        last = t
+        t = job.trigger.get_next_fire_time(t, t + timedelta(seconds=1))
+    if last is None:
+        return None
+    # Never-run jobs (fresh install) are not replayed
+    history = db.job_last_run(job.id)
+    if history is None:
+        return None
+    last_utc = last.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return last if history["started_at"] < last_utc else None
+
+
+def _schedule_catch_up(scheduler: BackgroundScheduler):
+    """Queue one staggered replay per job whose last slot was missed while we were down."""
+    now = datetime.now(timezone.utc)
+    missed = [(job, slot) for job in JOBS.values() if job.catch_up
+              for slot in [_missed_slot(job, now)] if slot is not None]
+    for i, (job, slot) in enumerate(sorted(missed, key=lambda js: js[1])):
+        run_at = now + timedelta(seconds=CATCHUP_DELAY + i * CATCHUP_STAGGER)
+        scheduler.add_job(
+            run_job, DateTrigger(run_date=run_at), args=[job.id, True],
+            id=f"catchup_{job.id}", name=f"Catch-up: {job.name}",
+            replace_existing=True, misfire_grace_time=3600,
+        )
+        db.event_log(
+            "manager", "info",
+            f"Scheduler: missed {job.name} ({slot.astimezone().strftime('%a %H:%M')}) "
+            f"— replaying at {run_at.astimezone().strftime('%H:%M:%S')}",
+        )
+
+
+def _jobstores() -> dict:
+    """Persist jobs in iys_agents.db when SQLAlchemy is available, else in memory."""
+    try:
+        from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    except ImportError:
+        db.event_log("manager", "error", "Scheduler: SQLAlchemy not installed — jobs are NOT persisted "
+                     "(pip install -r requirements-agents.txt)")
+        return {}
+    return {"default": SQLAlchemyJobStore(url=f"sqlite:///{db.DB_PATH}", tablename="apscheduler_jobs")}
 
-    # ── TAG Projects photo watcher ───────────────────────────────────────
-    # Polls hello@ every 30 minutes for Tim's photos — self-cancels once done
-    import threading as _threading
-    from agents.tag_projects_watcher import run_once as _tag_run_once, WATCH_PASS as _tag_pass
-    _tag_done = {"v": False}
-    def _run_tag_watcher():
-        if _tag_done["v"] or not _tag_pass:
-            return
-        found = _tag_run_once()
-        if found:
-            _tag_done["v"] = True
-            db.event_log("inbox", "info", "TAG Projects: Tim's photos received and published live")
-    scheduler.add_job(
-        _run_tag_watcher,
-        CronTrigger(minute="*/30", timezone=TIMEZONE),
-        id="tag_photo_watcher", name="TAG Projects photo watcher",
-        misfire_grace_time=120,
-    )
 
-    # ── South Coast Solar reply watcher ─────────────────────────────────
-    # Polls outreach@ every 30 min for SCS reply — removes demo if negative
-    from agents.scs_reply_watcher import run_once as _scs_run_once
-    def _run_scs_watcher():
-        _scs_run_once()
-    scheduler.add_job(
-        _run_scs_watcher,
-        CronTrigger(minute="*/30", timezone=TIMEZONE),
-        id="scs_reply_watcher", name="SCS reply watcher",
-        misfire_grace_time=120,
+def build_scheduler() -> BackgroundScheduler:
+    """Create and configure the scheduler. Call .start() in run.py."""
+    scheduler = BackgroundScheduler(
+        timezone=TIMEZONE,
+        jobstores=_jobstores(),
+        job_defaults={"coalesce": COALESCE, "max_instances": 1},
     )
+    for job in JOBS.values():
+        scheduler.add_job(
+            run_job, job.trigger, args=[job.id],
+            id=job.id, name=job.name,
+            misfire_grace_time=job.grace,
+            replace_existing=True,
+        )
+    _schedule_catch_up(scheduler)
 
     # Update next_run timestamps in DB after schedule is built
     _update_next_runs(scheduler)
@@ -0,0 +1,600 @@
+"""
+agents/score_sheet.py — Precompiled score-sheet template (HTML for the PDF attachment).
+
+LeadsAgent._build_score_sheet used to rebuild the whole report for every lead
+through nested closures (_gauge, _metric_card, _fix_card, _bar, ...) and
+large f-strings, redefining the fix library and scanning every keyword of
+it for each issue. Now:
+
+  - the report is a ScoreSheet (name, domain, date, four scores, issues)
+    built by ScoreSheet.from_psi()
+  - the templates are parsed once per process into literal chunks plus
+    field names. The page skeleton has font_css() and its other static
+    copy bound in on first use, so a render only joins strings
+  - FIX_LIBRARY lives at module level. One compiled regex over all of its
+    keywords finds the matching fix in a single pass per issue, with
+    library order deciding ties as before. Results are memoised per issue
+    text, and gauges and fix cards per value
+  - render() hands the HTML to agents/pdf_renderer.py, as before.
+    Business names, domains and issue text are HTML-escaped
+
+Usage:
+    from agents import score_sheet
+    pdf  = score_sheet.render(score_sheet.ScoreSheet.from_psi(name, website, psi, issues))
+    html = score_sheet.build_html(sheet)
+
+Benchmark (HTML only, no PDF):
+    python agents/score_sheet.py --bench 100
+"""
+
+from __future__ import annotations
+
+import html as html_lib
+import re
+import string
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import pdf_renderer as _pdf
+
+MAX_ISSUES = 5
+
+# ── Fix library ──────────────────────────────────────────────────────────────
+
+# (keywords, title, what we do, business impact) — the first entry with a
+# keyword contained in the issue text wins.
+FIX_LIBRARY: list[tuple[tuple[str, ...], str, str, str]] = [
+    (
+        ("performance", "speed", "load", "slow", "/100"),
+        "Speed & performance optimisation",
+        "We compress images, remove unused code, and configure caching so the site loads fast on any device.",
+        "Faster sites rank higher, keep visitors on the page longer, and convert more browsers into enquiries. A site that loads in under 2 seconds can see 2–3x more contact form submissions than one that takes 5+ seconds.",
+    ),
+    (
+        ("lcp", "largest contentful paint", "content"),
+        "Core Web Vitals — LCP fix",
+        "We identify and optimise the largest element on each page (usually the hero image or headline block) so it renders immediately.",
+        "Fixing LCP moves the site from Google's 'Poor' category into 'Good', removing the active ranking penalty. More customers find the business on page 1 instead of scrolling past to a competitor.",
+    ),
+    (
+        ("structured data", "schema", "google can't read"),
+        "Structured data & local schema markup",
+        "We add JSON-LD schema markup so Google can clearly read the business name, address, phone, hours, and services.",
+        "Google shows richer search results — star ratings, address, opening hours — directly in search. This increases click-through rates by up to 30% for local searches.",
+    ),
+    (
+        ("mobile", "viewport", "phone", "responsive"),
+        "Mobile-first rebuild",
+        "We rebuild the layout to work properly on all screen sizes — the way 70%+ of local search traffic arrives.",
+        "A site that looks broken on phones loses the majority of potential customers before they've even read a word. Fixing mobile typically doubles the time visitors spend on the site.",
+    ),
+    (
+        ("call-to-action", "cta", "visitors don't know", "no clear"),
+        "Clear calls-to-action on every page",
+        "We add prominent, specific CTAs — 'Call now', 'Get a quote', 'Book online' — in the right places so visitors know exactly what to do next.",
+        "Most websites lose leads not because the visitor wasn't interested, but because there was no obvious next step. A well-placed CTA can increase contact rate by 40–80%.",
+    ),
+    (
+        ("local", "suburb", "area", "nsw", "vic", "qld", "wa", "sa"),
+        "Local SEO — suburb & area targeting",
+        "We add suburb-specific content, location pages, and Google Business Profile optimisation so the site appears for local searches.",
+        "For most local businesses, appearing in the top 3 Google results for their suburb drives 5–10 new enquiries per month from people actively searching for exactly what they offer.",
+    ),
+    (
+        ("review", "testimonial", "social proof", "rating"),
+        "Social proof integration",
+        "We pull in Google reviews, add a testimonials section, and display trust signals that visitors look for before making contact.",
+        "Businesses with visible reviews convert 3–4x more website visitors into enquiries. For service businesses, seeing real reviews from local customers is often the deciding factor.",
+    ),
+    (
+        ("content", "thin", "words", "information"),
+        "Content depth & authority",
+        "We build out service pages with specific, helpful content that answers the questions customers actually search for.",
+        "Google rewards sites with real, useful information. More content depth also means the site ranks for a wider range of search terms — more entry points, more leads.",
+    ),
+    (
+        ("seo", "meta", "title", "description", "crawl", "index"),
+        "Technical SEO & on-page optimisation",
+        "We audit and fix all on-page SEO signals — page titles, meta descriptions, heading structure, internal links, and crawlability.",
+        "Even a technically sound business website loses ranking to competitors who have the SEO basics properly configured. Small fixes compound into significantly more organic traffic over time.",
+    ),
+    (
+        ("security", "https", "browser", "best practices"),
+        "Security & best practices audit",
+        "We resolve any HTTPS issues, fix browser console errors, and update any outdated code that modern browsers flag.",
+        "Visitors who see a security warning in their browser almost always leave immediately — before reading anything. A secure, error-free site builds trust passively, just by loading correctly.",
+    ),
+]
+
+FALLBACK_FIX = (
+    "Website audit & optimisation",
+    "We review and fix the specific issues flagged, optimising each element for speed, search visibility, and conversion.",
+    "A fully optimised website consistently generates more enquiries, ranks higher for local searches, and converts more visitors into paying customers.",
+)
+
+# keyword → index of the first library entry that lists it
+_KEYWORD_FIX: dict[str, int] = {}
+for _i, (_keywords, *_) in enumerate(FIX_LIBRARY):
+    for _kw in _keywords:
+        _KEYWORD_FIX.setdefault(_kw, _i)
+
+# A zero-width lookahead tries every position, and the alternatives are in
+# library order, so the best match at each position is the earliest entry —
+# the minimum over all positions is what the old linear scan returned.
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(kw) for kw in sorted(_KEYWORD_FIX, key=_KEYWORD_FIX.__getitem__)) + "))"
+)
+
+
+@lru_cache(maxsize=4096)
+def match_fix(issue_text: str) -> tuple[str, str, str]:
+    """(title, what we do, business impact) for an issue."""
+    best = min((_KEYWORD_FIX[m.group(1)] for m in _KEYWORD_RE.finditer(issue_text.lower())), default=None)
+    return FALLBACK_FIX if best is None else FIX_LIBRARY[best][1:]
+
+
+# ── Templates ────────────────────────────────────────────────────────────────
+
+class _Template:
+    """A str.format-style template, parsed once into literal chunks and field names."""
+
+    def __init__(self, source: str):
+        self._parts = [(literal, field) for literal, field, _, _ in string.Formatter().parse(source)]
+
+    def bind(self, **values) -> "_Template":
+        """A copy with some fields filled in for good (their text becomes literal)."""
+        bound = _Template("")
+        parts: list[tuple[str, str | None]] = []
+        pending = ""
+        for literal, field in self._parts:
+            pending += literal
+            if field in values:
+                pending += str(values[field])
+            else:
+                parts.append((pending, field))
+                pending = ""
+        if pending:
+            parts.append((pending, None))
+        bound._parts = parts
+        return bound
+
+    def render(self, **values) -> str:
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field is not None:
+                out.append(str(values[field]))
+        return "".join(out)
+
+
+_GAUGE = _Template("""
+            <div style="text-align:center;flex:1;min-width:120px;">
+              <svg width="100" height="100" viewBox="0 0 100 100" style="display:block;margin:0 auto 8px;">
+                <circle cx="50" cy="50" r="42" fill="none" stroke="#e2e8f0" stroke-width="10"/>
+                <circle cx="50" cy="50" r="42" fill="none" stroke="{colour}" stroke-width="10"
+                  stroke-dasharray="{dash} {gap}"
+                  stroke-dashoffset="{offset}"
+                  stroke-linecap="round" transform="rotate(-90 50 50)"/>
+                <text x="50" y="46" text-anchor="middle"
+                  style="font-family:Inter,sans-serif;font-size:{value_size}px;font-weight:900;fill:{colour};">{value}</text>
+                <text x="50" y="62" text-anchor="middle"
+                  style="font-family:Inter,sans-serif;font-size:{sub_size}px;font-weight:600;fill:#64748b;">{sub}</text>
+              </svg>
+              <div style="font-family:Inter,sans-serif;font-size:13px;font-weight:700;color:#0f172a;">{label}</div>
+            </div>""")
+
+_METRIC_CARD = _Template("""
+            <div style="width:calc(50% - 8px);box-sizing:border-box;background:#ffffff;
+              border:1px solid #e8edf2;border-radius:10px;padding:16px 18px;">
+              <div style="display:flex;align-items:baseline;justify-content:space-between;
+                margin-bottom:6px;">
+                <div style="font-size:12px;font-weight:700;color:#0f172a;
+                  letter-spacing:-.01em;">{label}</div>
+                <div style="font-size:19px;font-weight:900;
+                  color:{rating_colour};line-height:1;">{score}</div>
+              </div>
+              {bar}
+              <div style="font-size:11px;font-weight:700;color:{rating_colour};
+                text-transform:uppercase;letter-spacing:.06em;margin-bottom:8px;">{rating}</div>
+              <div style="font-size:11.5px;color:#64748b;line-height:1.65;">{body}</div>
+            </div>""")
+
+_BAR = _Template("""<div style="height:5px;background:#e8edf2;border-radius:3px;margin-bottom:6px;">
+              <div style="height:5px;width:{pct}%;background:{colour};
+                border-radius:3px;"></div></div>""")
+
+_LCP_BAR = _Template("""<div style="display:flex;gap:4px;margin-bottom:4px;">
+              <div style="flex:1;height:5px;border-radius:3px;background:{c1};"></div>
+              <div style="flex:1;height:5px;border-radius:3px;background:{c2};"></div>
+              <div style="flex:1;height:5px;border-radius:3px;background:{c3};"></div>
+            </div>
+            <div style="display:flex;justify-content:space-between;
+              font-size:9.5px;font-weight:600;color:#94a3b8;margin-bottom:6px;">
+              <span>&lt;2.5s Good</span><span>2.5–4s Needs work</span><span>&gt;4s Poor</span>
+            </div>""")
+
+_FIX_CARD = _Template("""
+            <div style="background:#ffffff;border:1px solid #e8edf2;border-radius:10px;
+              padding:16px 20px;margin-bottom:10px;">
+              <div style="display:flex;align-items:flex-start;gap:14px;">
+                <div style="width:24px;height:24px;border-radius:50%;background:#5b4dff;
+                  flex-shrink:0;display:flex;align-items:center;justify-content:center;
+                  font-size:11px;font-weight:800;color:#ffffff;margin-top:1px;">{idx}</div>
+                <div style="flex:1;">
+                  <div style="font-size:12.5px;font-weight:800;color:#0f172a;
+                    margin-bottom:5px;">{title}</div>
+                  <div style="font-size:11px;font-weight:600;color:#ef4444;
+                    margin-bottom:8px;line-height:1.5;">Issue: {issue}</div>
+                  <div style="display:flex;gap:12px;">
+                    <div style="flex:1;background:#f8fafc;border-radius:7px;padding:10px 13px;">
+                      <div style="font-size:10px;font-weight:700;letter-spacing:.08em;
+                        text-transform:uppercase;color:#5b4dff;margin-bottom:5px;">What we fix</div>
+                      <div style="font-size:11.5px;color:#475569;line-height:1.6;">{what}</div>
+                    </div>
+                    <div style="flex:1;background:#f0fdf4;border:1px solid #bbf7d0;
+                      border-radius:7px;padding:10px 13px;">
+                      <div style="font-size:10px;font-weight:700;letter-spacing:.08em;
+                        text-transform:uppercase;color:#16a34a;margin-bottom:5px;">Business impact</div>
+                      <div style="font-size:11.5px;color:#15803d;line-height:1.6;">{impact}</div>
+                    </div>
+                  </div>
+                </div>
+              </div>
+            </div>""")
+
+_PAGE_SOURCE = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8">
+{font_css}
+</head>
+<body style="margin:0;padding:0;background:#f1f5f9;font-family:Inter,sans-serif;">
+<div style="width:680px;margin:0 auto;background:#f1f5f9;padding-bottom:0;">
+
+  <!-- Header -->
+  <div style="background:#0f172a;padding:26px 36px;display:flex;
+    align-items:center;justify-content:space-between;">
+    <div>
+      <span style="font-size:20px;font-weight:900;color:rgba(255,255,255,.92);
+        letter-spacing:-.02em;">Improve<span style="color:#2dd4bf;">YourSite</span></span>
+      <div style="font-size:10.5px;font-weight:600;color:rgba(255,255,255,.35);
+        letter-spacing:.1em;text-transform:uppercase;margin-top:3px;">Website Performance Report</div>
+    </div>
+    <div style="text-align:right;">
+      <div style="font-size:11px;color:rgba(255,255,255,.35);">{today}</div>
+      <div style="font-size:12px;font-weight:600;color:rgba(255,255,255,.55);
+        margin-top:2px;">{domain}</div>
+    </div>
+  </div>
+  <div style="height:3px;background:linear-gradient(90deg,#5b4dff 0%,#2dd4bf 100%);"></div>
+
+  <!-- Business + summary strip -->
+  <div style="background:#ffffff;padding:20px 36px 18px;
+    border-bottom:1px solid #e8edf2;">
+    <div style="font-size:10px;font-weight:700;letter-spacing:.1em;text-transform:uppercase;
+      color:#5b4dff;margin-bottom:4px;">Audited for</div>
+    <div style="display:flex;align-items:baseline;justify-content:space-between;">
+      <div style="font-size:22px;font-weight:900;color:#0f172a;
+        letter-spacing:-.025em;">{business_name}</div>
+      <div style="font-size:11px;color:#94a3b8;">Google PageSpeed Insights · mobile</div>
+    </div>
+  </div>
+
+  <!-- 4 Score gauges -->
+  <div style="background:#ffffff;padding:20px 36px 22px;border-bottom:1px solid #e8edf2;">
+    <div style="font-size:10px;font-weight:700;letter-spacing:.1em;text-transform:uppercase;
+      color:#94a3b8;margin-bottom:16px;">Google Scores</div>
+    <div style="display:flex;justify-content:space-between;gap:12px;">
+      {gauges}
+    </div>
+  </div>
+
+  <!-- Ranking penalty banner -->
+  <div style="margin:14px 36px;background:#fffbeb;border:1px solid #fcd34d;
+    border-left:4px solid #f59e0b;border-radius:8px;padding:14px 18px;">
+    <div style="font-size:12px;font-weight:800;color:#92400e;margin-bottom:4px;">
+      Google Core Web Vitals — Active Ranking Penalty
+    </div>
+    <div style="font-size:12px;color:#78350f;line-height:1.65;">
+      Since 2021, Google uses these scores as a direct ranking factor. A performance score
+      of <strong>{perf}/100</strong> means faster competitors are currently ranked above this
+      site for the same local searches — this is happening now, not a future risk.
+    </div>
+  </div>
+
+  <!-- 4 Metric cards — 2x2 grid -->
+  <div style="margin:0 36px 14px;">
+    <div style="font-size:10px;font-weight:700;letter-spacing:.1em;text-transform:uppercase;
+      color:#94a3b8;margin-bottom:12px;">What Each Score Means for Your Ranking</div>
+    <div style="display:flex;flex-wrap:wrap;gap:12px;">
+      {card_perf}
+      {card_lcp}
+      {card_seo}
+      {card_bp}
+    </div>
+  </div>
+
+  <!-- Issues & what we fix — continues below scores -->
+  <div style="background:#f1f5f9;padding-top:0;">
+
+    <!-- Page 2 header -->
+    <div style="background:#0f172a;padding:20px 36px;display:flex;
+      align-items:center;justify-content:space-between;">
+      <span style="font-size:16px;font-weight:900;color:rgba(255,255,255,.9);
+        letter-spacing:-.02em;">Improve<span style="color:#2dd4bf;">YourSite</span></span>
+      <div style="text-align:right;">
+        <div style="font-size:11px;font-weight:600;color:rgba(255,255,255,.4);">{business_name}</div>
+        <div style="font-size:10px;color:rgba(255,255,255,.3);margin-top:2px;">Issues &amp; Recommendations</div>
+      </div>
+    </div>
+    <div style="height:3px;background:linear-gradient(90deg,#5b4dff 0%,#2dd4bf 100%);"></div>
+
+    <!-- Intro copy -->
+    <div style="background:#ffffff;padding:20px 36px 16px;border-bottom:1px solid #e8edf2;">
+      <div style="font-size:18px;font-weight:900;color:#0f172a;letter-spacing:-.02em;
+        margin-bottom:6px;">What's holding the site back</div>
+      <div style="font-size:12.5px;color:#64748b;line-height:1.65;max-width:560px;">
+        Below are the specific issues found during the audit, what we'd do to fix each one,
+        and what that fix typically means for a local business in terms of more enquiries,
+        better rankings, and stronger conversions.
+      </div>
+    </div>
+
+    <!-- Fix cards -->
+    <div style="padding:16px 36px 16px;">
+      {fix_cards}
+    </div>
+
+    <!-- What a fixed site looks like -->
+    <div style="margin:0 36px 16px;background:#0f172a;border-radius:10px;padding:22px 24px;">
+      <div style="font-size:13px;font-weight:800;color:#ffffff;margin-bottom:12px;
+        letter-spacing:-.01em;">What this looks like once it's done</div>
+      <div style="display:flex;gap:10px;flex-wrap:wrap;">
+        <div style="flex:1;min-width:140px;background:rgba(255,255,255,.06);
+          border-radius:8px;padding:12px 14px;">
+          <div style="font-size:20px;font-weight:900;color:#2dd4bf;margin-bottom:4px;">90+</div>
+          <div style="font-size:11px;color:rgba(255,255,255,.6);line-height:1.5;">
+            Google performance score — out of the penalty zone and competing for page 1
+          </div>
+        </div>
+        <div style="flex:1;min-width:140px;background:rgba(255,255,255,.06);
+          border-radius:8px;padding:12px 14px;">
+          <div style="font-size:20px;font-weight:900;color:#2dd4bf;margin-bottom:4px;">&lt;2.5s</div>
+          <div style="font-size:11px;color:rgba(255,255,255,.6);line-height:1.5;">
+            Page load time — keeps visitors on the page instead of bouncing to a competitor
+          </div>
+        </div>
+        <div style="flex:1;min-width:140px;background:rgba(255,255,255,.06);
+          border-radius:8px;padding:12px 14px;">
+          <div style="font-size:20px;font-weight:900;color:#2dd4bf;margin-bottom:4px;">More calls</div>
+          <div style="font-size:11px;color:rgba(255,255,255,.6);line-height:1.5;">
+            Clear CTAs and local SEO turn search traffic into actual enquiries every week
+          </div>
+        </div>
+        <div style="flex:1;min-width:140px;background:rgba(255,255,255,.06);
+          border-radius:8px;padding:12px 14px;">
+          <div style="font-size:20px;font-weight:900;color:#2dd4bf;margin-bottom:4px;">Page 1</div>
+          <div style="font-size:11px;color:rgba(255,255,255,.6);line-height:1.5;">
+            Local suburb ranking for the searches customers are already doing right now
+          </div>
+        </div>
+      </div>
+    </div>
+
+    <!-- Page 2 footer CTA -->
+    <div style="background:#5b4dff;padding:20px 36px;display:flex;align-items:center;
+      justify-content:space-between;">
+      <div>
+        <div style="font-size:14px;font-weight:800;color:#ffffff;letter-spacing:-.01em;">
+          See exactly what we'd fix — book a free 20-min call
+        </div>
+        <div style="font-size:11.5px;color:rgba(255,255,255,.65);margin-top:3px;">
+          No obligation. You get a written summary of every recommendation.
+        </div>
+      </div>
+      <div style="background:#ffffff;color:#5b4dff;font-size:12px;font-weight:800;
+        padding:10px 20px;border-radius:7px;white-space:nowrap;">
+        improveyoursite.com
+      </div>
+    </div>
+
+  </div><!-- end page 2 -->
+
+</div>
+</body></html>"""
+
+
+@lru_cache(maxsize=1)
+def _page() -> _Template:
+    # The embedded fonts are the bulk of the document and never change
+    return _Template(_PAGE_SOURCE).bind(font_css=_pdf.font_css())
+
+
+# ── Pieces ───────────────────────────────────────────────────────────────────
+
+_CIRCUMFERENCE = 2 * 3.14159 * 42
+_GREEN, _AMBER, _RED, _GREY = "#22c55e", "#f59e0b", "#ef4444", "#e8edf2"
+
+
+def _score_colour(score: int) -> str:
+    return _GREEN if score >= 90 else _AMBER if score >= 50 else _RED
+
+
+def _lcp_colour(lcp: float) -> str:
+    return _GREEN if lcp <= 2.5 else _AMBER if lcp <= 4.0 else _RED
+
+
+@lru_cache(maxsize=512)
+def _gauge(label: str, score: int) -> str:
+    colour = _score_colour(score)
+    pct    = min(score, 100)
+    return _GAUGE.render(
+        colour=colour, dash=int(_CIRCUMFERENCE * pct / 100), gap=int(_CIRCUMFERENCE * (100 - pct) / 100),
+        offset=int(_CIRCUMFERENCE * 0.25), value_size=22, value=score, sub_size=11, sub="/100", label=label,
+    )
+
+
+@lru_cache(maxsize=512)
+def _lcp_gauge(lcp: float) -> str:
+    filled = min(lcp / 10, 1)
+    return _GAUGE.render(
+        colour=_lcp_colour(lcp), dash=int(_CIRCUMFERENCE * filled * 100 / 100), gap=int(_CIRCUMFERENCE * (1 - filled)),
+        offset=int(_CIRCUMFERENCE * 0.25), value_size=18, value=f"{lcp}s", sub_size=10,
+        sub="Good" if lcp <= 2.5 else "Needs work" if lcp <= 4.0 else "Poor", label="Page Load (LCP)",
+    )
+
+
+@lru_cache(maxsize=4096)
+def _fix_card(issue_text: str, idx: int) -> str:
+    title, what, impact = match_fix(issue_text)
+    return _FIX_CARD.render(idx=idx, title=title, issue=_escape(issue_text), what=what, impact=impact)
+
+
+def _score_card(label: str, score: int, rating: str, body: str) -> str:
+    colour = _score_colour(score)
+    return _METRIC_CARD.render(
+        label=label, score=f"{score}/100", bar=_BAR.render(pct=min(score, 100), colour=colour),
+        rating=rating, rating_colour=colour, body=body,
+    )
+
+
+def _escape(text: str) -> str:
+    return html_lib.escape(text, quote=False)
+
+
+# ── Data model ───────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class ScoreSheet:
+    business_name: str
+    domain: str
+    date: str
+    perf: int
+    seo: int
+    bp: int
+    lcp: float
+    issues: tuple[str, ...]
+
+    @classmethod
+    def from_psi(cls, business_name: str, website: str, psi: dict, issues: list[str],
+                 today: date | None = None) -> "ScoreSheet":
+        return cls(
+            business_name=business_name,
+            domain=re.sub(r"https?://(www\.)?", "", website).rstrip("/") if website else "—",
+            date=(today or date.today()).strftime("%-d %B %Y"),
+            perf=psi.get("perf_score", 0),
+            seo=psi.get("seo_score", 0),
+            bp=psi.get("bp_score", 0),
+            lcp=psi.get("lcp", 0.0),
+            issues=tuple(issues[:MAX_ISSUES]),
+        )
+
+
+def build_html(sheet: ScoreSheet) -> str:
+    perf, seo, bp, lcp = sheet.perf, sheet.seo, sheet.bp, sheet.lcp
+
+    lcp_rating  = "Poor" if lcp > 4 else "Needs Improvement" if lcp > 2.5 else "Good"
+    perf_rating = "Poor" if perf < 50 else "Needs Improvement" if perf < 90 else "Good"
+    seo_rating  = "Needs Improvement" if seo < 90 else "Good"
+    bp_rating   = "Needs Improvement" if bp < 90 else "Good"
+
+    perf_note = (
+        "Under 50 is classified as Poor — these sites are actively penalised in search."
+        if perf < 50 else
+        "Under 90 means competitors scoring higher rank above this site for the same searches."
+        if perf < 90 else
+        "Within Google's good range."
+    )
+    seo_note = (
+        "Missing signals mean Google gets an incomplete picture, limiting how well it ranks the site locally."
+        if seo < 90 else
+        "SEO fundamentals are in place."
+    )
+    bp_note = (
+        "Issues here can trigger browser security warnings, damaging trust before a visitor even reads the page."
+        if bp < 90 else
+        "Meeting modern technical standards, which supports trust and ranking."
+    )
+
+    card_lcp = _METRIC_CARD.render(
+        label="LCP — Page Load Speed", score=f"{lcp}s",
+        bar=_LCP_BAR.render(
+            c1=_GREEN if lcp <= 2.5 else _GREY,
+            c2=_AMBER if 2.5 < lcp <= 4.0 else _GREY,
+            c3=_RED if lcp > 4.0 else _GREY,
+        ),
+        rating=lcp_rating, rating_colour=_lcp_colour(lcp),
+        body=f"How long the main content takes to appear after a visitor opens the page — "
+             f"Google's most heavily weighted speed signal. "
+             f"At {lcp}s this site is in the {lcp_rating} range. "
+             f"53% of mobile visitors leave if a page takes over 3 seconds — "
+             f"each one goes back and clicks a competitor instead.",
+    )
+
+    name = _escape(sheet.business_name)
+    return _page().render(
+        today=sheet.date,
+        domain=_escape(sheet.domain),
+        business_name=name,
+        perf=perf,
+        gauges=_gauge("Performance", perf) + _gauge("SEO", seo) + _gauge("Best Practices", bp) + _lcp_gauge(lcp),
+        card_perf=_score_card(
+            "Performance", perf, perf_rating,
+            f"Google's overall mobile speed score. {perf_note} "
+            f"Every 0.1s improvement in load time increases conversions by up to 8%.",
+        ),
+        card_lcp=card_lcp,
+        card_seo=_score_card(
+            "SEO Score", seo, seo_rating,
+            f"Whether Google can fully read and index the site — page titles, meta descriptions, "
+            f"structured data, crawlability. {seo_note} "
+            f"Gaps compound: a competitor who ticks every box consistently outranks a site that doesn't.",
+        ),
+        card_bp=_score_card(
+            "Best Practices", bp, bp_rating,
+            f"How securely and correctly the site is built — HTTPS, no browser errors, "
+            f"correct image sizing, privacy-safe scripts. {bp_note} "
+            f"Low scores compound the impact of a poor Performance or LCP result.",
+        ),
+        fix_cards="".join(_fix_card(issue, i + 1) for i, issue in enumerate(sheet.issues)),
+    )
+
+
+def render(sheet: ScoreSheet) -> bytes | None:
+    """PDF bytes on the warm browser in agents/pdf_renderer.py, or None if it's unavailable."""
+    return _pdf.render(build_html(sheet), width="720px")
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+def _bench(n: int):
+    import random
+    rng    = random.Random(0)
+    issues = [kw for keywords, *_ in FIX_LIBRARY for kw in keywords] + ["something else entirely"]
+    sheets = [
+        ScoreSheet.from_psi(
+            f"Business {i}", f"https://www.business{i}.com.au/",
+            {"perf_score": rng.randint(10, 100), "seo_score": rng.randint(40, 100),
+             "bp_score": rng.randint(40, 100), "lcp": round(rng.uniform(0.8, 12), 1)},
+            [f"Issue with {rng.choice(issues)}" for _ in range(rng.randint(1, MAX_ISSUES))],
+        )
+        for i in range(n)
+    ]
+    t0 = time.perf_counter()
+    _page()
+    t1 = time.perf_counter()
+    size = sum(len(build_html(s)) for s in sheets)
+    t2 = time.perf_counter()
+    print(f"template + fonts: {(t1 - t0) * 1000:.1f} ms (once per process)")
+    print(f"{n} sheets: {(t2 - t1) * 1000:.1f} ms, {(t2 - t1) / n * 1e6:.0f} µs/sheet, {size / n / 1024:.0f} KiB/sheet")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--bench":
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 100)
+    else:
+        print(__doc__)
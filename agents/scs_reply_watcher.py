@@ -106,8 +106,8 @@ def remove_scs_from_leads():
     try:
         with db.transaction() as conn:
             conn.execute(
-                "UPDATE leads SET status='cold' WHERE LOWER(email)=?",
-                (SCS_EMAIL.lower(),)
+                "UPDATE leads SET status='cold' WHERE email_norm=?",
+                (SCS_EMAIL.strip().lower(),)
             )
         print("  SCS marked cold in leads DB")
     except Exception as exc:
@@ -31,6 +31,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base import BaseAgent
+from agents import httpclient as _http
 from dashboard import db
 
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -303,7 +304,7 @@ class SecurityAgent(BaseAgent):
             url = base + endpoint
             try:
                 req = urllib.request.Request(url, method='GET')
-                with urllib.request.urlopen(req, timeout=3) as r:
+                with _http.urlopen(req, timeout=3) as r:
                     # If we get a 200 without auth — it's unprotected
                     if r.status == 200:
                         findings.append({
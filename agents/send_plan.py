@@ -0,0 +1,346 @@
+"""
+agents/send_plan.py — Deliverability-aware daily send plan for the outreach mailbox.
+
+The 10 AM leads job queued every outreach email, follow-up, win-back and
+re-engagement the moment it was produced. The outbox then sent them
+back-to-back from the one Gmail account: the whole day's volume went out in
+a single burst, grouped by sequence type. Now:
+
+  - plan_day() lays the day's messages out over SEND_WINDOW (local time,
+    SEND_TZ) on SEND_DAYS before anything is composed
+  - each mailbox gets at most HOURLY_CAP messages per clock hour, counting
+    what is already queued or sent from it and slots other plans hold
+  - messages are spread evenly over the rest of the window. Sequence types
+    are interleaved in proportion to their volume (smooth weighted
+    round-robin), and within a type the best-scoring leads get the
+    earliest slots
+  - what doesn't fit today moves to the next send day's window. If even
+    SPILL_DAYS of windows are full, take() raises PlanFull and the caller
+    leaves that message for a later run instead of sending it now
+  - the plan is stored in send_plan. Each composed message takes its slot
+    (Plan.take) and is queued in the outbox with send_after, so the agent
+    thread never waits and the outbox sender delivers on schedule. Slots
+    left unused at the end of the run are released
+  - the dashboard calendar (GET /api/calendar) shows the plan per day
+    (calendar())
+  - IYS_SEND_PLAN=0 turns planning off, so every message is queued to go
+    now (agents/replay.py does this to bench the pipeline)
+
+Usage:
+    from agents import send_plan
+    plan = send_plan.plan_day([send_plan.Item("outreach")] * 100
+                              + [send_plan.Item("followup1", "lead:42", 0.031)], mailbox=user)
+    slot = plan.take("followup1", "lead:42")      # → Slot, None (planning off) or raises PlanFull
+    mid  = outbox.enqueue(msg, to, send_after=slot.at if slot else None)
+    plan.fill(slot, mid)
+    plan.release()
+
+    python agents/send_plan.py --show [YYYY-MM-DD]
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import random
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dashboard import db
+
+ENABLED      = os.environ.get("IYS_SEND_PLAN", "1") != "0"   # 0 → every message is queued to go now
+SEND_TZ      = os.environ.get("IYS_SEND_TZ", "Australia/Sydney")
+SEND_WINDOW  = os.environ.get("IYS_SEND_WINDOW", "10:00-16:30")                 # local time
+SEND_DAYS    = os.environ.get("IYS_SEND_DAYS", "mon,tue,wed,thu,fri,sat,sun")
+HOURLY_CAP   = int(os.environ.get("IYS_SEND_HOURLY_CAP", "25"))                 # per mailbox
+LEAD_MINUTES = float(os.environ.get("IYS_SEND_LEAD_MINS", "15"))   # first slot no sooner than this after planning
+SPILL_DAYS   = 7             # how far ahead overflow may be pushed
+JITTER       = 0.35          # of the spacing between two slots, either way
+
+_DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def _tz():
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(SEND_TZ)
+    except Exception:
+        return timezone(timedelta(hours=10))    # AEST, no tz database
+
+
+def _key(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse(ts: str) -> datetime:
+    return datetime.strptime(ts, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+def _window(day: date) -> tuple[datetime, datetime]:
+    start, _, end = SEND_WINDOW.partition("-")
+    tz = _tz()
+    return tuple(datetime.combine(day, dtime.fromisoformat(t.strip()), tzinfo=tz) for t in (start, end))
+
+
+def _send_days() -> set[int]:
+    days = {_DAY_NAMES.index(d.strip()[:3].lower()) for d in SEND_DAYS.split(",")
+            if d.strip()[:3].lower() in _DAY_NAMES}
+    return days or set(range(7))
+
+
+# ── Ordering ─────────────────────────────────────────────────────────────────
+
+@dataclass
+class Item:
+    kind: str                       # outreach | followup1 | followup2 | winback | reengage ...
+    ref: Optional[str] = None       # None → a slot any message of this kind can take
+    score: float = 0.0
+
+
+def interleave(items: list[Item]) -> list[Item]:
+    """
+    Best-first within each kind, kinds mixed in proportion to their size
+    (smooth weighted round-robin), so no type goes out in one block.
+    """
+    queues: dict[str, list[Item]] = {}
+    for item in items:
+        queues.setdefault(item.kind, []).append(item)
+    for q in queues.values():
+        q.sort(key=lambda i: -i.score)
+    weight  = {k: len(q) for k, q in queues.items()}
+    current = {k: 0.0 for k in queues}
+    out: list[Item] = []
+    while queues:
+        total = sum(weight[k] for k in queues)
+        for k in queues:
+            current[k] += weight[k]
+        pick = max(queues, key=lambda k: current[k])
+        current[pick] -= total
+        out.append(queues[pick].pop(0))
+        if not queues[pick]:
+            del queues[pick]
+    return out
+
+
+# ── Slots ────────────────────────────────────────────────────────────────────
+
+def _segments(mailbox: str, start: datetime, day: date) -> list[tuple[datetime, datetime, int]]:
+    """(from, to, free capacity) per clock hour of a day's window from `start` on."""
+    w0, w1 = _window(day)
+    t = max(w0, start)
+    if t >= w1:
+        return []
+    busy = db.send_plan_busy(mailbox, _key(t.replace(minute=0, second=0, microsecond=0)), _key(w1))
+    segments = []
+    while t < w1:
+        hour     = t.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        hour_end = min(hour + timedelta(hours=1), w1)
+        # the hour's allowance shrinks with the part of it outside the window,
+        # and what's left of it is spread over the rest of the hour
+        allowed  = math.ceil(HOURLY_CAP * (hour_end - max(hour, w0)).total_seconds() / 3600)
+        free = min(allowed - busy.get(_key(t)[:13], 0),
+                   math.ceil(HOURLY_CAP * (hour_end - t).total_seconds() / 3600))
+        segments.append((t, hour_end, max(0, free)))
+        t = hour_end
+    return segments
+
+
+def _spread(n: int, segments: list[tuple[datetime, datetime, int]], rng: random.Random) -> list[datetime]:
+    """
+    n send times spread evenly over the segments: each message's ideal time is
+    placed in its hour, or the nearest later (then earlier) hour with room,
+    then spaced out within the hour with jitter.
+    """
+    start, end = segments[0][0], segments[-1][1]
+    span   = (end - start).total_seconds()
+    counts = [0] * len(segments)
+    for j in range(n):
+        ideal = start + timedelta(seconds=(j + 0.5) * span / n)
+        i = next(i for i, (a, b, _) in enumerate(segments) if a <= ideal < b or i == len(segments) - 1)
+        order = list(range(i, len(segments))) + list(range(i - 1, -1, -1))
+        i = next(k for k in order if counts[k] < segments[k][2])
+        counts[i] += 1
+    times = []
+    for (a, b, _), k in zip(segments, counts):
+        step = (b - a).total_seconds() / k if k else 0
+        for m in range(k):
+            offset = (m + 0.5 + rng.uniform(-JITTER, JITTER)) * step
+            times.append((a + timedelta(seconds=offset)).replace(microsecond=0))
+    return sorted(times)
+
+
+def _slots(mailbox: str, start: datetime, n: int, rng: random.Random,
+           until: Optional[date] = None) -> list[datetime]:
+    """
+    Up to n send times from `start` on, today's window first, then the next
+    send days' — up to `until` (local date, default SPILL_DAYS after start).
+    """
+    days  = _send_days()
+    times: list[datetime] = []
+    day   = start.astimezone(_tz()).date()
+    until = until or day + timedelta(days=SPILL_DAYS)
+    while day <= until:
+        if len(times) >= n:
+            break
+        if day.weekday() in days:
+            segments = _segments(mailbox, start, day)
+            room = sum(free for _, _, free in segments)
+            if room:
+                times += _spread(min(room, n - len(times)), segments, rng)
+        day += timedelta(days=1)
+    return times
+
+
+# ── Plan ─────────────────────────────────────────────────────────────────────
+
+class PlanFull(Exception):
+    """The mailbox has no capacity left within SPILL_DAYS — don't send this one now."""
+
+
+@dataclass
+class Slot:
+    id: int
+    kind: str
+    ref: Optional[str]
+    at: datetime                    # naive UTC (what outbox.enqueue's send_after takes)
+
+    @property
+    def day(self) -> date:
+        """Local send date (SEND_TZ)."""
+        return self.at.replace(tzinfo=timezone.utc).astimezone(_tz()).date()
+
+
+class Plan:
+    def __init__(self, mailbox: str, slots: list[Slot], rng: random.Random, until: date):
+        self.mailbox = mailbox
+        self.until   = until            # last local day this plan may spill into
+        self._slots  = slots
+        self._open   = {s.id for s in slots}
+        self._filled: set[int] = set()
+        self._rng    = rng
+        self._lock   = threading.Lock()
+
+    def take(self, kind: str, ref: Optional[str] = None) -> Optional[Slot]:
+        """
+        The slot reserved for ref, else the earliest open slot of this kind that
+        hasn't passed; if the plan has none left, a new one after the last slot.
+        None only when planning is off (send now). Raises PlanFull if nothing
+        fits within SPILL_DAYS.
+        """
+        if not ENABLED:
+            return None
+        now = datetime.utcnow()
+        with self._lock:
+            for match_ref in ((ref,) if ref else ()) + (None,):
+                for s in self._slots:
+                    if s.id in self._open and s.kind == kind and s.ref == match_ref and s.at >= now:
+                        self._open.discard(s.id)
+                        return s
+            after = max([s.at for s in self._slots] + [now]).replace(tzinfo=timezone.utc) + timedelta(seconds=1)
+            times = _slots(self.mailbox, after, 1, self._rng, until=self.until)
+            if not times:
+                raise PlanFull(f"{self.mailbox or 'mailbox'}: no send slot free in the next {SPILL_DAYS} day(s)")
+            t = times[0]
+            slot_id = db.send_plan_add([(t.astimezone(_tz()).date().isoformat(), self.mailbox, kind, ref,
+                                         None, _key(t))])[0]
+            slot = Slot(slot_id, kind, ref, t.astimezone(timezone.utc).replace(tzinfo=None))
+            self._slots.append(slot)
+            return slot
+
+    def fill(self, slot: Optional[Slot], message_id: Optional[str], ref: Optional[str] = None):
+        """Record the queued message in its slot (nothing if it wasn't queued)."""
+        if slot is None or not message_id:
+            return
+        db.send_plan_fill(slot.id, message_id, ref)
+        with self._lock:
+            self._filled.add(slot.id)
+
+    def release(self) -> int:
+        """Drop every slot this run didn't fill. Returns how many."""
+        with self._lock:
+            unused = [s.id for s in self._slots if s.id not in self._filled]
+            self._open.clear()
+        db.send_plan_release(unused)
+        return len(unused)
+
+    def summary(self) -> str:
+        if not self._slots:
+            return "nothing to send"
+        tz    = _tz()
+        times = sorted(s.at for s in self._slots)
+        kinds: dict[str, int] = {}
+        for s in self._slots:
+            kinds[s.kind] = kinds.get(s.kind, 0) + 1
+        fmt = lambda t: t.replace(tzinfo=timezone.utc).astimezone(tz).strftime("%a %H:%M")
+        return (f"{len(self._slots)} slot(s) {fmt(times[0])} → {fmt(times[-1])} "
+                f"(≤{HOURLY_CAP}/h) · " + " · ".join(f"{k} {n}" for k, n in kinds.items()))
+
+
+def plan_day(items: list[Item], mailbox: str, now: Optional[datetime] = None) -> Plan:
+    """Reserve send slots for the items (best first within each kind) and return the plan."""
+    now   = now or datetime.now(timezone.utc)
+    start = now + timedelta(minutes=LEAD_MINUTES)
+    rng   = random.Random(f"{mailbox}|{start.date()}")
+    tz    = _tz()
+    until = start.astimezone(tz).date() + timedelta(days=SPILL_DAYS)
+    if not ENABLED:
+        return Plan(mailbox, [], rng, until)
+    order = interleave(items)
+    times = _slots(mailbox, start, len(order), rng, until=until)
+    rows  = [(t.astimezone(tz).date().isoformat(), mailbox, item.kind, item.ref, item.score, _key(t))
+             for item, t in zip(order, times)]
+    ids   = db.send_plan_add(rows) if rows else []
+    slots = [Slot(i, item.kind, item.ref, t.astimezone(timezone.utc).replace(tzinfo=None))
+             for i, item, t in zip(ids, order, times)]
+    return Plan(mailbox, slots, rng, until)
+
+
+# ── Calendar ─────────────────────────────────────────────────────────────────
+
+def calendar(year: int, month: int) -> list[dict]:
+    """
+    One entry per local day with planned sends:
+    {date, total, sent, failed, first, last, kinds: {kind: n}, hours: [{hour, n, kinds}]}.
+    """
+    first = date(year, month, 1)
+    last  = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    tz    = _tz()
+    days: dict[str, dict] = {}
+    for row in db.send_plan_for_days(first.isoformat(), last.isoformat()):
+        at  = _parse(row["slot_at"]).astimezone(tz)
+        day = days.setdefault(row["day"], {"date": row["day"], "total": 0, "sent": 0, "failed": 0,
+                                           "first": at.strftime("%H:%M"), "kinds": {}, "hours": {}})
+        day["total"] += 1
+        day["sent"]   += row["status"] == "sent"
+        day["failed"] += row["status"] in ("failed", "rejected", "bounced")
+        day["last"]   = at.strftime("%H:%M")
+        day["kinds"][row["kind"]] = day["kinds"].get(row["kind"], 0) + 1
+        hour = day["hours"].setdefault(at.strftime("%H:00"), {"hour": at.strftime("%H:00"), "n": 0, "kinds": {}})
+        hour["n"] += 1
+        hour["kinds"][row["kind"]] = hour["kinds"].get(row["kind"], 0) + 1
+    out = []
+    for day in days.values():
+        day["hours"] = list(day["hours"].values())
+        out.append(day)
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--show":
+        db.init_db()
+        d = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else datetime.now(_tz()).date()
+        for day in calendar(d.year, d.month):
+            if day["date"] != d.isoformat():
+                continue
+            print(f"{day['date']}: {day['total']} send(s) {day['first']}–{day['last']}, "
+                  f"{day['sent']} sent, {day['failed']} failed")
+            for h in day["hours"]:
+                print(f"  {h['hour']}  {h['n']:3d}  " + ", ".join(f"{k} {n}" for k, n in h["kinds"].items()))
+    else:
+        print(__doc__)
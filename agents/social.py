@@ -38,6 +38,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base import BaseAgent
+from agents import httpclient as _http
+from agents import ratelimit as _ratelimit
 from agents.social_intel import run_intel
 from dashboard import db
 
@@ -300,6 +302,7 @@ class SocialAgent(BaseAgent):
                         f"Original post JSON:\n{json.dumps(post)}\n\n"
                         f"Return ONLY the corrected JSON with the same keys. No markdown fences."
                     )
+                    _ratelimit.acquire("api.anthropic.com")
                     _r = _client.messages.create(
                         model="claude-opus-4-6",
                         max_tokens=1200,
@@ -446,7 +449,7 @@ class SocialAgent(BaseAgent):
                     "Content-Type": "application/json",
                 },
             )
-            with urllib.request.urlopen(req, timeout=15) as r:
+            with _http.urlopen(req, timeout=15) as r:
                 resp = json.loads(r.read())
             content = resp["choices"][0]["message"]["content"]
             # Parse bullet points / numbered list into a list
@@ -626,6 +629,7 @@ Return ONLY valid JSON, no markdown fences:
 }}"""
 
         client = anthropic.Anthropic(api_key=api_key)
+        _ratelimit.acquire("api.anthropic.com")
         response = client.messages.create(
             model="claude-opus-4-6",
             max_tokens=1200,
@@ -1165,12 +1169,12 @@ Return ONLY valid JSON, no markdown fences:
                     "Content-Type":  "application/json",
                 },
             )
-            with urllib.request.urlopen(req, timeout=60) as r:
+            with _http.urlopen(req, timeout=60) as r:
                 resp = json.loads(r.read())
             img_url = resp["data"][0]["url"]
 
             # Download the background image
-            with urllib.request.urlopen(img_url, timeout=30) as r:
+            with _http.urlopen(img_url, timeout=30) as r:
                 bg_bytes = r.read()
             bg_img = Image.open(io.BytesIO(bg_bytes)).convert("RGBA").resize((1080, 1080))
 
@@ -1290,7 +1294,7 @@ Return ONLY valid JSON, no markdown fences:
                 f"https://eu1.make.com/api/v2/scenarios/{scenario_id}",
                 headers={"Authorization": f"Token {api_key}", "Content-Type": "application/json"},
             )
-            with urllib.request.urlopen(req, timeout=10) as r:
+            with _http.urlopen(req, timeout=10) as r:
                 data = json.loads(r.read())
             is_active = data.get("scenario", {}).get("isActive", True)
             if not is_active:
@@ -1302,7 +1306,7 @@ Return ONLY valid JSON, no markdown fences:
                     method="PATCH",
                     headers={"Authorization": f"Token {api_key}", "Content-Type": "application/json"},
                 )
-                with urllib.request.urlopen(req, timeout=10) as r:
+                with _http.urlopen(req, timeout=10) as r:
                     pass
                 self.log_info("Make.com: scenario was paused — re-activated successfully")
             else:
@@ -1365,7 +1369,7 @@ Return ONLY valid JSON, no markdown fences:
                 method="POST",
                 headers={"Content-Type": "application/json"},
             )
-            with urllib.request.urlopen(req, timeout=30) as r:
+            with _http.urlopen(req, timeout=30) as r:
                 status = r.status
             return status == 200
 
@@ -1411,7 +1415,7 @@ Return ONLY valid JSON, no markdown fences:
             req = urllib.request.Request(
                 create_url, data=params.encode(), method="POST"
             )
-            with urllib.request.urlopen(req, timeout=15) as r:
+            with _http.urlopen(req, timeout=15) as r:
                 container = json.loads(r.read())
             container_id = container.get("id")
             if not container_id:
@@ -1427,7 +1431,7 @@ Return ONLY valid JSON, no markdown fences:
             req = urllib.request.Request(
                 publish_url, data=pub_params.encode(), method="POST"
             )
-            with urllib.request.urlopen(req, timeout=15) as r:
+            with _http.urlopen(req, timeout=15) as r:
                 result = json.loads(r.read())
             post_id = result.get("id")
             return f"https://www.instagram.com/p/{post_id}/" if post_id else None
@@ -1458,7 +1462,7 @@ Return ONLY valid JSON, no markdown fences:
                         "Accept": "application/vnd.github.v3+json",
                     },
                 )
-                with urllib.request.urlopen(req) as r:
+                with _http.urlopen(req) as r:
                     existing = json.loads(r.read())
                     sha = existing.get("sha")
             except Exception:
@@ -1478,7 +1482,7 @@ Return ONLY valid JSON, no markdown fences:
                     "Content-Type": "application/json",
                 },
             )
-            with urllib.request.urlopen(req, timeout=20) as r:
+            with _http.urlopen(req, timeout=20) as r:
                 pass
 
             return f"https://raw.githubusercontent.com/anon8597299/smart-tech-innovations/main/{dest_path}"
@@ -1521,7 +1525,7 @@ Return ONLY valid JSON, no markdown fences:
                 f"?metric=reach,impressions,profile_views"
                 f"&period=week&access_token={token}"
             )
-            with urllib.request.urlopen(url, timeout=10) as r:
+            with _http.urlopen(url, timeout=10) as r:
                 data = json.loads(r.read())
             metrics = {m["name"]: m["values"][-1]["value"] for m in data.get("data", [])}
             self.log_info(
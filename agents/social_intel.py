@@ -25,6 +25,9 @@ import urllib.parse
 from datetime import date, datetime
 from pathlib import Path
 
+from agents import httpclient as _http
+from agents import ratelimit as _ratelimit
+
 PROJECT_ROOT = Path(__file__).parent.parent
 SOCIAL_DIR   = PROJECT_ROOT / "social"
 CONFIG_FILE  = SOCIAL_DIR / "intel_config.json"
@@ -192,7 +195,7 @@ def _research_hashtags(token: str, user_id: str, config: dict) -> list[dict]:
                 f"{GRAPH_BASE}/ig-hashtag-search"
                 f"?user_id={user_id}&q={urllib.parse.quote(tag)}&access_token={token}"
             )
-            with urllib.request.urlopen(search_url, timeout=8) as r:
+            with _http.urlopen(search_url, timeout=8) as r:
                 result = json.loads(r.read())
             tag_id = result.get("data", [{}])[0].get("id")
             if not tag_id:
@@ -205,7 +208,7 @@ def _research_hashtags(token: str, user_id: str, config: dict) -> list[dict]:
                 f"&fields=like_count,comments_count,caption,media_type,timestamp"
                 f"&access_token={token}"
             )
-            with urllib.request.urlopen(media_url, timeout=8) as r:
+            with _http.urlopen(media_url, timeout=8) as r:
                 media = json.loads(r.read())
 
             posts = media.get("data", [])
@@ -275,6 +278,7 @@ Angles must be contrarian or add genuine value — not generic tips everyone pos
 
     try:
         client = anthropic.Anthropic(api_key=api_key)
+        _ratelimit.acquire("api.anthropic.com")
         response = client.messages.create(
             model="claude-sonnet-4-6",
             max_tokens=1500,
@@ -313,7 +317,7 @@ def _perplexity_search(key: str, query: str) -> Optional[dict]:
                 "Content-Type":   "application/json",
             },
         )
-        with urllib.request.urlopen(req, timeout=20) as r:
+        with _http.urlopen(req, timeout=20) as r:
             resp = json.loads(r.read())
         content  = resp["choices"][0]["message"]["content"]
         sources  = [
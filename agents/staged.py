@@ -0,0 +1,228 @@
+"""
+agents/staged.py — Bounded-concurrency streaming pipeline for per-item work.
+
+Used by LeadsAgent._run_new_outreach to push prospects through
+verify → safety → email → audit → compose → render → send without doing
+each prospect strictly one after another.
+
+Each Stage gets its own worker threads and a bounded input queue:
+  - Workers per stage cap how hard each external API is hit (on top of
+    agents/ratelimit.py, which caps requests per host).
+  - Bounded queues give backpressure. Once the send stage is saturated,
+    upstream stages block instead of verifying hundreds of prospects that
+    will never be emailed.
+  - A stage function returns the (possibly updated) item to pass it on, or
+    None to drop it (e.g. no email found).
+  - A stage with batch_size > 1 collects up to batch_size items (waiting at
+    most batch_wait seconds after the first) and calls fn(list) → list of
+    items to pass on. Use it for APIs that take many inputs per request.
+  - pipeline.stop() cancels early (e.g. DAILY_LIMIT reached or the run
+    deadline passed). The feeder stops, in-flight items are dropped at the
+    next stage boundary, and run() returns once every worker has exited.
+
+Worker threads inherit the caller's RunContext, so self.log()/create_task()
+inside stage functions keep the run's run_id.
+
+Usage:
+    pipe = StagedPipeline([
+        Stage("verify", verify_fn, workers=4),
+        Stage("send",   send_fn,   workers=1),
+    ])
+    delivered = pipe.run(prospects)
+    pipe.metrics()   # per-stage in / out / dropped / errors / busy secs / per-min
+"""
+
+from __future__ import annotations
+
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.context import run_in_thread_target
+
+_DONE = object()   # end-of-stream sentinel, one per downstream worker
+
+
+@dataclass
+class StageStats:
+    received: int = 0
+    passed:   int = 0
+    dropped:  int = 0
+    errors:   int = 0
+    busy_secs: float = 0.0
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Any], Optional[Any]]
+    workers: int = 1
+    queue_size: int = 0                 # 0 → 2 × workers (or batch_size)
+    batch_size: int = 1                 # >1 → fn takes and returns a list
+    batch_wait: float = 2.0             # max seconds to wait filling a batch
+    stats: StageStats = field(default_factory=StageStats)
+
+
+class StagedPipeline:
+    def __init__(self, stages: list[Stage], on_error: Optional[Callable[[Stage, Any, Exception], None]] = None):
+        if not stages:
+            raise ValueError("StagedPipeline needs at least one stage")
+        self.stages   = stages
+        self.on_error = on_error
+        self._stop    = threading.Event()
+        self._lock    = threading.Lock()
+        self._queues  = [
+            queue.Queue(maxsize=s.queue_size or max(2 * s.workers, s.batch_size)) for s in stages
+        ]
+        self._results: list[Any] = []
+        self._started = 0.0
+        self._ended   = 0.0
+
+    # ── Control ────────────────────────────────────────────────────────────
+
+    def stop(self):
+        """Cancel early — stop feeding and drop whatever is still in flight."""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    # ── Execution ──────────────────────────────────────────────────────────
+
+    def run(self, source: Iterable[Any]) -> list[Any]:
+        """Push every item from source through the stages; return items that cleared the last one."""
+        self._started = time.time()
+        threads = []
+        for idx, stage in enumerate(self.stages):
+            remaining = [stage.workers]   # workers still running in this stage
+            for n in range(stage.workers):
+                t = threading.Thread(
+                    target=run_in_thread_target(self._worker),
+                    args=(idx, remaining),
+                    daemon=True, name=f"stage-{stage.name}-{n}",
+                )
+                t.start()
+                threads.append(t)
+
+        try:
+            for item in source:
+                if self._stop.is_set():
+                    break
+                self._queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self._queues[0].put(_DONE)
+            for t in threads:
+                t.join()
+            self._ended = time.time()
+        return self._results
+
+    def _next_batch(self, stage: Stage, inbox: queue.Queue) -> tuple[list, bool]:
+        """Take up to stage.batch_size items. Returns (items, end_of_stream)."""
+        item = inbox.get()
+        if item is _DONE:
+            return [], True
+        items    = [item]
+        deadline = time.time() + stage.batch_wait
+        while len(items) < stage.batch_size:
+            try:
+                item = inbox.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _process(self, stage: Stage, items: list) -> list:
+        """Run stage.fn over items (one call per item, or one per batch)."""
+        started = time.time()
+        out: list = []
+        if stage.batch_size > 1:
+            try:
+                out = [o for o in (stage.fn(items) or []) if o is not None]
+            except Exception as exc:
+                with self._lock:
+                    stage.stats.errors += 1
+                if self.on_error:
+                    for item in items:
+                        self.on_error(stage, item, exc)
+        else:
+            for item in items:
+                try:
+                    result = stage.fn(item)
+                except Exception as exc:
+                    result = None
+                    with self._lock:
+                        stage.stats.errors += 1
+                    if self.on_error:
+                        self.on_error(stage, item, exc)
+                if result is not None:
+                    out.append(result)
+        with self._lock:
+            stage.stats.busy_secs += time.time() - started
+            stage.stats.passed    += len(out)
+            stage.stats.dropped   += len(items) - len(out)
+        return out
+
+    def _worker(self, idx: int, remaining: list[int]):
+        stage = self.stages[idx]
+        inbox = self._queues[idx]
+        last  = idx == len(self.stages) - 1
+        done  = False
+        while not done:
+            items, done = self._next_batch(stage, inbox)
+            if not items:
+                continue
+            with self._lock:
+                stage.stats.received += len(items)
+            if self._stop.is_set():
+                with self._lock:
+                    stage.stats.dropped += len(items)
+                continue
+            for out in self._process(stage, items):
+                if last:
+                    with self._lock:
+                        self._results.append(out)
+                else:
+                    self._queues[idx + 1].put(out)
+
+        # Last worker out of this stage closes the next stage's input
+        with self._lock:
+            remaining[0] -= 1
+            close_next = remaining[0] == 0 and not last
+        if close_next:
+            for _ in range(self.stages[idx + 1].workers):
+                self._queues[idx + 1].put(_DONE)
+
+    # ── Metrics ────────────────────────────────────────────────────────────
+
+    def metrics(self) -> dict[str, dict]:
+        wall = max((self._ended or time.time()) - self._started, 1e-9)
+        return {
+            s.name: {
+                "workers":   s.workers,
+                "received":  s.stats.received,
+                "passed":    s.stats.passed,
+                "dropped":   s.stats.dropped,
+                "errors":    s.stats.errors,
+                "busy_secs": round(s.stats.busy_secs, 1),
+                "per_min":   round(60 * s.stats.received / wall, 1),
+                "utilisation": round(s.stats.busy_secs / (wall * s.workers), 2),
+            }
+            for s in self.stages
+        }
+
+    def summary(self) -> str:
+        """One-line-per-stage text for the event log."""
+        return " · ".join(
+            f"{name} {m['passed']}/{m['received']} ({m['per_min']}/min, {int(m['utilisation'] * 100)}% busy)"
+            for name, m in self.metrics().items()
+        )
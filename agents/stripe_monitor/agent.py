@@ -42,6 +42,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from agents.base import BaseAgent
+from agents import httpclient as _http
+from agents import outbox as _outbox
 from dashboard import db
 
 PROJECT_ROOT   = Path(__file__).parent.parent.parent
@@ -68,7 +70,7 @@ class StripeMonitorAgent(BaseAgent):
     name     = "Stripe Monitor"
 
     def run(self):
-        mode = os.environ.get("RUN_MODE", "monitor")
+        mode = self.run_mode("monitor")
         if mode == "diagnose":
             self._run_diagnostics()
             return
@@ -92,7 +94,7 @@ class StripeMonitorAgent(BaseAgent):
                     f"{STRIPE_API}/balance",
                     headers={"Authorization": f"Bearer {stripe_key}"},
                 )
-                with urllib.request.urlopen(req, timeout=10) as r:
+                with _http.urlopen(req, timeout=10) as r:
                     data = json.loads(r.read())
                 avail = data.get("available", [{}])[0].get("amount", 0)
                 results.append(f"  ✓ Stripe API connected — balance available: ${avail/100:.2f}")
@@ -150,7 +152,7 @@ class StripeMonitorAgent(BaseAgent):
                 f"{STRIPE_API}/payment_intents?{params}",
                 headers={"Authorization": f"Bearer {stripe_key}"},
             )
-            with urllib.request.urlopen(req, timeout=15) as r:
+            with _http.urlopen(req, timeout=15) as r:
                 data = json.loads(r.read())
 
             new_orders = 0
@@ -241,8 +243,7 @@ class StripeMonitorAgent(BaseAgent):
             f"ImproveYourSite\n"
             f"hello@improveyoursite.com"
         )
-        # Send via Gmail SMTP (reuse BaseAgent method but to customer)
-        import smtplib
+        # Queue on the SMTP outbox (BaseAgent.send_email only goes to James)
         from email.mime.text import MIMEText
         from email.mime.multipart import MIMEMultipart
 
@@ -259,11 +260,8 @@ class StripeMonitorAgent(BaseAgent):
             msg["Reply-To"] = "hello@improveyoursite.com"
             msg.attach(MIMEText(body, "plain"))
 
-            with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-                server.login(gmail_user, gmail_pass)
-                server.sendmail(gmail_user, email, msg.as_string())
-
-            self.log_info(f"Stripe Monitor: welcome email sent to {email}")
+            _outbox.enqueue(msg, email, from_addr=gmail_user, agent_id=self.agent_id)
+            self.log_info(f"Stripe Monitor: welcome email queued for {email}")
         except Exception as exc:
             self.log_warn(f"Stripe Monitor: welcome email failed: {exc}")
 
@@ -9,7 +9,14 @@ Routes:
   GET  /api/tasks         → recent tasks
   GET  /api/events        → recent events
   GET  /api/content       → delivered content
-  POST /api/trigger/{id}  → run an agent immediately
+  POST /api/trigger/{id}  → run an agent immediately (optional ?mode=, ?profile=1)
+  GET  /api/runs/{run_id} → events + tasks correlated to one run
+  GET  /api/pipeline      → content pipeline nodes, artifacts and last run state
+  GET  /api/net/stats     → outbound HTTP timings per host + rate-limit buckets + SMTP outbox
+  GET  /api/profile/armed → agents whose next run will be profiled
+  POST /api/profile/{id}  → arm / disarm "profile next run" for an agent
+  GET  /api/profiles      → captured profiles (optional ?agent_id=)
+  GET  /api/profiles/{id} → profile artifact (top functions + collapsed stacks)
   POST /api/pause         → pause all (sets a flag agents check)
   POST /api/clear         → clear completed tasks
 
@@ -204,18 +211,89 @@ async def stream():
 
 
 @app.post("/api/trigger/{agent_id}")
-async def trigger(agent_id: str):
+async def trigger(agent_id: str, mode: str = "", profile: int = 0):
     global _paused
     if _paused:
         raise HTTPException(status_code=409, detail="System is paused")
     # Import agent map lazily to avoid circular imports at module load
     from agents.scheduler import AGENT_MAP
+    from agents.context import RunContext
     if agent_id not in AGENT_MAP:
         raise HTTPException(status_code=404, detail=f"Unknown agent: {agent_id}")
     import threading
-    t = threading.Thread(target=AGENT_MAP[agent_id].execute, daemon=True)
+    ctx = RunContext(mode=mode, trigger="dashboard", profile=bool(profile))
+    t = threading.Thread(target=AGENT_MAP[agent_id].execute, args=(ctx,), daemon=True)
     t.start()
-    return {"status": "triggered", "agent_id": agent_id}
+    return {"status": "triggered", "agent_id": agent_id, "run_id": ctx.run_id}
+
+
+@app.get("/api/runs/{run_id}")
+async def run_trace(run_id: str):
+    return db.run_trace(run_id)
+
+
+@app.get("/api/net/stats")
+async def net_stats():
+    from agents import httpclient, outbox, ratelimit
+    return {"http": httpclient.stats(), "ratelimit": ratelimit.stats(), "outbox": outbox.stats()}
+
+
+@app.get("/api/pipeline")
+async def pipeline_state():
+    from agents.scheduler import PIPELINE
+    return {"nodes": PIPELINE.describe()}
+
+
+# ── Profiling ─────────────────────────────────────────────────────────────────
+
+@app.get("/api/profile/armed")
+async def profile_armed():
+    from agents import profiler
+    return {"armed": profiler.armed_agents()}
+
+
+@app.post("/api/profile/{agent_id}")
+async def profile_arm(agent_id: str, body: dict = {}):
+    from agents import profiler
+    from agents.scheduler import AGENT_MAP
+    if agent_id not in AGENT_MAP:
+        raise HTTPException(status_code=404, detail=f"Unknown agent: {agent_id}")
+    armed = body.get("armed", agent_id not in profiler.armed_agents())
+    if armed:
+        profiler.arm(agent_id)
+    else:
+        profiler.disarm(agent_id)
+    return {"agent_id": agent_id, "armed": bool(armed)}
+
+
+@app.get("/api/profiles")
+async def profiles(agent_id: str = "", limit: int = 30):
+    return db.profiles_recent(agent_id or None, limit)
+
+
+@app.get("/api/profiles/{profile_id}")
+async def profile_detail(profile_id: int):
+    from agents import profiler
+    row = db.profile_get(profile_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    try:
+        return {**row, "artifact": profiler.load_artifact(row)}
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Profile artifact has been removed")
+
+
+@app.get("/api/profiles/{profile_id}/download")
+async def profile_download(profile_id: int):
+    from agents import profiler
+    row = db.profile_get(profile_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    path = profiler.PROFILES_DIR / row["path"]
+    prof = path.with_suffix(".prof")
+    if prof.exists():
+        return FileResponse(str(prof), filename=prof.name)
+    return FileResponse(str(path), filename=path.name, media_type="application/json")
 
 
 @app.post("/api/pause")
@@ -355,9 +433,13 @@ async def chat(body: dict):
             if act == "trigger":
                 agent_id = action.get("agent_id", "")
                 from agents.scheduler import AGENT_MAP
+                from agents.context import RunContext
                 if agent_id in AGENT_MAP and not _paused:
                     import threading
-                    threading.Thread(target=AGENT_MAP[agent_id].execute, daemon=True).start()
+                    threading.Thread(
+                        target=AGENT_MAP[agent_id].execute,
+                        args=(RunContext(trigger="chat"),), daemon=True,
+                    ).start()
                     actions_taken.append(f"Triggered {agent_id} agent")
 
             elif act == "schedule":
@@ -405,7 +487,7 @@ async def clear_memory():
 
 @app.get("/api/calendar")
 async def calendar(year: int = 0, month: int = 0):
-    """Return tasks + social posts for a given month for the calendar view."""
+    """Return tasks, social posts, scheduler run history and planned sends for a given month for the calendar view."""
     from datetime import date
     import json as _json
     today = date.today()
@@ -426,7 +508,20 @@ async def calendar(year: int = 0, month: int = 0):
             posts = []
 
     scheduled = db.scheduled_tasks_for_month(y, m)
-    return {"year": y, "month": m, "tasks": tasks, "posts": posts, "scheduled": scheduled}
+
+    # Scheduler run history — daily/weekly jobs only (the */15 and */30 pollers are noise here)
+    from agents.scheduler import JOBS
+    runs = []
+    for r in db.job_runs_for_month(y, m):
+        job = JOBS.get(r["job_id"])
+        if job and job.catch_up:
+            runs.append({**r, "name": job.name})
+
+    # Outreach send plan — slots per day and hour (agents/send_plan.py)
+    from agents import send_plan
+    sends = send_plan.calendar(y, m)
+    return {"year": y, "month": m, "tasks": tasks, "posts": posts, "scheduled": scheduled, "runs": runs,
+            "sends": sends}
 
 
 @app.post("/api/schedule")
@@ -62,6 +62,7 @@ def init_db():
                 created_at      TEXT NOT NULL,
                 completed_at    TEXT,
                 output_preview  TEXT,
+                run_id          TEXT,
                 FOREIGN KEY (agent_id) REFERENCES agents(id)
             );
 
@@ -70,7 +71,8 @@ def init_db():
                 agent_id    TEXT NOT NULL,
                 level       TEXT NOT NULL DEFAULT 'info',
                 message     TEXT NOT NULL,
-                timestamp   TEXT NOT NULL
+                timestamp   TEXT NOT NULL,
+                run_id      TEXT
             );
 
             CREATE TABLE IF NOT EXISTS content (
@@ -97,7 +99,31 @@ def init_db():
                 ('seo_monitor',      'SEO Monitor',      'idle'),
                 ('inbox',            'Inbox',            'idle');
         """)
+    _migrate_columns(get_conn())
     _init_scheduled_tasks(get_conn())
+    _init_profiles(get_conn())
+    _init_dag_state(get_conn())
+    _init_job_runs(get_conn())
+    _init_crawl_cache(get_conn())
+    _init_outbox(get_conn())
+    _init_prospects(get_conn())
+    _init_intent_log(get_conn())
+    _init_send_plan(get_conn())
+
+
+def _migrate_columns(conn):
+    """Add columns introduced after the first release to existing DBs."""
+    for table, col, typedef in [
+        ("tasks",  "run_id", "TEXT"),
+        ("events", "run_id", "TEXT"),
+    ]:
+        try:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {typedef}")
+        except sqlite3.OperationalError:
+            pass  # already exists
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_run ON events(run_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_run ON tasks(run_id)")
+    conn.commit()
 
 
 # ── Agent helpers ────────────────────────────────────────────────────────────
@@ -155,13 +181,13 @@ def agent_get(agent_id: str) -> dict | None:
 
 # ── Task helpers ─────────────────────────────────────────────────────────────
 
-def task_create(agent_id: str, task_type: str, title: str) -> int:
+def task_create(agent_id: str, task_type: str, title: str, run_id: str | None = None) -> int:
     now = _now()
     with transaction() as conn:
         cur = conn.execute(
-            "INSERT INTO tasks (agent_id, type, title, status, progress, created_at) "
-            "VALUES (?, ?, ?, 'running', 0, ?)",
-            (agent_id, task_type, title, now),
+            "INSERT INTO tasks (agent_id, type, title, status, progress, created_at, run_id) "
+            "VALUES (?, ?, ?, 'running', 0, ?, ?)",
+            (agent_id, task_type, title, now, run_id),
         )
         agent_increment_task(agent_id)
         return cur.lastrowid
@@ -217,15 +243,16 @@ def tasks_recent(limit: int = 50) -> list[dict]:
 
 # ── Event helpers ────────────────────────────────────────────────────────────
 
-def event_log(agent_id: str, level: str, message: str) -> dict:
+def event_log(agent_id: str, level: str, message: str, run_id: str | None = None) -> dict:
     now = _now()
     with transaction() as conn:
         cur = conn.execute(
-            "INSERT INTO events (agent_id, level, message, timestamp) VALUES (?, ?, ?, ?)",
-            (agent_id, level, message, now),
+            "INSERT INTO events (agent_id, level, message, timestamp, run_id) VALUES (?, ?, ?, ?, ?)",
+            (agent_id, level, message, now, run_id),
         )
         row_id = cur.lastrowid
-    return {"id": row_id, "agent_id": agent_id, "level": level, "message": message, "timestamp": now}
+    return {"id": row_id, "agent_id": agent_id, "level": level, "message": message,
+            "timestamp": now, "run_id": run_id}
 
 
 def events_recent(limit: int = 100) -> list[dict]:
@@ -244,6 +271,18 @@ def events_since(event_id: int) -> list[dict]:
     return [dict(r) for r in rows]
 
 
+def run_trace(run_id: str) -> dict:
+    """All events + tasks stamped with a run_id (one agent run, or a chained run)."""
+    conn = get_conn()
+    events = conn.execute(
+        "SELECT * FROM events WHERE run_id=? ORDER BY id ASC", (run_id,)
+    ).fetchall()
+    tasks = conn.execute(
+        "SELECT * FROM tasks WHERE run_id=? ORDER BY id ASC", (run_id,)
+    ).fetchall()
+    return {"run_id": run_id, "events": [dict(r) for r in events], "tasks": [dict(r) for r in tasks]}
+
+
 # ── Content helpers ──────────────────────────────────────────────────────────
 
 def content_add(
@@ -326,6 +365,601 @@ def scheduled_task_mark_triggered(task_id: int):
         c.execute("UPDATE scheduled_tasks SET status='triggered' WHERE id=?", (task_id,))
 
 
+# ── Profiles ─────────────────────────────────────────────────────────────────
+
+def _init_profiles(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS profiles (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            agent_id    TEXT NOT NULL,
+            run_id      TEXT NOT NULL,
+            task_id     INTEGER,
+            kind        TEXT NOT NULL,
+            path        TEXT NOT NULL,
+            wall_secs   REAL,
+            samples     INTEGER DEFAULT 0,
+            created_at  TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+
+def profile_add(agent_id: str, run_id: str, task_id: int | None, kind: str,
+                path: str, wall_secs: float, samples: int) -> int:
+    with transaction() as c:
+        cur = c.execute(
+            "INSERT INTO profiles (agent_id, run_id, task_id, kind, path, wall_secs, samples, created_at) "
+            "VALUES (?,?,?,?,?,?,?,?)",
+            (agent_id, run_id, task_id, kind, path, round(wall_secs, 3), samples, _now()),
+        )
+        return cur.lastrowid
+
+
+def profiles_recent(agent_id: str | None = None, limit: int = 30) -> list[dict]:
+    conn = get_conn()
+    if agent_id:
+        rows = conn.execute(
+            "SELECT * FROM profiles WHERE agent_id=? ORDER BY id DESC LIMIT ?", (agent_id, limit)
+        ).fetchall()
+    else:
+        rows = conn.execute("SELECT * FROM profiles ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def profile_get(profile_id: int) -> dict | None:
+    conn = get_conn()
+    row = conn.execute("SELECT * FROM profiles WHERE id=?", (profile_id,)).fetchone()
+    return dict(row) if row else None
+
+
+# ── Pipeline (DAG) state ─────────────────────────────────────────────────────
+
+def _init_dag_state(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dag_state (
+            node_id      TEXT PRIMARY KEY,
+            input_hash   TEXT,
+            last_status  TEXT,
+            last_run_at  TEXT
+        )
+    """)
+    conn.commit()
+
+
+def dag_record_run(node_id: str, input_hash: str | None, status: str):
+    with transaction() as c:
+        c.execute(
+            "INSERT INTO dag_state (node_id, input_hash, last_status, last_run_at) VALUES (?,?,?,?) "
+            "ON CONFLICT(node_id) DO UPDATE SET input_hash=excluded.input_hash, "
+            "last_status=excluded.last_status, last_run_at=excluded.last_run_at",
+            (node_id, input_hash, status, _now()),
+        )
+
+
+def dag_state(node_id: str) -> dict | None:
+    row = get_conn().execute("SELECT * FROM dag_state WHERE node_id=?", (node_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def dag_states() -> list[dict]:
+    return [dict(r) for r in get_conn().execute("SELECT * FROM dag_state").fetchall()]
+
+
+# ── Scheduler job history ────────────────────────────────────────────────────
+
+def _init_job_runs(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_runs (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id       TEXT NOT NULL,
+            run_id       TEXT,
+            catch_up     INTEGER DEFAULT 0,
+            status       TEXT NOT NULL DEFAULT 'running',
+            started_at   TEXT NOT NULL,
+            finished_at  TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_job ON job_runs(job_id, started_at)")
+    conn.commit()
+
+
+def job_run_start(job_id: str, run_id: str, catch_up: bool = False) -> int:
+    with transaction() as c:
+        cur = c.execute(
+            "INSERT INTO job_runs (job_id, run_id, catch_up, started_at) VALUES (?,?,?,?)",
+            (job_id, run_id, int(catch_up), _now()),
+        )
+        return cur.lastrowid
+
+
+def job_run_finish(job_run_id: int, status: str):
+    with transaction() as c:
+        c.execute(
+            "UPDATE job_runs SET status=?, finished_at=? WHERE id=?",
+            (status, _now(), job_run_id),
+        )
+
+
+def job_last_run(job_id: str) -> dict | None:
+    row = get_conn().execute(
+        "SELECT * FROM job_runs WHERE job_id=? ORDER BY started_at DESC LIMIT 1", (job_id,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def job_runs_for_month(year: int, month: int) -> list[dict]:
+    prefix = f"{year:04d}-{month:02d}"
+    rows = get_conn().execute(
+        "SELECT * FROM job_runs WHERE started_at LIKE ? ORDER BY started_at ASC",
+        (f"{prefix}%",)
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+# ── Crawl cache index (bodies live in dashboard/crawl_cache/) ────────────────
+
+def _init_crawl_cache(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_cache (
+            key         TEXT PRIMARY KEY,
+            url         TEXT NOT NULL,
+            ua          TEXT NOT NULL,
+            status      INTEGER NOT NULL,
+            elapsed     REAL,
+            signals     TEXT,
+            fetched_at  TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+
+def crawl_get(key: str, ttl_hours: float) -> dict | None:
+    row = get_conn().execute(
+        "SELECT * FROM crawl_cache WHERE key=? AND fetched_at >= strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)",
+        (key, f"-{ttl_hours} hours"),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def crawl_put(key: str, url: str, ua: str, status: int, elapsed: float, signals: str):
+    with transaction() as c:
+        c.execute(
+            "INSERT OR REPLACE INTO crawl_cache (key, url, ua, status, elapsed, signals, fetched_at) "
+            "VALUES (?,?,?,?,?,?,?)",
+            (key, url, ua, status, round(elapsed, 3), signals, _now()),
+        )
+
+
+def crawl_prune(ttl_hours: float) -> list[str]:
+    """Delete expired rows; returns their keys so the caller can remove the files."""
+    cutoff = ("strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)", f"-{ttl_hours} hours")
+    with transaction() as c:
+        keys = [r[0] for r in c.execute(
+            f"SELECT key FROM crawl_cache WHERE fetched_at < {cutoff[0]}", (cutoff[1],)
+        ).fetchall()]
+        c.execute(f"DELETE FROM crawl_cache WHERE fetched_at < {cutoff[0]}", (cutoff[1],))
+    return keys
+
+
+# ── Outbox (agents/outbox.py) ────────────────────────────────────────────────
+
+def _init_outbox(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id      TEXT NOT NULL UNIQUE,
+            agent_id        TEXT,
+            ref             TEXT,
+            from_addr       TEXT NOT NULL,
+            to_addr         TEXT NOT NULL,
+            subject         TEXT,
+            raw             TEXT NOT NULL,
+            status          TEXT NOT NULL DEFAULT 'queued',
+            attempts        INTEGER NOT NULL DEFAULT 0,
+            last_error      TEXT,
+            created_at      TEXT NOT NULL,
+            next_attempt_at TEXT NOT NULL,
+            sent_at         TEXT,
+            claimed_by      TEXT,
+            claimed_at      TEXT,
+            reported_at     TEXT,
+            guard           TEXT
+        )
+    """)
+    for col in ("claimed_by", "claimed_at", "reported_at", "guard"):
+        try:
+            conn.execute(f"ALTER TABLE outbox ADD COLUMN {col} TEXT")
+        except sqlite3.OperationalError:
+            pass  # already exists
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)")
+    conn.commit()
+
+
+def outbox_enqueue(message_id: str, from_addr: str, to_addr: str, subject: str, raw: str,
+                   agent_id: str = "", ref: str = "", send_after: str | None = None,
+                   guard: str | None = None) -> int:
+    now = _now()
+    with transaction() as c:
+        cur = c.execute(
+            "INSERT INTO outbox (message_id, agent_id, ref, from_addr, to_addr, subject, raw, "
+            "created_at, next_attempt_at, guard) VALUES (?,?,?,?,?,?,?,?,?,?)",
+            (message_id, agent_id, ref, from_addr, to_addr, subject, raw, now, send_after or now, guard),
+        )
+        return cur.lastrowid
+
+
+def outbox_claim(owner: str, limit: int = 20) -> list[dict]:
+    """Mark up to `limit` due messages as 'sending' by `owner` and return them, oldest first."""
+    now = _now()
+    with transaction() as c:
+        rows = c.execute(
+            "SELECT * FROM outbox WHERE status IN ('queued','retry') AND next_attempt_at <= ? "
+            "ORDER BY next_attempt_at, id LIMIT ?",
+            (now, limit),
+        ).fetchall()
+        if rows:
+            c.execute(
+                f"UPDATE outbox SET status='sending', claimed_by=?, claimed_at=? "
+                f"WHERE id IN ({','.join('?' * len(rows))})",
+                [owner, now] + [r["id"] for r in rows],
+            )
+    return [dict(r) for r in rows]
+
+
+def outbox_next_due() -> str | None:
+    row = get_conn().execute(
+        "SELECT MIN(next_attempt_at) FROM outbox WHERE status IN ('queued','retry')"
+    ).fetchone()
+    return row[0] if row else None
+
+
+def outbox_mark(outbox_id: int, status: str, error: str | None = None, next_attempt_at: str | None = None):
+    """status: sent | retry | failed | rejected (5xx) | bounced | queued (released back unsent).
+    Use outbox_cancel / outbox_skip for 'cancelled' — they also free the send-plan slot."""
+    with transaction() as c:
+        c.execute(
+            "UPDATE outbox SET status=?, last_error=COALESCE(?, last_error), "
+            "attempts=attempts + (CASE WHEN ? IN ('retry','failed','rejected','sent') THEN 1 ELSE 0 END), "
+            "next_attempt_at=COALESCE(?, next_attempt_at), "
+            "sent_at=CASE WHEN ?='sent' THEN ? ELSE sent_at END WHERE id=?",
+            (status, error, status, next_attempt_at, status, _now(), outbox_id),
+        )
+
+
+def _cancel_rows(c, rows, reason: str):
+    if not rows:
+        return
+    c.executemany("UPDATE outbox SET status='cancelled', last_error=? WHERE id=?",
+                  [(reason, r["id"]) for r in rows])
+    c.executemany("DELETE FROM send_plan WHERE message_id=?", [(r["message_id"],) for r in rows])
+
+
+def outbox_cancel(agent_id: str, ref: str, reason: str = "") -> list[dict]:
+    """
+    Cancel an agent's unsent rows for ref (queued or waiting to retry — not one
+    a sender has already claimed) and free their send-plan slots.
+    Returns the cancelled rows (id, message_id, guard), oldest first.
+    """
+    with transaction() as c:
+        rows = [dict(r) for r in c.execute(
+            "SELECT id, message_id, guard FROM outbox "
+            "WHERE agent_id=? AND ref=? AND status IN ('queued','retry') ORDER BY id",
+            (agent_id, ref),
+        ).fetchall()]
+        _cancel_rows(c, rows, reason)
+    return rows
+
+
+def outbox_skip(outbox_id: int, message_id: str, reason: str):
+    """A claimed row its agent no longer wants delivered: cancelled, its send-plan slot freed."""
+    with transaction() as c:
+        _cancel_rows(c, [{"id": outbox_id, "message_id": message_id}], reason)
+
+
+def outbox_claims() -> list[dict]:
+    """Owners holding rows in 'sending', with their oldest claim."""
+    rows = get_conn().execute(
+        "SELECT claimed_by, MIN(claimed_at) AS claimed_at, COUNT(*) AS n FROM outbox "
+        "WHERE status='sending' GROUP BY claimed_by"
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def outbox_release_stale(owners: list[str | None]) -> int:
+    """Rows left 'sending' by these (dead) owners go back to the queue."""
+    released = 0
+    with transaction() as c:
+        for owner in owners:
+            released += c.execute(
+                "UPDATE outbox SET status='queued', claimed_by=NULL, claimed_at=NULL "
+                "WHERE status='sending' AND claimed_by IS ?",
+                (owner,),
+            ).rowcount
+    return released
+
+
+def outbox_unreported(status: str, agent_id: str) -> list[dict]:
+    """An agent's rows in a final status (e.g. 'rejected') it hasn't acted on yet."""
+    rows = get_conn().execute(
+        "SELECT id, message_id, ref, to_addr, last_error FROM outbox "
+        "WHERE status=? AND agent_id=? AND reported_at IS NULL ORDER BY id",
+        (status, agent_id),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def outbox_mark_reported(outbox_ids: list[int]):
+    now = _now()
+    with transaction() as c:
+        c.executemany("UPDATE outbox SET reported_at=? WHERE id=?", [(now, i) for i in outbox_ids])
+
+
+def outbox_by_message_ids(message_ids: list[str]) -> list[dict]:
+    if not message_ids:
+        return []
+    rows = get_conn().execute(
+        f"SELECT id, message_id, agent_id, ref, to_addr, status FROM outbox "
+        f"WHERE message_id IN ({','.join('?' * len(message_ids))})",
+        message_ids,
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def outbox_counts() -> dict:
+    rows = get_conn().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+    return {r[0]: r[1] for r in rows}
+
+
+# ── Send plan (agents/send_plan.py) ──────────────────────────────────────────
+
+def _init_send_plan(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS send_plan (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            day         TEXT NOT NULL,
+            mailbox     TEXT NOT NULL,
+            kind        TEXT NOT NULL,
+            ref         TEXT,
+            score       REAL,
+            slot_at     TEXT NOT NULL,
+            message_id  TEXT,
+            created_at  TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_send_plan_slot ON send_plan(mailbox, slot_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_send_plan_day ON send_plan(day)")
+    conn.commit()
+
+
+def send_plan_busy(mailbox: str, start: str, end: str) -> dict[str, int]:
+    """
+    {"YYYY-MM-DDTHH": messages} already taking a mailbox's capacity between
+    start and end (UTC): queued or sent outbox rows plus unfilled plan slots.
+    """
+    busy: dict[str, int] = {}
+    conn = get_conn()
+    for hour, n in conn.execute(
+        "SELECT substr(next_attempt_at, 1, 13), COUNT(*) FROM outbox WHERE from_addr=? "
+        "AND next_attempt_at >= ? AND next_attempt_at < ? AND status IN ('queued','retry','sending','sent') "
+        "GROUP BY 1",
+        (mailbox, start, end),
+    ):
+        busy[hour] = busy.get(hour, 0) + n
+    for hour, n in conn.execute(
+        "SELECT substr(slot_at, 1, 13), COUNT(*) FROM send_plan WHERE mailbox=? "
+        "AND slot_at >= ? AND slot_at < ? AND message_id IS NULL GROUP BY 1",
+        (mailbox, start, end),
+    ):
+        busy[hour] = busy.get(hour, 0) + n
+    return busy
+
+
+def send_plan_add(rows: list[tuple[str, str, str, str | None, float | None, str]]) -> list[int]:
+    """rows of (day, mailbox, kind, ref, score, slot_at) → their ids."""
+    now = _now()
+    with transaction() as c:
+        return [
+            c.execute(
+                "INSERT INTO send_plan (day, mailbox, kind, ref, score, slot_at, created_at) "
+                "VALUES (?,?,?,?,?,?,?)",
+                (*row, now),
+            ).lastrowid
+            for row in rows
+        ]
+
+
+def send_plan_fill(slot_id: int, message_id: str, ref: str | None = None):
+    with transaction() as c:
+        c.execute("UPDATE send_plan SET message_id=?, ref=COALESCE(?, ref) WHERE id=?",
+                  (message_id, ref, slot_id))
+
+
+def send_plan_release(slot_ids: list[int]):
+    """Drop slots that were never filled."""
+    if not slot_ids:
+        return
+    with transaction() as c:
+        c.executemany("DELETE FROM send_plan WHERE id=? AND message_id IS NULL", [(i,) for i in slot_ids])
+
+
+def send_plan_for_days(first_day: str, last_day: str) -> list[dict]:
+    """Plan slots for local days first_day..last_day, with the outbox status of filled ones."""
+    rows = get_conn().execute(
+        "SELECT p.day, p.kind, p.ref, p.score, p.slot_at, p.message_id, o.status "
+        "FROM send_plan p LEFT JOIN outbox o ON o.message_id = p.message_id "
+        "WHERE p.day >= ? AND p.day <= ? ORDER BY p.slot_at",
+        (first_day, last_day),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+# ── Prospect backlog (agents/prospects.py) ───────────────────────────────────
+
+def _init_prospects(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS prospects (
+            place_id    TEXT PRIMARY KEY,
+            name        TEXT NOT NULL,
+            industry    TEXT,
+            city        TEXT,
+            phone       TEXT,
+            website     TEXT,
+            address     TEXT,
+            email       TEXT,
+            source      TEXT NOT NULL,
+            first_seen  TEXT NOT NULL,
+            last_seen   TEXT NOT NULL,
+            enriched_at TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_prospects_backlog ON prospects(enriched_at, first_seen)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS prospect_pages (
+            source      TEXT NOT NULL,
+            keyword     TEXT NOT NULL,
+            city        TEXT NOT NULL,
+            page        INTEGER NOT NULL,
+            listings    INTEGER NOT NULL,
+            fetched_at  TEXT NOT NULL,
+            PRIMARY KEY (source, keyword, city, page)
+        )
+    """)
+    conn.commit()
+
+
+def prospect_pages_fresh(source: str, ttl_hours: float) -> dict[tuple, int]:
+    """{(keyword, city, page): listings} for pages fetched within the TTL."""
+    rows = get_conn().execute(
+        "SELECT keyword, city, page, listings FROM prospect_pages WHERE source=? "
+        "AND fetched_at >= strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)",
+        (source, f"-{ttl_hours} hours"),
+    ).fetchall()
+    return {(r[0], r[1], r[2]): r[3] for r in rows}
+
+
+def prospect_page_put(source: str, keyword: str, city: str, page: int, listings: list[dict]) -> int:
+    """Record a fetched results page and upsert its listings. Returns how many were new."""
+    now = _now()
+    with transaction() as c:
+        c.execute(
+            "INSERT OR REPLACE INTO prospect_pages (source, keyword, city, page, listings, fetched_at) "
+            "VALUES (?,?,?,?,?,?)",
+            (source, keyword, city, page, len(listings), now),
+        )
+        new = 0
+        for p in listings:
+            cur = c.execute(
+                "INSERT OR IGNORE INTO prospects (place_id, name, industry, city, phone, website, "
+                "address, email, source, first_seen, last_seen) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                (p["place_id"], p["name"], p.get("industry", ""), p.get("city", ""), p.get("phone", ""),
+                 p.get("website", ""), p.get("address", ""), p.get("email", ""), source, now, now),
+            )
+            if cur.rowcount:
+                new += 1
+            else:
+                c.execute(
+                    "UPDATE prospects SET last_seen=?, phone=COALESCE(NULLIF(?,''), phone), "
+                    "website=COALESCE(NULLIF(?,''), website), address=COALESCE(NULLIF(?,''), address) "
+                    "WHERE place_id=?",
+                    (now, p.get("phone", ""), p.get("website", ""), p.get("address", ""), p["place_id"]),
+                )
+    return new
+
+
+def prospects_backlog(limit: int, seen_within_days: float = 90) -> list[dict]:
+    """Unenriched prospects still listed recently, oldest first."""
+    rows = get_conn().execute(
+        "SELECT * FROM prospects WHERE enriched_at IS NULL "
+        "AND last_seen >= strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?) "
+        "ORDER BY first_seen, place_id LIMIT ?",
+        (f"-{seen_within_days} days", limit),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def prospects_mark_enriched(place_ids: list[str]):
+    if not place_ids:
+        return
+    now = _now()
+    with transaction() as c:
+        c.executemany(
+            "UPDATE prospects SET enriched_at=? WHERE place_id=? AND enriched_at IS NULL",
+            [(now, pid) for pid in place_ids],
+        )
+
+
+def prospects_counts() -> dict:
+    row = get_conn().execute(
+        "SELECT COUNT(*), SUM(enriched_at IS NULL) FROM prospects"
+    ).fetchone()
+    return {"total": row[0] or 0, "backlog": row[1] or 0}
+
+
+# ── Reply intent (agents/intent.py) ──────────────────────────────────────────
+
+def _init_intent_log(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS intent_log (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            scope        TEXT NOT NULL,
+            message_id   TEXT,
+            text         TEXT NOT NULL,
+            label        TEXT NOT NULL,
+            tier         TEXT NOT NULL,
+            confidence   REAL NOT NULL,
+            latency_ms   REAL NOT NULL,
+            truth        TEXT,
+            truth_source TEXT,
+            created_at   TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_intent_truth ON intent_log(scope, truth)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_intent_created ON intent_log(created_at)")
+    conn.commit()
+
+
+def intent_log_add(scope: str, message_id: str, text: str, label: str, tier: str, confidence: float,
+                   latency_ms: float, truth: str | None = None, truth_source: str | None = None) -> int:
+    with transaction() as c:
+        cur = c.execute(
+            "INSERT INTO intent_log (scope, message_id, text, label, tier, confidence, latency_ms, "
+            "truth, truth_source, created_at) VALUES (?,?,?,?,?,?,?,?,?,?)",
+            (scope, message_id, text, label, tier, confidence, latency_ms, truth, truth_source, _now()),
+        )
+        return cur.lastrowid
+
+
+def intent_set_truth(log_id: int, truth: str, source: str = "manual"):
+    """Correct a classification by hand — manual labels win over the LLM's."""
+    with transaction() as c:
+        c.execute("UPDATE intent_log SET truth=?, truth_source=? WHERE id=?", (truth, source, log_id))
+
+
+def intent_labelled(scope: str, limit: int = 5000) -> list[tuple[str, str]]:
+    """(text, true label) of the most recent labelled messages in a scope."""
+    rows = get_conn().execute(
+        "SELECT text, truth FROM intent_log WHERE scope=? AND truth IS NOT NULL "
+        "ORDER BY id DESC LIMIT ?",
+        (scope, limit),
+    ).fetchall()
+    return [(r[0], r[1]) for r in rows]
+
+
+def intent_labelled_count(scope: str) -> int:
+    return get_conn().execute(
+        "SELECT COUNT(*) FROM intent_log WHERE scope=? AND truth IS NOT NULL", (scope,)
+    ).fetchone()[0]
+
+
+def intent_log_since(days: float) -> list[dict]:
+    rows = get_conn().execute(
+        "SELECT scope, label, tier, confidence, latency_ms, truth, truth_source FROM intent_log "
+        "WHERE created_at >= strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)",
+        (f"-{days} days",),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
 # ── Calendar helpers ──────────────────────────────────────────────────────────
 
 def tasks_for_month(year: int, month: int) -> list[dict]:
@@ -102,6 +102,10 @@ def main():
         run_time = getattr(job, 'next_run_time', None)
         print(f"    • {job.name}: next run {run_time}")
 
+    # Resume anything left in the SMTP outbox by a previous run
+    from agents import outbox
+    outbox.start()
+
     # ── 3. Start FastAPI ────────────────────────────────────────────────────
     print(f"\n  Dashboard: http://{args.host}:{args.port}")
     print("  Ctrl+C to stop\n")